@@ -27,6 +27,7 @@ from local_operator.types import (
     ConversationRole,
     ExecutionType,
     ProcessResponseStatus,
+    ResourceLimits,
 )
 
 
@@ -52,6 +53,16 @@ class AgentData(BaseModel):
         "",
         description="The model to use for the agent.  Defaults to ''.",
     )
+    auxiliary_hosting: str = Field(
+        default="",
+        description="The hosting environment for the auxiliary model that runs "
+        "classification, safety checks, summaries and plans.  Defaults to ''.",
+    )
+    auxiliary_model: str = Field(
+        default="",
+        description="The auxiliary model that runs classification, safety checks, summaries "
+        "and plans.  Defaults to '' to use the main model for every task.",
+    )
     description: str = Field(
         "",
         description="A description of the agent.  Defaults to ''.",
@@ -96,6 +107,11 @@ class AgentData(BaseModel):
         description="The current working directory for the agent.  Updated whenever the "
         "agent changes its working directory through code execution.  Defaults to '.'",
     )
+    resource_limits: Optional[ResourceLimits] = Field(
+        default=None,
+        description="Limits on the wall time, CPU time and memory of each code execution "
+        "step of the agent.  Limits that are not set use the configured defaults.",
+    )
 
 
 class AgentEditFields(BaseModel):
@@ -117,6 +133,16 @@ class AgentEditFields(BaseModel):
         None,
         description="The model to use for the agent.  Defaults to 'openai/gpt-4o-mini'.",
     )
+    auxiliary_hosting: str | None = Field(
+        default=None,
+        description="The hosting environment for the auxiliary model that runs "
+        "classification, safety checks, summaries and plans.  Defaults to ''.",
+    )
+    auxiliary_model: str | None = Field(
+        default=None,
+        description="The auxiliary model that runs classification, safety checks, summaries "
+        "and plans.  Defaults to '' to use the main model for every task.",
+    )
     description: str | None = Field(
         None,
         description="A description of the agent.  Defaults to ''.",
@@ -156,6 +182,11 @@ class AgentEditFields(BaseModel):
         description="The current working directory for the agent.  Updated whenever the "
         "agent changes its working directory through code execution.",
     )
+    resource_limits: ResourceLimits | None = Field(
+        default=None,
+        description="Limits on the wall time, CPU time and memory of each code execution "
+        "step of the agent.  Limits that are not set use the configured defaults.",
+    )
 
 
 class AgentRegistry:
@@ -274,6 +305,8 @@ class AgentRegistry:
             security_prompt=agent_edit_metadata.security_prompt or "",
             hosting=agent_edit_metadata.hosting or "",
             model=agent_edit_metadata.model or "",
+            auxiliary_hosting=agent_edit_metadata.auxiliary_hosting or "",
+            auxiliary_model=agent_edit_metadata.auxiliary_model or "",
             description=agent_edit_metadata.description or "",
             last_message=agent_edit_metadata.last_message or "",
             tags=agent_edit_metadata.tags or [],
@@ -289,6 +322,7 @@ class AgentRegistry:
             seed=agent_edit_metadata.seed,
             current_working_directory=agent_edit_metadata.current_working_directory
             or "~/local-operator-home",
+            resource_limits=agent_edit_metadata.resource_limits,
         )
 
         return self.save_agent(agent_metadata)
@@ -359,8 +393,9 @@ class AgentRegistry:
         prospective_changes = updated_metadata.model_dump(exclude_unset=True)
         new_cwd_explicitly_set = prospective_changes.get("current_working_directory")
 
-        # Apply updates to current_metadata_obj
-        for field, value in prospective_changes.items():
+        # Apply updates to current_metadata_obj, keeping nested models validated
+        for field in prospective_changes:
+            value = getattr(updated_metadata, field)
             if value is not None:  # Ensure we only process fields that were actually provided
                 setattr(current_metadata_obj, field, value)
 
@@ -503,6 +538,8 @@ class AgentRegistry:
                 security_prompt=original_agent.security_prompt,
                 hosting=original_agent.hosting,
                 model=original_agent.model,
+                auxiliary_hosting=original_agent.auxiliary_hosting,
+                auxiliary_model=original_agent.auxiliary_model,
                 description=original_agent.description,
                 tags=original_agent.tags,
                 categories=original_agent.categories,
@@ -516,6 +553,7 @@ class AgentRegistry:
                 presence_penalty=original_agent.presence_penalty,
                 seed=original_agent.seed,
                 current_working_directory=original_agent.current_working_directory,
+                resource_limits=original_agent.resource_limits,
             )
         )
 
@@ -1372,6 +1410,10 @@ class AgentRegistry:
                     del agent_data["hosting"]
                 if "model" in agent_data:
                     del agent_data["model"]
+                if "auxiliary_hosting" in agent_data:
+                    del agent_data["auxiliary_hosting"]
+                if "auxiliary_model" in agent_data:
+                    del agent_data["auxiliary_model"]
 
                 # Save the updated agent.yml
                 with open(agent_yml_path, "w", encoding="utf-8") as f:
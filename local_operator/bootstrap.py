@@ -6,7 +6,7 @@ configuring models, initializing executors, and building tool registries,
 ensuring consistency between different entry points like the CLI and the server.
 """
 
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 from pydantic import SecretStr
 
@@ -21,19 +21,198 @@ from local_operator.config import ConfigManager
 from local_operator.console import VerbosityLevel
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
-from local_operator.executor import LocalCodeExecutor
+from local_operator.executor import (
+    DEFAULT_AUXILIARY_TASKS,
+    LocalCodeExecutor,
+    ModelTask,
+)
+from local_operator.kernel import KernelPool, get_kernel_pool
 from local_operator.logger import get_logger
+from local_operator.model.catalog import ModelCatalogCache, get_model_catalog_cache
 from local_operator.model.configure import (
     ModelConfiguration,
     configure_model,
     validate_model,
 )
 from local_operator.operator import Operator, OperatorType
+from local_operator.safety import (
+    DEFAULT_SAFETY_VERDICT_CACHE_TTL,
+    SafetyAllowlist,
+    get_safety_verdict_cache,
+)
+from local_operator.summary_cache import get_summary_cache
 from local_operator.tools.general import ToolRegistry
+from local_operator.types import ResourceLimits
 
 logger = get_logger()
 
 
+def build_model_info_client(
+    hosting: str, credential_manager: CredentialManager, env_config: EnvConfig
+) -> Optional[Union[OpenRouterClient, RadientClient]]:
+    """Build the client used to look up model information for a hosting platform.
+
+    Args:
+        hosting: The hosting platform of the model.
+        credential_manager: The CredentialManager for managing credentials.
+        env_config: The environment configuration.
+
+    Returns:
+        The model info client, or None if the hosting platform does not need one or its
+        API key is not configured.
+    """
+    if hosting == "openrouter":
+        api_key = credential_manager.get_credential("OPENROUTER_API_KEY")
+        if api_key:
+            return OpenRouterClient(api_key)
+        logger.warning("OpenRouter hosting selected but OPENROUTER_API_KEY not found.")
+    elif hosting == "radient":
+        api_key = credential_manager.get_credential("RADIENT_API_KEY")
+        if api_key:
+            return RadientClient(api_key, env_config.radient_api_base_url)
+        logger.warning("Radient hosting selected but RADIENT_API_KEY not found.")
+    return None
+
+
+def build_auxiliary_model_configuration(
+    config_manager: ConfigManager,
+    credential_manager: CredentialManager,
+    env_config: EnvConfig,
+    current_agent: Optional[AgentData] = None,
+    model_catalog: Optional[ModelCatalogCache] = None,
+) -> Optional[ModelConfiguration]:
+    """Build the configuration of the auxiliary model for cheap tasks.
+
+    The auxiliary model runs classification, safety checks, summaries and plans so that
+    these do not wait on a large main model.  The agent settings override the user config.
+
+    Args:
+        config_manager: The ConfigManager for managing configuration.
+        credential_manager: The CredentialManager for managing credentials.
+        env_config: The environment configuration.
+        current_agent: The agent for the current session, if any.
+        model_catalog: The cache of provider model catalogs, if any.
+
+    Returns:
+        The auxiliary model configuration, or None if no auxiliary model is configured or
+        it cannot be configured, in which case the main model is used for every task.
+    """
+    hosting = config_manager.get_config_value("auxiliary_hosting", "")
+    model_name = config_manager.get_config_value("auxiliary_model_name", "")
+
+    if current_agent:
+        hosting = current_agent.auxiliary_hosting or hosting
+        model_name = current_agent.auxiliary_model or model_name
+
+    if not hosting or not model_name:
+        return None
+
+    try:
+        model_configuration = configure_model(
+            hosting=hosting,
+            model_name=model_name,
+            credential_manager=credential_manager,
+            model_info_client=build_model_info_client(hosting, credential_manager, env_config),
+            env_config=env_config,
+            model_catalog=model_catalog,
+        )
+    except Exception as e:
+        logger.warning(f"Failed to configure auxiliary model {model_name} on {hosting}: {e}")
+        return None
+
+    if not model_configuration.instance:
+        logger.warning(f"No auxiliary model instance configured for {hosting}/{model_name}")
+        return None
+
+    logger.debug(f"Using auxiliary model {model_name} on {hosting}")
+    return model_configuration
+
+
+def build_auxiliary_tasks(config_manager: ConfigManager) -> List[ModelTask]:
+    """Get the tasks that run on the auxiliary model from the configuration.
+
+    Args:
+        config_manager: The ConfigManager for managing configuration.
+
+    Returns:
+        The configured auxiliary tasks, ignoring unknown task names.
+    """
+    task_names = config_manager.get_config_value(
+        "auxiliary_tasks", [task.value for task in DEFAULT_AUXILIARY_TASKS]
+    )
+    tasks = []
+    for task_name in task_names or []:
+        try:
+            tasks.append(ModelTask(str(task_name)))
+        except ValueError:
+            logger.warning(f"Ignoring unknown auxiliary task: {task_name}")
+    return tasks
+
+
+def build_kernel_pool(
+    config_manager: ConfigManager, resource_limits: Optional[ResourceLimits] = None
+) -> Optional[KernelPool]:
+    """Get the shared execution kernel pool from the configuration.
+
+    Resource limits are only enforced in execution kernels, so a pool without warm kernels
+    is used when limits are set even if no pool is configured.
+
+    Args:
+        config_manager: The ConfigManager for managing configuration.
+        resource_limits: The resource limits of the code execution steps of the session.
+
+    Returns:
+        The kernel pool of this process, or None if agent code runs in the worker process.
+    """
+    try:
+        pool_size = int(config_manager.get_config_value("execution_kernel_pool_size", 0) or 0)
+    except (TypeError, ValueError):
+        logger.warning("Ignoring invalid execution_kernel_pool_size")
+        pool_size = 0
+    if pool_size <= 0:
+        if resource_limits is not None and resource_limits.is_limited:
+            return get_kernel_pool(0)
+        return None
+    return get_kernel_pool(pool_size)
+
+
+def build_resource_limits(config_manager: ConfigManager) -> ResourceLimits:
+    """Get the default resource limits of a code execution step from the configuration.
+
+    Args:
+        config_manager: The ConfigManager for managing configuration.
+
+    Returns:
+        The configured limits, with invalid limits not enforced.
+    """
+    limits: Dict[str, float] = {}
+    for field, key in (
+        ("wall_time_seconds", "step_wall_time_limit"),
+        ("cpu_seconds", "step_cpu_time_limit"),
+        ("memory_mb", "step_memory_limit_mb"),
+    ):
+        try:
+            limits[field] = max(0.0, float(config_manager.get_config_value(key, 0) or 0))
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid {key}")
+    return ResourceLimits(**limits)
+
+
+def build_safety_allowlist(config_manager: ConfigManager) -> SafetyAllowlist:
+    """Build the allowlist for the local safety pre-screen from the configuration.
+
+    Args:
+        config_manager: The ConfigManager for managing configuration.
+
+    Returns:
+        The default safety allowlist extended with the configured modules.
+    """
+    allowlist = SafetyAllowlist()
+    extra_modules = config_manager.get_config_value("safety_allowlist_modules", []) or []
+    allowlist.modules.update(str(module) for module in extra_modules)
+    return allowlist
+
+
 def build_tool_registry(
     executor: LocalCodeExecutor,
     agent_registry: AgentRegistry,
@@ -215,19 +394,8 @@ def initialize_operator(
         logger.debug("No agent provided, using default empty agent state.")
 
     # --- Model Configuration ---
-    model_info_client: Optional[Union[OpenRouterClient, RadientClient]] = None
-    if hosting == "openrouter":
-        api_key = credential_manager.get_credential("OPENROUTER_API_KEY")
-        if api_key:
-            model_info_client = OpenRouterClient(api_key)
-        else:
-            logger.warning("OpenRouter hosting selected but OPENROUTER_API_KEY not found.")
-    elif hosting == "radient":
-        api_key = credential_manager.get_credential("RADIENT_API_KEY")
-        if api_key:
-            model_info_client = RadientClient(api_key, env_config.radient_api_base_url)
-        else:
-            logger.warning("Radient hosting selected but RADIENT_API_KEY not found.")
+    model_info_client = build_model_info_client(hosting, credential_manager, env_config)
+    model_catalog = get_model_catalog_cache(agent_registry.config_dir)
 
     try:
         model_configuration: ModelConfiguration = configure_model(
@@ -236,6 +404,7 @@ def initialize_operator(
             credential_manager=credential_manager,
             model_info_client=model_info_client,
             env_config=env_config,
+            model_catalog=model_catalog,
             **chat_args,
         )
     except Exception as e:
@@ -251,11 +420,35 @@ def initialize_operator(
         validate_model(hosting, model_name, model_configuration.api_key or SecretStr(""))
         logger.debug(f"Model {model_name} on {hosting} validated successfully.")
 
+    auxiliary_model_configuration = build_auxiliary_model_configuration(
+        config_manager, credential_manager, env_config, current_agent, model_catalog
+    )
+    resource_limits = build_resource_limits(config_manager)
+    step_resource_limits = resource_limits.merge(
+        current_agent.resource_limits if current_agent else None
+    )
+
     executor = LocalCodeExecutor(
         model_configuration=model_configuration,
         max_conversation_history=config_manager.get_config_value("max_conversation_history", 100),
         detail_conversation_length=config_manager.get_config_value("detail_length", 15),
         max_learnings_history=config_manager.get_config_value("max_learnings_history", 50),
+        summary_cache=get_summary_cache(agent_registry.config_dir),
+        background_summarization=config_manager.get_config_value("background_summarization", False),
+        safety_prescreen=config_manager.get_config_value("safety_prescreen", False),
+        safety_allowlist=build_safety_allowlist(config_manager),
+        safety_verdict_cache=get_safety_verdict_cache(
+            agent_registry.config_dir,
+            config_manager.get_config_value(
+                "safety_verdict_cache_ttl", DEFAULT_SAFETY_VERDICT_CACHE_TTL
+            ),
+        ),
+        code_preflight=config_manager.get_config_value("code_preflight", True),
+        fsync_file_writes=config_manager.get_config_value("fsync_file_writes", True),
+        auxiliary_model_configuration=auxiliary_model_configuration,
+        auxiliary_tasks=build_auxiliary_tasks(config_manager),
+        kernel_pool=build_kernel_pool(config_manager, step_resource_limits),
+        resource_limits=resource_limits,
         can_prompt_user=(operator_type == OperatorType.CLI),
         agent=current_agent,
         verbosity_level=verbosity_level,
@@ -279,6 +472,9 @@ def initialize_operator(
         verbosity_level=verbosity_level,
         persist_agent_conversation=persist_conversation,
         env_config=env_config,
+        speculative_classification=config_manager.get_config_value(
+            "speculative_classification", False
+        ),
     )
     logger.debug(
         f"Operator instance created. Type: {operator.type.name}, "
@@ -0,0 +1,172 @@
+"""Context-local capture of stdout, stderr, stdin and logging.
+
+Executors capture the output of the code that they run.  Swapping `sys.stdout` or the
+handlers of the root logger would capture the output of every session in the process, so
+instead a demultiplexing proxy is installed once as `sys.stdout`, `sys.stderr` and
+`sys.stdin`, and a demultiplexing handler is added to the root logger.  They send each
+write or log record to the capture of the current context, and to the original stream or
+handlers when the current context has no capture.
+
+Contexts are copied into the tasks and `asyncio.to_thread` calls that a capturing task
+starts, so their output is captured as well.  Threads that are started directly inherit
+no context, and their output goes to the original streams.
+"""
+
+import io
+import logging
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, Sequence, TextIO
+
+NON_PROPAGATING_LOGGERS: Sequence[str] = ("prophet", "cmdstanpy")
+"""Loggers that libraries configure with their own handlers and without propagation to the
+root logger, which are routed to the capture as well."""
+
+
+@dataclass
+class OutputCapture:
+    """The destinations of the output written in a capturing context.
+
+    Attributes:
+        stdout (TextIO): Receives writes to sys.stdout.
+        stderr (TextIO): Receives writes to sys.stderr.
+        log_handler (logging.Handler): Handles log records, its level and formatter apply.
+        stdin (TextIO): Serves reads from sys.stdin, empty by default so that code that
+            asks for input does not block.
+    """
+
+    stdout: TextIO
+    stderr: TextIO
+    log_handler: logging.Handler
+    stdin: TextIO = field(default_factory=io.StringIO)
+
+
+_current_capture: ContextVar[Optional[OutputCapture]] = ContextVar("output_capture", default=None)
+
+
+class _DemuxStream(io.TextIOBase):
+    """Stands in for a standard stream and forwards to the capture of the current context."""
+
+    def __init__(self, name: str, fallback: TextIO):
+        super().__init__()
+        self._name = name
+        self._fallback = fallback
+
+    def _target(self) -> TextIO:
+        capture = _current_capture.get()
+        if capture is None:
+            return self._fallback
+        return getattr(capture, self._name)
+
+    def write(self, s: str) -> int:
+        return self._target().write(s)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def read(self, size: Optional[int] = -1) -> str:
+        return self._target().read(-1 if size is None else size)
+
+    def readline(self, size: int = -1) -> str:
+        return self._target().readline(size)
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def fileno(self) -> int:
+        return self._target().fileno()
+
+    def readable(self) -> bool:
+        return self._name == "stdin"
+
+    def writable(self) -> bool:
+        return self._name != "stdin"
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return getattr(self._target(), "encoding", None) or "utf-8"
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+class _DemuxLogHandler(logging.Handler):
+    """Hands log records of a capturing context to the log handler of its capture."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        capture = _current_capture.get()
+        if capture is not None and record.levelno >= capture.log_handler.level:
+            capture.log_handler.handle(record)
+
+
+def _is_not_captured(record: logging.LogRecord) -> bool:
+    """Filter for the original handlers, which skip the records of capturing contexts."""
+    return _current_capture.get() is None
+
+
+_demux_log_handler = _DemuxLogHandler()
+
+
+def _route_logger(logger: logging.Logger) -> None:
+    """Route the records of a capturing context on a logger to the capture only."""
+    for handler in logger.handlers:
+        if handler is not _demux_log_handler and _is_not_captured not in handler.filters:
+            handler.addFilter(_is_not_captured)
+    if _demux_log_handler not in logger.handlers and (
+        logger is logging.getLogger() or not logger.propagate
+    ):
+        logger.addHandler(_demux_log_handler)
+
+
+def install_output_capture() -> None:
+    """Install the demultiplexing streams and log handler if they are not installed.
+
+    The standard streams are checked on every call, so that streams that were replaced
+    after the first install, for example by a test harness, are wrapped as well.
+    """
+    for name in ("stdout", "stderr", "stdin"):
+        stream = getattr(sys, name)
+        if not isinstance(stream, _DemuxStream):
+            setattr(sys, name, _DemuxStream(name, stream))
+
+    _route_logger(logging.getLogger())
+    for logger_name in NON_PROPAGATING_LOGGERS:
+        _route_logger(logging.getLogger(logger_name))
+
+
+@contextmanager
+def capture_output(capture: OutputCapture) -> Iterator[OutputCapture]:
+    """Send the output written in the current context to a capture.
+
+    Args:
+        capture (OutputCapture): The destinations of the output.
+
+    Yields:
+        OutputCapture: The capture, until the context manager exits.
+    """
+    install_output_capture()
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+def get_output_stream(name: str) -> TextIO:
+    """Get the stream that output written to a standard stream goes to in this context.
+
+    Callbacks that run in another context, for example in a task that was started by an
+    earlier step, use this to resolve their destination up front.
+
+    Args:
+        name (str): "stdout" or "stderr"
+
+    Returns:
+        TextIO: The stream of the current capture, or the standard stream.
+    """
+    capture = _current_capture.get()
+    if capture is None:
+        return getattr(sys, name)
+    return getattr(capture, name)
@@ -392,6 +392,20 @@ def config_list_command() -> int:
         "detail_length": "Number of recent messages to leave unsummarized in conversation history",
         "max_learnings_history": "Maximum number of learning entries to retain",
         "auto_save_conversation": "Whether to automatically save conversations",
+        "background_summarization": "Whether to summarize old messages in the background",
+        "safety_prescreen": "Whether to skip the LLM safety check for benign code",
+        "safety_allowlist_modules": "Additional modules that the safety pre-screen allows",
+        "safety_verdict_cache_ttl": "Seconds to remember actions found safe (0 disables)",
+        "code_preflight": "Whether to check code for certain errors before running it",
+        "fsync_file_writes": "Whether to flush written files to the disk",
+        "auxiliary_hosting": "AI provider platform for the auxiliary model (e.g., ollama)",
+        "auxiliary_model_name": "Small, fast model for classification, safety, summaries, plans",
+        "auxiliary_tasks": "Tasks that run on the auxiliary model",
+        "speculative_classification": "Whether to start the first action during classification",
+        "execution_kernel_pool_size": "Pre-warmed code execution kernels, 0 runs code in-process",
+        "step_wall_time_limit": "Maximum seconds of a code execution step, 0 for no limit",
+        "step_cpu_time_limit": "Maximum CPU seconds of a code execution step, 0 for no limit",
+        "step_memory_limit_mb": "Maximum memory of the execution kernel in MB, 0 for no limit",
     }
 
     print("\n\033[1;32m╭─ Configuration Options ───────────────────────\033[0m")
@@ -12,6 +12,8 @@ from typing import Any, Dict, List, Optional, Union
 import requests
 from pydantic import BaseModel, SecretStr
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class ImageSize(str, Enum):
     """Image size options for the FAL API."""
@@ -81,15 +83,23 @@ class FalClient:
     This client is used to generate images using the FLUX.1 text-to-image model.
     """
 
-    def __init__(self, api_key: SecretStr, base_url: str = "https://queue.fal.run") -> None:
+    def __init__(
+        self,
+        api_key: SecretStr,
+        base_url: str = "https://queue.fal.run",
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
         """Initialize the FalClient.
 
         Args:
             api_key (SecretStr): The FAL API key
             base_url (str): The base URL for the FAL API
+            transport (Optional[HttpTransport]): The transport to send the requests with,
+                defaults to the shared transport.
         """
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or get_default_transport()
         self.model_path = "fal-ai/flux/dev"
 
         if not self.api_key:
@@ -134,7 +144,7 @@ class FalClient:
         headers = self._get_headers()
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.transport.post(url, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
 
@@ -173,7 +183,7 @@ class FalClient:
         headers = self._get_headers()
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -205,7 +215,7 @@ class FalClient:
         headers = self._get_headers()
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
 
@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from pydantic import BaseModel
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 logger = logging.getLogger(__name__)
 
 GMAIL_API_BASE_URL = "https://gmail.googleapis.com/gmail/v1/users/me/"
@@ -256,17 +258,20 @@ class GoogleClient:
     across Gmail, Google Calendar, and Google Drive.
     """
 
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, transport: Optional[HttpTransport] = None):
         """
         Initializes the GoogleClient.
 
         Args:
             access_token: The OAuth 2.0 access token for Google APIs.
+            transport: The transport to send the requests with, defaults to the shared
+                transport.
         """
         if not access_token:
             raise ValueError("Access token cannot be empty.")
         self.access_token = access_token
         self.headers = {"Authorization": f"Bearer {self.access_token}"}
+        self.transport = transport or get_default_transport()
 
     def _request(
         self,
@@ -309,7 +314,7 @@ class GoogleClient:
             request_kwargs["json"] = data
 
         try:
-            response = requests.request(method, url, **request_kwargs)
+            response = self.transport.request(method, url, **request_kwargs)
             response.raise_for_status()  # Raises HTTPError for bad responses (4XX or 5XX)
 
             if is_download:
@@ -826,12 +831,14 @@ class GoogleClient:
 
         upload_url = f"{DRIVE_API_UPLOAD_BASE_URL}files?uploadType=media"
 
-        # We need to use requests.post directly here as _request is not set up for this.
+        # We need to post directly here as _request is not set up for this.
         temp_headers = self.headers.copy()
         temp_headers["Content-Type"] = mime_type
 
         try:
-            response_upload = requests.post(upload_url, headers=temp_headers, data=file_content)
+            response_upload = self.transport.post(
+                upload_url, headers=temp_headers, data=file_content
+            )
             response_upload.raise_for_status()
             uploaded_file_data = response_upload.json()
             file_id = uploaded_file_data.get("id")
@@ -923,7 +930,10 @@ class GoogleClient:
 
 # Helper function for token refresh (will be used by SchedulerService)
 def refresh_google_access_token(
-    client_id: str, client_secret: str, refresh_token: str
+    client_id: str,
+    client_secret: str,
+    refresh_token: str,
+    transport: Optional[HttpTransport] = None,
 ) -> Dict[str, Any]:
     """
     Refreshes a Google OAuth 2.0 access token.
@@ -932,6 +942,8 @@ def refresh_google_access_token(
         client_id: The Google Cloud project's client ID.
         client_secret: The Google Cloud project's client secret.
         refresh_token: The refresh token to use.
+        transport: The transport to send the request with, defaults to the shared
+            transport.
 
     Returns:
         A dictionary containing the new 'access_token', 'expires_in',
@@ -947,7 +959,7 @@ def refresh_google_access_token(
         "grant_type": "refresh_token",
     }
     try:
-        response = requests.post(GOOGLE_OAUTH_TOKEN_URL, data=payload)
+        response = (transport or get_default_transport()).post(GOOGLE_OAUTH_TOKEN_URL, data=payload)
         response.raise_for_status()
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -0,0 +1,315 @@
+"""Shared HTTP transport for the API clients.
+
+Every client sends its requests through an HttpTransport, which keeps one pooled
+`requests.Session` per scheme and host.  Connections are kept alive between calls, so that
+chatty tools, such as listing Gmail messages one request per message or polling a Fal
+queue, only pay for the TCP and TLS handshakes once per host.
+
+The transport also gives every request a connect and a read timeout, and retries requests
+that failed to connect, and idempotent requests that got a 429 or 5xx status, with
+exponential backoff.  A Retry-After header of the response is honored, up to a maximum
+wait, instead of the backoff.  The latency of the requests is counted by endpoint, with
+the IDs in the paths collapsed, so that slow providers show up in the stats.
+
+Clients use the default transport of the process unless one is passed to them.  The
+sessions of a transport are dropped in a child process after a fork, so that the child
+does not share pooled connections with its parent.
+"""
+
+import os
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+DEFAULT_CONNECT_TIMEOUT: float = 10.0
+"""Seconds to wait for a connection to be established."""
+
+DEFAULT_READ_TIMEOUT: float = 300.0
+"""Seconds to wait for the next bytes of a response."""
+
+DEFAULT_POOL_MAXSIZE: int = 10
+"""Maximum number of kept-alive connections to each host."""
+
+DEFAULT_MAX_RETRIES: int = 3
+"""Maximum number of retries of a request."""
+
+DEFAULT_BACKOFF_FACTOR: float = 0.5
+"""Backoff between retries, the n-th retry waits `factor * 2 ** (n - 1)` seconds."""
+
+MAX_RETRY_AFTER: float = 30.0
+"""Maximum number of seconds to wait for a Retry-After header before retrying."""
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+"""Response statuses of idempotent requests that are retried."""
+
+MAX_TRACKED_ENDPOINTS: int = 256
+"""Maximum number of endpoints with latency counters, later endpoints count as "other"."""
+
+_ID_SEGMENT = re.compile(r"^\d+$|^(?=[^/]*\d)[\w.=-]{16,}$")
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class _CappedRetry(Retry):
+    """Retry policy that waits at most MAX_RETRY_AFTER seconds for a Retry-After header."""
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), MAX_RETRY_AFTER)
+
+
+@dataclass
+class EndpointStats:
+    """Latency counters of the requests to an endpoint.
+
+    Attributes:
+        requests (int): The number of requests, including failed requests.
+        errors (int): The number of requests that raised or got an error status.
+        total_seconds (float): The total time of the requests, including retries.
+        max_seconds (float): The time of the slowest request.
+    """
+
+    requests: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """The mean time of the requests."""
+        return self.total_seconds / self.requests if self.requests else 0.0
+
+
+def get_endpoint(method: str, url: str) -> str:
+    """Get the name of the endpoint of a request, such as "GET api.fal.ai/requests/{id}".
+
+    Path segments that are numbers, or long tokens with digits such as UUIDs and message
+    IDs, are replaced by "{id}", and the query string is left out.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The URL of the request.
+
+    Returns:
+        str: The method, host and path of the request.
+    """
+    parts = urlsplit(url)
+    path = "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment for segment in parts.path.split("/")
+    )
+    return f"{method.upper()} {parts.netloc}{path}"
+
+
+class HttpTransport:
+    """Pooled keep-alive HTTP sessions with timeouts, retries and latency counters.
+
+    Attributes:
+        connect_timeout (float): Seconds to wait for a connection to be established.
+        read_timeout (float): Seconds to wait for the next bytes of a response.
+        pool_maxsize (int): Maximum number of kept-alive connections to each host.
+        max_retries (int): Maximum number of retries of a request.
+        backoff_factor (float): Backoff between retries.
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+    ):
+        """Create a transport.  Sessions are created on the first request to each host.
+
+        Args:
+            connect_timeout (float): Seconds to wait for a connection to be established.
+            read_timeout (float): Seconds to wait for the next bytes of a response.
+            pool_maxsize (int): Maximum number of kept-alive connections to each host.
+            max_retries (int): Maximum number of retries of a request.
+            backoff_factor (float): Backoff between retries.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+        _transports.add(self)
+
+    def _create_session(self) -> requests.Session:
+        retry = _CappedRetry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def get_session(self, url: str) -> requests.Session:
+        """Get the pooled session for the host of a URL.
+
+        Args:
+            url (str): A URL on the host.
+
+        Returns:
+            requests.Session: The session, which keeps the connections to the host alive.
+        """
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._create_session()
+            return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        timeout: Optional[Timeout] = None,
+        endpoint: Optional[str] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send a request.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The URL of the request.
+            timeout (Timeout | None): Seconds to wait for the connection and for the
+                response, or a tuple of the two, defaults to the timeouts of the transport.
+            endpoint (str | None): The name to count the latency of the request under,
+                defaults to the method, host and path of the request.
+            **kwargs (Any): Other arguments of `requests.Session.request`.
+
+        Returns:
+            requests.Response: The response, after any retries.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after the retries.
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        session = self.get_session(url)
+
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        except requests.exceptions.ConnectionError as e:
+            # Requests reports a read timeout that used up the retries as a connection
+            # error, raise it as the timeout that it is
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(reason, ReadTimeoutError):
+                raise requests.exceptions.ReadTimeout(e, request=e.request) from e
+            raise
+        finally:
+            self._record(
+                endpoint or get_endpoint(method, url), time.perf_counter() - start_time, failed
+            )
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request, see `request`."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a POST request, see `request`."""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a PUT request, see `request`."""
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a DELETE request, see `request`."""
+        return self.request("DELETE", url, **kwargs)
+
+    def _record(self, endpoint: str, seconds: float, failed: bool) -> None:
+        with self._lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                if len(self._stats) >= MAX_TRACKED_ENDPOINTS:
+                    endpoint = "other"
+                stats = self._stats.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.errors += failed
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def get_stats(self) -> Dict[str, EndpointStats]:
+        """Get a copy of the latency counters of the endpoints.
+
+        Returns:
+            Dict[str, EndpointStats]: The counters by endpoint name.
+        """
+        with self._lock:
+            return {
+                endpoint: EndpointStats(**vars(stats)) for endpoint, stats in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        """Clear the latency counters."""
+        with self._lock:
+            self._stats.clear()
+
+    def close(self) -> None:
+        """Close the sessions and their pooled connections."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _reset_after_fork(self) -> None:
+        # The pooled connections belong to the parent process, so they are dropped without
+        # being used or shut down
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+
+_transports: "weakref.WeakSet[HttpTransport]" = weakref.WeakSet()
+_default_transport: Optional[HttpTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def _reset_transports_after_fork() -> None:
+    global _default_transport_lock
+    _default_transport_lock = threading.Lock()
+    for transport in list(_transports):
+        transport._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_transports_after_fork)
+
+
+def get_default_transport() -> HttpTransport:
+    """Get the transport that the clients of this process share by default.
+
+    Returns:
+        HttpTransport: The default transport, created on first use.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
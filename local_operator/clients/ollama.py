@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from pydantic import BaseModel, Field
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class OllamaModelData(BaseModel):
     """Data for an Ollama model.
@@ -51,13 +53,20 @@ class OllamaClient:
     This client is used to check the health of the Ollama server and list available models.
     """
 
-    def __init__(self, base_url: str = "http://localhost:11434") -> None:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
         """Initializes the OllamaClient.
 
         Args:
             base_url (str): The base URL for the Ollama API.
+            transport (Optional[HttpTransport]): The transport to send the requests with,
+                defaults to the shared transport.
         """
         self.base_url = base_url
+        self.transport = transport or get_default_transport()
 
     def is_healthy(self) -> bool:
         """Checks if the Ollama server is running and healthy.
@@ -67,7 +76,7 @@ class OllamaClient:
         """
         try:
             # Based on testing, the root endpoint returns "Ollama is running" when healthy
-            response = requests.get(self.base_url, timeout=2)
+            response = self.transport.get(self.base_url, timeout=2)
             return response.status_code == 200 and "Ollama is running" in response.text
         except requests.exceptions.RequestException:
             return False
@@ -86,7 +95,7 @@ class OllamaClient:
 
         url = f"{self.base_url}/api/tags"
         try:
-            response = requests.get(url)
+            response = self.transport.get(url)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
 
             tags_response = OllamaGetTagsResponse.model_validate(response.json())
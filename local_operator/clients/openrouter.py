@@ -1,8 +1,10 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import requests
 from pydantic import BaseModel, SecretStr
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class OpenRouterModelPricing(BaseModel):
     """Pricing information for an OpenRouter model.
@@ -66,16 +68,24 @@ class OpenRouterClient:
     This client is used to fetch model pricing information from OpenRouter.
     """
 
-    def __init__(self, api_key: SecretStr, base_url: str = "https://openrouter.ai/api/v1") -> None:
+    def __init__(
+        self,
+        api_key: SecretStr,
+        base_url: str = "https://openrouter.ai/api/v1",
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
         """Initializes the OpenRouterClient.
 
         Args:
             api_key (SecretStr | None): The OpenRouter API key. If None, it is assumed that
                 the key is not needed for the specific operation (e.g., listing models).
             base_url (str): The base URL for the OpenRouter API.
+            transport (Optional[HttpTransport]): The transport to send the requests with,
+                defaults to the shared transport.
         """
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or get_default_transport()
         self.app_title = "Local Operator"
         self.http_referer = "https://local-operator.com"
 
@@ -100,7 +110,7 @@ class OpenRouterClient:
         }
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
             data = response.json()
             return OpenRouterListModelsResponse.model_validate(data)
@@ -5,6 +5,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from pydantic import BaseModel, SecretStr
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class ImageSize(str, Enum):
     """Image size options for the FAL API."""
@@ -405,7 +407,12 @@ class RadientClient:
     interact with the Radient Agent Hub.
     """
 
-    def __init__(self, api_key: Optional[SecretStr], base_url: str) -> None:
+    def __init__(
+        self,
+        api_key: Optional[SecretStr],
+        base_url: str,
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
         """Initializes the RadientClient.
 
         Args:
@@ -413,9 +420,12 @@ class RadientClient:
                 the key is not needed for the specific operation (e.g., listing
                 models or downloading agents).
             base_url (str): The base URL for the Radient API.
+            transport (Optional[HttpTransport]): The transport to send the requests with,
+                defaults to the shared transport.
         """
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or get_default_transport()
         self.app_title = "Local Operator"
         self.http_referer = "https://local-operator.com"
 
@@ -465,7 +475,7 @@ class RadientClient:
         files = {"file": (zip_path.name, open(zip_path, "rb"), "application/zip")}
 
         try:
-            response = requests.post(url, headers=headers, files=files)
+            response = self.transport.post(url, headers=headers, files=files)
             response.raise_for_status()
             data = response.json()
             # The response is a dict with the new agent ID (e.g., {"id": "new-agent-id"})
@@ -501,7 +511,7 @@ class RadientClient:
         headers = self._get_headers(content_type=None, require_api_key=True)
         files = {"file": (zip_path.name, open(zip_path, "rb"), "application/zip")}
         try:
-            response = requests.put(url, headers=headers, files=files)
+            response = self.transport.put(url, headers=headers, files=files)
             response.raise_for_status()
         except requests.exceptions.RequestException as e:
             error_body = (
@@ -531,7 +541,7 @@ class RadientClient:
         # Download does not require API key
         headers = self._get_headers(content_type=None, require_api_key=False)
         try:
-            response = requests.get(url, headers=headers, stream=True)
+            response = self.transport.get(url, headers=headers, stream=True)
             response.raise_for_status()
             with open(dest_path, "wb") as f:
                 for chunk in response.iter_content(chunk_size=8192):
@@ -566,7 +576,7 @@ class RadientClient:
         # This is a public endpoint, no API key required
         headers = self._get_headers(content_type="application/json", require_api_key=False)
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -598,7 +608,7 @@ class RadientClient:
         headers = self._get_headers()
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
             data = response.json()
             return RadientListModelsResponse.model_validate(data)
@@ -673,7 +683,7 @@ class RadientClient:
 
         try:
             # Submit the initial request
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.transport.post(url, headers=headers, json=payload)
             response.raise_for_status()
             data = response.json()
             result = RadientImageGenerationResponse.model_validate(data)
@@ -745,7 +755,7 @@ class RadientClient:
             params["provider"] = provider
 
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.transport.get(url, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
             return RadientImageGenerationResponse.model_validate(data)
@@ -774,7 +784,7 @@ class RadientClient:
         headers = self._get_headers()
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
             return RadientImageGenerationProvidersResponse.model_validate(data)
@@ -839,7 +849,7 @@ class RadientClient:
             params["domains"] = ",".join(domains)
 
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.transport.get(url, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
             return RadientSearchResponse.model_validate(data)
@@ -868,7 +878,7 @@ class RadientClient:
         headers = self._get_headers()
 
         try:
-            response = requests.get(url, headers=headers)
+            response = self.transport.get(url, headers=headers)
             response.raise_for_status()
             data = response.json()
             return RadientSearchProvidersResponse.model_validate(data)
@@ -897,7 +907,7 @@ class RadientClient:
         url = f"{self.base_url}/agents/{agent_id}"
         headers = self._get_headers(content_type=None, require_api_key=True)
         try:
-            response = requests.delete(url, headers=headers)
+            response = self.transport.delete(url, headers=headers)
             if response.status_code == 204:
                 return
             # If not 204, try to extract error details
@@ -935,7 +945,7 @@ class RadientClient:
         payload = RadientSendEmailRequest(subject=subject, body=body).dict()
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.transport.post(url, headers=headers, json=payload)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
             api_response_data = response.json()
             api_response = RadientSendEmailAPIResponse.model_validate(api_response_data)
@@ -990,7 +1000,7 @@ class RadientClient:
         ).dict()
 
         try:
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.transport.post(url, headers=headers, json=payload)
             response.raise_for_status()
             api_response_data = response.json()
             api_response = RadientTokenRefreshAPIResponse.model_validate(api_response_data)
@@ -1068,7 +1078,7 @@ class RadientClient:
         try:
             with open(file_path, "rb") as audio_file:
                 files = {"file": (file_path, audio_file)}
-                response = requests.post(url, headers=headers, data=form_data, files=files)
+                response = self.transport.post(url, headers=headers, data=form_data, files=files)
             response.raise_for_status()
             api_response_data = response.json()
             api_response = RadientTranscriptionAPIResponse.model_validate(api_response_data)
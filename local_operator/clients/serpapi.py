@@ -1,9 +1,11 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from urllib.parse import urlencode
 
 import requests
 from pydantic import BaseModel, Field, SecretStr
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class SerpApiSearchMetadata(BaseModel):
     """Metadata about a SERP API search request.
@@ -440,19 +442,23 @@ class SerpApiClient:
 
     Attributes:
         api_key (str): SERP API key for authentication
+        transport (HttpTransport): Transport used to send the requests
     """
 
-    def __init__(self, api_key: SecretStr):
+    def __init__(self, api_key: SecretStr, transport: Optional[HttpTransport] = None):
         """Initialize the SERP API client.
 
         Args:
             api_key (str | None): SERP API key. If not provided, will \
           try to get from SERP_API_KEY env var.
+            transport (HttpTransport | None): Transport used to send the requests, defaults
+                to the shared transport.
 
         Raises:
             RuntimeError: If no API key is provided or found in environment.
         """
         self.api_key = api_key
+        self.transport = transport or get_default_transport()
         if not self.api_key:
             raise RuntimeError(
                 "SERP API key must be provided or set in SERP_API_KEY environment variable"
@@ -505,7 +511,7 @@ class SerpApiClient:
 
         url = f"https://serpapi.com/search?{urlencode(params)}"
         try:
-            response = requests.get(url)
+            response = self.transport.get(url)
             if response.status_code != 200:
                 raise RuntimeError(
                     f"SERP API request failed with status {response.status_code}, content:"
@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from pydantic import BaseModel, SecretStr
 
+from local_operator.clients.http import HttpTransport, get_default_transport
+
 
 class TavilyResult(BaseModel):
     """Individual search result from Tavily API.
@@ -68,21 +70,30 @@ class TavilyClient:
     Attributes:
         api_key (SecretStr): Tavily API key for authentication
         base_url (str): Base URL for the Tavily API
+        transport (HttpTransport): Transport used to send the requests
     """
 
-    def __init__(self, api_key: SecretStr, base_url: str = "https://api.tavily.com"):
+    def __init__(
+        self,
+        api_key: SecretStr,
+        base_url: str = "https://api.tavily.com",
+        transport: Optional[HttpTransport] = None,
+    ):
         """Initialize the Tavily API client.
 
         Args:
             api_key (SecretStr): Tavily API key for authentication
             base_url (str, optional): Base URL for the Tavily API.
             Defaults to "https://api.tavily.com".
+            transport (HttpTransport, optional): Transport used to send the requests.
+            Defaults to the shared transport.
 
         Raises:
             RuntimeError: If no API key is provided.
         """
         self.api_key = api_key
         self.base_url = base_url
+        self.transport = transport or get_default_transport()
         if not self.api_key:
             raise RuntimeError("Tavily API key must be provided")
 
@@ -145,7 +156,7 @@ class TavilyClient:
         }
 
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = self.transport.post(url, json=payload, headers=headers)
             if response.status_code != 200:
                 raise RuntimeError(
                     f"Tavily API request failed with status {response.status_code}, content:"
@@ -26,6 +26,32 @@ class Config:
             model_name (str): Name of the AI model to use
             rag_enabled (bool): Whether RAG is enabled
             auto_save_conversation (bool): Whether to automatically save the conversation
+            background_summarization (bool): Whether to summarize old conversation steps
+                in the background between steps
+            safety_prescreen (bool): Whether to skip the LLM safety check for actions that a
+                local static analysis classifies as benign
+            safety_allowlist_modules (List[str]): Additional modules that the safety
+                pre-screen treats as side-effect-free
+            safety_verdict_cache_ttl (int): Number of seconds to remember actions that the
+                LLM safety check found safe, 0 to disable the cache
+            code_preflight (bool): Whether to check code for errors that are certain to
+                happen before the safety check and the execution
+            fsync_file_writes (bool): Whether WRITE and EDIT actions flush files to the
+                disk before they replace them
+            auxiliary_hosting (str): Hosting provider of the auxiliary model for cheap tasks
+            auxiliary_model_name (str): Name of the auxiliary model for cheap tasks
+            auxiliary_tasks (List[str]): Tasks that run on the auxiliary model, any of
+                classify, safety, summarize and plan
+            speculative_classification (bool): Whether to start generating the first action
+                while the request is being classified
+            execution_kernel_pool_size (int): Number of pre-warmed execution kernels to keep
+                ready, 0 runs agent code in the worker process instead of a kernel
+            step_wall_time_limit (float): Maximum wall clock seconds of a code execution
+                step, 0 for no limit
+            step_cpu_time_limit (float): Maximum CPU seconds of a code execution step, 0 for
+                no limit
+            step_memory_limit_mb (float): Maximum resident memory of the execution kernel in
+                megabytes, 0 for no limit
     """
 
     version: str
@@ -97,6 +123,20 @@ DEFAULT_CONFIG = Config(
             "hosting": "",
             "model_name": "",
             "auto_save_conversation": False,
+            "background_summarization": False,
+            "safety_prescreen": False,
+            "safety_allowlist_modules": [],
+            "safety_verdict_cache_ttl": 604800,
+            "code_preflight": True,
+            "fsync_file_writes": True,
+            "auxiliary_hosting": "",
+            "auxiliary_model_name": "",
+            "auxiliary_tasks": ["classify", "safety", "summarize", "plan"],
+            "speculative_classification": False,
+            "execution_kernel_pool_size": 0,
+            "step_wall_time_limit": 0,
+            "step_cpu_time_limit": 0,
+            "step_memory_limit_mb": 0,
         },
     }
 )
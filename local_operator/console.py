@@ -327,6 +327,22 @@ def format_error_output(error: Exception, max_retries: int) -> str:
     )
 
 
+def format_preflight_error_output(error: Exception) -> str:
+    """Format the errors found by the pre-flight check of code with ANSI color codes.
+
+    Args:
+        error (Exception): The errors found in the code, which was not run
+
+    Returns:
+        str: Formatted error message string
+    """
+    return (
+        f"\n\033[1;31m✗ Code Pre-flight Check Failed, the code was not run\033[0m\n"
+        f"\033[1;34m╞══════════════════════════════════════════════════╡\n"
+        f"\033[1;36m│ Error:\033[0m\n{error}"
+    )
+
+
 def format_success_output(output: tuple[str, str, str]) -> str:
     """Format successful execution output with ANSI color codes.
 
@@ -452,6 +468,42 @@ def print_execution_section(
                     f"{cost_str}\033[0m"
                 )
 
+            cache_read_tokens = data.get("step_cache_read_tokens", 0)
+            cache_write_tokens = data.get("step_cache_write_tokens", 0)
+            cache_hit_rate = data.get("step_cache_hit_rate", 0.0)
+
+            if cache_read_tokens or cache_write_tokens:
+                print(
+                    "\033[1;36m│ Step Prompt Cache: \033[0m"
+                    f"\033[1;33mRead: {cache_read_tokens}  Write: {cache_write_tokens}  "
+                    f"Hit rate: {cache_hit_rate:.0%}\033[0m"
+                )
+
+            for task_name, task_usage in (data.get("task_usage") or {}).items():
+                print(
+                    f"\033[1;36m│ {task_name.capitalize()} ({task_usage['model']}): \033[0m"
+                    f"\033[1;33mCalls: {task_usage['calls']}  "
+                    f"Avg: {task_usage['average_seconds']:.1f}s  "
+                    f"Cost: ${task_usage['cost']:.4f}\033[0m"
+                )
+
+            safety_checks = data.get("safety_checks") or {}
+            if safety_checks:
+                print(
+                    "\033[1;36m│ Safety Checks: \033[0m"
+                    f"\033[1;33mChecked: {safety_checks['total_checks']}  "
+                    f"Skipped: {safety_checks['skip_fraction']:.0%}  "
+                    f"Saved: ~{safety_checks['seconds_saved']:.1f}s\033[0m"
+                )
+
+            preflight_checks = data.get("preflight_checks") or {}
+            if preflight_checks:
+                print(
+                    "\033[1;36m│ Pre-flight Checks: \033[0m"
+                    f"\033[1;33mChecked: {preflight_checks['total_checks']}  "
+                    f"Round Trips Avoided: {preflight_checks['round_trips_avoided']}\033[0m"
+                )
+
         except Exception:
             # Don't display if there is no token usage data
             pass
@@ -2,34 +2,46 @@ import asyncio
 import base64
 import builtins
 import difflib
-import inspect
 import io
 import logging
 import os
+import re
 import subprocess
 import sys
 import threading
 import time
+from contextvars import ContextVar
 from datetime import datetime
 from enum import Enum
 from logging import StreamHandler
 from multiprocessing import Queue
 from pathlib import Path
 from traceback import format_exception
-from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from langchain_community.callbacks.manager import get_openai_callback
 from langchain_core.messages import BaseMessage
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel
-from tiktoken import encoding_for_model
 
 from local_operator.agents import AgentData, AgentRegistry
+from local_operator.capture import OutputCapture, capture_output, get_output_stream
 from local_operator.console import (
     ExecutionSection,
     VerbosityLevel,
     condense_logging,
     format_error_output,
+    format_preflight_error_output,
     format_success_output,
     log_action_error,
     log_retry_error,
@@ -37,16 +49,51 @@ from local_operator.console import (
     print_task_interrupted,
     spinner_context,
 )
-from local_operator.helpers import clean_plain_text_response, process_json_response
+from local_operator.file_editor import (
+    PieceTable,
+    describe_file_write,
+    find_closest_region,
+    strip_file_fences,
+    write_text_atomically,
+)
+from local_operator.file_reader import read_file_window, search_file
+from local_operator.frames import encode_message_update
+from local_operator.helpers import (
+    clean_plain_text_response,
+    get_tokenizer,
+    process_json_response,
+)
+from local_operator.kernel import (
+    ExecutionKernel,
+    KernelError,
+    KernelPool,
+    compile_agent_code,
+    format_context_value,
+    get_error_line,
+    is_async_code,
+)
 from local_operator.model.configure import ModelConfiguration, calculate_cost
+from local_operator.preflight import PreflightMetrics, preflight_check
 from local_operator.prompts import (
     AgentHeadsUpDisplayPrompt,
+    MessageBatchSummarySystemPrompt,
     MessageSummarySystemPrompt,
     SafetyCheckConversationPrompt,
     SafetyCheckSystemPrompt,
     SafetyCheckUserPrompt,
     create_system_prompt,
 )
+from local_operator.resources import ResourceMonitor
+from local_operator.safety import (
+    SafetyAllowlist,
+    SafetyCheckMetrics,
+    SafetyScreenResult,
+    SafetyVerdictCache,
+    get_context_modules,
+    get_safety_verdict_key,
+    screen_action,
+)
+from local_operator.summary_cache import SummaryCache
 from local_operator.tools.general import ToolRegistry, list_working_directory
 from local_operator.types import (
     ActionType,
@@ -55,21 +102,89 @@ from local_operator.types import (
     ConversationRecord,
     ConversationRole,
     ExecutionType,
+    FileReadRange,
     ProcessResponseOutput,
     ProcessResponseStatus,
     RequestClassification,
+    ResourceLimits,
+    ResourceUsage,
     ResponseJsonSchema,
 )
 
 CHARS_PER_TOKEN = 4
 MAX_FILE_READ_TOKENS = 50000
 MAX_FILE_READ_SIZE_BYTES = CHARS_PER_TOKEN * MAX_FILE_READ_TOKENS
-"""The maximum file size to read in bytes.
+"""The maximum number of bytes of a text file that a READ action reads.
 
 This is used to prevent reading large files into context, which can cause
-context overflow errors for LLM APIs.
+context overflow errors for LLM APIs.  Larger files are read in windows of lines.
+"""
+
+MAX_CACHE_BREAKPOINTS = 4
+"""The maximum number of prompt cache breakpoints that a provider will accept per request.
+
+Anthropic rejects requests with more than four cache_control markers.
+"""
+
+DEFAULT_SUMMARY_BLOCK_SIZE = 4
+"""The number of old conversation records that are summarized together as one block.
+
+Summaries rewrite record contents, which invalidates any provider prompt cache from the
+first rewritten record onwards.  Summarizing in aligned blocks means that the cached
+prefix is only broken once every block instead of on every step.
+"""
+
+DEFAULT_SUMMARY_CONCURRENCY = 4
+"""The maximum number of summarization model calls that run at the same time."""
+
+DEFAULT_SUMMARY_BATCH_SIZE = 4
+"""The maximum number of conversation records that are summarized in one model call."""
+
+MAX_BATCHED_SUMMARY_TOKENS = 4000
+"""Records with more tokens than this are summarized in a model call of their own, since
+batching large records together would make the summarization prompt very long.
+"""
+
+_in_background_summarization: ContextVar[bool] = ContextVar(
+    "in_background_summarization", default=False
+)
+"""Set in background summarization tasks, whose model calls are not attributed to the
+token usage of the step that happens to be running when they complete."""
+
+DEFAULT_OUTPUT_TOKEN_RESERVE = 4096
+"""The number of context window tokens reserved for the model response when the model
+does not report its maximum output tokens.
+"""
+
+CONTEXT_WINDOW_SAFETY_MARGIN = 0.05
+"""The fraction of the context window that is left unused when packing the conversation.
+
+Token counts are estimated locally and may differ from the provider's tokenizer, so a small
+margin is kept to make sure that the packed conversation fits the real context window.
+"""
+
+MIN_TRUNCATED_RECORD_TOKENS = 256
+"""The minimum token budget for including a truncated copy of a record that does not fit
+in the context window.  Below this, the record is dropped instead.
+"""
+
+MESSAGE_TOKEN_OVERHEAD = 4
+"""The number of tokens that providers add to each message for its role and delimiters."""
+
+ATTACHMENT_TOKEN_ESTIMATE = 1600
+"""The estimated number of tokens for each file attached to a message.
+
+Images are billed by size rather than by their encoded bytes, and providers downscale
+large images to about this many tokens, so a fixed upper estimate is used instead of
+reading the files when packing the conversation.
 """
 
+CONTEXT_TRUNCATION_NOTICE = (
+    "<system>Some conversation history has been truncated for brevity.</system>"
+)
+
+RECORD_TRUNCATION_NOTICE = "\n\n[... truncated to fit the context window]"
+
 
 class ExecutorInitError(Exception):
     """Raised when the executor fails to initialize properly."""
@@ -90,6 +205,34 @@ class ConfirmSafetyResult(Enum):
     )
 
 
+class ModelTask(str, Enum):
+    """Kinds of model calls that the executor makes, used to route calls to a model."""
+
+    ACTION = "action"  # Agent responses and actions in the main conversation
+    CLASSIFY = "classify"  # Classification of user requests
+    SAFETY = "safety"  # Security audits of agent actions
+    SUMMARIZE = "summarize"  # Summaries of old conversation steps
+    PLAN = "plan"  # Plans for multi-step tasks
+
+
+# Tasks that run on the auxiliary model by default, when one is configured
+DEFAULT_AUXILIARY_TASKS: Tuple[ModelTask, ...] = (
+    ModelTask.CLASSIFY,
+    ModelTask.SAFETY,
+    ModelTask.SUMMARIZE,
+    ModelTask.PLAN,
+)
+
+
+# Actions that are reviewed by the safety check before they are performed
+SAFETY_CHECKED_ACTIONS: Tuple[ActionType, ...] = (
+    ActionType.CODE,
+    ActionType.WRITE,
+    ActionType.EDIT,
+    ActionType.READ,
+)
+
+
 def get_confirm_safety_result(response_content: str) -> ConfirmSafetyResult:
     """Get the result of the safety check from the response content."""
     if not response_content:
@@ -126,52 +269,7 @@ def get_context_vars_str(context_vars: Dict[str, Any]) -> str:
         if key in ignored_keys:
             continue
 
-        value_str = str(value)
-        formatted_value_str = value_str
-
-        if inspect.iscoroutine(value):
-            formatted_value_str = f"<Coroutine object {value.__name__} (not awaited)>"
-        elif inspect.iscoroutinefunction(value):
-            # For async function definitions, format them like other callables
-            try:
-                doc = value.__doc__ or "No description available"
-                doc = doc.split("\n")[0].strip()
-                sig = inspect.signature(value)
-                args = [
-                    f"{p.name}: {p.annotation.__name__ if hasattr(p.annotation, '__name__') else str(p.annotation)}"  # noqa: E501
-                    for p in sig.parameters.values()
-                ]
-                return_type = (
-                    sig.return_annotation.__name__
-                    if hasattr(sig.return_annotation, "__name__")
-                    else str(sig.return_annotation)
-                )
-                formatted_value_str = f"async def {key}({', '.join(args)}) -> {return_type}: {doc}"
-            except ValueError:
-                formatted_value_str = f"<AsyncFunction {key}>"
-        elif callable(value):
-            try:
-                doc = value.__doc__ or "No description available"
-                doc = doc.split("\n")[0].strip()
-                sig = inspect.signature(value)
-                args = [
-                    f"{p.name}: {p.annotation.__name__ if hasattr(p.annotation, '__name__') else str(p.annotation)}"  # noqa: E501
-                    for p in sig.parameters.values()
-                ]
-                return_type = (
-                    sig.return_annotation.__name__
-                    if hasattr(sig.return_annotation, "__name__")
-                    else str(sig.return_annotation)
-                )
-                # No async_prefix here as iscoroutinefunction is handled above
-                formatted_value_str = f"def {key}({', '.join(args)}) -> {return_type}: {doc}"
-            except ValueError:
-                formatted_value_str = f"<Function {key}>"
-
-        if len(formatted_value_str) > 10000:
-            formatted_value_str = (
-                f"{formatted_value_str[:10000]} ... (truncated due to length limits)"
-            )
+        formatted_value_str = format_context_value(key, value)
 
         entry = f"{key}: {formatted_value_str}\n"
         context_vars_str += entry
@@ -179,7 +277,7 @@ def get_context_vars_str(context_vars: Dict[str, Any]) -> str:
     return context_vars_str
 
 
-def annotate_code(code: str, error_line: int | None = None) -> str | None:
+def annotate_code(code: str, error_line: int | None = None, start_line: int = 1) -> str | None:
     """Annotate the code with line numbers and content lengths.
 
     This function takes a string of code, splits it into lines, and then
@@ -188,6 +286,8 @@ def annotate_code(code: str, error_line: int | None = None) -> str | None:
     Args:
         code (str): The code to annotate.
         error_line (int | None): The line number where the error occurred, if any.
+        start_line (int): The line number of the first line, for code that was read from
+            the middle of a file.
 
     Returns:
         str: The annotated code, with each line prepended by its line number
@@ -201,11 +301,16 @@ def annotate_code(code: str, error_line: int | None = None) -> str | None:
     if not code:
         return None
 
-    lines = code.splitlines(keepends=True)
-    annotated_code = ""
+    # Only newlines end a line, so that line numbers match the line numbers of files
+    lines = code.split("\n")
+    if lines[-1]:
+        lines = [line + "\n" for line in lines[:-1]] + [lines[-1]]
+    else:
+        lines = [line + "\n" for line in lines[:-1]]
+    annotated_lines = []
 
     for i, line in enumerate(lines):
-        line_number = i + 1
+        line_number = start_line + i
         line_length = len(line) - (len(line.rstrip("\r\n")) - len(line))
 
         if error_line is not None:
@@ -216,9 +321,337 @@ def annotate_code(code: str, error_line: int | None = None) -> str | None:
         else:
             error_indicator = ""
 
-        annotated_code += f"{error_indicator}{line_number:>4} | {line_length:>4} | {line}"
+        annotated_lines.append(f"{error_indicator}{line_number:>4} | {line_length:>4} | {line}")
+
+    return "".join(annotated_lines)
+
+
+def order_volatile_records_last(records: List[ConversationRecord]) -> List[ConversationRecord]:
+    """Move the ephemeral records of a conversation behind all of its stable records.
+
+    Ephemeral records such as the agent heads up display and file contents shown for a
+    few steps are rewritten or removed in later steps.  Sending them after the stable
+    records keeps them out of the cached prompt prefix, so that removing them does not
+    invalidate the prefix that was cached by the previous call.  The relative order of
+    the stable records and of the ephemeral records is kept.
+
+    Args:
+        records (List[ConversationRecord]): The records that will be sent to the model.
+
+    Returns:
+        List[ConversationRecord]: The stable records followed by the ephemeral records.
+    """
+    stable = [record for record in records if not record.ephemeral]
+    if len(stable) == len(records):
+        return list(records)
+    return stable + [record for record in records if record.ephemeral]
+
+
+def get_stable_prefix_length(records: List[ConversationRecord]) -> int:
+    """Get the length of the stable, append-only prefix of a list of conversation records.
+
+    Ephemeral records such as the agent heads up display are removed from the conversation
+    in later steps, so only the records before the first ephemeral record are guaranteed
+    to be sent unchanged on the next call.
+
+    Args:
+        records (List[ConversationRecord]): The records that will be sent to the model.
+
+    Returns:
+        int: The number of records in the stable prefix.
+    """
+    for idx, record in enumerate(records):
+        if record.ephemeral:
+            return idx
+    return len(records)
+
+
+def select_cache_breakpoints(
+    records: List[ConversationRecord],
+    previous_prefix_length: int = 0,
+    max_breakpoints: int = MAX_CACHE_BREAKPOINTS,
+) -> List[int]:
+    """Choose the record indices to mark with prompt cache breakpoints.
+
+    Breakpoints are chosen so that the longest possible prefix is reused between calls:
+
+    1. The end of the stable prefix, which writes the cache for the next call.
+    2. The end of the stable prefix from the previous call, which reads the cache that
+       the previous call wrote even if many records were appended since.
+    3. The end of the summarized region, which only changes once per summary block.
+    4. The system prompt, which survives history truncation and summarization.
+
+    Args:
+        records (List[ConversationRecord]): The records that will be sent to the model.
+        previous_prefix_length (int): The stable prefix length of the previous call for
+            the same conversation, or 0 if unknown.
+        max_breakpoints (int): The maximum number of breakpoints to return.
+
+    Returns:
+        List[int]: Sorted indices into records that should carry a cache breakpoint.
+    """
+    stable_length = get_stable_prefix_length(records)
+    if stable_length == 0 or max_breakpoints <= 0:
+        return []
+
+    candidates = [stable_length - 1]
+
+    if 0 < previous_prefix_length < stable_length:
+        candidates.append(previous_prefix_length - 1)
+
+    for idx in range(stable_length - 1, -1, -1):
+        if records[idx].summarized:
+            candidates.append(idx)
+            break
+
+    if records[0].is_system_prompt:
+        candidates.append(0)
+
+    breakpoints: List[int] = []
+    for idx in candidates:
+        if idx not in breakpoints:
+            breakpoints.append(idx)
+        if len(breakpoints) >= max_breakpoints:
+            break
+
+    return sorted(breakpoints)
+
+
+class StreamTokenUsage(BaseModel):
+    """Token usage reported by a provider while streaming a model response.
+
+    LangChain chat models report provider usage on the `usage_metadata` of streamed
+    chunks.  Depending on the provider, usage arrives on the final chunk only, is split
+    across chunks (for example input tokens on the first chunk and output tokens on the
+    last), or is reported cumulatively (Anthropic repeats the input and cache counts of
+    `message_start` on `message_delta`).  The largest value reported for each field is
+    kept, which is correct in all three cases, whereas summing would count cumulative
+    usage twice.
+
+    Attributes:
+        input_tokens (int): Prompt tokens reported by the provider, including cached tokens.
+        output_tokens (int): Completion tokens reported by the provider.
+        cache_read_tokens (int): Prompt tokens that were read from the provider's cache.
+        cache_write_tokens (int): Prompt tokens that were written to the provider's cache.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def add_chunk(self, chunk: Any) -> None:
+        """Add the usage reported on a streamed chunk, if any.
+
+        Args:
+            chunk (Any): A streamed message chunk from the model.
+        """
+        usage_metadata = getattr(chunk, "usage_metadata", None)
+        if not isinstance(usage_metadata, dict):
+            return
+
+        self.input_tokens = max(self.input_tokens, int(usage_metadata.get("input_tokens") or 0))
+        self.output_tokens = max(self.output_tokens, int(usage_metadata.get("output_tokens") or 0))
+
+        input_token_details = usage_metadata.get("input_token_details")
+        if isinstance(input_token_details, dict):
+            self.cache_read_tokens = max(
+                self.cache_read_tokens, int(input_token_details.get("cache_read") or 0)
+            )
+            self.cache_write_tokens = max(
+                self.cache_write_tokens, int(input_token_details.get("cache_creation") or 0)
+            )
+
+
+class ContextPackResult(BaseModel):
+    """The result of packing conversation records into a model's context window.
+
+    Attributes:
+        records (List[ConversationRecord]): The records to send to the model, in order.
+            Records that were cut down to fit are copies, so the original conversation is
+            never modified.
+        excluded (List[ConversationRecord]): The original records that were dropped,
+            summarized or truncated, in conversation order, so that they can be recalled
+            later.
+        token_count (int): The estimated number of tokens in the packed records.
+    """
+
+    records: List[ConversationRecord]
+    excluded: List[ConversationRecord]
+    token_count: int
+
+
+def truncate_record_to_token_limit(
+    record: ConversationRecord,
+    max_tokens: int,
+    count_tokens: Callable[[ConversationRecord], int],
+) -> ConversationRecord | None:
+    """Create a copy of a record with its content cut down to fit a token limit.
+
+    The start of the content is kept and a notice is appended so that the model knows
+    that the rest of the message was removed.
+
+    Args:
+        record (ConversationRecord): The record to truncate.
+        max_tokens (int): The maximum number of tokens for the truncated record.
+        count_tokens (Callable[[ConversationRecord], int]): Function that counts the tokens
+            in a record.
+
+    Returns:
+        ConversationRecord | None: The truncated copy, or None if no meaningful part of the
+            content fits within the limit.
+    """
+    content = record.content or ""
+    token_count = count_tokens(record)
+    keep_chars = len(content)
+
+    # Token counts are not linear in characters, so shrink proportionally until it fits
+    for _ in range(5):
+        keep_chars = int(keep_chars * max_tokens / max(token_count, 1) * 0.9)
+        if keep_chars <= 0:
+            return None
+
+        truncated = record.model_copy(
+            update={"content": content[:keep_chars] + RECORD_TRUNCATION_NOTICE}
+        )
+        token_count = count_tokens(truncated)
+        if token_count <= max_tokens:
+            return truncated
+
+    return None
+
+
+def pack_conversation_context(
+    records: List[ConversationRecord],
+    token_budget: int,
+    count_tokens: Callable[[ConversationRecord], int],
+    summarize: Optional[Callable[[ConversationRecord], Optional[ConversationRecord]]] = None,
+    block_size: int = DEFAULT_SUMMARY_BLOCK_SIZE,
+) -> ContextPackResult:
+    """Pack conversation records into a token budget.
+
+    Each record after the system prompt is sent verbatim, summarized or dropped:
+
+    1. The most recent records are kept verbatim, starting from the oldest block boundary
+       from which they fit the budget.
+    2. Older records are replaced by their summaries, block by block from the newest,
+       for as long as the summaries fit.  Records without a summary are dropped.
+    3. Everything older is dropped and replaced by a single truncation notice.
+
+    Both cut points move in whole blocks aligned to the system prompt, the same blocks
+    that the conversation is summarized in, so the packed conversation only changes once
+    every block and is append-only in between.  If the most recent block does not fit on
+    its own, the most recent records are kept one by one and the oldest of them is
+    truncated as a last resort.
+
+    Args:
+        records (List[ConversationRecord]): The conversation records to pack.
+        token_budget (int): The maximum number of tokens for the packed records.  A value
+            of zero or less disables packing.
+        count_tokens (Callable[[ConversationRecord], int]): Function that counts the tokens
+            that a record takes up in the request, including its attachments.
+        summarize (Optional[Callable[[ConversationRecord], Optional[ConversationRecord]]]):
+            Function that returns a summarized copy of a record, or None if the record has
+            no summary.  Without it, records that do not fit are dropped.
+        block_size (int): The number of records in each block that is summarized or
+            dropped together.
+
+    Returns:
+        ContextPackResult: The packed records, the excluded records and the token count.
+    """
+    counts = [count_tokens(record) for record in records]
+    total_tokens = sum(counts)
+
+    if token_budget <= 0 or total_tokens <= token_budget:
+        return ContextPackResult(records=list(records), excluded=[], token_count=total_tokens)
+
+    head_length = 1 if records[0].is_system_prompt else 0
+    notice = ConversationRecord(
+        role=ConversationRole.USER,
+        content=CONTEXT_TRUNCATION_NOTICE,
+        should_summarize=False,
+    )
+    notice_tokens = count_tokens(notice)
+
+    head: List[ConversationRecord] = list(records[:head_length])
+    used_tokens = sum(counts[:head_length]) + notice_tokens
+    excluded: List[ConversationRecord] = []
+
+    if head and used_tokens > token_budget:
+        # The system prompt alone does not fit, so it is cut down as a last resort
+        truncated_head = truncate_record_to_token_limit(
+            head[0], max(token_budget - notice_tokens, 0), count_tokens
+        )
+        excluded.append(head[0])
+        head = [truncated_head] if truncated_head else []
+        used_tokens = notice_tokens + (count_tokens(truncated_head) if truncated_head else 0)
+
+    # Find the oldest block boundary from which the most recent records fit verbatim
+    block_size = max(1, block_size)
+    suffix_tokens = [0] * (len(records) + 1)
+    for idx in range(len(records) - 1, -1, -1):
+        suffix_tokens[idx] = suffix_tokens[idx + 1] + counts[idx]
+
+    cut = head_length
+    while cut < len(records) and used_tokens + suffix_tokens[cut] > token_budget:
+        cut += block_size
+
+    if cut >= len(records):
+        # Not even the most recent block fits, so keep as many of the most recent records
+        # as possible and truncate the oldest of them
+        lower_bound = cut - block_size
+        kept: List[ConversationRecord] = []
+        idx = len(records) - 1
+        while idx >= lower_bound and used_tokens + counts[idx] <= token_budget:
+            kept.append(records[idx])
+            used_tokens += counts[idx]
+            idx -= 1
+
+        if idx >= head_length:
+            remaining_tokens = token_budget - used_tokens
+            if remaining_tokens >= MIN_TRUNCATED_RECORD_TOKENS or not kept:
+                truncated = truncate_record_to_token_limit(
+                    records[idx], remaining_tokens, count_tokens
+                )
+                if truncated is not None:
+                    kept.append(truncated)
+                    used_tokens += count_tokens(truncated)
+
+        kept.reverse()
+        excluded.extend(records[head_length : idx + 1])
+
+        return ContextPackResult(
+            records=head + [notice] + kept,
+            excluded=excluded,
+            token_count=used_tokens,
+        )
 
-    return annotated_code
+    used_tokens += suffix_tokens[cut]
+
+    # Fill the remaining budget with summaries of the blocks before the cut, newest first
+    summarized: List[ConversationRecord] = []
+    summary_start = cut
+    while summarize is not None and summary_start > head_length:
+        block_start = max(head_length, summary_start - block_size)
+        block: List[ConversationRecord] = []
+        for record in records[block_start:summary_start]:
+            summary = summarize(record)
+            if summary is not None:
+                block.append(summary)
+        block_tokens = sum(count_tokens(record) for record in block)
+        if used_tokens + block_tokens > token_budget:
+            break
+        summarized = block + summarized
+        used_tokens += block_tokens
+        summary_start = block_start
+
+    excluded.extend(records[head_length:cut])
+
+    return ContextPackResult(
+        records=head + [notice] + summarized + list(records[cut:]),
+        excluded=excluded,
+        token_count=used_tokens,
+    )
 
 
 class ExecutorTokenMetrics(BaseModel):
@@ -228,12 +661,58 @@ class ExecutorTokenMetrics(BaseModel):
         total_prompt_tokens (int): Total number of tokens used in prompts across all invocations.
         total_completion_tokens (int): Total number of tokens generated in completions.
         total_cost (float): Total monetary cost of all model invocations.
+        total_cache_read_tokens (int): Prompt tokens that were served from the provider's
+            prompt cache.
+        total_cache_write_tokens (int): Prompt tokens that were written to the provider's
+            prompt cache.
+    """
+
+    total_prompt_tokens: int = 0
+    total_completion_tokens: int = 0
+    total_cost: float = 0.0
+    total_cache_read_tokens: int = 0
+    total_cache_write_tokens: int = 0
+
+    def cache_hit_rate(self) -> float:
+        """Get the fraction of prompt tokens that were read from the prompt cache.
+
+        Returns:
+            float: The cache hit rate between 0.0 and 1.0.
+        """
+        if self.total_prompt_tokens <= 0:
+            return 0.0
+        return min(1.0, self.total_cache_read_tokens / self.total_prompt_tokens)
+
+
+class ModelTaskMetrics(BaseModel):
+    """Tracks the latency, token usage and cost of the model calls for one kind of task.
+
+    Attributes:
+        model (str): The hosting and name of the model that the task runs on.
+        calls (int): Number of model calls made for the task.
+        total_seconds (float): Total time spent in model calls for the task.
+        total_prompt_tokens (int): Total number of prompt tokens used by the task.
+        total_completion_tokens (int): Total number of completion tokens used by the task.
+        total_cost (float): Total monetary cost of the model calls for the task.
     """
 
+    model: str = ""
+    calls: int = 0
+    total_seconds: float = 0.0
     total_prompt_tokens: int = 0
     total_completion_tokens: int = 0
     total_cost: float = 0.0
 
+    def average_seconds(self) -> float:
+        """Get the average latency of a model call for the task.
+
+        Returns:
+            float: The average number of seconds per call.
+        """
+        if self.calls <= 0:
+            return 0.0
+        return self.total_seconds / self.calls
+
 
 class CodeExecutionError(Exception):
     """
@@ -242,18 +721,32 @@ class CodeExecutionError(Exception):
     Attributes:
         message (str): The error message.
         code (str): The code that caused the error.
+        traceback_str (str | None): The formatted traceback of an error that was raised in
+            an execution kernel, whose traceback is not attached to this exception.
+        error_line (int | None): The line of the code that raised, if known.
     """
 
-    def __init__(self, message: str, code: str):
+    def __init__(
+        self,
+        message: str,
+        code: str,
+        traceback_str: Optional[str] = None,
+        error_line: Optional[int] = None,
+    ):
         """
         Initializes a new instance of the CodeExecutionError class.
 
         Args:
             message (str): The error message.
             code (str): The code that caused the error.
+            traceback_str (Optional[str]): The formatted traceback of an error that was
+                raised in an execution kernel.
+            error_line (Optional[int]): The line of the code that raised, if known.
         """
         self.message = message
         self.code = code
+        self.traceback_str = traceback_str
+        self.error_line = error_line
         super().__init__(self.message)
 
     def agent_info_str(self) -> str:
@@ -271,8 +764,8 @@ class CodeExecutionError(Exception):
                  - A legend explaining the annotation format.
                  - The annotated code block, highlighting the error location.
         """
-        lineno: int | None = None
-        tb = self.__traceback__
+        lineno: int | None = self.error_line
+        tb = self.__traceback__ if lineno is None else None
         while tb is not None:
             if tb.tb_frame.f_code.co_filename == "<agent_generated_code>":
                 lineno = tb.tb_lineno
@@ -281,7 +774,7 @@ class CodeExecutionError(Exception):
 
         error_string = self.message
         annotated_code = annotate_code(self.code, error_line=lineno)
-        traceback_str = "".join(format_exception(self))
+        traceback_str = self.traceback_str or "".join(format_exception(self))
 
         error_info = (
             "<error_message>\n"
@@ -319,14 +812,61 @@ class LocalCodeExecutor:
         detail_conversation_length (int): The number of messages to keep in full detail in the
             conversation history. Every step before this, except the system prompt, will be
             summarized.
+        summary_block_size (int): The number of old messages that are summarized together so
+            that the cached conversation prefix is only rewritten once per block.
+        summary_concurrency (int): The maximum number of summarization model calls that run
+            at the same time.
+        summary_batch_size (int): The maximum number of small messages that are summarized
+            in a single model call.
+        summary_cache (SummaryCache): Cache of summaries keyed by message content, so that
+            the same message is never summarized twice.
+        background_summarization (bool): Whether old messages are summarized in a background
+            task between steps instead of before the next model call.
+        safety_prescreen (bool): Whether actions that the local static pre-screen classifies
+            as benign skip the LLM safety check.
+        safety_allowlist (SafetyAllowlist): Allowlist of side-effect-free patterns for the
+            safety pre-screen.
+        safety_verdict_cache (SafetyVerdictCache): Cache of actions that the LLM safety
+            check found safe, so that repeated actions skip the check.
+        conversation_safety_verdict_cache (SafetyVerdictCache): In-memory cache of the
+            actions that the conversation safety check found safe, which only apply to the
+            conversation of this executor.
+        safety_metrics (SafetyCheckMetrics): Tracks how many safety checks skipped the LLM
+            and the latency that was saved.
+        code_preflight (bool): Whether code is checked for errors that are certain to
+            happen before the safety check, so that broken code goes straight back to the
+            agent.
+        preflight_metrics (PreflightMetrics): Tracks how many code actions failed the
+            pre-flight check.
+        fsync_file_writes (bool): Whether files written by WRITE and EDIT actions are
+            flushed to the disk before they replace the original file.
         interrupted (bool): Flag indicating if execution was interrupted.
         can_prompt_user (bool): Informs the executor about whether the end user has access to the
             terminal (True), or is consuming the service from some remote source where they
             cannot respond via the terminal (False).
+        auxiliary_model_configuration (ModelConfiguration | None): Configuration of a small,
+            fast model for auxiliary tasks such as classification, safety checks,
+            summaries and plans.
+        auxiliary_tasks (Set[ModelTask]): The tasks that run on the auxiliary model when
+            one is configured.
         token_metrics (ExecutorTokenMetrics): Tracks token usage and cost metrics for model calls.
+        task_metrics (Dict[ModelTask, ModelTaskMetrics]): Latency, token usage and cost of
+            the model calls for each task.
+        step_token_metrics (ExecutorTokenMetrics): Token usage and cost metrics since the last
+            step report, used to measure the prompt cache hit rate of each step.
+        excluded_context_records (List[ConversationRecord]): The conversation records that
+            were dropped or truncated to fit the context window on the last model call.
         agent (AgentData | None): The agent data for the current conversation.
         agent_registry (AgentRegistry | None): The agent registry for the current conversation.
         tool_registry (ToolRegistry | None): The tool registry for the current conversation.
+        kernel_pool (KernelPool | None): Pool that the execution kernel of the session is
+            taken from, or None to run code in this process.
+        kernel (ExecutionKernel | None): The execution kernel of the session, started on the
+            first code execution when a kernel pool is set.
+        resource_limits (ResourceLimits): The default resource limits of a code execution
+            step, which the limits of the agent override.
+        step_resource_usage (ResourceUsage | None): The resources used by the last code
+            execution step.
         persist_conversation (bool): Whether to persist the conversation history and code
             execution history to the agent registry on each step.
         agent_state (AgentState): Contains the agent's state including conversation history,
@@ -339,15 +879,37 @@ class LocalCodeExecutor:
 
     context: Dict[str, Any]
     model_configuration: ModelConfiguration
+    auxiliary_model_configuration: ModelConfiguration | None
+    auxiliary_tasks: Set[ModelTask]
     step_counter: int
     max_conversation_history: int
     detail_conversation_length: int
+    summary_block_size: int
+    summary_concurrency: int
+    summary_batch_size: int
+    summary_cache: SummaryCache
+    background_summarization: bool
+    safety_prescreen: bool
+    safety_allowlist: SafetyAllowlist
+    safety_verdict_cache: SafetyVerdictCache
+    conversation_safety_verdict_cache: SafetyVerdictCache
+    safety_metrics: SafetyCheckMetrics
+    code_preflight: bool
+    preflight_metrics: PreflightMetrics
+    fsync_file_writes: bool
     interrupted: bool
     can_prompt_user: bool
     token_metrics: ExecutorTokenMetrics
+    step_token_metrics: ExecutorTokenMetrics
+    task_metrics: Dict[ModelTask, ModelTaskMetrics]
+    excluded_context_records: List[ConversationRecord]
     agent: AgentData | None
     agent_registry: AgentRegistry | None
     tool_registry: ToolRegistry | None
+    kernel_pool: KernelPool | None
+    kernel: ExecutionKernel | None
+    resource_limits: ResourceLimits
+    step_resource_usage: ResourceUsage | None
     persist_conversation: bool
     agent_state: AgentState
     status_queue: Optional[Queue] = None  # type: ignore
@@ -374,6 +936,20 @@ class LocalCodeExecutor:
         verbosity_level: VerbosityLevel = VerbosityLevel.VERBOSE,
         persist_conversation: bool = False,
         job_id: Optional[str] = None,
+        summary_block_size: int = DEFAULT_SUMMARY_BLOCK_SIZE,
+        summary_concurrency: int = DEFAULT_SUMMARY_CONCURRENCY,
+        summary_batch_size: int = DEFAULT_SUMMARY_BATCH_SIZE,
+        summary_cache: Optional[SummaryCache] = None,
+        background_summarization: bool = False,
+        safety_prescreen: bool = False,
+        safety_allowlist: Optional[SafetyAllowlist] = None,
+        safety_verdict_cache: Optional[SafetyVerdictCache] = None,
+        code_preflight: bool = False,
+        fsync_file_writes: bool = True,
+        auxiliary_model_configuration: Optional[ModelConfiguration] = None,
+        auxiliary_tasks: Optional[Iterable[ModelTask]] = None,
+        kernel_pool: Optional[KernelPool] = None,
+        resource_limits: Optional[ResourceLimits] = None,
     ):
         """Initialize the LocalCodeExecutor with a language model.
 
@@ -395,14 +971,68 @@ class LocalCodeExecutor:
             persist_conversation: Whether to automatically persist conversation and execution
                 history to the agent registry after each step
             job_id: Optional identifier for the current job being processed
+            summary_block_size: Number of old messages to summarize together as one block,
+                so that the cached conversation prefix is rewritten at most once per block
+            summary_concurrency: Maximum number of summarization model calls to run at once
+            summary_batch_size: Maximum number of small messages to summarize in one model call
+            summary_cache: Cache of summaries shared between executors, defaults to a new
+                in-memory cache
+            background_summarization: Whether to summarize old messages in a background task
+                between steps instead of before the next model call
+            safety_prescreen: Whether to skip the LLM safety auditor for actions that the
+                local static pre-screen classifies as benign
+            safety_allowlist: Allowlist of side-effect-free patterns for the safety
+                pre-screen, defaults to the built-in allowlist
+            safety_verdict_cache: Cache of SAFE verdicts shared between executors, defaults
+                to a new in-memory cache
+            code_preflight: Whether to check code for errors that are certain to happen
+                before the safety check and the execution
+            fsync_file_writes: Whether WRITE and EDIT actions flush files to the disk before
+                they replace them
+            auxiliary_model_configuration: Optional configuration of a small, fast model for
+                auxiliary tasks, defaults to using the main model for every task
+            auxiliary_tasks: The tasks that run on the auxiliary model, defaults to
+                classification, safety checks, summaries and plans
+            kernel_pool: Optional pool of execution kernels, to run code in a persistent
+                child interpreter instead of this process
+            resource_limits: Default limits on the wall time, CPU time and memory of a code
+                execution step, defaults to no limits
         """
         self.context = {"__builtins__": builtins}
         self.model_configuration = model_configuration
+        self.auxiliary_model_configuration = auxiliary_model_configuration
+        self.auxiliary_tasks = set(
+            DEFAULT_AUXILIARY_TASKS if auxiliary_tasks is None else auxiliary_tasks
+        )
         self.agent_state = agent_state
         self.max_conversation_history = max_conversation_history
         self.detail_conversation_length = detail_conversation_length
+        self.summary_block_size = summary_block_size
+        self.summary_concurrency = summary_concurrency
+        self.summary_batch_size = summary_batch_size
+        self.summary_cache = summary_cache or SummaryCache()
+        self.background_summarization = background_summarization
+        self._summary_task: Optional[asyncio.Task[List[Tuple[ConversationRecord, str, str]]]] = None
+        self.safety_prescreen = safety_prescreen
+        self.safety_allowlist = safety_allowlist or SafetyAllowlist()
+        self.safety_verdict_cache = safety_verdict_cache or SafetyVerdictCache()
+        self.conversation_safety_verdict_cache = SafetyVerdictCache(
+            ttl=self.safety_verdict_cache.ttl
+        )
+        self.safety_metrics = SafetyCheckMetrics()
+        self._early_safety_review: Optional[
+            asyncio.Task[Tuple[ConfirmSafetyResult, str, float]]
+        ] = None
+        self._early_safety_review_key = ""
+        self.code_preflight = code_preflight
+        self.preflight_metrics = PreflightMetrics()
+        self.fsync_file_writes = fsync_file_writes
         self.can_prompt_user = can_prompt_user
         self.token_metrics = ExecutorTokenMetrics()
+        self.step_token_metrics = ExecutorTokenMetrics()
+        self.task_metrics = {}
+        self._cache_prefix_length = 0
+        self.excluded_context_records = []
         self.agent = agent
         self.interrupted = False
         self.max_learnings_history = max_learnings_history
@@ -410,6 +1040,12 @@ class LocalCodeExecutor:
         self.agent_registry = agent_registry
         self.persist_conversation = persist_conversation
         self.job_id = job_id
+        self.kernel_pool = kernel_pool
+        self.kernel = None
+        self.kernel_modules: Dict[str, str] = {}
+        self.kernel_variables: Dict[str, str] = {}
+        self.resource_limits = resource_limits or ResourceLimits()
+        self.step_resource_usage = None
 
         # Load agent context if agent and agent_registry are provided
         if self.agent and self.agent_registry:
@@ -457,45 +1093,302 @@ class LocalCodeExecutor:
         Summarize old conversation steps beyond the detail conversation length.
 
         This method summarizes messages in the conversation history that are beyond the
-        `detail_conversation_length` limit and have not been summarized yet. It ensures that
-        only messages that need summarization are processed, and updates their content with
-        a concise summary.
+        `detail_conversation_length` limit and have not been summarized yet, and updates
+        their content with a concise summary.
+
+        Args:
+            min_token_threshold (int): The minimum number of tokens to consider summarizing.
 
         Returns:
             None
+        """
+        self._apply_summaries(await self._generate_old_step_summaries(min_token_threshold))
 
-        Raises:
-            ValueError: If the conversation record is not of the expected type.
+    async def _generate_old_step_summaries(
+        self, min_token_threshold: int = 1000
+    ) -> List[Tuple[ConversationRecord, str, str]]:
+        """Generate summaries of the old conversation steps without changing the conversation.
+
+        The summarization boundary is aligned to `summary_block_size` records so that old
+        messages are rewritten in whole blocks.  Between blocks the conversation prefix is
+        left untouched and can be served from the provider's prompt cache.  The records are
+        summarized from copies, so the conversation can be used while this runs in the
+        background, and the summaries are applied with `_apply_summaries`.
+
+        Args:
+            min_token_threshold (int): The minimum number of tokens to consider summarizing.
+
+        Returns:
+            List[Tuple[ConversationRecord, str, str]]: The record, the content that was
+                summarized and the summary of each summarized record.
         """
         if len(self.agent_state.conversation) <= 1:  # Just system prompt or empty
-            return
+            return []
 
         if self.detail_conversation_length == -1:
-            return
+            return []
 
-        # Calculate which messages need summarizing
-        history_to_summarize = self.agent_state.conversation[1 : -self.detail_conversation_length]
+        # Calculate which messages need summarizing, aligned to whole blocks
+        stable_length = get_stable_prefix_length(self.agent_state.conversation)
+        detail_boundary = stable_length - self.detail_conversation_length
+        block_size = max(1, self.summary_block_size)
+        aligned_boundary = 1 + ((detail_boundary - 1) // block_size) * block_size
 
+        if aligned_boundary <= 1:
+            return []
+
+        history_to_summarize = self.agent_state.conversation[1:aligned_boundary]
+
+        summaries: List[Tuple[ConversationRecord, str, str]] = []
+        pending: List[ConversationRecord] = []
         for msg in history_to_summarize:
             # Skip messages that are already sufficiently concise/summarized
             if not msg.should_summarize or msg.summarized:
                 continue
 
-            summary = await self._summarize_conversation_step(msg, min_token_threshold)
+            cached_summary = self.summary_cache.get(msg)
+            if cached_summary is not None:
+                summaries.append((msg, msg.content, cached_summary))
+            else:
+                pending.append(msg)
+
+        if not pending:
+            return summaries
+
+        semaphore = asyncio.Semaphore(max(1, self.summary_concurrency))
+
+        async def summarize_batch(batch: List[ConversationRecord]) -> None:
+            copies = [msg.model_copy() for msg in batch]
+            async with semaphore:
+                if len(copies) == 1:
+                    batch_summaries = [
+                        await self._summarize_conversation_step(copies[0], min_token_threshold)
+                    ]
+                else:
+                    batch_summaries = await self._summarize_conversation_steps(
+                        copies, min_token_threshold
+                    )
+
+            for msg, copy, summary in zip(batch, copies, batch_summaries):
+                if summary != copy.content:
+                    self.summary_cache.set(copy, summary)
+                summaries.append((msg, copy.content, summary))
+
+        await asyncio.gather(
+            *(
+                summarize_batch(batch)
+                for batch in self._get_summary_batches(pending, min_token_threshold)
+            )
+        )
+
+        self.summary_cache.save()
+
+        return summaries
+
+    @staticmethod
+    def _apply_summaries(summaries: List[Tuple[ConversationRecord, str, str]]) -> None:
+        """Replace the content of conversation records with their summaries.
+
+        Records that were summarized or changed since the summary was generated are left
+        as they are.
+
+        Args:
+            summaries (List[Tuple[ConversationRecord, str, str]]): The record, the content
+                that was summarized and the summary of each summarized record.
+        """
+        for msg, summarized_content, summary in summaries:
+            if msg.summarized or msg.content != summarized_content:
+                continue
             msg.content = summary
             msg.summarized = True
 
-    def get_model_name(self) -> str:
+    def _get_summary_batches(
+        self, messages: List[ConversationRecord], min_token_threshold: int
+    ) -> List[List[ConversationRecord]]:
+        """Group messages that need summarizing into batches for the summarization model.
+
+        Messages that are short enough to be kept as is, and messages that are too large
+        to share a prompt, are placed in batches of their own.  The remaining messages are
+        grouped into batches of up to `summary_batch_size` messages.
+
+        Args:
+            messages (List[ConversationRecord]): The messages to summarize.
+            min_token_threshold (int): The minimum number of tokens to consider summarizing.
+
+        Returns:
+            List[List[ConversationRecord]]: The batches of messages, in conversation order.
+        """
+        batches: List[List[ConversationRecord]] = []
+        current_batch: List[ConversationRecord] = []
+        batch_size = max(1, self.summary_batch_size)
+        summary_model = self.get_task_model_configuration(ModelTask.SUMMARIZE)
+
+        for msg in messages:
+            token_count = self.get_record_token_count(msg, summary_model)
+            if token_count <= min_token_threshold or token_count > MAX_BATCHED_SUMMARY_TOKENS:
+                batches.append([msg])
+                continue
+
+            current_batch.append(msg)
+            if len(current_batch) >= batch_size:
+                batches.append(current_batch)
+                current_batch = []
+
+        if current_batch:
+            batches.append(current_batch)
+
+        return batches
+
+    def start_background_summarization(self) -> None:
+        """Generate summaries of old conversation steps in a background task.
+
+        The summaries are generated from copies of the records while the next step runs,
+        so that the summarization model calls are not on the critical path, and are only
+        applied to the conversation at a step boundary by `apply_background_summaries` or
+        `wait_for_background_summarization`.  If a background summarization is already
+        running, no new task is started.
+        """
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+
+        self._summary_task = asyncio.create_task(self._run_background_summarization())
+        self._summary_task.add_done_callback(self._log_background_summarization_error)
+
+    async def _run_background_summarization(self) -> List[Tuple[ConversationRecord, str, str]]:
+        # The task runs in a copy of the context, so this only applies to its model calls
+        _in_background_summarization.set(True)
+        return await self._generate_old_step_summaries()
+
+    def apply_background_summaries(self) -> bool:
+        """Apply the summaries of a completed background summarization, if any.
+
+        A background summarization that is still running is left running.
+
+        Returns:
+            bool: True if summaries were applied to the conversation
+        """
+        task = self._summary_task
+        if task is None or not task.done():
+            return False
+
+        self._summary_task = None
+        if task.cancelled() or task.exception() is not None:
+            return False
+
+        summaries = task.result()
+        self._apply_summaries(summaries)
+        return bool(summaries)
+
+    async def wait_for_background_summarization(self) -> bool:
+        """Wait for a running background summarization task to complete, if any, and apply
+        its summaries.
+
+        Returns:
+            bool: True if summaries were applied to the conversation
+        """
+        if self._summary_task is not None and not self._summary_task.done():
+            await asyncio.wait([self._summary_task])
+        return self.apply_background_summaries()
+
+    def cancel_background_summarization(self) -> None:
+        """Cancel a running background summarization task, if any, without applying it."""
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
+        self._summary_task = None
+
+    @staticmethod
+    def _log_background_summarization_error(task: "asyncio.Task[Any]") -> None:
+        """Log the error of a failed background summarization task."""
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning(f"Background summarization failed: {task.exception()}")
+
+    def get_model_name(self, model_configuration: Optional[ModelConfiguration] = None) -> str:
         """Get the name of the model being used.
 
+        Args:
+            model_configuration: The model configuration to get the name of, defaults to the
+                main model
+
         Returns:
             str: The lowercase name of the model. For OpenAI models, returns the model_name
                 attribute. For other models, returns the string representation of the model.
         """
-        if isinstance(self.model_configuration.instance, ChatOpenAI):
-            return self.model_configuration.instance.model_name.lower()
+        model_configuration = model_configuration or self.model_configuration
+        if isinstance(model_configuration.instance, ChatOpenAI):
+            return model_configuration.instance.model_name.lower()
         else:
-            return str(self.model_configuration.instance.model).lower()
+            return str(model_configuration.instance.model).lower()
+
+    def get_task_model_configuration(self, task: ModelTask) -> ModelConfiguration:
+        """Get the configuration of the model that a task runs on.
+
+        Args:
+            task (ModelTask): The kind of model call
+
+        Returns:
+            ModelConfiguration: The auxiliary model for auxiliary tasks if one is configured,
+                otherwise the main model
+        """
+        if self.auxiliary_model_configuration is not None and task in self.auxiliary_tasks:
+            return self.auxiliary_model_configuration
+        return self.model_configuration
+
+    def get_task_metrics(self) -> Dict[ModelTask, ModelTaskMetrics]:
+        """Get the latency, token usage and cost of the model calls for each task."""
+        return self.task_metrics
+
+    def get_task_usage_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Get the per-task usage for reporting, when tasks are split across models.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: The model, call count, average latency and cost of
+                each task, or an empty dictionary if no auxiliary model is configured.
+        """
+        if self.auxiliary_model_configuration is None:
+            return {}
+
+        return {
+            task.value: {
+                "model": metrics.model,
+                "calls": metrics.calls,
+                "average_seconds": metrics.average_seconds(),
+                "cost": metrics.total_cost,
+            }
+            for task, metrics in self.task_metrics.items()
+        }
+
+    def get_safety_check_summary(self) -> Dict[str, Any]:
+        """Get how many safety checks of this agent skipped the LLM auditor, for reporting.
+
+        Returns:
+            Dict[str, Any]: The number of checks, the fraction that was resolved by the
+                pre-screen or the verdict cache and the estimated latency saved, or an empty
+                dictionary if no action has been checked yet.
+        """
+        if self.safety_metrics.total_checks == 0:
+            return {}
+
+        return {
+            "total_checks": self.safety_metrics.total_checks,
+            "skip_fraction": self.safety_metrics.skip_fraction(),
+            "seconds_saved": self.safety_metrics.estimated_seconds_saved(),
+        }
+
+    def get_preflight_summary(self) -> Dict[str, Any]:
+        """Get how many code actions failed the pre-flight check, for reporting.
+
+        Returns:
+            Dict[str, Any]: The number of checks and the number of failed checks, each of
+                which avoided a safety check and an execution, or an empty dictionary if no
+                code has been checked yet.
+        """
+        if self.preflight_metrics.total_checks == 0:
+            return {}
+
+        return {
+            "total_checks": self.preflight_metrics.total_checks,
+            "round_trips_avoided": self.preflight_metrics.failed_checks,
+        }
 
     def get_token_metrics(self) -> ExecutorTokenMetrics:
         """Get the total token metrics for the current session."""
@@ -505,7 +1398,8 @@ class LocalCodeExecutor:
         """Calculate the total number of tokens in a list of conversation messages.
 
         Uses the appropriate tokenizer for the current model to count tokens. Falls back
-        to the GPT-4 tokenizer if the model-specific tokenizer is not available.
+        to the GPT-4 tokenizer if the model-specific tokenizer is not available.  Token
+        counts are cached on each record, so only new or changed records are tokenized.
 
         Args:
             messages: List of conversation message dictionaries, each containing a "content" key
@@ -514,17 +1408,133 @@ class LocalCodeExecutor:
         Returns:
             int: Total number of tokens across all messages.
         """
-        tokenizer = None
-        try:
-            tokenizer = encoding_for_model(self.get_model_name())
-        except Exception:
-            tokenizer = encoding_for_model("gpt-4o")
+        return sum(self.get_record_token_count(entry) for entry in messages)
+
+    def get_record_token_count(
+        self,
+        record: ConversationRecord,
+        model_configuration: Optional[ModelConfiguration] = None,
+    ) -> int:
+        """Get the number of tokens in the content of a conversation record.
 
-        total_tokens = 0
-        for entry in messages:
-            if entry.content:  # Ensure content is not None or empty before encoding
-                total_tokens += len(tokenizer.encode(entry.content))
-        return total_tokens
+        The count is stored on the record and only recomputed when its content or the
+        tokenizer changes, so records are only encoded once no matter how many times the
+        conversation is packed.
+
+        Args:
+            record (ConversationRecord): The record to count the tokens of.
+            model_configuration (Optional[ModelConfiguration]): The model whose tokenizer is
+                used, defaults to the main model.
+
+        Returns:
+            int: The number of tokens in the record content.
+        """
+        return record.get_token_count(get_tokenizer(self.get_model_name(model_configuration)))
+
+    def get_record_context_token_count(
+        self,
+        record: ConversationRecord,
+        model_configuration: Optional[ModelConfiguration] = None,
+    ) -> int:
+        """Get the number of tokens that a conversation record takes up in a model call.
+
+        This is the token count of the content plus the per message overhead and an
+        estimate for each attached file.
+
+        Args:
+            record (ConversationRecord): The record to count the tokens of.
+            model_configuration (Optional[ModelConfiguration]): The model whose tokenizer is
+                used, defaults to the main model.
+
+        Returns:
+            int: The number of tokens of the record in the request.
+        """
+        return (
+            self.get_record_token_count(record, model_configuration)
+            + MESSAGE_TOKEN_OVERHEAD
+            + len(record.files or []) * ATTACHMENT_TOKEN_ESTIMATE
+        )
+
+    def get_summarized_record(self, record: ConversationRecord) -> Optional[ConversationRecord]:
+        """Get a copy of a conversation record with its content replaced by its summary.
+
+        Only summaries that are already known are used, so that packing the conversation
+        never waits for a model call.
+
+        Args:
+            record (ConversationRecord): The record to summarize.
+
+        Returns:
+            Optional[ConversationRecord]: The summarized copy, the record itself if it is
+                already summarized, or None if no summary is cached for it.
+        """
+        if record.summarized:
+            return record
+        if not record.should_summarize:
+            return None
+
+        summary = self.summary_cache.get(record)
+        if summary is None:
+            return None
+
+        return record.model_copy(update={"content": summary, "summarized": True})
+
+    def get_context_token_budget(
+        self, model_configuration: Optional[ModelConfiguration] = None
+    ) -> int:
+        """Get the number of tokens available for the conversation in a model call.
+
+        The budget is the model's context window less a reserve for the response and a
+        safety margin for differences between the local and provider tokenizers.
+
+        Args:
+            model_configuration: The model that is called, defaults to the main model.
+
+        Returns:
+            int: The token budget, or -1 if the model's context window is unknown.
+        """
+        model_configuration = model_configuration or self.model_configuration
+        model_info = getattr(model_configuration, "info", None)
+        context_window = getattr(model_info, "context_window", None)
+        if not isinstance(context_window, int) or context_window <= 0:
+            return -1
+
+        output_reserve = DEFAULT_OUTPUT_TOKEN_RESERVE
+        for max_tokens in (
+            getattr(model_configuration, "max_tokens", None),
+            getattr(model_info, "max_tokens", None),
+        ):
+            if isinstance(max_tokens, int) and max_tokens > 0:
+                output_reserve = max_tokens
+                break
+
+        output_reserve = min(output_reserve, context_window // 2)
+        safety_margin = int(context_window * CONTEXT_WINDOW_SAFETY_MARGIN)
+
+        return context_window - output_reserve - safety_margin
+
+    def pack_context(
+        self,
+        messages: List[ConversationRecord],
+        model_configuration: Optional[ModelConfiguration] = None,
+    ) -> ContextPackResult:
+        """Pack conversation records so that they fit the model's context window.
+
+        Args:
+            messages (List[ConversationRecord]): The records to send to the model.
+            model_configuration (Optional[ModelConfiguration]): The model that is called,
+                defaults to the main model.
+
+        Returns:
+            ContextPackResult: The packed records, the excluded records and the token count.
+        """
+        return pack_conversation_context(
+            messages,
+            self.get_context_token_budget(model_configuration),
+            lambda record: self.get_record_context_token_count(record, model_configuration),
+            summarize=self.get_summarized_record,
+            block_size=self.summary_block_size,
+        )
 
     def get_session_token_usage(self) -> int:
         """Get the total token count for the current session."""
@@ -685,13 +1695,15 @@ class LocalCodeExecutor:
         return blocks
 
     async def _convert_and_stream(
-        self, messages: List[ConversationRecord]
+        self, messages: List[ConversationRecord], task: ModelTask = ModelTask.ACTION
     ) -> AsyncGenerator[BaseMessage, None]:
         """Convert the messages to a list of dictionaries and invoke the model with streaming.
 
         Args:
             messages (List[ConversationRecord]): A list of conversation records to send to the
             model.
+            task (ModelTask): The kind of model call, used to pick the model and to track the
+            latency and cost of each task.
 
         Yields:
             BaseMessage: Chunks of the model's response.
@@ -700,13 +1712,35 @@ class LocalCodeExecutor:
             Exception: If there is an error during model invocation.
         """
         messages_list = []
+        sent_records: List[ConversationRecord] = []
+        start_time = time.monotonic()
+        model_configuration = self.get_task_model_configuration(task)
+
+        # Only the main conversation has a stable prefix that carries over between calls,
+        # auxiliary prompts such as safety checks and summaries are built fresh each time.
+        is_main_conversation = (
+            messages is self.agent_state.conversation
+            and model_configuration is self.model_configuration
+        )
+
+        # Keep records that change between calls behind the cacheable prefix, and make sure
+        # that the request fits the context window of the model
+        pack_result = self.pack_context(order_volatile_records_last(messages), model_configuration)
+        if pack_result.excluded:
+            logging.debug(
+                f"Packed {len(messages)} records into {pack_result.token_count} tokens, "
+                f"excluded {len(pack_result.excluded)} records"
+            )
+        if is_main_conversation:
+            self.excluded_context_records = pack_result.excluded
 
         # Only Anthropic requires manual cache control
         should_manual_cache_control = (
-            "anthropic" in self.get_model_name() or self.model_configuration.hosting == "anthropic"
+            "anthropic" in self.get_model_name(model_configuration)
+            or model_configuration.hosting == "anthropic"
         )
 
-        for record in messages:
+        for record in pack_result.records:
             content_parts = []
             # Add main text content if it exists
             if record.content:
@@ -764,94 +1798,75 @@ class LocalCodeExecutor:
                 "content": content_parts,
             }
             messages_list.append(msg)
+            sent_records.append(record)
 
         if should_manual_cache_control:
-            cache_count = 0
-            # Iterate over a copy of messages_list for safe modification if needed,
-            # or ensure logic correctly maps indices if messages_list can change.
-            # For cache control, we are modifying `msg` which is part of `messages_list`.
-            for idx, msg_container in reversed(list(enumerate(messages_list))):
-                # msg_container is the dict like {"role": ..., "content": [...]}
-                # messages[idx] is the original ConversationRecord
-                if messages[idx].should_cache and msg_container["content"]:
-                    # Apply cache control to the first part of the content list,
-                    # assuming it's the primary text part or a significant part.
-                    # This might need adjustment based on how providers handle cache control
-                    # for multipart messages.
-                    # Ensure there's content to apply cache control to.
-                    if (
-                        isinstance(msg_container["content"], list)
-                        and len(msg_container["content"]) > 0
-                    ):
-                        # Ensure the first part is a dictionary before adding cache_control
-                        if isinstance(msg_container["content"][0], dict):
-                            msg_container["content"][0]["cache_control"] = {
-                                "type": "ephemeral",
-                            }
-                            cache_count += 1
-                            # Only 4 cache checkpoints allowed
-                            if cache_count >= 4:
-                                break
-                        else:
-                            # Log or handle cases where the first content
-                            # part isn't a dict as expected
-                            logging.warning(
-                                "Cache control: First content part for "
-                                f"message {idx} is not a dict."
-                            )
-                    else:
-                        # Log or handle cases where content is unexpectedly not a list or is empty
-                        logging.warning(
-                            f"Cache control: Content for message {idx} is not a list or is empty."
-                        )
+            breakpoints = select_cache_breakpoints(
+                sent_records,
+                previous_prefix_length=self._cache_prefix_length if is_main_conversation else 0,
+            )
+            for idx in breakpoints:
+                # Apply cache control to the last content part so that attached files
+                # are included in the cached prefix.
+                messages_list[idx]["content"][-1]["cache_control"] = {"type": "ephemeral"}
 
-        model_instance = self.model_configuration.instance
+        if is_main_conversation:
+            self._cache_prefix_length = get_stable_prefix_length(sent_records)
 
-        new_tokens_prompt = 0
-        new_tokens_completion = 0
+        model_instance = model_configuration.instance
+        usage = StreamTokenUsage()
+        response_parts: List[str] = []
 
-        # Use get_openai_callback for OpenAI models to track token usage and cost
-        if isinstance(model_instance, ChatOpenAI):
+        async for chunk in model_instance.astream(messages_list):
+            if hasattr(chunk, "content") and chunk.content and isinstance(chunk.content, str):
+                response_parts.append(chunk.content)
 
-            with get_openai_callback() as cb:
-                async for chunk in model_instance.astream(messages_list):
-                    # Increment completion tokens (approximate for now)
-                    if (
-                        hasattr(chunk, "content")
-                        and chunk.content
-                        and isinstance(chunk.content, str)
-                    ):
-                        # Very rough approximation of token count
-                        new_tokens_completion += len(chunk.content.split()) / 2
+            usage.add_chunk(chunk)
 
-                    yield chunk
+            yield chunk
 
-                if cb is not None:
-                    new_tokens_prompt = cb.prompt_tokens
-                    new_tokens_completion = cb.completion_tokens
-        else:
-            # For other models, use direct streaming
-            new_tokens_prompt = self.get_invoke_token_count(messages)
-
-            async for chunk in model_instance.astream(messages_list):
-                # Increment completion tokens (approximate for now)
-                if hasattr(chunk, "content") and chunk.content and isinstance(chunk.content, str):
-                    # Very rough approximation of token count
-                    new_tokens_completion += len(chunk.content.split()) / 2
-
-                yield chunk
+        # Prefer the usage reported by the provider, and fall back to local estimates
+        # for providers that do not report usage while streaming.
+        new_tokens_prompt = usage.input_tokens or pack_result.token_count
+        new_tokens_completion = usage.output_tokens
+        if not new_tokens_completion and response_parts:
+            new_tokens_completion = self.get_record_token_count(
+                ConversationRecord(content="".join(response_parts)), model_configuration
+            )
 
         # Update token metrics and cost after streaming is complete
-        self.token_metrics.total_prompt_tokens += new_tokens_prompt
-        self.token_metrics.total_completion_tokens += int(new_tokens_completion)
-        self.token_metrics.total_cost += calculate_cost(
-            self.model_configuration.info,
+        new_cost = calculate_cost(
+            model_configuration.info,
             new_tokens_prompt,
-            int(new_tokens_completion),
+            new_tokens_completion,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_write_tokens=usage.cache_write_tokens,
         )
 
+        updated_metrics = [self.token_metrics]
+        if not _in_background_summarization.get():
+            updated_metrics.append(self.step_token_metrics)
+
+        for metrics in updated_metrics:
+            metrics.total_prompt_tokens += new_tokens_prompt
+            metrics.total_completion_tokens += new_tokens_completion
+            metrics.total_cache_read_tokens += usage.cache_read_tokens
+            metrics.total_cache_write_tokens += usage.cache_write_tokens
+            metrics.total_cost += new_cost
+
+        task_metrics = self.task_metrics.setdefault(task, ModelTaskMetrics())
+        task_metrics.model = f"{model_configuration.hosting}/{model_configuration.name}"
+        task_metrics.calls += 1
+        task_metrics.total_seconds += time.monotonic() - start_time
+        task_metrics.total_prompt_tokens += new_tokens_prompt
+        task_metrics.total_completion_tokens += new_tokens_completion
+        task_metrics.total_cost += new_cost
+
     async def invoke_model(
-        self, messages: List[ConversationRecord], max_attempts: int = 3
+        self,
+        messages: List[ConversationRecord],
+        max_attempts: int = 3,
+        task: ModelTask = ModelTask.ACTION,
     ) -> BaseMessage:
         """Invoke the language model with a list of messages.
 
@@ -862,6 +1877,8 @@ class LocalCodeExecutor:
         Args:
             messages: List of message dictionaries containing 'role' and 'content' keys
             max_attempts: Maximum number of retry attempts on failure (default: 3)
+            task: The kind of model call, auxiliary tasks run on the auxiliary model if one
+                is configured
 
         Returns:
             BaseMessage: The model's response message
@@ -877,7 +1894,7 @@ class LocalCodeExecutor:
             try:
                 # Use streaming but collect the full response
                 full_response = None
-                async for chunk in self._convert_and_stream(messages):
+                async for chunk in self._convert_and_stream(messages, task):
                     if full_response is None:
                         full_response = chunk
                     else:
@@ -918,7 +1935,10 @@ class LocalCodeExecutor:
             raise Exception("Failed to invoke model")
 
     async def stream_model(
-        self, messages: List[ConversationRecord], max_attempts: int = 3
+        self,
+        messages: List[ConversationRecord],
+        max_attempts: int = 3,
+        task: ModelTask = ModelTask.ACTION,
     ) -> AsyncGenerator[BaseMessage, None]:
         """Stream responses from the language model with a list of messages.
 
@@ -928,6 +1948,8 @@ class LocalCodeExecutor:
         Args:
             messages: List of message dictionaries containing 'role' and 'content' keys
             max_attempts: Maximum number of retry attempts on failure (default: 3)
+            task: The kind of model call, auxiliary tasks run on the auxiliary model if one
+                is configured
 
         Yields:
             BaseMessage: Chunks of the model's response message
@@ -941,7 +1963,7 @@ class LocalCodeExecutor:
 
         while attempt < max_attempts:
             try:
-                async for chunk in self._convert_and_stream(messages):
+                async for chunk in self._convert_and_stream(messages, task):
                     yield chunk
                 return
             except Exception as e:
@@ -981,6 +2003,30 @@ class LocalCodeExecutor:
         Returns:
             ConfirmSafetyResult: Result of the safety check
         """
+        safety_result, response_content = await self.request_safety_review(
+            response, conversation_length, prompt_user
+        )
+        return self.apply_safety_review(safety_result, response_content, prompt_user)
+
+    async def request_safety_review(
+        self, response: ResponseJsonSchema, conversation_length: int = 8, prompt_user: bool = True
+    ) -> Tuple[ConfirmSafetyResult, str]:
+        """Ask the security auditor model to review an action.
+
+        This only reads the conversation history, so that it can run while the rest of the
+        agent response is still streaming.  The verdict is applied to the conversation by
+        apply_safety_review.
+
+        Args:
+            response (ResponseJsonSchema): The response from the language model
+            conversation_length (int): Number of recent messages to include in the
+                conversation audit
+            prompt_user (bool): Whether the user can be prompted, in which case the action is
+                audited on its own against the agent security prompt
+
+        Returns:
+            Tuple[ConfirmSafetyResult, str]: The verdict and the analysis of the auditor
+        """
         security_response: BaseMessage
 
         agent_security_prompt = self.agent.security_prompt if self.agent else ""
@@ -1006,14 +2052,14 @@ class LocalCodeExecutor:
                 ),
             ]
 
-            security_response = await self.invoke_model(safety_history)
+            security_response = await self.invoke_model(safety_history, task=ModelTask.SAFETY)
 
             response_content = (
                 security_response.content
                 if isinstance(security_response.content, str)
                 else str(security_response.content)
             )
-            return get_confirm_safety_result(response_content)
+            return get_confirm_safety_result(response_content), response_content
 
         # If we can't prompt the user, we need to use the conversation history to determine
         # if the user has previously indicated an override or a safe decision otherwise
@@ -1051,7 +2097,9 @@ class LocalCodeExecutor:
         )
 
         try:
-            security_response = await self.invoke_model(safety_check_conversation)
+            security_response = await self.invoke_model(
+                safety_check_conversation, task=ModelTask.SAFETY
+            )
             response_content = (
                 security_response.content
                 if isinstance(security_response.content, str)
@@ -1059,11 +2107,27 @@ class LocalCodeExecutor:
             )
         except Exception as e:
             print(f"Error invoking security check model: {e}")
-            return ConfirmSafetyResult.UNSAFE
+            return ConfirmSafetyResult.UNSAFE, ""
 
-        safety_result = get_confirm_safety_result(response_content)
+        return get_confirm_safety_result(response_content), response_content
 
-        if safety_result == ConfirmSafetyResult.UNSAFE:
+    def apply_safety_review(
+        self, safety_result: ConfirmSafetyResult, response_content: str, prompt_user: bool
+    ) -> ConfirmSafetyResult:
+        """Apply the verdict of the security auditor to the conversation.
+
+        When the user cannot be prompted, the analysis of an unsafe action is added to the
+        conversation so that the agent can explain the risk to the user.
+
+        Args:
+            safety_result (ConfirmSafetyResult): The verdict of the auditor
+            response_content (str): The analysis of the auditor
+            prompt_user (bool): Whether the user can be prompted
+
+        Returns:
+            ConfirmSafetyResult: The verdict of the auditor
+        """
+        if not prompt_user and safety_result == ConfirmSafetyResult.UNSAFE and response_content:
             analysis = response_content.replace("[UNSAFE]", "").strip()
             self.append_to_history(
                 ConversationRecord(
@@ -1172,58 +2236,311 @@ class LocalCodeExecutor:
                     " prompt\033[0m\n"
                 )
 
-    async def execute_code(
-        self, response: ResponseJsonSchema, max_retries: int = 1
-    ) -> CodeExecutionResult:
-        """Execute Python code with safety checks and context management.
+    async def execute_code(
+        self, response: ResponseJsonSchema, max_retries: int = 1
+    ) -> CodeExecutionResult:
+        """Execute Python code with safety checks and context management.
+
+        Args:
+            code (str): The Python code to execute
+            max_retries (int): Maximum number of retry attempts
+
+        Returns:
+            CodeExecutionResult: The result of the code execution
+        """
+
+        current_response = response
+        final_error: Exception | None = None
+        self.step_resource_usage = None
+
+        for attempt in range(max_retries):
+            try:
+                return await self._execute_with_output(current_response)
+            except Exception as error:
+                final_error = error
+                if attempt == 0:
+                    self._record_initial_error(error)
+                else:
+                    self._record_retry_error(error, attempt - 1)
+
+                log_retry_error(error, attempt, max_retries, self.verbosity_level)
+
+                self.update_ephemeral_messages()
+
+                if attempt < max_retries - 1:
+                    try:
+                        new_response = await self._get_corrected_code()
+                        if new_response:
+                            current_response = new_response
+                        else:
+                            break
+                    except Exception as retry_error:
+                        log_retry_error(retry_error, attempt, max_retries, self.verbosity_level)
+                        break
+
+        formatted_print = format_error_output(
+            final_error or Exception("Unknown error occurred"), max_retries
+        )
+
+        return CodeExecutionResult(
+            stdout="",
+            stderr=str(final_error),
+            logging="",
+            message=current_response.response,
+            code=response.code,
+            formatted_print=formatted_print,
+            role=ConversationRole.ASSISTANT,
+            status=ProcessResponseStatus.ERROR,
+            files=[],
+            execution_type=ExecutionType.ACTION,
+            action=ActionType.CODE,
+            resource_usage=self.step_resource_usage,
+        )
+
+    async def check_and_confirm_safety(self, response: ResponseJsonSchema) -> ConfirmSafetyResult:
+        """Check code safety and get user confirmation if needed.
+
+        Args:
+            response (ResponseJsonSchema): The response from the language model
+
+        Returns:
+            ConfirmSafetyResult: Result of the safety check
+        """
+        if self.prescreen_response_safety(response) == SafetyScreenResult.BENIGN:
+            self.cancel_early_safety_review()
+            self.safety_metrics.record_skip()
+            logging.debug(
+                "Skipped LLM safety check for benign %s action (%.0f%% of checks skipped, "
+                "~%.1fs saved)",
+                response.action.value,
+                self.safety_metrics.skip_fraction() * 100,
+                self.safety_metrics.estimated_seconds_saved(),
+            )
+            return ConfirmSafetyResult.SAFE
+
+        verdict_key = self.get_safety_verdict_key(response)
+        early_review = self._take_early_safety_review(verdict_key)
+
+        if self.get_safety_verdict_cache().is_safe(verdict_key):
+            if early_review:
+                early_review.cancel()
+            self.safety_metrics.record_cache_hit()
+            return ConfirmSafetyResult.SAFE
+
+        if early_review:
+            wait_start_time = time.monotonic()
+            safety_result, response_content, review_seconds = await early_review
+            wait_seconds = time.monotonic() - wait_start_time
+            safety_result = self.apply_safety_review(
+                safety_result, response_content, self.can_prompt_user
+            )
+            self.safety_metrics.record_llm_check(
+                review_seconds, pipelined_seconds=max(0.0, review_seconds - wait_seconds)
+            )
+        else:
+            start_time = time.monotonic()
+            safety_result = await self.check_response_safety(
+                response, prompt_user=self.can_prompt_user
+            )
+            self.safety_metrics.record_llm_check(time.monotonic() - start_time)
+
+        # Only SAFE verdicts are cached so that a cache hit never approves an unsafe action
+        if safety_result == ConfirmSafetyResult.SAFE:
+            self.get_safety_verdict_cache().mark_safe(verdict_key)
+            self.get_safety_verdict_cache().save()
+
+        if safety_result == ConfirmSafetyResult.UNSAFE and self.can_prompt_user:
+            return self.prompt_for_safety()
+
+        return safety_result
+
+    def start_early_safety_review(self, response: ResponseJsonSchema) -> bool:
+        """Start the safety review of an action while the agent response is still streaming.
+
+        The review runs in the background and is picked up by check_and_confirm_safety if
+        the final action matches the action that was reviewed, otherwise it is cancelled.
+        Actions that the pre-screen or the verdict cache resolve are not reviewed early.
+
+        Args:
+            response (ResponseJsonSchema): The action parsed from the partial agent response,
+                once the fields that define the action are complete
+
+        Returns:
+            bool: True if a review was started
+        """
+        self.cancel_early_safety_review()
+
+        if response.action not in SAFETY_CHECKED_ACTIONS:
+            return False
+
+        if self.prescreen_response_safety(response) == SafetyScreenResult.BENIGN:
+            return False
+
+        verdict_key = self.get_safety_verdict_key(response)
+        if self.get_safety_verdict_cache().is_safe(verdict_key):
+            return False
+
+        self._early_safety_review_key = verdict_key
+        self._early_safety_review = asyncio.create_task(self._run_timed_safety_review(response))
+        return True
+
+    def cancel_early_safety_review(self) -> None:
+        """Cancel the pending early safety review, if any."""
+        if self._early_safety_review and not self._early_safety_review.done():
+            self._early_safety_review.cancel()
+        self._early_safety_review = None
+        self._early_safety_review_key = ""
+
+    def _take_early_safety_review(
+        self, verdict_key: str
+    ) -> Optional[asyncio.Task[Tuple[ConfirmSafetyResult, str, float]]]:
+        """Take the early safety review if it reviewed the same action.
+
+        Args:
+            verdict_key (str): The verdict key of the final action
+
+        Returns:
+            Optional[asyncio.Task]: The early review task, or None if there is no early
+                review or it reviewed a different action, in which case it is cancelled
+        """
+        early_review = self._early_safety_review
+        if early_review is None:
+            return None
+
+        if self._early_safety_review_key != verdict_key:
+            logging.debug("Cancelled early safety review because the action changed")
+            self.cancel_early_safety_review()
+            return None
+
+        self._early_safety_review = None
+        self._early_safety_review_key = ""
+        return early_review
+
+    async def _run_timed_safety_review(
+        self, response: ResponseJsonSchema
+    ) -> Tuple[ConfirmSafetyResult, str, float]:
+        """Request a safety review and measure how long it takes.
+
+        Args:
+            response (ResponseJsonSchema): The response from the language model
+
+        Returns:
+            Tuple[ConfirmSafetyResult, str, float]: The verdict, the analysis of the auditor
+                and the number of seconds that the review took
+        """
+        start_time = time.monotonic()
+        safety_result, response_content = await self.request_safety_review(
+            response, prompt_user=self.can_prompt_user
+        )
+        return safety_result, response_content, time.monotonic() - start_time
+
+    def get_safety_verdict_cache(self) -> SafetyVerdictCache:
+        """Get the cache for the verdicts of the current safety check mode.
+
+        Verdicts from the standalone security audit only depend on the action, the agent
+        security prompt and the model, so they are persisted and shared between agents.
+        Verdicts from the conversation audit can depend on approvals given in the
+        conversation, so they are only kept in memory for the conversation of this
+        executor.
+
+        Returns:
+            SafetyVerdictCache: The verdict cache to use
+        """
+        if self.can_prompt_user:
+            return self.safety_verdict_cache
+        return self.conversation_safety_verdict_cache
+
+    def get_safety_verdict_key(self, response: ResponseJsonSchema) -> str:
+        """Get the safety verdict cache key for an action.
+
+        File paths are resolved against the current working directory, and conversation
+        verdicts are scoped to the agent, see get_safety_verdict_cache.
 
         Args:
-            code (str): The Python code to execute
-            max_retries (int): Maximum number of retry attempts
+            response (ResponseJsonSchema): The response from the language model
 
         Returns:
-            CodeExecutionResult: The result of the code execution
+            str: The verdict cache key for the action
         """
+        security_prompt = self.agent.security_prompt if self.agent else ""
+        if not isinstance(security_prompt, str):
+            security_prompt = ""
+        safety_model = self.get_task_model_configuration(ModelTask.SAFETY)
+        model_name = f"{safety_model.hosting}/{safety_model.name}"
+
+        if self.can_prompt_user:
+            scope = "audit"
+        else:
+            scope = f"conversation:{self.agent.id if self.agent else ''}"
 
-        current_response = response
-        final_error: Exception | None = None
+        return get_safety_verdict_key(response, security_prompt, model_name, scope, Path.cwd())
 
-        for attempt in range(max_retries):
-            try:
-                return await self._execute_with_output(current_response)
-            except Exception as error:
-                final_error = error
-                if attempt == 0:
-                    self._record_initial_error(error)
-                else:
-                    self._record_retry_error(error, attempt - 1)
+    def prescreen_response_safety(self, response: ResponseJsonSchema) -> SafetyScreenResult:
+        """Classify an action with the local static safety pre-screen.
 
-                log_retry_error(error, attempt, max_retries, self.verbosity_level)
+        Actions are only classified as benign when the pre-screen is enabled and the agent
+        has no custom security prompt, since the static allowlist cannot take custom
+        security rules into account.
 
-                self.update_ephemeral_messages()
+        Args:
+            response (ResponseJsonSchema): The response from the language model
 
-                if attempt < max_retries - 1:
-                    try:
-                        new_response = await self._get_corrected_code()
-                        if new_response:
-                            current_response = new_response
-                        else:
-                            break
-                    except Exception as retry_error:
-                        log_retry_error(retry_error, attempt, max_retries, self.verbosity_level)
-                        break
+        Returns:
+            SafetyScreenResult: BENIGN if the LLM safety auditor can be skipped, otherwise
+                UNCERTAIN
+        """
+        if not self.safety_prescreen or (self.agent and self.agent.security_prompt):
+            return SafetyScreenResult.UNCERTAIN
+
+        return screen_action(
+            response,
+            Path.cwd(),
+            self.safety_allowlist,
+            {**get_context_modules(self.context), **self.kernel_modules},
+        )
 
-        formatted_print = format_error_output(
-            final_error or Exception("Unknown error occurred"), max_retries
+    def preflight_code(self, response: ResponseJsonSchema) -> Optional[CodeExecutionResult]:
+        """Check the code of an action for errors that are certain to happen when it runs.
+
+        Code that fails the check is sent back to the agent with the errors that were found,
+        without a safety check or an execution.  Undefined names are not checked while the
+        context lives in an execution kernel, whose variables are not known here.
+
+        Args:
+            response (ResponseJsonSchema): The response from the language model
+
+        Returns:
+            CodeExecutionResult | None: The error result if the code failed the check, or
+                None if it passed or the check is disabled
+        """
+        if not self.code_preflight or not response.code:
+            return None
+
+        tool_registry = getattr(self, "tool_registry", None)
+        diagnostics = preflight_check(
+            response.code,
+            self.context if self.kernel is None else None,
+            tool_registry if isinstance(tool_registry, ToolRegistry) else None,
+        )
+        self.preflight_metrics.record(passed=not diagnostics)
+        if not diagnostics:
+            return None
+
+        error = CodeExecutionError(
+            message="\n".join(str(diagnostic) for diagnostic in diagnostics),
+            code=response.code,
+            error_line=diagnostics[0].line,
         )
+        self._record_preflight_error(error)
+        self.update_ephemeral_messages()
 
         return CodeExecutionResult(
             stdout="",
-            stderr=str(final_error),
+            stderr=error.message,
             logging="",
-            message=current_response.response,
+            message=response.response,
             code=response.code,
-            formatted_print=formatted_print,
+            formatted_print=format_preflight_error_output(error),
             role=ConversationRole.ASSISTANT,
             status=ProcessResponseStatus.ERROR,
             files=[],
@@ -1231,22 +2548,6 @@ class LocalCodeExecutor:
             action=ActionType.CODE,
         )
 
-    async def check_and_confirm_safety(self, response: ResponseJsonSchema) -> ConfirmSafetyResult:
-        """Check code safety and get user confirmation if needed.
-
-        Args:
-            response (ResponseJsonSchema): The response from the language model
-
-        Returns:
-            ConfirmSafetyResult: Result of the safety check
-        """
-        safety_result = await self.check_response_safety(response, prompt_user=self.can_prompt_user)
-
-        if safety_result == ConfirmSafetyResult.UNSAFE and self.can_prompt_user:
-            return self.prompt_for_safety()
-
-        return safety_result
-
     def prompt_for_safety(self) -> ConfirmSafetyResult:
         """Prompt the user for safety confirmation.
 
@@ -1399,36 +2700,15 @@ class LocalCodeExecutor:
             except Exception:
                 pass
 
-        # Save old std streams
-        old_stdout, old_stderr = sys.stdout, sys.stderr
-
-        # Create streaming buffers
+        # Create streaming buffers.  Output is routed to them only in the context of this
+        # execution, so that other sessions in the process keep their own output.
         stdout_buffer = StreamingBuffer("stdout", stream_update_callback)
         stderr_buffer = StreamingBuffer("stderr", stream_update_callback)
-        sys.stdout, sys.stderr = stdout_buffer, stderr_buffer
-
-        # Set up logging
-        root_logger = logging.getLogger()
-        original_handlers = root_logger.handlers.copy()
-        original_level = root_logger.level
 
         log_buffer = StreamingBuffer("logging", stream_update_callback)
         log_handler = StreamingLogHandler(log_buffer, stream_update_callback)
         log_handler.setLevel(logging.WARNING)
 
-        # Remove existing handlers and set new handler
-        root_logger.handlers = []
-        root_logger.addHandler(log_handler)
-        root_logger.setLevel(logging.WARNING)
-
-        # Also handle specific loggers that might cause issues (like Prophet)
-        for logger_name in ["prophet", "cmdstanpy"]:
-            specific_logger = logging.getLogger(logger_name)
-            if specific_logger:
-                specific_logger.handlers = []
-                specific_logger.addHandler(log_handler)
-                specific_logger.propagate = False
-
         # --- Start background streaming update task ---
         stop_streaming = False
 
@@ -1443,7 +2723,8 @@ class LocalCodeExecutor:
         periodic_task = asyncio.create_task(periodic_stream_update())
 
         try:
-            await self._run_code(response.code)
+            with capture_output(OutputCapture(stdout_buffer, stderr_buffer, log_handler)):
+                await self._run_code(response.code)
             # Final update after execution
             await stream_update_callback()
 
@@ -1473,6 +2754,7 @@ class LocalCodeExecutor:
                 files=expanded_mentioned_files,
                 execution_type=ExecutionType.ACTION,
                 action=ActionType.CODE,
+                resource_usage=self.step_resource_usage,
             )
         except Exception as e:
             # Final update on error
@@ -1492,24 +2774,15 @@ class LocalCodeExecutor:
             except Exception:
                 pass
 
-            sys.stdout, sys.stderr = old_stdout, old_stderr
             stdout_buffer.close()
             stderr_buffer.close()
             log_buffer.close()
 
-            # Restore original logging configuration
-            root_logger.handlers = original_handlers
-            root_logger.setLevel(original_level)
-
-            # Restore specific loggers
-            for logger_name in ["prophet", "cmdstanpy"]:
-                specific_logger = logging.getLogger(logger_name)
-                if specific_logger:
-                    specific_logger.handlers = []
-                    specific_logger.propagate = True
-
     async def _run_code(self, code: str) -> None:
-        """Run code in the main thread.
+        """Run code in the main thread, or in the execution kernel if a pool is set.
+
+        The resources used by the code are recorded in step_resource_usage.  The resource
+        limits of the step are only enforced when the code runs in an execution kernel.
 
         Args:
             code (str): The Python code to execute
@@ -1517,76 +2790,191 @@ class LocalCodeExecutor:
         Raises:
             Exception: Any exceptions raised during code execution
         """
-        old_stdin = sys.stdin
+        limits = self.get_step_resource_limits()
+        resource_monitor = ResourceMonitor(
+            wall_time_limit=limits.wall_time_seconds,
+            cpu_time_limit=limits.cpu_seconds,
+            memory_limit=int(limits.memory_mb * 1024 * 1024) if limits.memory_mb else None,
+        )
 
-        try:
-            # Redirect stdin to /dev/null to ignore input requests
-            with open(os.devnull) as devnull:
-                sys.stdin = devnull
-                # Extract any async code
-                if "async def" in code or "await" in code:
-                    # Prepare the code to be wrapped in an async function
-                    # that will update a provided dictionary with its locals.
-                    wrapped_code_lines = []
-                    wrapped_code_lines.append(
-                        "async def __exec_async_code_wrapper__(__context_dict_to_update__):"
-                    )
-                    for line in code.split("\n"):
-                        wrapped_code_lines.append(f"    {line}")
-                    # After user's code, update the passed dictionary
-                    # with locals from user's code scope
-                    wrapped_code_lines.append(
-                        "    # Update context with locals from this async function's scope"
-                    )
-                    wrapped_code_lines.append("    for __k, __v in locals().items():")
-                    # Avoid copying the context dict itself, or internal loop variables.
-                    wrapped_code_lines.append(
-                        "        if __k not in ['__context_dict_to_update__', '__k', '__v']:"
-                    )
-                    wrapped_code_lines.append("            __context_dict_to_update__[__k] = __v")
+        if self.kernel_pool is not None:
+            try:
+                kernel = await self.get_kernel()
+            except KernelError as e:
+                logging.warning(f"{e.message}, running code in the worker process instead")
+                self.kernel_pool = None
+            else:
+                await self._run_code_in_kernel(kernel, code, resource_monitor)
+                return
 
-                    full_wrapped_code = "\n".join(wrapped_code_lines)
+        resource_monitor.start()
 
-                    # Compile and execute the wrapper definition.
-                    # The wrapper function will be defined in self.context.
-                    compiled_wrapper = compile(
-                        full_wrapped_code, "<agent_generated_code_wrapper>", "exec"
-                    )
-                    exec(
-                        compiled_wrapper, self.context
-                    )  # Defines __exec_async_code_wrapper__ in self.context
+        try:
+            # Compiled code is cached, so retries and scheduled runs skip the compiler
+            compiled_code = compile_agent_code(code)
 
-                    try:
-                        # Call the wrapper, passing self.context to be updated.
-                        await self.context["__exec_async_code_wrapper__"](self.context)
-                    finally:
-                        # Clean up the wrapper function from self.context
-                        if "__exec_async_code_wrapper__" in self.context:
-                            del self.context["__exec_async_code_wrapper__"]
+            if is_async_code(compiled_code):
+                # Code that awaits at the top level evaluates to a coroutine that runs on
+                # the event loop and assigns its variables in the context directly
+                await eval(compiled_code, self.context)
+            else:
+                sync_required_libs = ["matplotlib", "tkinter", "PIL"]
+
+                # Some libraries do not support async execution, so we
+                # need to run them in the main thread
+                if any(lib in code for lib in sync_required_libs):
+                    exec(compiled_code, self.context)
                 else:
-                    # Regular synchronous code
                     # Run synchronous exec in a separate thread to avoid blocking the event loop
-                    compiled_code = compile(code, "<agent_generated_code>", "exec")
+                    await asyncio.to_thread(exec, compiled_code, self.context)
+        except Exception as e:
+            code_execution_error = CodeExecutionError(
+                message=str(e), code=code, error_line=get_error_line(e)
+            ).with_traceback(e.__traceback__)
+            raise code_execution_error from None
+        finally:
+            resource_monitor.stop()
+            self.step_resource_usage = ResourceUsage(**resource_monitor.usage)
 
-                    sync_required_libs = ["matplotlib", "tkinter", "PIL"]
+    async def _run_code_in_kernel(
+        self,
+        kernel: ExecutionKernel,
+        code: str,
+        resource_monitor: Optional[ResourceMonitor] = None,
+    ) -> None:
+        """Run code in the execution kernel of the session.
 
-                    # Some libraries do not support async execution, so we
-                    # need to run them in the main thread
-                    if any(lib in code for lib in sync_required_libs):
-                        exec(compiled_code, self.context)
-                    else:
+        Output of the code is written to the current stdout and stderr as it arrives, so
+        that it is captured and streamed like the output of code that runs in this process.
 
-                        def _execute_sync_in_thread():
-                            exec(compiled_code, self.context)
+        Args:
+            kernel (ExecutionKernel): The kernel to run the code in
+            code (str): The Python code to execute
+            resource_monitor (ResourceMonitor | None): Monitor that enforces the resource
+                limits of the step and measures the resources that it uses
 
-                        await asyncio.to_thread(_execute_sync_in_thread)
-        except Exception as e:
-            code_execution_error = CodeExecutionError(message=str(e), code=code).with_traceback(
-                e.__traceback__
+        Raises:
+            CodeExecutionError: If the code raised an exception, was interrupted, went over
+                a resource limit, or the kernel exited while running it
+        """
+
+        # Output of the kernel is forwarded by tasks that may have been started by an
+        # earlier execution, so the destination is resolved in the context of this one
+        stdout, stderr = get_output_stream("stdout"), get_output_stream("stderr")
+
+        def write_output(name: str, text: str) -> None:
+            (stderr if name == "stderr" else stdout).write(text)
+
+        limit_exceeded = None
+        try:
+            result = await kernel.execute(
+                code,
+                getattr(self, "tool_registry", None),
+                on_output=write_output,
+                resource_monitor=resource_monitor,
             )
-            raise code_execution_error from None
+        except KernelError as e:
+            message = e.message
+            if resource_monitor is not None and resource_monitor.limit_exceeded is not None:
+                message = (
+                    f"{resource_monitor.limit_exceeded}, the execution kernel was stopped "
+                    "and the variables set by this code are lost"
+                )
+            raise CodeExecutionError(message=message, code=code) from None
         finally:
-            sys.stdin = old_stdin
+            if resource_monitor is not None:
+                limit_exceeded = resource_monitor.limit_exceeded
+                self.step_resource_usage = ResourceUsage(**resource_monitor.usage)
+
+        self.kernel_modules = result.modules
+        self.kernel_variables = result.variables
+
+        # Code that changes the working directory changes it for the whole session
+        if result.cwd and result.cwd != os.getcwd() and Path(result.cwd).is_dir():
+            os.chdir(result.cwd)
+
+        if result.error is not None:
+            raise CodeExecutionError(
+                message=(limit_exceeded if result.interrupted and limit_exceeded else result.error),
+                code=code,
+                traceback_str=result.traceback,
+                error_line=result.error_line,
+            )
+
+    def get_step_resource_limits(self) -> ResourceLimits:
+        """Get the resource limits of a code execution step for the current agent.
+
+        Returns:
+            ResourceLimits: The default limits, with the limits that the agent sets applied
+        """
+        return self.resource_limits.merge(self.agent.resource_limits if self.agent else None)
+
+    async def get_kernel(self) -> ExecutionKernel:
+        """Get the execution kernel of the session, starting it if needed.
+
+        A new kernel is taken from the pool and the context of the session is loaded into
+        it.  If the previous kernel exited, the context is reloaded from the persisted state
+        of the agent.
+
+        Returns:
+            ExecutionKernel: The running kernel of the session
+
+        Raises:
+            KernelError: If no kernel pool is set or the kernel fails to start
+        """
+        if self.kernel is not None and self.kernel.is_alive:
+            return self.kernel
+
+        if self.kernel_pool is None:
+            raise KernelError("No execution kernel pool is configured")
+
+        restarting = self.kernel is not None
+        self.kernel = await self.kernel_pool.acquire()
+        context = self.load_persisted_context() if restarting else self.context
+        await self.kernel.set_variables(context)
+        return self.kernel
+
+    def load_persisted_context(self) -> Dict[str, Any]:
+        """Get the persisted execution context of the agent, or the current context.
+
+        Returns:
+            Dict[str, Any]: The context that was last persisted for the agent, or the
+                context of this executor if the agent has no persisted context
+        """
+        if self.agent and self.agent_registry:
+            try:
+                context = self.agent_registry.load_agent_context(self.agent.id)
+                if context is not None:
+                    return context
+            except Exception as e:
+                logging.warning(f"Failed to load agent context: {e}")
+        return self.context
+
+    async def shutdown_kernel(self) -> None:
+        """Stop the execution kernel of the session, if any."""
+        if self.kernel is not None:
+            await self.kernel.shutdown()
+            self.kernel = None
+
+    async def sync_kernel_context(self) -> None:
+        """Copy the variables of the execution kernel into the context of this executor.
+
+        Modules are bound to placeholders that carry the module name, so that the context
+        can be persisted without importing the modules in this process.
+        """
+        if self.kernel is None or not self.kernel.is_alive:
+            return
+
+        try:
+            variables = await self.kernel.get_variables(import_modules=False)
+        except KernelError as e:
+            logging.warning(f"Failed to copy the execution kernel context: {e.message}")
+            return
+
+        tools = self.context.get("tools")
+        self.context = {"__builtins__": builtins, **variables}
+        if tools is not None:
+            self.context["tools"] = tools
 
     def _get_mentioned_variables(self, code: str) -> dict[str, Any]:
         """Get the variables mentioned in the code.
@@ -1595,8 +2983,11 @@ class LocalCodeExecutor:
             code (str): The code to get the variables from
 
         Returns:
-            dict[str, Any]: A dictionary of variables mentioned in the code
+            dict[str, Any]: A dictionary of variables mentioned in the code.  For code that
+                ran in an execution kernel, the values are the summaries from the kernel.
         """
+        if self.kernel is not None:
+            return dict(self.kernel_variables)
         return {key: var for key, var in self.context.items() if key in code}
 
     def _capture_and_record_output(
@@ -1694,6 +3085,30 @@ class LocalCodeExecutor:
             )
         )
 
+    def _record_preflight_error(self, error: CodeExecutionError) -> None:
+        """Record the errors that the pre-flight check found in conversation history.
+
+        Args:
+            error (CodeExecutionError): The errors found in the code, which was not run.
+        """
+        msg = (
+            "<system>The code was not run because a check before execution found errors "
+            "that it would raise.\n"
+            f"{error.agent_info_str()}\n"
+            "Make all necessary corrections to the code you submitted and submit it "
+            "again.  Only use variables that are defined in the code or in the environment "
+            "details, and call tools with the arguments in their signatures.  Do not "
+            "acknowledge this message directly or apologize, simply fix the errors and "
+            "continue.</system>"
+        )
+        self.append_to_history(
+            ConversationRecord(
+                role=ConversationRole.USER,
+                content=msg,
+                should_summarize=True,
+            )
+        )
+
     def _record_retry_error(self, error: Exception, attempt: int) -> None:
         """Record retry attempt errors, including the traceback, in conversation history.
 
@@ -1791,6 +3206,7 @@ class LocalCodeExecutor:
         current_working_directory = os.getcwd()
 
         if self.persist_conversation and self.agent_registry and self.agent:
+            await self.sync_kernel_context()
             self.agent_registry.update_agent_state(
                 agent_id=self.agent.id,
                 agent_state=self.agent_state,
@@ -1996,13 +3412,19 @@ class LocalCodeExecutor:
                                 )
                             )
 
-                            execution_result = await self.read_file(file_path)
+                            execution_result = await self.read_file(
+                                file_path, read_range=response.read_range
+                            )
                     else:
                         raise ValueError("File path is required for READ action")
 
                 elif response.action == ActionType.CODE:
                     code_block = response.code
-                    if code_block:
+                    # Code with errors that are certain to happen skips the safety check
+                    execution_result = self.preflight_code(response)
+                    if execution_result is not None:
+                        self.cancel_early_safety_review()
+                    elif code_block:
                         # First check code safety
                         await self.update_job_execution_state(
                             CodeExecutionResult(
@@ -2041,6 +3463,7 @@ class LocalCodeExecutor:
 
                             execution_result = await self.execute_code(response)
 
+                    if execution_result is not None:
                         if "code execution cancelled by user" in execution_result.message:
                             return (
                                 ProcessResponseOutput(
@@ -2075,6 +3498,7 @@ class LocalCodeExecutor:
                 )
 
         token_metrics = self.get_token_metrics()
+        step_token_metrics = self.step_token_metrics
 
         print_execution_section(
             ExecutionSection.TOKEN_USAGE,
@@ -2082,11 +3506,27 @@ class LocalCodeExecutor:
                 "prompt_tokens": token_metrics.total_prompt_tokens,
                 "completion_tokens": token_metrics.total_completion_tokens,
                 "cost": token_metrics.total_cost,
+                "step_cache_read_tokens": step_token_metrics.total_cache_read_tokens,
+                "step_cache_write_tokens": step_token_metrics.total_cache_write_tokens,
+                "step_cache_hit_rate": step_token_metrics.cache_hit_rate(),
+                "task_usage": self.get_task_usage_summary(),
+                "safety_checks": self.get_safety_check_summary(),
+                "preflight_checks": self.get_preflight_summary(),
             },
             action=response.action,
             verbosity_level=self.verbosity_level,
         )
 
+        logging.debug(
+            f"Step {self.step_counter} prompt cache usage: "
+            f"read={step_token_metrics.total_cache_read_tokens} "
+            f"write={step_token_metrics.total_cache_write_tokens} "
+            f"prompt={step_token_metrics.total_prompt_tokens} "
+            f"hit_rate={step_token_metrics.cache_hit_rate():.2%}"
+        )
+
+        self.step_token_metrics = ExecutorTokenMetrics()
+
         print_execution_section(
             ExecutionSection.FOOTER,
             action=response.action,
@@ -2110,12 +3550,17 @@ class LocalCodeExecutor:
             )
         )
 
-        # Phase 4: Summarize old conversation steps
-        async with spinner_context(
-            "Summarizing conversation",
-            verbosity_level=self.verbosity_level,
-        ):
-            await self._summarize_old_steps()
+        # Phase 4: Summarize old conversation steps, summaries generated in the background
+        # during the previous step are applied at this step boundary
+        if self.background_summarization:
+            self.apply_background_summaries()
+            self.start_background_summarization()
+        else:
+            async with spinner_context(
+                "Summarizing conversation",
+                verbosity_level=self.verbosity_level,
+            ):
+                await self._summarize_old_steps()
 
         if self.verbosity_level >= VerbosityLevel.VERBOSE:
             print("\n")  # New line for next spinner
@@ -2198,21 +3643,30 @@ class LocalCodeExecutor:
         )
 
     async def read_file(
-        self, file_path: str, max_text_file_size_bytes: int = MAX_FILE_READ_SIZE_BYTES
+        self,
+        file_path: str,
+        max_text_file_size_bytes: int = MAX_FILE_READ_SIZE_BYTES,
+        read_range: Optional[FileReadRange] = None,
     ) -> CodeExecutionResult:
         """
         Read the contents of a file and include line numbers and lengths, or attach image files.
 
+        Text files are read through a memory map, and only a window of lines goes into the
+        conversation: the lines of the read range, the lines that match its pattern, or the
+        first lines of a file that is too large to read in full.
+
         Args:
             file_path (str): The path to the file to read.
-            max_file_size_bytes (int): The maximum file size to read in bytes.
+            max_text_file_size_bytes (int): The maximum number of bytes of text to read.
+            read_range (Optional[FileReadRange]): The lines, bytes or pattern to read,
+                defaults to the whole file.
 
         Returns:
             CodeExecutionResult: The result of the file read operation.
 
         Raises:
             FileNotFoundError: If the file does not exist.
-            ValueError: If the file is too large to read.
+            ValueError: If the search pattern is not a valid regular expression.
             OSError: If there is an error reading the file.
         """
         expanded_file_path = Path(file_path).expanduser().resolve()
@@ -2282,35 +3736,82 @@ class LocalCodeExecutor:
                 action=ActionType.READ,
             )
 
-        if os.path.getsize(expanded_file_path) > max_text_file_size_bytes:
-            raise ValueError(
-                f"File is too large to use read action on: {file_path}\n"
-                f"Please use code action to summarize and extract key features from "
-                f"the file instead."
-            )
-
+        read_range = read_range or FileReadRange()
         try:
-            with open(expanded_file_path, "r", encoding="utf-8") as f:
-                file_content = f.read()
+            if read_range.pattern:
+                window = search_file(
+                    expanded_file_path,
+                    read_range.pattern,
+                    max_text_file_size_bytes,
+                    read_range.start_line,
+                    read_range.end_line,
+                )
+            else:
+                window = read_file_window(
+                    expanded_file_path,
+                    max_text_file_size_bytes,
+                    read_range.start_line,
+                    read_range.end_line,
+                    read_range.start_byte,
+                    read_range.end_byte,
+                )
+        except ValueError:
+            raise
         except Exception as e:
             raise OSError(f"Error reading file {file_path}: {e}")
 
-        annotated_content = annotate_code(file_content)
+        annotated_content = "".join(
+            annotate_code(text, start_line=start_line) or "" for start_line, text in window.lines
+        )
+        is_whole_file = window.first_line <= 1 and window.last_line >= window.total_lines
+        continuation = ""
 
-        if not annotated_content:
-            annotated_content = "[File is empty]"
+        if read_range.pattern:
+            description = (
+                f"Here are the lines of {file_path} that match the pattern "
+                f"{read_range.pattern!r}, with line numbers and lengths:"
+            )
+            if not annotated_content:
+                annotated_content = "[No lines match the pattern]"
+            if window.truncated:
+                continuation = (
+                    f"\nMore lines match after line {window.last_line}.  Use a narrower "
+                    "pattern or a line range to see them."
+                )
+            read_summary = f"{len(window.lines)} matching lines of file"
+        elif is_whole_file and not window.truncated:
+            description = f"Here are the contents of {file_path} with line numbers and lengths:"
+            if not annotated_content:
+                annotated_content = "[File is empty]"
+            read_summary = "file"
+        else:
+            description = (
+                f"Here are lines {window.first_line}-{window.last_line} of "
+                f"{window.total_lines} of {file_path} ({window.total_bytes} bytes) with line "
+                "numbers and lengths:"
+            )
+            if not annotated_content:
+                annotated_content = (
+                    f"[No lines in the range, the file has {window.total_lines} lines]"
+                )
+            if window.last_line and window.last_line < window.total_lines:
+                continuation = (
+                    f"\nThe file continues after line {window.last_line}.  Use a READ action "
+                    "with a read_range to read further, or search the file with a pattern."
+                )
+            read_summary = f"lines {window.first_line}-{window.last_line} of file"
 
         self.append_to_history(
             ConversationRecord(
                 role=ConversationRole.USER,
                 content=(
-                    f"<system>Here are the contents of {file_path} with line numbers and lengths:\n"
+                    f"<system>{description}\n"
                     f"\n"
                     f"Line | Length | Content\n"
                     f"----------------------\n"
                     f"BEGIN\n"
                     f"{annotated_content}\n"
-                    f"END</system>"
+                    f"END{continuation}</system>"
                 ),
                 should_summarize=True,
                 should_cache=True,
@@ -2318,10 +3819,10 @@ class LocalCodeExecutor:
         )
 
         return CodeExecutionResult(
-            stdout=f"Successfully read file: {file_path}",
+            stdout=f"Successfully read {read_summary}: {file_path}",
             stderr="",
             logging="",
-            formatted_print=f"Successfully read file: {file_path}",
+            formatted_print=f"Successfully read {read_summary}: {file_path}",
             code="",
             message="",
             file_path=file_path,
@@ -2336,6 +3837,9 @@ class LocalCodeExecutor:
         """
         Write content to a file, removing code block markers only for file-type fences.
 
+        The file is replaced atomically, and is not written at all if it already has the
+        content.
+
         Args:
             file_path (str): The path to the file to write.
             content (str): The content to write to the file.
@@ -2347,80 +3851,14 @@ class LocalCodeExecutor:
             OSError: If there is an error writing to the file.
         """
         try:
-            content_lines = content.split("\n")
-            # Only remove code block markers if they are file-type (e.g., ```python, ```json, etc.)
-            file_type_fences = {
-                "python",
-                "json",
-                "yaml",
-                "toml",
-                "xml",
-                "html",
-                "js",
-                "javascript",
-                "ts",
-                "typescript",
-                "csv",
-                "txt",
-                "md",
-                "markdown",
-                "sh",
-                "bash",
-                "ini",
-                "cfg",
-                "conf",
-                "go",
-                "java",
-                "c",
-                "cpp",
-                "cs",
-                "rb",
-                "rs",
-                "swift",
-                "php",
-                "pl",
-                "r",
-                "scala",
-                "kt",
-                "kotlin",
-                "sql",
-                "dockerfile",
-                "makefile",
-                "bat",
-                "ps1",
-                "powershell",
-                "dart",
-                "lua",
-                "groovy",
-                "asm",
-                "s",
-                "scss",
-                "css",
-            }
-
-            def is_file_type_fence(line: str) -> bool:
-                if not line.startswith("```"):
-                    return False
-                fence = line.strip()[3:].strip().lower()
-                return fence in file_type_fences or fence == ""
-
-            file_type_fence = is_file_type_fence(content_lines[0])
-
-            # Remove leading file-type code fence
-            if content_lines and file_type_fence:
-                content_lines = content_lines[1:]
-
-            # Remove trailing code fence if present and leading was file-type
-            if content_lines and file_type_fence and content_lines[-1].strip() == "```":
-                content_lines = content_lines[:-1]
-
-            cleaned_content = "\n".join(content_lines)
+            cleaned_content = strip_file_fences(content)
             expanded_file_path = Path(file_path).expanduser().resolve()
         except Exception as exc:
             raise OSError(f"Error preparing file content for writing to {file_path}: {exc}")
 
-        with open(expanded_file_path, "w") as f:
-            f.write(cleaned_content)
+        write_result = write_text_atomically(
+            expanded_file_path, cleaned_content, fsync=self.fsync_file_writes
+        )
 
         self.append_to_history(
             ConversationRecord(
@@ -2433,11 +3871,15 @@ class LocalCodeExecutor:
             )
         )
 
+        write_message = (
+            f"Successfully wrote to file: {file_path} ({describe_file_write(write_result)})"
+        )
+
         return CodeExecutionResult(
-            stdout=f"Successfully wrote to file: {file_path}",
+            stdout=write_message,
             stderr="",
             logging="",
-            formatted_print=f"Successfully wrote to file: {file_path}",
+            formatted_print=write_message,
             content=cleaned_content,
             file_path=file_path,
             message="",
@@ -2453,6 +3895,9 @@ class LocalCodeExecutor:
     ) -> CodeExecutionResult:
         """Edit a file by applying a series of find and replace operations.
 
+        Each replacement applies to the result of the previous ones, and the edited file is
+        written once, in an atomic replace, after all replacements were found.
+
         Args:
             file_path (str): The path to the file to edit
             replacements (List[Dict[str, str]]): A list of dictionaries, where each dictionary
@@ -2469,93 +3914,69 @@ class LocalCodeExecutor:
         """
         expanded_file_path = Path(file_path).expanduser().resolve()
 
-        file_content = ""
         with open(expanded_file_path, "r") as f:
-            file_content = f.read()
+            edited_content = PieceTable(f.read())
 
         for replacement in replacements:
             find = replacement["find"]
             replace = replacement["replace"]
 
-            # Attempt exact string match
-            match_index = file_content.find(find)
-
-            if match_index != -1:
-                # Exact match found, perform replacement
-                file_content = (
-                    file_content[:match_index] + replace + file_content[match_index + len(find) :]
-                )
-            else:
-                # Exact match failed, provide detailed error feedback
-                s1_lines_for_diff = find.splitlines(keepends=True)
-                s2_lines_for_diff = file_content.splitlines(keepends=True)
+            if edited_content.replace(find, replace):
+                continue
 
-                matcher = difflib.SequenceMatcher(
-                    None, s1_lines_for_diff, s2_lines_for_diff, autojunk=False
-                )
-                match = matcher.find_longest_match(
-                    0, len(s1_lines_for_diff), 0, len(s2_lines_for_diff)
-                )
+            # Exact match failed, provide detailed error feedback
+            s1_lines_for_diff = find.splitlines(keepends=True)
+            s2_lines_for_diff = edited_content.text().splitlines(keepends=True)
+            region = find_closest_region(s2_lines_for_diff, s1_lines_for_diff)
 
-                closest_actual_snippet_text = "No close match found to generate a detailed diff."
-                diff_output_text = "No close match found to generate a detailed diff."
-                snippet_line_info = ""
+            if region is not None:
+                region_start, region_end = region
+                file_block_for_diff_lines = s2_lines_for_diff[region_start:region_end]
 
-                if match.size > 0:
-                    # Extract the block from the file that aligns with
-                    # find_text's length, starting at the best match point
-                    file_block_for_diff_lines = s2_lines_for_diff[
-                        match.b : match.b + len(s1_lines_for_diff)
-                    ]
-                    if not file_block_for_diff_lines:  # if find_text is longer than remaining file
-                        file_block_for_diff_lines = s2_lines_for_diff[match.b :]
-                    file_block_for_diff_text = "".join(file_block_for_diff_lines)
+                # Diff only the closest region, which keeps the diff fast for large files
+                diff_gen = difflib.ndiff(s1_lines_for_diff, file_block_for_diff_lines)
+                diff_output_text = "".join(list(diff_gen))
 
-                    # Generate diff
-                    diff_gen = difflib.ndiff(
-                        s1_lines_for_diff, file_block_for_diff_text.splitlines(keepends=True)
-                    )
-                    diff_output_text = "".join(list(diff_gen))
-
-                    # For showing the "closest text found in the file", provide some context
-                    context_window_lines = 2
-                    actual_snippet_start_line_idx = max(0, match.b - context_window_lines)
-                    actual_snippet_end_line_idx = min(
-                        len(s2_lines_for_diff),
-                        match.b + len(file_block_for_diff_lines) + context_window_lines,
-                    )
+                # For showing the "closest text found in the file", provide some context
+                context_window_lines = 2
+                actual_snippet_start_line_idx = max(0, region_start - context_window_lines)
+                actual_snippet_end_line_idx = min(
+                    len(s2_lines_for_diff), region_end + context_window_lines
+                )
 
-                    closest_snippet_lines_with_context = s2_lines_for_diff[
-                        actual_snippet_start_line_idx:actual_snippet_end_line_idx
-                    ]
-                    closest_actual_snippet_text = "".join(closest_snippet_lines_with_context)
+                closest_snippet_lines_with_context = s2_lines_for_diff[
+                    actual_snippet_start_line_idx:actual_snippet_end_line_idx
+                ]
+                closest_actual_snippet_text = "".join(closest_snippet_lines_with_context)
 
-                    snippet_start_human_line = actual_snippet_start_line_idx + 1
-                    snippet_end_human_line = actual_snippet_end_line_idx
-                    snippet_line_info = (
-                        f"(lines approx. {snippet_start_human_line}-{snippet_end_human_line})"
-                    )
+                snippet_start_human_line = actual_snippet_start_line_idx + 1
+                snippet_end_human_line = actual_snippet_end_line_idx
+                snippet_line_info = (
+                    f"(lines approx. {snippet_start_human_line}-{snippet_end_human_line})"
+                )
 
-                    error_message_parts = [
-                        f"The SEARCH block for file '{file_path}' was not found.",
-                        f"\nYour provided SEARCH block:\n---\n{find}\n---\n",
-                        f"The closest text found in the file {snippet_line_info} was:\n---\n{closest_actual_snippet_text}\n---\n",  # noqa: E501
-                        "Differences (+ your search / - actual file content / ? suggestions):\n---",
-                        diff_output_text,
-                        "---\n",
-                        "Please review these differences carefully and provide a corrected SEARCH block.",  # noqa: E501
-                    ]
-                    error_message = "\n".join(error_message_parts)
-                else:
-                    error_message = (
-                        f"The SEARCH block for file '{file_path}' was not found.\n\n"
-                        f"Your provided SEARCH block:\n---\n{find}\n---\n\n"
-                        "No close match could be identified in the file to provide a detailed diff."
-                    )
-                raise ValueError(error_message)
+                error_message_parts = [
+                    f"The SEARCH block for file '{file_path}' was not found.",
+                    f"\nYour provided SEARCH block:\n---\n{find}\n---\n",
+                    f"The closest text found in the file {snippet_line_info} was:\n---\n{closest_actual_snippet_text}\n---\n",  # noqa: E501
+                    "Differences (+ your search / - actual file content / ? suggestions):\n---",
+                    diff_output_text,
+                    "---\n",
+                    "Please review these differences carefully and provide a corrected SEARCH block.",  # noqa: E501
+                ]
+                error_message = "\n".join(error_message_parts)
+            else:
+                error_message = (
+                    f"The SEARCH block for file '{file_path}' was not found.\n\n"
+                    f"Your provided SEARCH block:\n---\n{find}\n---\n\n"
+                    "No close match could be identified in the file to provide a detailed diff."
+                )
+            raise ValueError(error_message)
 
-        with open(expanded_file_path, "w") as f:
-            f.write(file_content)
+        file_content = edited_content.text()
+        write_result = write_text_atomically(
+            expanded_file_path, file_content, fsync=self.fsync_file_writes
+        )
 
         self.append_to_history(
             ConversationRecord(
@@ -2570,11 +3991,15 @@ class LocalCodeExecutor:
             )
         )
 
+        edit_message = (
+            f"Successfully edited file: {file_path} ({describe_file_write(write_result)})"
+        )
+
         return CodeExecutionResult(
-            stdout=f"Successfully edited file: {file_path}",
+            stdout=edit_message,
             stderr="",
             logging="",
-            formatted_print=f"Successfully edited file: {file_path}",
+            formatted_print=edit_message,
             file_path=file_path,
             message="",
             role=ConversationRole.ASSISTANT,
@@ -2585,22 +4010,37 @@ class LocalCodeExecutor:
         )
 
     def _limit_conversation_history(self) -> None:
-        """Limit the conversation history to the maximum number of messages."""
+        """Limit the conversation history to the maximum number of messages.
 
-        # Limit in chunks of half the max conversation history to reduce
-        # cache breaking
-        chunk_size = self.max_conversation_history // 2
+        The oldest messages after the system prompt are dropped in whole blocks of
+        `summary_block_size` messages, the same blocks that the history is summarized in,
+        so that the start of the history only changes once every block.  A truncation
+        notice is kept after the system prompt once messages have been dropped.
+        """
+        conversation = self.agent_state.conversation
+        if len(conversation) <= 1:
+            return
 
-        if len(self.agent_state.conversation) - 1 > self.max_conversation_history:
-            # Keep the first message (system prompt) and the most recent messages
-            self.agent_state.conversation = [
-                self.agent_state.conversation[0],
-                ConversationRecord(
-                    role=ConversationRole.USER,
-                    content="<system>Some conversation history has been truncated for brevity.</system>",  # noqa: E501
-                    should_summarize=False,
-                ),
-            ] + self.agent_state.conversation[-chunk_size:]
+        has_notice = conversation[1].content == CONTEXT_TRUNCATION_NOTICE
+        body = conversation[2:] if has_notice else conversation[1:]
+        excess = len(body) - self.max_conversation_history
+        if excess <= 0:
+            return
+
+        # Keep the first message (system prompt) and drop the oldest messages in blocks
+        block_size = max(1, min(self.summary_block_size, self.max_conversation_history // 2))
+        drop_count = -(-excess // block_size) * block_size
+        notice = (
+            conversation[1]
+            if has_notice
+            else ConversationRecord(
+                role=ConversationRole.USER,
+                content=CONTEXT_TRUNCATION_NOTICE,
+                should_summarize=False,
+            )
+        )
+
+        self.agent_state.conversation = [conversation[0], notice] + body[drop_count:]
 
     async def _summarize_conversation_step(
         self, msg: ConversationRecord, min_token_threshold: int = 500
@@ -2621,9 +4061,7 @@ class LocalCodeExecutor:
             ValueError: If the conversation record is not of the expected type.
         """
         # Calculate token count for the message content
-        tokenizer = encoding_for_model("gpt-4o")
-
-        token_count = len(tokenizer.encode(msg.content or ""))
+        token_count = self.get_record_token_count(msg)
 
         if token_count <= min_token_threshold:
             return msg.content
@@ -2643,9 +4081,65 @@ class LocalCodeExecutor:
             ConversationRecord(role=ConversationRole.USER, content=step_info),
         ]
 
-        response = await self.invoke_model(summary_history)
+        response = await self.invoke_model(summary_history, task=ModelTask.SUMMARIZE)
         return response.content if isinstance(response.content, str) else str(response.content)
 
+    async def _summarize_conversation_steps(
+        self, msgs: List[ConversationRecord], min_token_threshold: int = 500
+    ) -> List[str]:
+        """
+        Summarize several conversation steps with a single model invocation.
+
+        Steps that the model does not return a summary for are summarized on their own
+        with `_summarize_conversation_step`.
+
+        Args:
+            msgs (List[ConversationRecord]): The conversation records to summarize.
+            min_token_threshold (int): The minimum number of tokens to consider summarizing.
+
+        Returns:
+            List[str]: The summaries of the conversation steps, in the same order as msgs.
+        """
+        steps_info = "\n".join(
+            f'<step id="{idx}">\n<role>{msg.role}</role>\n<message>{msg.content}</message>\n'
+            "</step>"
+            for idx, msg in enumerate(msgs, 1)
+        )
+
+        summary_history = [
+            ConversationRecord(
+                role=ConversationRole.SYSTEM,
+                content=MessageBatchSummarySystemPrompt,
+                is_system_prompt=True,
+                should_cache=True,
+            ),
+            ConversationRecord(
+                role=ConversationRole.USER,
+                content=f"Please summarize the following conversation steps:\n{steps_info}",
+            ),
+        ]
+
+        response = await self.invoke_model(summary_history, task=ModelTask.SUMMARIZE)
+        response_content = (
+            response.content if isinstance(response.content, str) else str(response.content)
+        )
+
+        summaries_by_id = {
+            int(match.group(1)): match.group(2).strip()
+            for match in re.finditer(
+                r'<summary id="(\d+)">(.*?)</summary>', response_content, re.DOTALL
+            )
+        }
+
+        summaries: List[str] = []
+        for idx, msg in enumerate(msgs, 1):
+            summary = summaries_by_id.get(idx)
+            if not summary:
+                summary = await self._summarize_conversation_step(msg, min_token_threshold)
+            summaries.append(summary)
+
+        return summaries
+
     def set_tool_registry(self, tool_registry: ToolRegistry) -> None:
         """Set the tool registry for the current conversation."""
         self.tool_registry = tool_registry
@@ -2925,7 +4419,9 @@ Agent Created At: {self.agent.created_date}
         Ephemeral messages are identified by having an 'ephemeral' field set to 'true' in their
         dictionary representation. These messages are meant to be temporary and are removed
         before the next model invocation, unless they have ephemeral_steps>0, in which case
-        they will remain for that many steps before being removed.
+        they will remain for that many steps before being removed.  Ephemeral messages are
+        sent to the model after all other messages, see `order_volatile_records_last`, so
+        replacing them does not change the cached prefix of the conversation.
 
         The method updates self.agent_state.conversation in-place.
         """
@@ -3099,6 +4595,9 @@ Agent Created At: {self.agent.created_date}
     async def broadcast_message_update(self, id: str, new_code_record: CodeExecutionResult) -> None:
         """Broadcast the update via WebSocket if available.
 
+        The update is serialized here, so that the server process forwards it to the
+        subscribers without serializing it again.
+
         Args:
             id (str): The id of the code execution result to update
             new_code_record (CodeExecutionResult): The new code execution result to
@@ -3106,7 +4605,8 @@ Agent Created At: {self.agent.created_date}
         """
         try:
             if self.status_queue:
-                self.status_queue.put(("message_update", id, new_code_record))
+                frame = encode_message_update(id, new_code_record.model_dump())
+                self.status_queue.put(("message_frame", id, frame))
         except Exception as e:
             print(f"Failed to broadcast execution state update via WebSocket: {e}")
 
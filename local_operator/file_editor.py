@@ -0,0 +1,378 @@
+"""Edits and writes of text files for the EDIT and WRITE actions.
+
+Replacements are applied one after the other to a piece table, which holds the edited text
+as a sequence of pieces of the original text and of the replacement strings.  Finding and
+replacing does not copy the text, and the edited text is only joined once, when it is
+written back to the file in one atomic replace.
+
+When a SEARCH block is not found, the closest region of the file is found with an index of
+the lines of the file: every line of the SEARCH block votes for the position that the block
+would start at if that line matched, and only the few regions with the most votes are
+compared line by line.  This keeps the cost linear in the size of the file, so that the
+agent gets a diff of the closest region even for files with many lines.
+
+Files are written to a temporary file that then replaces the file, so that a crash in the
+middle of a write never leaves a truncated file, and a file that already has the content is
+not written at all, which keeps its modification time for tools that watch it.
+"""
+
+import hashlib
+import locale
+import os
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+FUZZY_MATCH_CANDIDATES = 3
+"""The number of candidate regions that are compared with the SEARCH block in full."""
+
+COMMON_LINE_LIMIT = 32
+"""Lines that occur more often than this in the file, such as blank lines or closing
+brackets, do not vote for candidate regions."""
+
+SIMILAR_LINE_RATIO = 0.6
+"""The minimum similarity of a file line to the longest line of the SEARCH block for the
+file line to vote, when no line of the block occurs in the file."""
+
+FILE_TYPE_FENCES = frozenset(
+    {
+        "python",
+        "json",
+        "yaml",
+        "toml",
+        "xml",
+        "html",
+        "js",
+        "javascript",
+        "ts",
+        "typescript",
+        "csv",
+        "txt",
+        "md",
+        "markdown",
+        "sh",
+        "bash",
+        "ini",
+        "cfg",
+        "conf",
+        "go",
+        "java",
+        "c",
+        "cpp",
+        "cs",
+        "rb",
+        "rs",
+        "swift",
+        "php",
+        "pl",
+        "r",
+        "scala",
+        "kt",
+        "kotlin",
+        "sql",
+        "dockerfile",
+        "makefile",
+        "bat",
+        "ps1",
+        "powershell",
+        "dart",
+        "lua",
+        "groovy",
+        "asm",
+        "s",
+        "scss",
+        "css",
+    }
+)
+"""The languages of code fences that are removed from the content of a WRITE action."""
+
+
+class PieceTable:
+    """Text that is edited by replacing substrings, without copying the text.
+
+    The text is a sequence of pieces, each a range of the original text or of a
+    replacement string.  Substrings are found in the text as it is after the previous
+    replacements, including matches that span pieces.
+    """
+
+    def __init__(self, text: str):
+        """Create a piece table of a text.
+
+        Args:
+            text (str): The original text.
+        """
+        self._pieces: List[Tuple[str, int, int]] = [(text, 0, len(text))] if text else []
+
+    def _find(self, find: str) -> Optional[Tuple[int, int, int, int]]:
+        """Find the first occurrence of a non-empty string.
+
+        Returns:
+            Tuple[int, int, int, int] | None: The index of the piece that the match starts
+                in and the offset in its source, and the index of the piece that the match
+                ends in and the end offset in its source, or None if there is no match.
+        """
+        length = len(find)
+        for i, (source, start, end) in enumerate(self._pieces):
+            index = source.find(find, start, end)
+            if index != -1:
+                return i, index, i, index + length
+
+            # A match that starts near the end of this piece continues in the next pieces
+            tail_start = max(start, end - length + 1)
+            window = [source[tail_start:end]]
+            window_length = end - tail_start
+            for next_source, next_start, next_end in self._pieces[i + 1 :]:
+                if window_length >= 2 * length - 1:
+                    break
+                window.append(next_source[next_start:next_end][: length - 1])
+                window_length += len(window[-1])
+
+            index = "".join(window).find(find)
+            if index == -1 or index >= end - tail_start:
+                continue
+
+            remaining = length - (end - tail_start - index)
+            for j in range(i + 1, len(self._pieces)):
+                _, next_start, next_end = self._pieces[j]
+                if remaining <= next_end - next_start:
+                    return i, tail_start + index, j, next_start + remaining
+                remaining -= next_end - next_start
+        return None
+
+    def replace(self, find: str, replace: str) -> bool:
+        """Replace the first occurrence of a string.
+
+        An empty string is found at the start of the text.
+
+        Args:
+            find (str): The string to find.
+            replace (str): The string to replace it with.
+
+        Returns:
+            bool: Whether the string was found and replaced.
+        """
+        if not find:
+            if replace:
+                self._pieces.insert(0, (replace, 0, len(replace)))
+            return True
+
+        match = self._find(find)
+        if match is None:
+            return False
+
+        first, match_start, last, match_end = match
+        first_source, first_start, _ = self._pieces[first]
+        last_source, _, last_end = self._pieces[last]
+        pieces = []
+        if match_start > first_start:
+            pieces.append((first_source, first_start, match_start))
+        if replace:
+            pieces.append((replace, 0, len(replace)))
+        if match_end < last_end:
+            pieces.append((last_source, match_end, last_end))
+        self._pieces[first : last + 1] = pieces
+        return True
+
+    def text(self) -> str:
+        """Join the pieces into the edited text."""
+        return "".join(source[start:end] for source, start, end in self._pieces)
+
+
+def find_closest_region(
+    file_lines: List[str], search_lines: List[str]
+) -> Optional[Tuple[int, int]]:
+    """Find the region of a file that is most similar to a block of lines.
+
+    Lines are compared without leading and trailing whitespace to find the candidate
+    regions, and the candidates are ranked by the similarity of their lines to the block.
+
+    Args:
+        file_lines (List[str]): The lines of the file.
+        search_lines (List[str]): The lines of the block to find.
+
+    Returns:
+        Tuple[int, int] | None: The start and end line indexes of the closest region, or
+            None if no line of the file is similar to the block.
+    """
+    keys = [line.strip() for line in search_lines]
+    if not file_lines or not any(keys):
+        return None
+
+    line_index: Dict[str, List[int]] = {}
+    for i, line in enumerate(file_lines):
+        line_index.setdefault(line.strip(), []).append(i)
+
+    votes: Counter[int] = Counter()
+    for offset, key in enumerate(keys):
+        positions = line_index.get(key, []) if key else []
+        if len(positions) <= COMMON_LINE_LIMIT:
+            for position in positions:
+                votes[position - offset] += 1
+
+    if not votes:
+        # No line of the block occurs in the file, so the lines that are most similar to
+        # the longest line of the block vote instead
+        offset, needle = max(enumerate(keys), key=lambda item: len(item[1]))
+        matcher = SequenceMatcher(None, autojunk=False)
+        matcher.set_seq2(needle)
+        for key, positions in line_index.items():
+            matcher.set_seq1(key)
+            if matcher.real_quick_ratio() < SIMILAR_LINE_RATIO:
+                continue
+            if matcher.quick_ratio() >= SIMILAR_LINE_RATIO and len(positions) <= COMMON_LINE_LIMIT:
+                for position in positions:
+                    votes[position - offset] += 1
+
+    best: Optional[Tuple[float, int, int]] = None
+    for start, _ in votes.most_common(FUZZY_MATCH_CANDIDATES):
+        start = max(start, 0)
+        end = min(start + len(search_lines), len(file_lines))
+        ratio = SequenceMatcher(None, search_lines, file_lines[start:end], autojunk=False).ratio()
+        if best is None or ratio > best[0]:
+            best = (ratio, start, end)
+
+    return (best[1], best[2]) if best is not None else None
+
+
+def _is_file_type_fence(line: str) -> bool:
+    if not line.startswith("```"):
+        return False
+    fence = line.strip()[3:].strip().lower()
+    return fence in FILE_TYPE_FENCES or fence == ""
+
+
+def strip_file_fences(content: str) -> str:
+    """Remove the code fences that an agent wrapped around the content of a file.
+
+    The leading fence is only removed if it is empty or names a file type, and the
+    trailing fence only along with it.  Only the first and last lines are looked at, and
+    the content is sliced once.
+
+    Args:
+        content (str): The content of the file, possibly in a code fence.
+
+    Returns:
+        str: The content without the code fences.
+    """
+    first_newline = content.find("\n")
+    if not _is_file_type_fence(content if first_newline == -1 else content[:first_newline]):
+        return content
+    if first_newline == -1:
+        return ""
+
+    start = first_newline + 1
+    last_newline = content.rfind("\n", start)
+    last_line_start = start if last_newline == -1 else last_newline + 1
+    if content[last_line_start:].strip() == "```":
+        return content[start : max(last_newline, start)]
+    return content[start:]
+
+
+@dataclass
+class FileWriteResult:
+    """The outcome of writing a file.
+
+    Attributes:
+        bytes_written (int): The number of bytes written, 0 if the write was skipped.
+        duration (float): The number of seconds that the write took.
+        skipped (bool): Whether the file already had the content and was left alone.
+    """
+
+    bytes_written: int = 0
+    duration: float = 0.0
+    skipped: bool = False
+
+
+def encode_file_text(text: str) -> bytes:
+    """Encode text the way that a file opened in text mode writes it.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        bytes: The text in the preferred encoding, with the line separator of the platform.
+    """
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode(locale.getpreferredencoding(False))
+
+
+def describe_file_write(result: FileWriteResult) -> str:
+    """Describe a file write in a few words, such as "1,024 bytes in 2.1 ms"."""
+    if result.skipped:
+        return "unchanged, the file already had this content"
+    return f"{result.bytes_written:,} bytes in {result.duration * 1000:.1f} ms"
+
+
+def _has_content(path: Path, data: bytes) -> bool:
+    """Whether a file has exactly this content, compared by size and then by hash."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    if not path.is_file() or stat.st_size != len(data):
+        return False
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest() == hashlib.sha256(data).digest()
+
+
+def _read_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# The umask can only be read by changing it, so it is read once at import, before agent
+# code and concurrent executors can create files in other threads
+_UMASK: int = _read_umask()
+
+
+def write_text_atomically(path: Path, text: str, fsync: bool = True) -> FileWriteResult:
+    """Replace the contents of a file in one step.
+
+    The text is written to a temporary file in the same directory, which then replaces
+    the file, so that readers never see a partially written file and the file is left
+    unchanged if writing fails.  The permissions of an existing file are kept, and a file
+    that already has the text is not written.
+
+    Args:
+        path (Path): The path of the file.
+        text (str): The new contents of the file.
+        fsync (bool): Whether to flush the contents to the disk before the file is
+            replaced, so that the file survives a power failure as well.
+
+    Returns:
+        FileWriteResult: The number of bytes written and the time it took.
+
+    Raises:
+        OSError: If the file can not be written.
+    """
+    start_time = time.perf_counter()
+    data = encode_file_text(text)
+    if _has_content(path, data):
+        return FileWriteResult(duration=time.perf_counter() - start_time, skipped=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(temp_path, path.stat().st_mode & 0o7777)
+        else:
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return FileWriteResult(bytes_written=len(data), duration=time.perf_counter() - start_time)
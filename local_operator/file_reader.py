@@ -0,0 +1,280 @@
+"""Ranged reads of text files for the READ action.
+
+Files are memory mapped, so that reading a window of a large file only touches the pages
+of that window.  A sparse index of line offsets is built once per file and cached by the
+path, modification time and size of the file, so that an agent can page through a log or
+CSV file of several gigabytes by line number without the file being scanned again for
+every page.
+
+Windows are always expanded to whole lines, and are cut at the last whole line that fits
+in the maximum window size.
+"""
+
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+LINE_INDEX_STRIDE = 1024
+"""The number of lines between two offsets in the line index of a file."""
+
+LINE_INDEX_CACHE_SIZE = 32
+"""The number of files whose line index is kept."""
+
+MAX_PATTERN_MATCHES = 200
+"""The maximum number of matching lines that a pattern search returns."""
+
+_STRIDE_PATTERN = re.compile(rb"(?:[^\n]*\n){%d}" % LINE_INDEX_STRIDE)
+
+
+class LineIndex:
+    """Byte offsets of every LINE_INDEX_STRIDE-th line of a file.
+
+    Offsets of the lines in between are found by scanning from the nearest indexed line,
+    which keeps the index small for files with many lines.
+
+    Attributes:
+        offsets (array): Offset of line `i * LINE_INDEX_STRIDE + 1` at index i.
+        line_count (int): The number of lines in the file.
+        size (int): The size of the file in bytes.
+    """
+
+    offsets: "array[int]"
+    line_count: int
+    size: int
+
+    def __init__(self, data: mmap.mmap):
+        """Index the lines of a memory mapped file.
+
+        Args:
+            data (mmap.mmap): The contents of the file.
+        """
+        self.size = len(data)
+        self.offsets = array("q", [0])
+
+        # Each match consumes a whole stride of lines, so the scan runs in the regex engine
+        position = 0
+        while match := _STRIDE_PATTERN.match(data, position):
+            position = match.end()
+            self.offsets.append(position)
+
+        self.line_count = (len(self.offsets) - 1) * LINE_INDEX_STRIDE
+        while position := data.find(b"\n", position) + 1:
+            self.line_count += 1
+        if self.size and data[self.size - 1 : self.size] != b"\n":
+            self.line_count += 1
+
+    def line_offset(self, data: mmap.mmap, line: int) -> int:
+        """Get the offset of the start of a line.
+
+        Args:
+            data (mmap.mmap): The contents of the file.
+            line (int): The line number, starting at 1.
+
+        Returns:
+            int: The offset of the line, or the size of the file if it has fewer lines.
+        """
+        if line > self.line_count:
+            return self.size
+        index, remainder = divmod(max(line, 1) - 1, LINE_INDEX_STRIDE)
+        position = self.offsets[index]
+        for _ in range(remainder):
+            position = data.find(b"\n", position) + 1
+        return position
+
+    def line_at(self, data: mmap.mmap, offset: int) -> int:
+        """Get the number of the line that contains a byte offset.
+
+        Args:
+            data (mmap.mmap): The contents of the file.
+            offset (int): The byte offset.
+
+        Returns:
+            int: The line number, starting at 1.
+        """
+        offset = min(max(offset, 0), self.size)
+        index = bisect_right(self.offsets, offset) - 1
+        line = index * LINE_INDEX_STRIDE + 1
+        position = self.offsets[index]
+        while position := data.find(b"\n", position, offset) + 1:
+            line += 1
+        return min(line, max(self.line_count, 1))
+
+
+@lru_cache(maxsize=LINE_INDEX_CACHE_SIZE)
+def _get_line_index(path: str, modified_ns: int, size: int) -> LineIndex:
+    """Build the line index of a file, cached until the file changes."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return LineIndex(data)
+
+
+def get_line_index(path: Path, data: mmap.mmap) -> LineIndex:
+    """Get the cached line index of a file.
+
+    Args:
+        path (Path): The path of the file.
+        data (mmap.mmap): The contents of the file, which must be mapped from the path.
+
+    Returns:
+        LineIndex: The line index of the current version of the file.
+    """
+    stat = os.stat(path)
+    index = _get_line_index(str(path), stat.st_mtime_ns, stat.st_size)
+    if index.size != len(data):
+        # The file changed between the stat and the mapping
+        return LineIndex(data)
+    return index
+
+
+@dataclass
+class FileWindow:
+    """Lines of a text file that were read.
+
+    Attributes:
+        lines (List[Tuple[int, str]]): Blocks of consecutive lines, as the number of the
+            first line and the text of the lines.  A window of a range has one block, a
+            pattern search has one block for each matching line.
+        total_lines (int): The number of lines in the file.
+        total_bytes (int): The size of the file in bytes.
+        truncated (bool): Whether the window was cut short because it was too large, or
+            because the pattern matched more than MAX_PATTERN_MATCHES lines.
+    """
+
+    lines: List[Tuple[int, str]] = field(default_factory=list)
+    total_lines: int = 0
+    total_bytes: int = 0
+    truncated: bool = False
+
+    @property
+    def first_line(self) -> int:
+        """The number of the first line in the window, 0 if it is empty."""
+        return self.lines[0][0] if self.lines else 0
+
+    @property
+    def last_line(self) -> int:
+        """The number of the last line in the window, 0 if it is empty."""
+        if not self.lines:
+            return 0
+        start, text = self.lines[-1]
+        return start + text.count("\n", 0, len(text) - 1)
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+
+def read_file_window(
+    path: Path,
+    max_bytes: int,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    start_byte: Optional[int] = None,
+    end_byte: Optional[int] = None,
+) -> FileWindow:
+    """Read a range of lines from a text file.
+
+    A byte range is expanded to the lines that it touches.  When both are given, the byte
+    range takes precedence over the line range.
+
+    Args:
+        path (Path): The path of the file.
+        max_bytes (int): The maximum number of bytes to read.
+        start_line (Optional[int]): The first line to read, starting at 1.
+        end_line (Optional[int]): The last line to read, inclusive.
+        start_byte (Optional[int]): A byte offset in the first line to read.
+        end_byte (Optional[int]): The byte offset to stop reading at, exclusive.
+
+    Returns:
+        FileWindow: The lines that were read.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return FileWindow()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        index = get_line_index(path, data)
+        window = FileWindow(total_lines=index.line_count, total_bytes=index.size)
+
+        first_line = index.line_at(data, start_byte) if start_byte is not None else start_line
+        first_line = max(first_line or 1, 1)
+        if first_line > index.line_count:
+            return window
+        start = index.line_offset(data, first_line)
+
+        if end_byte is not None:
+            last_line = index.line_at(data, max(end_byte - 1, start))
+        else:
+            last_line = end_line or index.line_count
+        end = index.line_offset(data, max(last_line, first_line) + 1)
+
+        if end - start > max_bytes:
+            cut = data.rfind(b"\n", start, start + max_bytes)
+            # A single line longer than the window is cut in the middle
+            end = cut + 1 if cut != -1 else start + max_bytes
+            window.truncated = True
+
+        window.lines.append((first_line, _decode(data[start:end])))
+        return window
+
+
+def search_file(
+    path: Path,
+    pattern: str,
+    max_bytes: int,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+) -> FileWindow:
+    """Read the lines of a text file that match a regular expression.
+
+    Args:
+        path (Path): The path of the file.
+        pattern (str): The regular expression to search for.
+        max_bytes (int): The maximum number of bytes of matching lines to read.
+        start_line (Optional[int]): The first line to search, starting at 1.
+        end_line (Optional[int]): The last line to search, inclusive.
+
+    Returns:
+        FileWindow: The matching lines, each in a block of its own.
+
+    Raises:
+        ValueError: If the pattern is not a valid regular expression.
+    """
+    try:
+        regex = re.compile(pattern.encode("utf-8"), re.MULTILINE)
+    except re.error as e:
+        raise ValueError(f"Invalid search pattern {pattern!r}: {e}") from e
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return FileWindow()
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        index = get_line_index(path, data)
+        window = FileWindow(total_lines=index.line_count, total_bytes=index.size)
+        start = index.line_offset(data, start_line or 1)
+        end = index.line_offset(data, end_line + 1) if end_line else index.size
+
+        remaining = max_bytes
+        previous_line_end = -1
+        for match in regex.finditer(data, start, end):
+            line_start = data.rfind(b"\n", 0, match.start()) + 1
+            if line_start < previous_line_end:
+                continue
+            line_end = data.find(b"\n", match.start())
+            line_end = index.size if line_end == -1 else line_end + 1
+            previous_line_end = line_end
+
+            if len(window.lines) >= MAX_PATTERN_MATCHES or line_end - line_start > remaining:
+                window.truncated = True
+                break
+            remaining -= line_end - line_start
+            window.lines.append(
+                (index.line_at(data, line_start), _decode(data[line_start:line_end]))
+            )
+
+        return window
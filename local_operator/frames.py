@@ -0,0 +1,166 @@
+"""Message update frames that are serialized once and sent to many WebSocket clients.
+
+A job process streams an update of its message for every chunk of model output.  The
+update is serialized to JSON in the job process, when it is created, so that the server
+process only passes the text through its status queue and forwards it to every
+subscriber, instead of unpickling the update and serializing it again for each broadcast.
+
+Clients can ask for a compact binary encoding of the updates instead of JSON.  A frame is
+converted to each binary encoding at most once, and only when a subscriber uses it.
+msgpack and CBOR are optional, and are only offered when `msgpack` or `cbor2` is
+installed.
+"""
+
+import json
+from enum import Enum
+from typing import Any, Dict, List, Optional, Union, cast
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import cbor2  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    cbor2 = None
+
+
+class FrameEncoding(str, Enum):
+    """Encodings of the update frames sent to WebSocket clients."""
+
+    JSON = "json"
+    MSGPACK = "msgpack"
+    CBOR = "cbor"
+
+
+def get_available_encodings() -> List[FrameEncoding]:
+    """Get the frame encodings whose libraries are installed.
+
+    Returns:
+        List[FrameEncoding]: The available encodings, JSON first.
+    """
+    encodings = [FrameEncoding.JSON]
+    if msgpack is not None:
+        encodings.append(FrameEncoding.MSGPACK)
+    if cbor2 is not None:
+        encodings.append(FrameEncoding.CBOR)
+    return encodings
+
+
+def negotiate_encoding(requested: Optional[str]) -> FrameEncoding:
+    """Pick the frame encoding for a client.
+
+    Args:
+        requested (Optional[str]): The encoding that the client asked for.
+
+    Returns:
+        FrameEncoding: The requested encoding if it is available, otherwise JSON.
+    """
+    try:
+        encoding = FrameEncoding((requested or "").lower())
+    except ValueError:
+        return FrameEncoding.JSON
+    return encoding if encoding in get_available_encodings() else FrameEncoding.JSON
+
+
+class EncodedFrame:
+    """A message update that was serialized to JSON once.
+
+    Only the JSON text is pickled, the binary encodings are converted from it on demand
+    and cached in the process that sends the frame.
+
+    Attributes:
+        text (str): The JSON text of the update.
+    """
+
+    __slots__ = ("text", "_binary")
+
+    def __init__(self, text: str):
+        """Wrap the JSON text of an update.
+
+        Args:
+            text (str): The JSON text of the update.
+        """
+        self.text = text
+        self._binary: Dict[FrameEncoding, bytes] = {}
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "EncodedFrame":
+        """Serialize an update.
+
+        Args:
+            data (Dict[str, Any]): The update, which must be JSON serializable.
+
+        Returns:
+            EncodedFrame: The serialized update.
+        """
+        return cls(json.dumps(data))
+
+    def encode(self, encoding: FrameEncoding) -> Union[str, bytes]:
+        """Get the frame in an encoding.
+
+        Args:
+            encoding (FrameEncoding): The encoding.
+
+        Returns:
+            str | bytes: The JSON text, or the bytes of a binary encoding.
+
+        Raises:
+            ValueError: If the library of the encoding is not installed.
+        """
+        if encoding == FrameEncoding.JSON:
+            return self.text
+
+        binary = self._binary.get(encoding)
+        if binary is None:
+            if encoding == FrameEncoding.MSGPACK and msgpack is not None:
+                binary = cast(bytes, msgpack.packb(json.loads(self.text)))
+            elif encoding == FrameEncoding.CBOR and cbor2 is not None:
+                binary = cast(bytes, cbor2.dumps(json.loads(self.text)))
+            else:
+                raise ValueError(f"The {encoding.value} frame encoding is not available")
+            self._binary[encoding] = binary
+        return binary
+
+    def with_sequence(self, sequence: int) -> "EncodedFrame":
+        """Get a copy of the frame with a sequence number.
+
+        The number is added to the start of the JSON text, without serializing the update
+        again.
+
+        Args:
+            sequence (int): The sequence number.
+
+        Returns:
+            EncodedFrame: The frame with a "sequence" key.
+        """
+        rest = self.text[1:].lstrip()
+        separator = "" if rest.startswith("}") else ", "
+        return EncodedFrame(f'{{"sequence": {sequence}{separator}{rest}')
+
+    def __getstate__(self) -> str:
+        return self.text
+
+    def __setstate__(self, state: str) -> None:
+        self.text = state
+        self._binary = {}
+
+
+def encode_message_update(
+    message_id: str, data: Dict[str, Any], connection_type: str = "message"
+) -> EncodedFrame:
+    """Serialize an update of a message for the subscribers of the message.
+
+    Args:
+        message_id (str): The ID of the message.
+        data (Dict[str, Any]): The update, which must be JSON serializable.  The message ID
+            and connection type are added to it.
+        connection_type (str): The WebSocket connection type of the subscribers.
+
+    Returns:
+        EncodedFrame: The serialized update.
+    """
+    data["message_id"] = message_id
+    data["connection_type"] = connection_type
+    return EncodedFrame.from_data(data)
@@ -14,8 +14,11 @@ import platform
 import re
 import subprocess
 import sys
+from functools import lru_cache
 from typing import Any, Dict, List, Tuple
 
+from tiktoken import Encoding, encoding_for_model
+
 from local_operator.types import ResponseJsonSchema
 
 # Configure logging (optional, but helpful for debugging)
@@ -28,6 +31,32 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# --- Token Counting ---
+
+
+DEFAULT_TOKENIZER_MODEL = "gpt-4o"
+"""The model whose tokenizer is used when a model has no tiktoken encoding of its own."""
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str) -> Encoding:
+    """Get the tiktoken encoding for a model, resolving it only once per model.
+
+    Models that tiktoken does not know about, such as non-OpenAI models, fall back to
+    the GPT-4o tokenizer as an approximation.
+
+    Args:
+        model_name (str): The name of the model.
+
+    Returns:
+        Encoding: The tokenizer to use for the model.
+    """
+    try:
+        return encoding_for_model(model_name)
+    except Exception:
+        return encoding_for_model(DEFAULT_TOKENIZER_MODEL)
+
+
 # --- Response Cleaning ---
 
 
@@ -371,6 +400,53 @@ def _extract_tag_content(xml_string: str, tag_name: str) -> Tuple[str, int]:
     return content, next_search_start_index
 
 
+def _parse_read_range(read_range_str: str) -> Dict[str, Any]:
+    """
+    Parses the content of a <read_range> tag into the fields of a FileReadRange.
+
+    Each line of the tag holds a key and a value, for example:
+
+        lines: 100-200
+        bytes: 0-4096
+        pattern: ERROR.*timeout
+
+    Ranges are inclusive of the first and exclusive of the last byte, line ranges are
+    inclusive of both lines, and either end of a range can be left open.  Lines that can
+    not be parsed are ignored.
+
+    Args:
+        read_range_str (str): The string content inside the <read_range> tag.
+
+    Returns:
+        Dict[str, Any]: The fields of the read range that were found.
+    """
+    read_range: Dict[str, Any] = {}
+    for line in read_range_str.splitlines():
+        key, separator, value = line.partition(":")
+        key = key.strip().lower()
+        if not separator:
+            continue
+        if key == "pattern":
+            read_range["pattern"] = value.strip()
+            continue
+        if key not in ("lines", "bytes"):
+            continue
+
+        start, dash, end = value.partition("-")
+        prefix = "line" if key == "lines" else "byte"
+        try:
+            if start.strip():
+                read_range[f"start_{prefix}"] = int(start)
+            if end.strip():
+                read_range[f"end_{prefix}"] = int(end)
+            elif not dash and key == "lines":
+                # A single line number reads just that line
+                read_range["end_line"] = int(start)
+        except ValueError:
+            continue
+    return read_range
+
+
 def _parse_replacements(replacements_str: str) -> List[Dict[str, str]]:
     """
     Parses the content of a <replacements> tag in diff notation, supporting nested SEARCH blocks.
@@ -555,6 +631,10 @@ def parse_agent_action_xml(xml_string: str) -> Dict[str, Any]:
     if replacements_str:
         parsed_data["replacements"] = _parse_replacements(replacements_str)
 
+    read_range_str, _ = _extract_tag_content(xml_content_to_parse, "read_range")
+    if read_range_str:
+        parsed_data["read_range"] = _parse_read_range(read_range_str)
+
     mentioned_files_str, _ = _extract_tag_content(xml_content_to_parse, "mentioned_files")
     if mentioned_files_str:
         parsed_data["mentioned_files"] = [
@@ -5,17 +5,24 @@ This module provides functionality to track and manage asynchronous jobs
 for the Local Operator, including their status, associated agents, and timing information.
 It supports running jobs in isolated contexts that can change working directories
 without affecting the parent process.
+
+The status changes and message updates of each job are also kept in a log of job events,
+which streams of the job read from.  Every message update carries the full state of the
+message, so the log only keeps the latest update of each message.
 """
 
 import asyncio
+import json
 import logging
 import os
 import time
 import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from enum import Enum
 from multiprocessing import Process
-from typing import Any, Dict, List, Optional, TypeVar, Union, cast
+from typing import Any, Dict, Hashable, List, Optional, Tuple, TypeVar, Union, cast
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -25,6 +32,9 @@ logger = logging.getLogger("local_operator.jobs")
 
 T = TypeVar("T")
 
+JOB_EVENT_LOG_SIZE = 256
+"""The maximum number of events kept in the event log of a job."""
+
 
 class JobStatus(str, Enum):
     """Enum representing the possible states of a job."""
@@ -36,6 +46,114 @@ class JobStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+TERMINAL_JOB_STATUSES = frozenset({JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED})
+"""The statuses of jobs that have ended."""
+
+
+@dataclass
+class JobEvent:
+    """An event of a job.
+
+    Attributes:
+        id (int): The number of the event, which increases with every event of the job.
+        event (str): The type of the event, "status" or "message".
+        data (str): The JSON text of the event.
+    """
+
+    id: int
+    event: str
+    data: str
+
+
+class JobEventLog:
+    """The latest events of a job, which any number of streams read without registering.
+
+    Events with a key replace the earlier event with the same key, and the oldest events
+    are dropped when the log is full.
+
+    Attributes:
+        last_id (int): The ID of the latest event, 0 before the first.
+        dropped_id (int): The ID of the latest event that was dropped because the log was
+            full, 0 if none was.
+        closed (bool): Whether the job has ended, after which no more events are added.
+    """
+
+    def __init__(self, size: int = JOB_EVENT_LOG_SIZE):
+        """Initialize an empty log.
+
+        Args:
+            size (int): The maximum number of events to keep.
+        """
+        self.size = size
+        self.last_id = 0
+        self.dropped_id = 0
+        self.closed = False
+        self._events: OrderedDict[Hashable, JobEvent] = OrderedDict()
+        self._changed = asyncio.Event()
+
+    def publish(self, event: str, data: str, key: Optional[Hashable] = None) -> JobEvent:
+        """Add an event and wake up the streams that wait for one.
+
+        Args:
+            event (str): The type of the event.
+            data (str): The JSON text of the event.
+            key (Optional[Hashable]): The key of the event, an earlier event with the same
+                key is removed.
+
+        Returns:
+            JobEvent: The event that was added.
+        """
+        self.last_id += 1
+        job_event = JobEvent(self.last_id, event, data)
+        if key is None:
+            key = object()
+        self._events.pop(key, None)
+        self._events[key] = job_event
+        if len(self._events) > self.size:
+            _, dropped = self._events.popitem(last=False)
+            self.dropped_id = max(self.dropped_id, dropped.id)
+        self._notify()
+        return job_event
+
+    def close(self) -> None:
+        """Mark the job as ended and wake up the streams that wait for events."""
+        self.closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(self, last_id: int) -> Tuple[List[JobEvent], bool]:
+        """Get the events after an event ID.
+
+        Args:
+            last_id (int): The ID of the last event that the reader has, 0 for none.
+
+        Returns:
+            Tuple[List[JobEvent], bool]: The kept events after the ID, oldest first, and
+                whether they bring the reader up to date.  They do not if events that the
+                reader missed were dropped, or if the ID is not one of this log.
+        """
+        events = [event for event in self._events.values() if event.id > last_id]
+        return events, self.dropped_id <= last_id <= self.last_id
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for the next event or for the job to end.
+
+        Args:
+            timeout (float): The maximum number of seconds to wait.
+
+        Returns:
+            bool: True if an event was added or the job ended, False on timeout.
+        """
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
 class JobContextRecord(BaseModel):
     """Model representing a record of a job context."""
 
@@ -147,6 +265,7 @@ class JobManager:
     def __init__(self) -> None:
         """Initialize the JobManager with an empty jobs dictionary."""
         self.jobs: Dict[str, Job] = {}
+        self.job_events: Dict[str, JobEventLog] = {}
         self._lock = asyncio.Lock()
         self._processes: Dict[str, Process] = {}
 
@@ -243,8 +362,54 @@ class JobManager:
                     else:
                         job.result = result
 
+        events = self.get_job_events(job_id)
+        if not events.closed:
+            events.publish(
+                "status",
+                json.dumps(
+                    {
+                        "job_id": job_id,
+                        "status": status.value,
+                        "result": job.result.model_dump() if job.result else None,
+                    },
+                    default=str,
+                ),
+            )
+            if status in TERMINAL_JOB_STATUSES:
+                events.close()
+
         return job
 
+    def get_job_events(self, job_id: str) -> JobEventLog:
+        """
+        Get the event log of a job, creating it on first use.
+
+        Args:
+            job_id: The ID of the job
+
+        Returns:
+            The event log of the job
+        """
+        events = self.job_events.get(job_id)
+        if events is None:
+            events = self.job_events[job_id] = JobEventLog()
+        return events
+
+    def publish_message_update(self, job_id: str, message_id: str, data: str) -> None:
+        """
+        Add an update of a message of a job to the event log of the job.
+
+        The update replaces the earlier update of the same message in the log.
+
+        Args:
+            job_id: The ID of the job
+            message_id: The ID of the message
+            data: The JSON text of the update
+        """
+        events = self.get_job_events(job_id)
+        if not events.closed:
+            events.publish("message", data, key=("message", message_id))
+
     async def register_task(self, job_id: str, task: asyncio.Task[T]) -> Job:
         """
         Register an asyncio task with a job.
@@ -423,6 +588,9 @@ class JobManager:
         async with self._lock:
             for job_id in jobs_to_remove:
                 del self.jobs[job_id]
+                events = self.job_events.pop(job_id, None)
+                if events is not None:
+                    events.close()
 
         return len(jobs_to_remove)
 
@@ -0,0 +1,1031 @@
+"""Persistent execution kernels for Local Operator.
+
+An execution kernel is a long-lived child Python interpreter that holds the execution
+context of one session.  Agent code runs in the kernel instead of the worker process, so
+CPU heavy code does not hold the GIL of the worker, a runaway execution can be interrupted
+or killed without killing the job, and the memory of the context is returned to the
+operating system when the kernel exits.
+
+The parent and the kernel talk over a pair of pipes with length-prefixed frames that
+carry code, output streams, log records, tool calls and variable summaries.  Tool calls
+from agent code are forwarded to the tool registry in the parent.  Anything written
+directly to the file descriptors of the kernel, for example by C extensions or
+subprocesses, is forwarded as output as well.
+
+An execution can be given a resource monitor that enforces the resource limits of the
+step, see local_operator.resources.  The monitor samples the kernel process from the
+parent, the code is interrupted when it goes over a limit, and the kernel is killed if the
+code does not stop in time.
+
+This module is also the entry point of the kernel process, and only imports the standard
+library, dill and psutil so that kernels start quickly.
+"""
+
+import ast
+import asyncio
+import builtins
+import importlib
+import inspect
+import logging
+import os
+import signal
+import struct
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import CodeType, ModuleType
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Sequence
+
+import dill
+
+from local_operator.resources import ResourceMonitor, cpu_time_limit
+
+DEFAULT_KERNEL_PRELOAD_MODULES: Sequence[str] = ("numpy", "pandas")
+"""Modules that are imported when a kernel starts, so that the first execution of a
+session does not pay for importing them.  Modules that are not installed are skipped."""
+
+DEFAULT_KERNEL_STARTUP_TIMEOUT = 120.0
+"""The number of seconds to wait for a kernel to import its preloaded modules."""
+
+DEFAULT_INTERRUPT_GRACE_PERIOD = 5.0
+"""The number of seconds that interrupted code has to stop before the kernel is killed."""
+
+AGENT_CODE_FILENAME = "<agent_generated_code>"
+"""The file name that agent code is compiled with, used to find the line of an error."""
+
+COMPILE_CACHE_SIZE = 256
+"""The number of compiled agent code objects that are kept, so that retries and scheduled
+runs of the same code are not compiled again."""
+
+MAX_CONTEXT_VALUE_LENGTH = 10000
+"""The maximum length of the summary of a context variable."""
+
+IGNORED_CONTEXT_KEYS = frozenset(
+    {"__builtins__", "__doc__", "__file__", "__name__", "__package__", "__loader__", "__spec__"}
+)
+"""Context keys that are never summarized or transferred between processes."""
+
+_FRAME_HEADER = struct.Struct(">I")
+
+
+class KernelError(Exception):
+    """Raised when an execution kernel fails to start or stops responding."""
+
+    def __init__(self, message: str = "Execution kernel failed"):
+        self.message = message
+        super().__init__(self.message)
+
+
+@dataclass
+class KernelExecutionResult:
+    """The result of running code in an execution kernel.
+
+    Attributes:
+        error (str | None): The error message if the code raised an exception.
+        error_type (str | None): The name of the exception type if the code raised.
+        traceback (str | None): The formatted traceback if the code raised.
+        error_line (int | None): The line of the agent code that raised, if known.
+        interrupted (bool): Whether the code was interrupted.
+        variables (Dict[str, str]): Summaries of the context variables mentioned in the code.
+        modules (Dict[str, str]): Context variable names bound to modules, mapped to the
+            module names.
+        cwd (str | None): The working directory of the kernel after the execution.
+    """
+
+    error: Optional[str] = None
+    error_type: Optional[str] = None
+    traceback: Optional[str] = None
+    error_line: Optional[int] = None
+    interrupted: bool = False
+    variables: Dict[str, str] = field(default_factory=dict)
+    modules: Dict[str, str] = field(default_factory=dict)
+    cwd: Optional[str] = None
+
+
+def format_signature(key: str, value: Callable[..., Any]) -> str:
+    """Format a callable as a one line definition with its first docstring line.
+
+    Args:
+        key (str): The name that the callable is bound to.
+        value (Callable[..., Any]): The callable to format.
+
+    Returns:
+        str: The formatted definition.
+
+    Raises:
+        ValueError: If the signature of the callable can not be determined.
+    """
+    doc = value.__doc__ or "No description available"
+    doc = doc.split("\n")[0].strip()
+    sig = inspect.signature(value)
+    args = [
+        f"{p.name}: {p.annotation.__name__ if hasattr(p.annotation, '__name__') else str(p.annotation)}"  # noqa: E501
+        for p in sig.parameters.values()
+    ]
+    return_type = (
+        sig.return_annotation.__name__
+        if hasattr(sig.return_annotation, "__name__")
+        else str(sig.return_annotation)
+    )
+    prefix = "async def" if inspect.iscoroutinefunction(value) else "def"
+    return f"{prefix} {key}({', '.join(args)}) -> {return_type}: {doc}"
+
+
+def format_context_value(key: str, value: Any) -> str:
+    """Format a context variable for the agent, limited to MAX_CONTEXT_VALUE_LENGTH characters.
+
+    Args:
+        key (str): The name of the variable.
+        value (Any): The value of the variable.
+
+    Returns:
+        str: The summary of the value.
+    """
+    if inspect.iscoroutine(value):
+        formatted_value_str = f"<Coroutine object {value.__name__} (not awaited)>"
+    elif inspect.iscoroutinefunction(value):
+        try:
+            formatted_value_str = format_signature(key, value)
+        except ValueError:
+            formatted_value_str = f"<AsyncFunction {key}>"
+    elif callable(value):
+        try:
+            formatted_value_str = format_signature(key, value)
+        except ValueError:
+            formatted_value_str = f"<Function {key}>"
+    else:
+        formatted_value_str = str(value)
+
+    if len(formatted_value_str) > MAX_CONTEXT_VALUE_LENGTH:
+        formatted_value_str = (
+            f"{formatted_value_str[:MAX_CONTEXT_VALUE_LENGTH]} ... (truncated due to length limits)"
+        )
+
+    return formatted_value_str
+
+
+def get_tool_signatures(tool_registry: Any) -> Dict[str, bool]:
+    """Get the callable tools of a tool registry and whether each of them is async.
+
+    Args:
+        tool_registry (Any): The tool registry, or None.
+
+    Returns:
+        Dict[str, bool]: Mapping of tool names to True for async tools.
+    """
+    if tool_registry is None:
+        return {}
+
+    signatures: Dict[str, bool] = {}
+    for name in tool_registry:
+        tool = getattr(tool_registry, name, None)
+        if callable(tool) and not name.startswith("_"):
+            signatures[name] = inspect.iscoroutinefunction(tool)
+    return signatures
+
+
+def serialize_variables(context: Mapping[str, Any]) -> Dict[str, Any]:
+    """Serialize the variables of an execution context for transfer to another process.
+
+    Modules are sent by name and imported again on the other side, other values are
+    pickled one by one so that a single unpicklable value does not prevent the transfer
+    of the rest.
+
+    Args:
+        context (Mapping[str, Any]): The execution context.
+
+    Returns:
+        Dict[str, Any]: The pickled values and the module names.
+    """
+    values: Dict[str, bytes] = {}
+    modules: Dict[str, str] = {}
+    for key, value in context.items():
+        if key in IGNORED_CONTEXT_KEYS or key == "tools":
+            continue
+        if isinstance(value, ModuleType):
+            modules[key] = value.__name__
+            continue
+        try:
+            values[key] = dill.dumps(value)
+        except Exception as e:
+            logging.debug(f"Skipping context variable {key} that can not be pickled: {e}")
+    return {"values": values, "modules": modules}
+
+
+def deserialize_variables(
+    variables: Mapping[str, Any], import_modules: bool = True
+) -> Dict[str, Any]:
+    """Restore variables that were serialized with serialize_variables.
+
+    Args:
+        variables (Mapping[str, Any]): The pickled values and the module names.
+        import_modules (bool): Whether to import the modules.  Otherwise modules are bound
+            to empty placeholder modules that only carry the module name.
+
+    Returns:
+        Dict[str, Any]: The restored variables.  Values that fail to load are skipped.
+    """
+    context: Dict[str, Any] = {}
+    for key, module_name in variables.get("modules", {}).items():
+        if not import_modules:
+            context[key] = ModuleType(module_name)
+            continue
+        try:
+            context[key] = importlib.import_module(module_name)
+        except Exception as e:
+            logging.debug(f"Skipping module {module_name} that can not be imported: {e}")
+    for key, data in variables.get("values", {}).items():
+        try:
+            context[key] = dill.loads(data)
+        except Exception as e:
+            logging.debug(f"Skipping context variable {key} that can not be loaded: {e}")
+    return context
+
+
+def write_frame(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """Write a length-prefixed message frame to a binary stream.
+
+    Args:
+        stream (BinaryIO): The stream to write to.
+        message (Dict[str, Any]): The message to write.
+    """
+    payload = dill.dumps(message)
+    stream.write(_FRAME_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> Dict[str, Any]:
+    """Read a length-prefixed message frame from a binary stream.
+
+    Args:
+        stream (BinaryIO): The stream to read from.
+
+    Returns:
+        Dict[str, Any]: The message.
+
+    Raises:
+        EOFError: If the stream was closed.
+    """
+    header = stream.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        raise EOFError("Kernel channel closed")
+    (length,) = _FRAME_HEADER.unpack(header)
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise EOFError("Kernel channel closed")
+    return dill.loads(payload)
+
+
+class _KernelChannel:
+    """The kernel side of the pipe protocol."""
+
+    def __init__(self, commands: BinaryIO, replies: BinaryIO):
+        self.commands = commands
+        self.replies = replies
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            write_frame(self.replies, message)
+
+    def receive(self) -> Dict[str, Any]:
+        return read_frame(self.commands)
+
+    def call_tool(self, name: str, args: Any, kwargs: Any) -> Any:
+        """Run a tool in the parent and wait for its result."""
+        self.send({"type": "tool_call", "name": name, "args": args, "kwargs": kwargs})
+        message = self.receive()
+        if message.get("error") is not None:
+            raise RuntimeError(message["error"])
+        return message.get("value")
+
+
+class _StreamForwarder:
+    """File-like object that forwards writes to the parent as output frames."""
+
+    def __init__(self, channel: _KernelChannel, name: str):
+        self._channel = channel
+        self._name = name
+        self._buffer: List[str] = []
+        self._buffered = 0
+
+    def write(self, text: str) -> int:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if "\n" in text or self._buffered >= 8192:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._buffered = 0
+            self._channel.send({"type": "stream", "name": self._name, "text": text})
+
+    def isatty(self) -> bool:
+        return False
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+
+class _LogForwarder(logging.Handler):
+    """Logging handler that forwards log records to the parent."""
+
+    def __init__(self, channel: _KernelChannel):
+        super().__init__(logging.WARNING)
+        self._channel = channel
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._channel.send(
+                {
+                    "type": "log",
+                    "name": record.name,
+                    "level": record.levelno,
+                    "message": self.format(record),
+                }
+            )
+        except Exception:
+            self.handleError(record)
+
+
+class _ToolProxy:
+    """Stand-in for the tool registry that forwards tool calls to the parent."""
+
+    def __init__(self, channel: _KernelChannel, tools: Mapping[str, bool]):
+        self._channel = channel
+        self._tools = dict(tools)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_") or name not in self._tools:
+            raise AttributeError(f"Tool '{name}' not found in registry")
+
+        channel = self._channel
+
+        if self._tools[name]:
+
+            async def call_async_tool(*args: Any, **kwargs: Any) -> Any:
+                return channel.call_tool(name, args, kwargs)
+
+            call_async_tool.__name__ = name
+            return call_async_tool
+
+        def call_tool(*args: Any, **kwargs: Any) -> Any:
+            return channel.call_tool(name, args, kwargs)
+
+        call_tool.__name__ = name
+        return call_tool
+
+    def __iter__(self):
+        return iter(self._tools)
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile_agent_code(code: str) -> CodeType:
+    """Compile agent code, allowing await at the top level.
+
+    Code objects are immutable, so the compiled code is cached by its source and shared
+    by every execution of the same code.
+
+    Args:
+        code (str): The agent code.
+
+    Returns:
+        CodeType: The compiled code, which returns a coroutine when it is evaluated if
+            the code awaits at the top level, see is_async_code.
+
+    Raises:
+        SyntaxError: If the code is not valid Python.
+    """
+    return compile(code, AGENT_CODE_FILENAME, "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT)
+
+
+def is_async_code(compiled_code: CodeType) -> bool:
+    """Whether compiled agent code awaits at the top level and must run on an event loop.
+
+    The compiler marks code with a top level await, async for or async with as a
+    coroutine, while code that only defines async functions is compiled as regular code.
+    """
+    return bool(compiled_code.co_flags & inspect.CO_COROUTINE)
+
+
+def get_error_line(error: BaseException) -> Optional[int]:
+    """Get the line of the agent code where an error was raised.
+
+    Args:
+        error (BaseException): An error raised by compiling or running agent code.
+
+    Returns:
+        int | None: The line of the innermost frame of the agent code in the traceback,
+            or the line of a syntax error, or None if the error did not come from agent
+            code.
+    """
+    line: Optional[int] = None
+    tb = error.__traceback__
+    while tb is not None:
+        if tb.tb_frame.f_code.co_filename == AGENT_CODE_FILENAME:
+            line = tb.tb_lineno
+        tb = tb.tb_next
+    if line is None and isinstance(error, SyntaxError) and error.filename == AGENT_CODE_FILENAME:
+        line = error.lineno
+    return line
+
+
+class _Kernel:
+    """The state and command loop of the kernel process."""
+
+    def __init__(self, channel: _KernelChannel):
+        self.channel = channel
+        self.namespace: Dict[str, Any] = {"__builtins__": builtins, "__name__": "__main__"}
+        self.loop = asyncio.new_event_loop()
+        self.executing = False
+
+    def handle_interrupt(self, signum: int, frame: Any) -> None:
+        # Interrupts are only delivered while agent code runs, so that they never
+        # corrupt a frame that is being written to the parent
+        if self.executing:
+            raise KeyboardInterrupt
+
+    def run(self) -> None:
+        self.channel.send({"type": "ready", "pid": os.getpid()})
+        while True:
+            try:
+                message = self.channel.receive()
+            except EOFError:
+                return
+
+            kind = message.get("type")
+            if kind == "execute":
+                self.channel.send(
+                    self.execute(
+                        message["code"],
+                        message.get("tools") or {},
+                        message.get("cwd"),
+                        message.get("cpu_time_limit"),
+                    )
+                )
+            elif kind == "set_variables":
+                self.namespace.update(deserialize_variables(message["variables"]))
+                self.channel.send({"type": "done"})
+            elif kind == "get_variables":
+                self.channel.send(
+                    {"type": "variables", "variables": serialize_variables(self.namespace)}
+                )
+            elif kind == "shutdown":
+                self.channel.send({"type": "done"})
+                return
+
+    def execute(
+        self,
+        code: str,
+        tools: Mapping[str, bool],
+        cwd: Optional[str],
+        cpu_time_limit_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        result = KernelExecutionResult()
+        if tools:
+            self.namespace["tools"] = _ToolProxy(self.channel, tools)
+
+        try:
+            # Follow the working directory of the parent, which tools may have changed
+            if cwd and cwd != os.getcwd():
+                os.chdir(cwd)
+
+            self.executing = True
+            try:
+                with cpu_time_limit(cpu_time_limit_seconds):
+                    self.run_code(code)
+            finally:
+                self.executing = False
+        except KeyboardInterrupt as e:
+            result.interrupted = True
+            result.error = "Execution interrupted"
+            result.error_type = type(e).__name__
+            result.traceback = "".join(traceback.format_exception(e))
+            result.error_line = get_error_line(e)
+        except BaseException as e:
+            result.error = str(e)
+            result.error_type = type(e).__name__
+            result.traceback = "".join(traceback.format_exception(e))
+            result.error_line = get_error_line(e)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        result.cwd = os.getcwd()
+
+        for key, value in self.namespace.items():
+            if key in IGNORED_CONTEXT_KEYS or key == "tools":
+                continue
+            if isinstance(value, ModuleType):
+                result.modules[key] = value.__name__
+            if key in code:
+                try:
+                    result.variables[key] = format_context_value(key, value)
+                except Exception as e:
+                    result.variables[key] = f"<{type(value).__name__} ({e})>"
+
+        return {"type": "result", "result": result.__dict__}
+
+    def run_code(self, code: str) -> None:
+        compiled_code = compile_agent_code(code)
+        if is_async_code(compiled_code):
+            self.loop.run_until_complete(eval(compiled_code, self.namespace))
+        else:
+            exec(compiled_code, self.namespace)
+
+
+def _watch_parent(parent_pid: int) -> None:
+    """Exit the kernel if the parent process exits, even if agent code is still running."""
+    while True:
+        if os.getppid() != parent_pid:
+            os._exit(1)
+        time.sleep(1.0)
+
+
+def run_kernel(command_fd: int, reply_fd: int, preload_modules: Sequence[str]) -> None:
+    """Run the command loop of a kernel process until the parent closes the channel.
+
+    Args:
+        command_fd (int): File descriptor that commands are read from.
+        reply_fd (int): File descriptor that replies are written to.
+        preload_modules (Sequence[str]): Modules to import before the kernel is ready.
+    """
+    channel = _KernelChannel(os.fdopen(command_fd, "rb"), os.fdopen(reply_fd, "wb"))
+
+    threading.Thread(target=_watch_parent, args=(os.getppid(),), daemon=True).start()
+
+    for module_name in preload_modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            pass
+
+    sys.stdin = open(os.devnull)
+    sys.stdout = _StreamForwarder(channel, "stdout")
+    sys.stderr = _StreamForwarder(channel, "stderr")
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [_LogForwarder(channel)]
+    root_logger.setLevel(logging.WARNING)
+
+    kernel = _Kernel(channel)
+    signal.signal(signal.SIGINT, kernel.handle_interrupt)
+    kernel.run()
+
+
+class ExecutionKernel:
+    """Parent side of an execution kernel that holds the context of one session.
+
+    Only one request runs in a kernel at a time.  Output written by agent code is passed
+    to the `on_output` callback of the running execution as it arrives, and log records
+    are re-emitted on the logger of the same name in the parent.
+
+    Attributes:
+        preload_modules (Sequence[str]): Modules imported when the kernel starts.
+        startup_timeout (float): Seconds to wait for the kernel to be ready.
+        process (asyncio.subprocess.Process | None): The kernel process once started.
+    """
+
+    preload_modules: Sequence[str]
+    startup_timeout: float
+    process: Optional[asyncio.subprocess.Process]
+
+    def __init__(
+        self,
+        preload_modules: Sequence[str] = DEFAULT_KERNEL_PRELOAD_MODULES,
+        startup_timeout: float = DEFAULT_KERNEL_STARTUP_TIMEOUT,
+    ):
+        self.preload_modules = preload_modules
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._output_tasks: List[asyncio.Task[None]] = []
+        self._on_output: Optional[Callable[[str, str], None]] = None
+        self._limit_timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the kernel process is running."""
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def is_busy(self) -> bool:
+        """Whether the kernel is running a request."""
+        return not self._idle.is_set()
+
+    async def start(self) -> None:
+        """Start the kernel process and wait until it is ready.
+
+        Raises:
+            KernelError: If kernels are not supported on this platform, or the kernel
+                does not start within the startup timeout.
+        """
+        if os.name == "nt":
+            raise KernelError("Execution kernels are not supported on Windows")
+
+        command_read, command_write = os.pipe()
+        reply_read, reply_write = os.pipe()
+
+        # Make sure that the kernel can import this package even if it is not installed
+        env = os.environ.copy()
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "local_operator.kernel",
+                str(command_read),
+                str(reply_write),
+                *self.preload_modules,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                pass_fds=(command_read, reply_write),
+                start_new_session=True,
+                env=env,
+            )
+        finally:
+            os.close(command_read)
+            os.close(reply_write)
+
+        loop = asyncio.get_running_loop()
+        self._reader = asyncio.StreamReader()
+        reader_protocol = asyncio.StreamReaderProtocol(self._reader)
+        await loop.connect_read_pipe(lambda: reader_protocol, os.fdopen(reply_read, "rb", 0))
+        write_transport, write_protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, os.fdopen(command_write, "wb", 0)
+        )
+        self._writer = asyncio.StreamWriter(write_transport, write_protocol, None, loop)
+
+        for name, stream in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            if stream is not None:
+                self._output_tasks.append(asyncio.create_task(self._forward_output(name, stream)))
+
+        try:
+            await asyncio.wait_for(self._receive(), self.startup_timeout)
+        except (asyncio.TimeoutError, KernelError) as e:
+            self.kill()
+            raise KernelError(f"Execution kernel failed to start: {e}") from e
+
+    async def execute(
+        self,
+        code: str,
+        tool_registry: Any = None,
+        on_output: Optional[Callable[[str, str], None]] = None,
+        interrupt_grace_period: float = DEFAULT_INTERRUPT_GRACE_PERIOD,
+        resource_monitor: Optional[ResourceMonitor] = None,
+    ) -> KernelExecutionResult:
+        """Run code in the kernel.
+
+        If the calling task is cancelled, or the code goes over a limit of the resource
+        monitor, the code is interrupted, and the kernel is killed if the code does not
+        stop within the grace period.  The CPU time of the kernel is also limited with
+        RLIMIT_CPU to the CPU time limit plus the grace period.
+
+        Args:
+            code (str): The code to run.
+            tool_registry (Any): The tool registry that tool calls from the code run on.
+            on_output (Optional[Callable[[str, str], None]]): Called with the stream name
+                and the text of output written by the code.
+            interrupt_grace_period (float): Seconds that cancelled code has to stop.
+            resource_monitor (Optional[ResourceMonitor]): Monitor that measures the kernel
+                during the execution and enforces the limits of the step.
+
+        Returns:
+            KernelExecutionResult: The result of the execution.
+
+        Raises:
+            KernelError: If the kernel is not running or exits during the execution.
+        """
+        async with self._lock:
+            self._ensure_alive()
+            self._idle.clear()
+            self._on_output = on_output
+            try:
+                cpu_time_limit_seconds = None
+                if resource_monitor is not None and self.process is not None:
+                    loop = asyncio.get_running_loop()
+
+                    def enforce_limit(kill: bool) -> None:
+                        loop.call_soon_threadsafe(self._enforce_limit, kill, interrupt_grace_period)
+
+                    resource_monitor.start(self.process.pid, enforce_limit)
+                    if resource_monitor.cpu_time_limit is not None:
+                        cpu_time_limit_seconds = (
+                            resource_monitor.cpu_time_limit + interrupt_grace_period
+                        )
+                await self._send(
+                    {
+                        "type": "execute",
+                        "code": code,
+                        "tools": get_tool_signatures(tool_registry),
+                        "cwd": os.getcwd(),
+                        "cpu_time_limit": cpu_time_limit_seconds,
+                    }
+                )
+                return await self._read_result(tool_registry)
+            except asyncio.CancelledError:
+                await self._interrupt_cancelled(tool_registry, interrupt_grace_period)
+                raise
+            finally:
+                if resource_monitor is not None:
+                    resource_monitor.stop()
+                if self._limit_timer is not None:
+                    self._limit_timer.cancel()
+                    self._limit_timer = None
+                self._on_output = None
+                self._idle.set()
+
+    async def interrupt(self, grace_period: float = DEFAULT_INTERRUPT_GRACE_PERIOD) -> bool:
+        """Interrupt the running execution, and kill the kernel if it does not stop.
+
+        Args:
+            grace_period (float): Seconds that the code has to stop before the kernel is
+                killed.
+
+        Returns:
+            bool: True if the kernel was killed.
+        """
+        if not self.is_alive or not self.is_busy or self.process is None:
+            return False
+
+        self.process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(self._idle.wait(), grace_period)
+            return False
+        except asyncio.TimeoutError:
+            self.kill()
+            return True
+
+    async def set_variables(self, context: Mapping[str, Any]) -> None:
+        """Load variables into the context of the kernel.
+
+        Args:
+            context (Mapping[str, Any]): The variables to load, values that can not be
+                pickled are skipped.
+        """
+        async with self._lock:
+            self._ensure_alive()
+            await self._send({"type": "set_variables", "variables": serialize_variables(context)})
+            await self._receive()
+
+    async def get_variables(self, import_modules: bool = True) -> Dict[str, Any]:
+        """Get a copy of the variables in the context of the kernel.
+
+        Args:
+            import_modules (bool): Whether to import the modules of the context in this
+                process, see deserialize_variables.
+
+        Returns:
+            Dict[str, Any]: The variables that can be pickled, and the modules.
+        """
+        async with self._lock:
+            self._ensure_alive()
+            await self._send({"type": "get_variables"})
+            message = await self._receive()
+            return deserialize_variables(message["variables"], import_modules)
+
+    async def restart(self, context: Optional[Mapping[str, Any]] = None) -> None:
+        """Replace the kernel process with a new one and load a context into it.
+
+        Args:
+            context (Optional[Mapping[str, Any]]): The context to load, for example the
+                persisted context of the agent.
+        """
+        await self.shutdown()
+        self.process = None
+        self._lock = asyncio.Lock()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        await self.start()
+        if context:
+            await self.set_variables(context)
+
+    async def shutdown(self, timeout: float = DEFAULT_INTERRUPT_GRACE_PERIOD) -> None:
+        """Stop the kernel process, killing it if it does not exit within the timeout.
+
+        Args:
+            timeout (float): Seconds to wait for the kernel to exit.
+        """
+        if self.process is None:
+            return
+
+        if self.is_alive and not self.is_busy:
+            try:
+                await asyncio.wait_for(self._send({"type": "shutdown"}), timeout)
+            except (asyncio.TimeoutError, KernelError, ConnectionError):
+                pass
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        try:
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.kill()
+            await self.process.wait()
+
+        for task in self._output_tasks:
+            task.cancel()
+        await asyncio.gather(*self._output_tasks, return_exceptions=True)
+        self._output_tasks = []
+
+    def kill(self) -> None:
+        """Kill the kernel process immediately."""
+        if self.is_alive and self.process is not None:
+            self.process.kill()
+
+    def _ensure_alive(self) -> None:
+        if not self.is_alive:
+            raise KernelError("Execution kernel is not running")
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        if self._writer is None:
+            raise KernelError("Execution kernel is not running")
+        payload = dill.dumps(message)
+        self._writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+        try:
+            await self._writer.drain()
+        except ConnectionError as e:
+            raise KernelError(f"Execution kernel stopped: {e}") from e
+
+    async def _receive(self) -> Dict[str, Any]:
+        if self._reader is None:
+            raise KernelError("Execution kernel is not running")
+        try:
+            header = await self._reader.readexactly(_FRAME_HEADER.size)
+            (length,) = _FRAME_HEADER.unpack(header)
+            payload = await self._reader.readexactly(length)
+        except asyncio.IncompleteReadError as e:
+            raise KernelError("Execution kernel exited unexpectedly") from e
+        return dill.loads(payload)
+
+    async def _read_result(self, tool_registry: Any) -> KernelExecutionResult:
+        """Handle output and tool calls from the kernel until the execution finishes."""
+        while True:
+            message = await self._receive()
+            kind = message.get("type")
+            if kind == "result":
+                return KernelExecutionResult(**message["result"])
+            elif kind == "stream":
+                self._emit_output(message["name"], message["text"])
+            elif kind == "log":
+                logging.getLogger(message["name"]).log(message["level"], message["message"])
+            elif kind == "tool_call":
+                await self._send(await self._run_tool(message, tool_registry))
+
+    async def _run_tool(self, message: Dict[str, Any], tool_registry: Any) -> Dict[str, Any]:
+        """Run a tool call from the kernel on the tool registry."""
+        try:
+            tool = getattr(tool_registry, message["name"])
+            value = tool(*message["args"], **message["kwargs"])
+            if inspect.isawaitable(value):
+                value = await value
+            dill.dumps(value)
+            return {"type": "tool_result", "value": value, "error": None}
+        except Exception as e:
+            return {"type": "tool_result", "value": None, "error": f"{type(e).__name__}: {e}"}
+
+    async def _interrupt_cancelled(self, tool_registry: Any, grace_period: float) -> None:
+        """Interrupt the code of a cancelled execution and wait for it to stop."""
+        if not self.is_alive or self.process is None:
+            return
+        self.process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.wait_for(self._read_result(tool_registry), grace_period)
+        except (asyncio.TimeoutError, KernelError):
+            self.kill()
+
+    def _enforce_limit(self, kill: bool, grace_period: float) -> None:
+        """Interrupt an execution that went over a resource limit, or kill the kernel."""
+        if not self.is_alive or not self.is_busy or self.process is None:
+            return
+        if kill:
+            self.kill()
+        elif self._limit_timer is None:
+            self.process.send_signal(signal.SIGINT)
+            self._limit_timer = asyncio.get_running_loop().call_later(grace_period, self.kill)
+
+    def _emit_output(self, name: str, text: str) -> None:
+        if self._on_output is not None:
+            try:
+                self._on_output(name, text)
+            except Exception as e:
+                logging.debug(f"Failed to forward kernel output: {e}")
+
+    async def _forward_output(self, name: str, stream: asyncio.StreamReader) -> None:
+        """Forward output that was written directly to the file descriptors of the kernel."""
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                return
+            self._emit_output(name, chunk.decode("utf-8", errors="replace"))
+
+
+class KernelPool:
+    """Pool of pre-warmed execution kernels with the preloaded modules already imported.
+
+    Kernels hold the state of one session and are never returned to the pool.  Every
+    kernel that is acquired is replaced by a new one that starts in the background, so
+    that the next session does not wait for the interpreter to start.
+
+    Attributes:
+        size (int): The number of warm kernels to keep ready.
+        preload_modules (Sequence[str]): Modules imported by every kernel when it starts.
+    """
+
+    size: int
+    preload_modules: Sequence[str]
+
+    def __init__(self, size: int, preload_modules: Sequence[str] = DEFAULT_KERNEL_PRELOAD_MODULES):
+        self.size = size
+        self.preload_modules = preload_modules
+        self._warm: List[asyncio.Task[ExecutionKernel]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self) -> ExecutionKernel:
+        """Take a ready kernel from the pool, or start a new one if none is ready.
+
+        Returns:
+            ExecutionKernel: A started kernel that belongs to the caller.
+
+        Raises:
+            KernelError: If a kernel can not be started.
+        """
+        self._bind_to_running_loop()
+
+        while self._warm:
+            task = self._warm.pop(0)
+            self._fill()
+            try:
+                kernel = await task
+            except Exception as e:
+                logging.warning(f"Discarding execution kernel that failed to start: {e}")
+                continue
+            if kernel.is_alive:
+                return kernel
+
+        kernel = ExecutionKernel(self.preload_modules)
+        await kernel.start()
+        self._fill()
+        return kernel
+
+    async def shutdown(self) -> None:
+        """Stop all warm kernels."""
+        tasks, self._warm = self._warm, []
+        for kernel in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(kernel, ExecutionKernel):
+                await kernel.shutdown()
+
+    def _fill(self) -> None:
+        while len(self._warm) < self.size:
+            self._warm.append(asyncio.create_task(self._start_kernel()))
+
+    async def _start_kernel(self) -> ExecutionKernel:
+        kernel = ExecutionKernel(self.preload_modules)
+        await kernel.start()
+        return kernel
+
+    def _bind_to_running_loop(self) -> None:
+        """Drop warm kernels that were started on another event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        self._loop = loop
+        stale, self._warm = self._warm, []
+        for task in stale:
+            if task.done() and not task.cancelled() and task.exception() is None:
+                task.result().kill()
+            else:
+                task.cancel()
+
+
+@lru_cache(maxsize=None)
+def get_kernel_pool(size: int) -> KernelPool:
+    """Get the shared kernel pool of this process.
+
+    Args:
+        size (int): The number of warm kernels to keep ready.
+
+    Returns:
+        KernelPool: The pool shared by all executors in this process with the same size.
+    """
+    return KernelPool(size)
+
+
+if __name__ == "__main__":
+    run_kernel(int(sys.argv[1]), int(sys.argv[2]), sys.argv[3:])
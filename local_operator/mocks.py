@@ -93,15 +93,17 @@ class ChatMock:
         if not messages:
             raise ValueError("No messages provided to ChatMock")
 
-        # Get last user message
+        # Get last user message, skipping the ephemeral heads up display and task
+        # instructions which are sent after it
         user_message = ""
         for msg in reversed(list(messages)):
+            text = msg.get("content", [])[0].get("text", "") or ""
             if (
                 msg.get("role") == ConversationRole.USER.value
-                and "agent_heads_up_display"
-                not in msg.get("content", [])[0].get("text", "").lower()
+                and "agent_heads_up_display" not in text.lower()
+                and "<request_classification>" not in text
             ):
-                user_message = msg.get("content", [])[0].get("text", "") or ""
+                user_message = text
                 break
 
         # Find best matching response
@@ -0,0 +1,215 @@
+"""Cached catalogs of the models of hosting providers.
+
+OpenRouter and Radient list hundreds of models in a catalog that takes a round trip and
+a few hundred kilobytes to fetch, and that changes a few times a day at most.  The
+catalogs are cached in memory and in a JSON file in the config directory, which the
+server and the job processes share, so that listing models and starting a job do not
+wait for the provider.
+
+A catalog is fresh for a TTL after it was fetched.  A stale catalog is still used, and
+refreshed in a background thread while it is ("stale while revalidate"), until it is
+older than the maximum stale age, after which it is fetched again before it is used.  If
+the provider can not be reached, the last catalog that was fetched is used regardless of
+its age.
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+
+from local_operator.clients.openrouter import (
+    OpenRouterClient,
+    OpenRouterListModelsResponse,
+)
+from local_operator.clients.radient import RadientClient, RadientListModelsResponse
+from local_operator.persisted_cache import PersistedLRUCache
+
+# Name of the file used to persist the model catalog cache
+MODEL_CATALOG_CACHE_FILE_NAME: str = "model_catalog_cache.json"
+
+# Number of seconds that a catalog is used without being refreshed
+DEFAULT_MODEL_CATALOG_TTL: float = 60 * 60
+
+# Number of seconds after which a stale catalog is fetched again before it is used
+DEFAULT_MODEL_CATALOG_MAX_STALE: float = 7 * 24 * 60 * 60
+
+# Maximum number of catalogs to keep, one for each provider and base URL
+MAX_MODEL_CATALOG_ENTRIES: int = 16
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+def _is_valid_entry(entry: Any) -> bool:
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("fetched_at"), (int, float))
+        and isinstance(entry.get("catalog"), dict)
+    )
+
+
+class ModelCatalogCache:
+    """Thread safe cache of provider model catalogs with stale-while-revalidate.
+
+    Catalogs are stored as the JSON data of the list models response of the provider,
+    keyed by the provider and its base URL.  Concurrent lookups of a catalog that has to
+    be fetched share one fetch.
+
+    Attributes:
+        cache_file (Path | None): Path to the file that the cache is persisted to, or None
+            to keep the cache in memory only
+        ttl (float): Number of seconds that a catalog is used without being refreshed
+        max_stale (float): Number of seconds after which a stale catalog is fetched again
+            before it is used
+    """
+
+    cache_file: Optional[Path]
+    ttl: float
+    max_stale: float
+
+    def __init__(
+        self,
+        cache_file: Optional[Path] = None,
+        ttl: float = DEFAULT_MODEL_CATALOG_TTL,
+        max_stale: float = DEFAULT_MODEL_CATALOG_MAX_STALE,
+    ):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: PersistedLRUCache[Dict[str, Any]] = PersistedLRUCache(
+            cache_file,
+            MAX_MODEL_CATALOG_ENTRIES,
+            name="model catalog cache",
+            is_valid=_is_valid_entry,
+        )
+        self._lock = threading.Lock()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._refreshing: Set[str] = set()
+        self._parsed: Dict[str, Tuple[Dict[str, Any], BaseModel]] = {}
+
+    def get(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Get a catalog, fetching it only if there is no usable cached catalog.
+
+        Args:
+            key (str): The key of the catalog
+            fetch (Callable[[], Dict[str, Any]]): Fetches the JSON data of the catalog from
+                the provider
+
+        Returns:
+            Dict[str, Any]: The JSON data of the catalog
+
+        Raises:
+            Exception: Any error of the fetch, if the catalog had to be fetched and no
+                catalog was cached
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.time() - entry["fetched_at"]
+            if age < self.ttl:
+                return entry["catalog"]
+            if age < self.max_stale:
+                self._refresh_in_background(key, fetch)
+                return entry["catalog"]
+        return self._fetch(key, fetch)
+
+    def invalidate(self, key: str) -> None:
+        """Remove a catalog, so that the next lookup fetches it.
+
+        Args:
+            key (str): The key of the catalog
+        """
+        self._entries.pop(key)
+        self._entries.save()
+
+    def _fetch(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Fetch a catalog and cache it, or wait for the fetch that is already running."""
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(key, threading.Lock())
+
+        with fetch_lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+                # Another thread fetched the catalog while this one waited
+                return entry["catalog"]
+
+            try:
+                catalog = fetch()
+            except Exception as e:
+                if entry is None:
+                    raise
+                logging.warning(f"Failed to refresh the {key} model catalog, using the cache: {e}")
+                return entry["catalog"]
+
+            self._entries.set(key, {"fetched_at": time.time(), "catalog": catalog})
+            self._entries.save()
+            return catalog
+
+    def _refresh_in_background(self, key: str, fetch: Callable[[], Dict[str, Any]]) -> None:
+        """Start refreshing a stale catalog unless it is being refreshed already."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                self._fetch(key, fetch)
+            except Exception as e:
+                logging.warning(f"Failed to refresh the {key} model catalog: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"refresh-{key}-models", daemon=True).start()
+
+    def _parse(self, key: str, data: Dict[str, Any], response_type: Type[ResponseT]) -> ResponseT:
+        """Validate the data of a catalog once, and reuse the response until it changes."""
+        parsed = self._parsed.get(key)
+        if parsed is not None and parsed[0] is data and isinstance(parsed[1], response_type):
+            return parsed[1]
+        response = response_type.model_validate(data)
+        self._parsed[key] = (data, response)
+        return response
+
+    def get_openrouter_models(self, client: OpenRouterClient) -> OpenRouterListModelsResponse:
+        """Get the OpenRouter model catalog.
+
+        Args:
+            client (OpenRouterClient): The client used to fetch the catalog
+
+        Returns:
+            OpenRouterListModelsResponse: The models available on OpenRouter
+        """
+        key = f"openrouter:{client.base_url}"
+        data = self.get(key, lambda: client.list_models().model_dump())
+        return self._parse(key, data, OpenRouterListModelsResponse)
+
+    def get_radient_models(self, client: RadientClient) -> RadientListModelsResponse:
+        """Get the Radient model catalog.
+
+        Args:
+            client (RadientClient): The client used to fetch the catalog
+
+        Returns:
+            RadientListModelsResponse: The models available on Radient
+        """
+        key = f"radient:{client.base_url}"
+        data = self.get(key, lambda: client.list_models().model_dump())
+        return self._parse(key, data, RadientListModelsResponse)
+
+
+@lru_cache(maxsize=None)
+def get_model_catalog_cache(config_dir: Path) -> ModelCatalogCache:
+    """Get the shared model catalog cache for a config directory.
+
+    Args:
+        config_dir (Path): The Local Operator config directory
+
+    Returns:
+        ModelCatalogCache: The model catalog cache persisted in the config directory
+    """
+    return ModelCatalogCache(cache_file=config_dir / MODEL_CATALOG_CACHE_FILE_NAME)
@@ -12,6 +12,7 @@ from local_operator.clients.radient import RadientClient
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
 from local_operator.mocks import ChatMock, ChatNoop
+from local_operator.model.catalog import ModelCatalogCache
 from local_operator.model.registry import (
     ModelInfo,
     get_model_info,
@@ -215,13 +216,17 @@ def validate_model(hosting: str, model: str, api_key: SecretStr) -> bool:
     return False
 
 
-def get_model_info_from_openrouter(client: OpenRouterClient, model_name: str) -> ModelInfo:
+def get_model_info_from_openrouter(
+    client: OpenRouterClient, model_name: str, model_catalog: Optional[ModelCatalogCache] = None
+) -> ModelInfo:
     """
     Retrieves model information from OpenRouter based on the model name.
 
     Args:
         client (OpenRouterClient): The OpenRouter client instance.
         model_name (str): The name of the model to retrieve information for.
+        model_catalog (Optional[ModelCatalogCache]): Cache of the model catalog, the
+            catalog is fetched with the client if not given.
 
     Returns:
         ModelInfo: The model information retrieved from OpenRouter.
@@ -230,7 +235,7 @@ def get_model_info_from_openrouter(client: OpenRouterClient, model_name: str) ->
         ValueError: If the model is not found on OpenRouter.
         RuntimeError: If there is an error retrieving the model information.
     """
-    models = client.list_models()
+    models = model_catalog.get_openrouter_models(client) if model_catalog else client.list_models()
     for model in models.data:
         if model.id == model_name:
             model_info = openrouter_default_model_info
@@ -244,13 +249,17 @@ def get_model_info_from_openrouter(client: OpenRouterClient, model_name: str) ->
     raise ValueError(f"Model not found from openrouter models API: {model_name}")
 
 
-def get_model_info_from_radient(client: RadientClient, model_name: str) -> ModelInfo:
+def get_model_info_from_radient(
+    client: RadientClient, model_name: str, model_catalog: Optional[ModelCatalogCache] = None
+) -> ModelInfo:
     """
     Retrieves model information from Radient based on the model name.
 
     Args:
         client (RadientClient): The Radient client instance.
         model_name (str): The name of the model to retrieve information for.
+        model_catalog (Optional[ModelCatalogCache]): Cache of the model catalog, the
+            catalog is fetched with the client if not given.
 
     Returns:
         ModelInfo: The model information retrieved from Radient.
@@ -259,7 +268,7 @@ def get_model_info_from_radient(client: RadientClient, model_name: str) -> Model
         ValueError: If the model is not found on Radient.
         RuntimeError: If there is an error retrieving the model information.
     """
-    models = client.list_models()
+    models = model_catalog.get_radient_models(client) if model_catalog else client.list_models()
     for model in models.data:
         if model.id == model_name:
             model_info = radient_default_model_info
@@ -287,6 +296,7 @@ def configure_model(
     presence_penalty: Optional[float] = None,
     stop: Optional[List[str]] = None,
     seed: Optional[int] = None,
+    model_catalog: Optional[ModelCatalogCache] = None,
 ) -> ModelConfiguration:
     """Configure and return the appropriate model based on hosting platform.
 
@@ -306,6 +316,9 @@ def configure_model(
         Defaults to None.
         stop (Optional[List[str]], optional): Sequences that stop generation. Defaults to None.
         seed (Optional[int], optional): Random seed for deterministic generation. Defaults to None.
+        model_catalog (Optional[ModelCatalogCache], optional): Cache of the model catalogs
+        that model_info_client looks models up in. Defaults to None, which fetches the
+        catalog.
 
     Returns:
         ModelConfiguration: Config object containing the configured model instance and API
@@ -382,6 +395,7 @@ def configure_model(
             "top_p": top_p,
             "model": model_name,
             "base_url": base_url,
+            "stream_usage": True,
             "default_headers": {
                 "HTTP-Referer": "https://local-operator.com",
                 "X-Title": "Local Operator",
@@ -415,6 +429,7 @@ def configure_model(
             "top_p": top_p,
             "base_url": base_url,
             "model": model_name,
+            "stream_usage": True,
         }
         if max_tokens is not None:
             model_kwargs["max_tokens"] = max_tokens
@@ -476,6 +491,7 @@ def configure_model(
             "top_p": top_p,
             "model": model_name,
             "base_url": "https://openrouter.ai/api/v1",
+            "stream_usage": True,
             "default_headers": {
                 "HTTP-Referer": "https://local-operator.com",
                 "X-Title": "Local Operator",
@@ -558,6 +574,7 @@ def configure_model(
             "top_p": top_p,
             "model": model_name,
             "base_url": "https://dashscope-intl.aliyuncs.com/compatible-mode/v1",
+            "stream_usage": True,
         }
         if max_tokens is not None:
             model_kwargs["max_tokens"] = max_tokens
@@ -651,6 +668,7 @@ def configure_model(
             "model": model_name,
             "base_url": "https://api.x.ai/v1",
             "api_key": api_key.get_secret_value(),
+            "stream_usage": True,
         }
 
         if temperature is not None:
@@ -671,9 +689,11 @@ def configure_model(
 
     if model_info_client:
         if hosting == "openrouter" and isinstance(model_info_client, OpenRouterClient):
-            model_info = get_model_info_from_openrouter(model_info_client, model_name)
+            model_info = get_model_info_from_openrouter(
+                model_info_client, model_name, model_catalog
+            )
         elif hosting == "radient" and isinstance(model_info_client, RadientClient):
-            model_info = get_model_info_from_radient(model_info_client, model_name)
+            model_info = get_model_info_from_radient(model_info_client, model_name, model_catalog)
         else:
             raise ValueError(f"Model info client not supported for hosting: {hosting}")
     else:
@@ -696,14 +716,23 @@ def configure_model(
     )
 
 
-def calculate_cost(model_info: ModelInfo, input_tokens: int, output_tokens: int) -> float:
+def calculate_cost(
+    model_info: ModelInfo,
+    input_tokens: int,
+    output_tokens: int,
+    cache_read_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
     """
     Calculates the cost of a request based on token usage and model pricing.
 
     Args:
         model_info (ModelInfo): The pricing information for the model.
-        input_tokens (int): The number of input tokens used in the request.
+        input_tokens (int): The number of input tokens used in the request, including any
+            tokens read from or written to the prompt cache.
         output_tokens (int): The number of output tokens generated by the request.
+        cache_read_tokens (int): The number of input tokens read from the prompt cache.
+        cache_write_tokens (int): The number of input tokens written to the prompt cache.
 
     Returns:
         float: The total cost of the request.
@@ -712,9 +741,20 @@ def calculate_cost(model_info: ModelInfo, input_tokens: int, output_tokens: int)
         ValueError: If there is an error during cost calculation.
     """
     try:
-        input_cost = (float(input_tokens) / 1_000_000.0) * model_info.input_price
+        cache_reads_price = model_info.cache_reads_price
+        if cache_reads_price is None:
+            cache_reads_price = model_info.input_price
+        cache_writes_price = model_info.cache_writes_price
+        if cache_writes_price is None:
+            cache_writes_price = model_info.input_price
+
+        uncached_input_tokens = max(input_tokens - cache_read_tokens - cache_write_tokens, 0)
+
+        input_cost = (float(uncached_input_tokens) / 1_000_000.0) * model_info.input_price
+        cache_read_cost = (float(cache_read_tokens) / 1_000_000.0) * cache_reads_price
+        cache_write_cost = (float(cache_write_tokens) / 1_000_000.0) * cache_writes_price
         output_cost = (float(output_tokens) / 1_000_000.0) * model_info.output_price
-        total_cost = input_cost + output_cost
+        total_cost = input_cost + cache_read_cost + cache_write_cost + output_cost
         return total_cost
     except Exception as e:
         raise ValueError(f"Error calculating cost: {e}") from e
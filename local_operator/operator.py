@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 import platform
@@ -8,14 +9,15 @@ from enum import Enum
 from pathlib import Path
 from typing import List
 
-from pydantic import ValidationError
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel, ValidationError
 
 from local_operator.agents import AgentData, AgentRegistry
 from local_operator.config import ConfigManager
 from local_operator.console import VerbosityLevel, print_cli_banner, spinner_context
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
-from local_operator.executor import CodeExecutionResult, LocalCodeExecutor
+from local_operator.executor import CodeExecutionResult, LocalCodeExecutor, ModelTask
 from local_operator.helpers import parse_agent_action_xml
 from local_operator.model.configure import ModelConfiguration
 from local_operator.notebook import save_code_history_to_notebook
@@ -28,7 +30,11 @@ from local_operator.prompts import (
     apply_attachments_to_prompt,
     get_request_type_instructions,
 )
-from local_operator.stream import stream_action_buffer
+from local_operator.stream import (
+    BufferedStream,
+    is_action_payload_complete,
+    stream_action_buffer,
+)
 from local_operator.types import (
     ConversationRecord,
     ConversationRole,
@@ -54,6 +60,46 @@ class OperatorType(Enum):
     SERVER = "server"
 
 
+class SpeculationMetrics(BaseModel):
+    """Counters for speculative first action generation, which starts the first action
+    while the request is still being classified.
+
+    Attributes:
+        attempts (int): Number of speculative first actions that were started
+        hits (int): Number of speculative first actions that were kept
+        seconds_saved (float): Time to first action saved by the kept speculations
+    """
+
+    attempts: int = 0
+    hits: int = 0
+    seconds_saved: float = 0.0
+
+    def record_hit(self, seconds_saved: float) -> None:
+        """Record a speculative first action that was kept.
+
+        Args:
+            seconds_saved (float): How much earlier the action started than it would have
+                after the classification
+        """
+        self.attempts += 1
+        self.hits += 1
+        self.seconds_saved += seconds_saved
+
+    def record_miss(self) -> None:
+        """Record a speculative first action that was discarded."""
+        self.attempts += 1
+
+    def hit_rate(self) -> float:
+        """Get the fraction of speculative first actions that were kept.
+
+        Returns:
+            float: The hit rate, or 0 if nothing was speculated
+        """
+        if self.attempts == 0:
+            return 0.0
+        return self.hits / self.attempts
+
+
 def process_classification_response(response_content: str) -> RequestClassification:
     """Process and validate a response string from the language model into a
     RequestClassification.
@@ -133,6 +179,8 @@ class Operator:
     verbosity_level: VerbosityLevel
     persist_agent_conversation: bool
     env_config: EnvConfig
+    speculative_classification: bool
+    speculation_metrics: SpeculationMetrics
 
     def __init__(
         self,
@@ -147,6 +195,7 @@ class Operator:
         auto_save_conversation: bool = False,
         verbosity_level: VerbosityLevel = VerbosityLevel.VERBOSE,
         persist_agent_conversation: bool = False,
+        speculative_classification: bool = False,
     ):
         """Initialize the Operator with required components.
 
@@ -168,6 +217,9 @@ class Operator:
             persist_agent_conversation (bool): Whether to persist the agent's conversation
                 history to the agent's directory after each completed task.
             env_config (EnvConfig): The environment configuration instance.
+            speculative_classification (bool): Whether to start generating the first action
+                while the request is being classified, and discard it if the classification
+                calls for planning or a change of subject.
 
         The Operator class serves as the main interface for interacting with language models,
         managing configuration, credentials, and code execution. It handles both CLI and
@@ -185,6 +237,8 @@ class Operator:
         self.verbosity_level = verbosity_level
         self.persist_agent_conversation = persist_agent_conversation
         self.env_config = env_config
+        self.speculative_classification = speculative_classification
+        self.speculation_metrics = SpeculationMetrics()
         # Set the delegate callback for DELEGATE actions
         self.executor.delegate_callback = self.delegate_to_agent
         if self.type == OperatorType.CLI:
@@ -332,7 +386,7 @@ class Operator:
 
         while attempt < max_attempts:
             try:
-                response = await self.executor.invoke_model(messages)
+                response = await self.executor.invoke_model(messages, task=ModelTask.CLASSIFY)
                 response_content = (
                     response.content if isinstance(response.content, str) else str(response.content)
                 )
@@ -401,6 +455,7 @@ class Operator:
         _, response_content, _ = await self.invoke_and_process_response(
             self.executor.agent_state.conversation,
             current_task_classification,
+            task=ModelTask.PLAN,
         )
 
         self.executor.set_current_plan(response_content)
@@ -429,6 +484,22 @@ class Operator:
 
         return response_content
 
+    def _can_keep_speculative_response(self, classification: RequestClassification) -> bool:
+        """Check whether a first action that was generated before the request was classified
+        can be kept.
+
+        The action is discarded when the classification requires a plan or changes the
+        subject, since both change the conversation that the first action is based on.
+        Task instructions for new requests are still added for the following steps.
+
+        Args:
+            classification (RequestClassification): The classification of the request
+
+        Returns:
+            bool: True if the speculative first action can be kept
+        """
+        return not classification.planning_required and not classification.subject_change
+
     def add_task_instructions(self, request_classification: RequestClassification) -> None:
         """
         Add the task instructions as an ephemeral message to help the agent
@@ -457,6 +528,22 @@ class Operator:
             )
         )
 
+    def _start_early_safety_review(self, partial_response_content: str) -> None:
+        """Start the safety review of an action whose payload has finished streaming.
+
+        Args:
+            partial_response_content (str): The agent response streamed so far
+        """
+        try:
+            response_json = ResponseJsonSchema.model_validate(
+                parse_agent_action_xml(partial_response_content)
+            )
+        except Exception as e:
+            logging.debug(f"Unable to parse partial action response for early review: {e}")
+            return
+
+        self.executor.start_early_safety_review(response_json)
+
     def interpret_action_response(self, response_content: str) -> ResponseJsonSchema:
         """Interpret the action response from the agent using a custom XML parser."""
         response_json_dict = None
@@ -542,8 +629,22 @@ class Operator:
         self,
         messages: list[ConversationRecord],
         classification: RequestClassification,
+        task: ModelTask = ModelTask.ACTION,
+        speculative_response: BufferedStream[BaseMessage] | None = None,
     ) -> tuple[ResponseJsonSchema | None, str, ProcessResponseOutput]:
-        """Invoke the model and process the response with streaming support."""
+        """Invoke the model and process the response with streaming support.
+
+        Args:
+            messages: The conversation to generate the response for
+            classification: The classification of the current request
+            task: The kind of model call
+            speculative_response: A response that was already started for these messages,
+                used for the first attempt instead of invoking the model again
+
+        Returns:
+            tuple[ResponseJsonSchema | None, str, ProcessResponseOutput]: The parsed action,
+                the raw response content and the result of processing the action
+        """
 
         # Initialize streaming state
         accumulated_text = ""
@@ -601,6 +702,8 @@ class Operator:
 
         while attempts < max_attempts:
             attempts += 1
+            early_safety_review_started = False
+            self.executor.cancel_early_safety_review()
 
             # Reset streaming state for retries
             if attempts > 1:
@@ -641,7 +744,12 @@ class Operator:
 
                 action_response_started = False
 
-                async for chunk in self.executor.stream_model(messages):
+                if speculative_response is not None and attempts == 1:
+                    response_stream = speculative_response.replay()
+                else:
+                    response_stream = self.executor.stream_model(messages, task=task)
+
+                async for chunk in response_stream:
                     chunk_content = (
                         chunk.content if isinstance(chunk.content, str) else str(chunk.content)
                     )
@@ -652,6 +760,14 @@ class Operator:
                     # Process the accumulated text through the stream buffer
                     finished, result = stream_action_buffer(accumulated_text)
 
+                    # Start the safety review as soon as the action payload is complete so
+                    # that it runs while the rest of the response streams
+                    if not early_safety_review_started and is_action_payload_complete(
+                        accumulated_text, result.action
+                    ):
+                        early_safety_review_started = True
+                        self._start_early_safety_review(accumulated_text)
+
                     if self.verbosity_level >= VerbosityLevel.VERBOSE:
                         # Check if we're in an action response by looking for action_response tags
                         in_action_response = (
@@ -699,6 +815,9 @@ class Operator:
                     if finished:
                         break
 
+                if speculative_response is not None:
+                    speculative_response.cancel()
+
                 if self.verbosity_level >= VerbosityLevel.VERBOSE:
                     print(
                         "\n\033[1;36m╰──────────────────────────────────────────────────\033[0m\n"
@@ -709,6 +828,7 @@ class Operator:
 
                 # Check if there is an action request from the agent
                 if not self._has_action_tag(final_response_content) and not result.action:
+                    self.executor.cancel_early_safety_review()
                     self.executor.append_to_history(
                         ConversationRecord(
                             role=ConversationRole.ASSISTANT,
@@ -755,11 +875,16 @@ class Operator:
                 break  # Successfully parsed
 
             except Exception as e:
+                if speculative_response is not None:
+                    speculative_response.cancel()
+
                 logging.error(
                     "Failed to interpret action response "
                     f"(attempt {attempts}/{max_attempts}): {e}"
                 )
                 if attempts >= max_attempts:
+                    self.executor.cancel_early_safety_review()
+
                     # Persist the last failing response before raising
                     self.executor.append_to_history(
                         ConversationRecord(
@@ -924,13 +1049,48 @@ class Operator:
         self.executor.reset_step_counter()
         self.executor_is_processing = True
 
+        user_record = ConversationRecord(
+            role=ConversationRole.USER,
+            content=user_input_with_attachments,
+            files=attachments,
+            should_summarize=False,
+        )
+
+        # Start the first action while the request is classified, it is kept if the
+        # classification doesn't change the conversation that it was generated for
+        speculative_response: BufferedStream[BaseMessage] | None = None
+        if self.speculative_classification:
+            speculative_response = BufferedStream(
+                self.executor.stream_model([*self.executor.agent_state.conversation, user_record])
+            )
+
         # Classify the user's request to determine the type of task at hand and if
         # planning is required.
-        async with spinner_context(
-            "Interpreting your message",
-            verbosity_level=self.verbosity_level,
-        ):
-            classification = await self.classify_request(user_input)
+        try:
+            async with spinner_context(
+                "Interpreting your message",
+                verbosity_level=self.verbosity_level,
+            ):
+                classification = await self.classify_request(user_input)
+        except BaseException:
+            if speculative_response is not None:
+                speculative_response.cancel()
+            raise
+
+        if speculative_response is not None:
+            if self._can_keep_speculative_response(classification):
+                self.speculation_metrics.record_hit(
+                    asyncio.get_running_loop().time() - speculative_response.started_at
+                )
+            else:
+                speculative_response.cancel()
+                speculative_response = None
+                self.speculation_metrics.record_miss()
+
+            logging.debug(
+                f"Speculative first action hit rate: {self.speculation_metrics.hit_rate():.0%}, "
+                f"time to first action saved: {self.speculation_metrics.seconds_saved:.2f}s"
+            )
 
         if classification.subject_change:
             self.executor.set_current_plan("")
@@ -955,14 +1115,7 @@ class Operator:
             self.add_task_instructions(classification)
 
         # Add the user's request after the task instructions
-        self.executor.agent_state.conversation.append(
-            ConversationRecord(
-                role=ConversationRole.USER,
-                content=user_input_with_attachments,
-                files=attachments,
-                should_summarize=False,
-            )
-        )
+        self.executor.agent_state.conversation.append(user_record)
 
         # Perform planning for more complex tasks
         if classification.planning_required:
@@ -970,69 +1123,87 @@ class Operator:
         elif classification.type != RequestType.CONTINUE:
             self.executor.set_current_plan("")
 
-        while (
-            not self._agent_is_done(response_json)
-            and not final_response
-            and not self._agent_requires_user_input(response_json)
-            and not self.executor.interrupted
-        ):
-            if self.model_configuration is None:
-                raise ValueError("Model is not initialized")
-
-            await self.executor.update_job_execution_state(
-                CodeExecutionResult(
-                    stdout="",
-                    stderr="",
-                    logging="",
-                    formatted_print="",
-                    code="",
-                    message="Thinking about my next action",
-                    role=ConversationRole.ASSISTANT,
-                    status=ProcessResponseStatus.IN_PROGRESS,
-                    files=[],
-                    execution_type=ExecutionType.ACTION,
-                )
-            )
-
-            if self.verbosity_level >= VerbosityLevel.VERBOSE:
-                print("\n")
-
-            # Process and handle any actions from the agent
-            response_json, response_content, result = await self.invoke_and_process_response(
-                self.executor.agent_state.conversation,
-                classification,
-            )
+        try:
+            while (
+                not self._agent_is_done(response_json)
+                and not final_response
+                and not self._agent_requires_user_input(response_json)
+                and not self.executor.interrupted
+            ):
+                if self.model_configuration is None:
+                    raise ValueError("Model is not initialized")
 
-            if response_json is None:
-                # If there is no action request, process the response as a text response
-                final_response, result = self.process_text_response(response_content)
-            else:
-                # Update the "Agent Heads Up Display"
-                self.executor.update_ephemeral_messages()
-
-            # Auto-save on each step if enabled
-            if self.auto_save_conversation:
-                try:
-                    self.handle_autosave(
-                        self.agent_registry.config_dir,
-                        self.executor.agent_state.conversation,
-                        self.executor.agent_state.execution_history,
+                await self.executor.update_job_execution_state(
+                    CodeExecutionResult(
+                        stdout="",
+                        stderr="",
+                        logging="",
+                        formatted_print="",
+                        code="",
+                        message="Thinking about my next action",
+                        role=ConversationRole.ASSISTANT,
+                        status=ProcessResponseStatus.IN_PROGRESS,
+                        files=[],
+                        execution_type=ExecutionType.ACTION,
                     )
-                except Exception as e:
-                    error_str = str(e)
+                )
 
-                    if self.verbosity_level >= VerbosityLevel.INFO:
-                        print(
-                            "\n\033[1;31m✗ Error encountered while auto-saving conversation:\033[0m"
+                if self.verbosity_level >= VerbosityLevel.VERBOSE:
+                    print("\n")
+
+                # Process and handle any actions from the agent
+                response_json, response_content, result = await self.invoke_and_process_response(
+                    self.executor.agent_state.conversation,
+                    classification,
+                    speculative_response=speculative_response,
+                )
+                speculative_response = None
+
+                if response_json is None:
+                    # If there is no action request, process the response as a text response
+                    final_response, result = self.process_text_response(response_content)
+                else:
+                    # Update the "Agent Heads Up Display"
+                    self.executor.update_ephemeral_messages()
+
+                # Auto-save on each step if enabled
+                if self.auto_save_conversation:
+                    try:
+                        self.handle_autosave(
+                            self.agent_registry.config_dir,
+                            self.executor.agent_state.conversation,
+                            self.executor.agent_state.execution_history,
                         )
-                        print(f"\033[1;36m│ Error Details:\033[0m\n{error_str}")
+                    except Exception as e:
+                        error_str = str(e)
 
-            # Break out of the agent flow if the user cancels the code execution
-            if (
-                result.status == ProcessResponseStatus.CANCELLED
-                or result.status == ProcessResponseStatus.INTERRUPTED
-            ):
-                break
+                        if self.verbosity_level >= VerbosityLevel.INFO:
+                            print(
+                                "\n\033[1;31m✗ Error encountered while auto-saving conversation:\033[0m"
+                            )
+                            print(f"\033[1;36m│ Error Details:\033[0m\n{error_str}")
+
+                # Break out of the agent flow if the user cancels the code execution
+                if (
+                    result.status == ProcessResponseStatus.CANCELLED
+                    or result.status == ProcessResponseStatus.INTERRUPTED
+                ):
+                    break
+        except BaseException:
+            self.executor.cancel_background_summarization()
+            raise
+
+        # Apply the summaries of the last step so that no summarization outlives the request
+        if (
+            await self.executor.wait_for_background_summarization()
+            and self.persist_agent_conversation
+            and self.agent_registry
+            and self.current_agent
+        ):
+            self.agent_registry.update_agent_state(
+                agent_id=self.current_agent.id,
+                agent_state=self.executor.agent_state,
+            )
 
         if os.environ.get("LOCAL_OPERATOR_DEBUG") == "true":
             self.print_conversation_history()
@@ -1099,6 +1270,8 @@ class Operator:
                 status=ProcessResponseStatus.ERROR,
                 message=f"Delegation to agent '{agent_name}' failed: {e}",
             )
+        finally:
+            await delegated_operator.executor.shutdown_kernel()
 
     def print_conversation_history(self) -> None:
         """Print the conversation history for debugging."""
@@ -1198,6 +1371,8 @@ class Operator:
                 print(f"\033[1;36m│\033[0m {final_response}")
                 print("\033[1;36m╰──────────────────────────────────────────────────\033[0m\n")
 
+        await self.executor.shutdown_kernel()
+
     def handle_autosave(
         self,
         config_dir: Path,
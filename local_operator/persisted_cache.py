@@ -0,0 +1,153 @@
+"""Persisted least-recently-used cache for Local Operator.
+
+This module provides the thread safe LRU map that backs the caches which are shared by
+all executors of a config directory, such as the summary cache and the safety verdict
+cache.  The map is loaded from a JSON file lazily on first use and written back
+atomically, so that a crash or a concurrent reader never sees a partially written file.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class PersistedLRUCache(Generic[V]):
+    """Thread safe LRU map of string keys to JSON values, persisted to a JSON file.
+
+    Attributes:
+        cache_file (Path | None): Path to the file that the cache is persisted to, or None
+            to keep the cache in memory only
+        max_entries (int): Maximum number of entries to keep, the least recently used
+            entries are evicted first
+        name (str): Name of the cache used in log messages
+    """
+
+    cache_file: Optional[Path]
+    max_entries: int
+    name: str
+
+    def __init__(
+        self,
+        cache_file: Optional[Path],
+        max_entries: int,
+        name: str = "cache",
+        is_valid: Optional[Callable[[Any], bool]] = None,
+    ):
+        """Create the cache.  The file is not read until the cache is first used.
+
+        Args:
+            cache_file (Path | None): Path to the file that the cache is persisted to, or
+                None to keep the cache in memory only
+            max_entries (int): Maximum number of entries to keep
+            name (str): Name of the cache used in log messages
+            is_valid (Callable[[Any], bool] | None): Check applied to values read from the
+                file and to values being saved, invalid values are dropped
+        """
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.name = name
+        self._is_valid = is_valid or (lambda value: True)
+        self._entries: "OrderedDict[str, V]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = cache_file is None
+        self._dirty = False
+
+    def get(self, key: str) -> Optional[V]:
+        """Get the value for a key and mark it as recently used.
+
+        Args:
+            key (str): The key to look up
+
+        Returns:
+            Optional[V]: The cached value, or None if the key is not cached
+        """
+        with self._lock:
+            self._load()
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: V) -> None:
+        """Store the value for a key, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): The key to store the value under
+            value (V): The value to store
+        """
+        with self._lock:
+            self._load()
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def pop(self, key: str) -> None:
+        """Remove a key from the cache if it is cached.
+
+        Args:
+            key (str): The key to remove
+        """
+        with self._lock:
+            self._load()
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Persist the cache to disk if it has changed since it was loaded.
+
+        The file is written to a temporary file and renamed into place so that a crash
+        or a concurrent reader never sees a partially written cache.
+        """
+        if self.cache_file is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            entries: Dict[str, V] = {
+                key: value for key, value in self._entries.items() if self._is_valid(value)
+            }
+            self._dirty = False
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=self.cache_file.parent, prefix=f".{self.cache_file.name}."
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.cache_file)
+        except Exception as e:
+            logging.warning(f"Failed to save {self.name} to {self.cache_file}: {e}")
+
+    def _load(self) -> None:
+        """Load the cache from disk on first use.  Must be called with the lock held."""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        if self.cache_file is None or not self.cache_file.exists():
+            return
+
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Failed to load {self.name} from {self.cache_file}: {e}")
+            return
+
+        if isinstance(data, dict):
+            for key, value in data.items():
+                if isinstance(key, str) and value is not None and self._is_valid(value):
+                    self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
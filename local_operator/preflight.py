@@ -0,0 +1,240 @@
+"""Local pre-flight validation of agent code.
+
+Code that can not run, because it does not compile, uses a name that is not defined
+anywhere, or calls an agent tool that does not exist or with the wrong arguments, would
+otherwise only fail after the safety check and the execution.  The pre-flight check finds
+these errors with static analysis before either of them, so that they go straight back to
+the agent without a round trip to the safety auditor.
+
+The check only reports errors that are certain to happen when the code runs.  Names are
+resolved against everything that the code binds anywhere, regardless of scope and order,
+and code that can bind names dynamically is not checked for undefined names at all.
+"""
+
+import ast
+import builtins
+import inspect
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Set
+
+from pydantic import BaseModel
+
+from local_operator.kernel import IGNORED_CONTEXT_KEYS, compile_agent_code
+
+DYNAMIC_BINDING_NAMES = frozenset({"exec", "eval", "globals", "locals", "vars", "__builtins__"})
+"""Names whose use lets code bind variables that static analysis can not see."""
+
+
+@dataclass
+class PreflightDiagnostic:
+    """An error that the pre-flight check found in agent code.
+
+    Attributes:
+        line (int | None): The line of the code that the error is on, if known.
+        message (str): Description of the error, in the form of the runtime error.
+    """
+
+    line: Optional[int]
+    message: str
+
+    def __str__(self) -> str:
+        if self.line is None:
+            return self.message
+        return f"Line {self.line}: {self.message}"
+
+
+class PreflightMetrics(BaseModel):
+    """Tracks how many code actions the pre-flight check sent back to the agent.
+
+    Attributes:
+        total_checks (int): Number of code actions that were checked.
+        failed_checks (int): Number of code actions that failed the check, each of which
+            skipped the safety check and the execution.
+    """
+
+    total_checks: int = 0
+    failed_checks: int = 0
+
+    def record(self, passed: bool) -> None:
+        """Record a pre-flight check.
+
+        Args:
+            passed (bool): Whether the code passed the check.
+        """
+        self.total_checks += 1
+        if not passed:
+            self.failed_checks += 1
+
+
+def _collect_bound_names(tree: ast.AST) -> Set[str]:
+    """Collect every name that the code binds, in any scope."""
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, ast.alias):
+            names.add(node.asname or node.name.split(".")[0])
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            names.add(node.rest)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+        elif isinstance(getattr(node, "name", None), str):
+            # Functions, classes, exception handlers, match captures and type parameters
+            names.add(getattr(node, "name"))
+    return names
+
+
+def _uses_dynamic_binding(tree: ast.AST) -> bool:
+    """Whether the code can bind names that static analysis can not see."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in DYNAMIC_BINDING_NAMES:
+            return True
+        if isinstance(node, ast.alias) and node.name == "*":
+            return True
+    return False
+
+
+def check_undefined_names(tree: ast.AST, context: Mapping[str, Any]) -> List[PreflightDiagnostic]:
+    """Find names that the code loads but that are not defined anywhere.
+
+    Args:
+        tree (ast.AST): The parsed code.
+        context (Mapping[str, Any]): The execution context that the code runs in.
+
+    Returns:
+        List[PreflightDiagnostic]: One diagnostic for the first use of each undefined name.
+    """
+    if _uses_dynamic_binding(tree):
+        return []
+
+    defined = _collect_bound_names(tree) | set(context) | set(dir(builtins))
+    defined |= IGNORED_CONTEXT_KEYS
+
+    diagnostics: Dict[str, PreflightDiagnostic] = {}
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Name)
+            and isinstance(node.ctx, ast.Load)
+            and node.id not in defined
+            and node.id not in diagnostics
+        ):
+            diagnostics[node.id] = PreflightDiagnostic(
+                node.lineno, f"NameError: name '{node.id}' is not defined"
+            )
+    return sorted(diagnostics.values(), key=lambda diagnostic: diagnostic.line or 0)
+
+
+def _check_tool_call(
+    node: ast.Call, name: str, tool: Any, awaited: bool, discarded: bool
+) -> Optional[str]:
+    """Check a call of an agent tool against the signature of the tool."""
+    is_async = inspect.iscoroutinefunction(inspect.unwrap(tool))
+    if is_async and discarded:
+        return f"tools.{name} is async and must be awaited, use 'await tools.{name}(...)'"
+    if awaited and not is_async:
+        return f"tools.{name} is not async and can not be awaited, remove the 'await'"
+
+    # Arguments that are unpacked can not be counted
+    if any(isinstance(arg, ast.Starred) for arg in node.args) or any(
+        keyword.arg is None for keyword in node.keywords
+    ):
+        return None
+
+    try:
+        signature = inspect.signature(tool)
+    except (TypeError, ValueError):
+        return None
+
+    keywords = {keyword.arg: keyword.value for keyword in node.keywords if keyword.arg}
+    try:
+        signature.bind(*node.args, **keywords)
+    except TypeError as e:
+        return f"TypeError: tools.{name}() {e}"
+    return None
+
+
+def check_tool_calls(tree: ast.AST, tools: Any) -> List[PreflightDiagnostic]:
+    """Check the calls of agent tools for tools that do not exist and wrong arguments.
+
+    Calls of async tools whose result is discarded, and awaited calls of tools that are
+    not async, are reported as well.
+
+    Args:
+        tree (ast.AST): The parsed code.
+        tools (Any): The tool registry, an iterable of tool names whose tools are its
+            attributes.
+
+    Returns:
+        List[PreflightDiagnostic]: One diagnostic for each invalid tool call.
+    """
+    available = set(tools)
+    awaited: Set[int] = set()
+    discarded: Set[int] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Await):
+            awaited.add(id(node.value))
+        elif isinstance(node, ast.Expr):
+            discarded.add(id(node.value))
+
+    diagnostics: List[PreflightDiagnostic] = []
+    for node in ast.walk(tree):
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "tools"
+        ):
+            continue
+
+        name = node.func.attr
+        if name not in available:
+            message: Optional[str] = f"AttributeError: tools.{name} is not an available tool"
+        else:
+            message = _check_tool_call(
+                node,
+                name,
+                getattr(tools, name),
+                id(node) in awaited,
+                id(node) in discarded,
+            )
+        if message is not None:
+            diagnostics.append(PreflightDiagnostic(node.lineno, message))
+
+    return sorted(diagnostics, key=lambda diagnostic: diagnostic.line or 0)
+
+
+def preflight_check(
+    code: str, context: Optional[Mapping[str, Any]] = None, tools: Optional[Any] = None
+) -> List[PreflightDiagnostic]:
+    """Check agent code for errors that are certain to happen when it runs.
+
+    Args:
+        code (str): The agent code.
+        context (Optional[Mapping[str, Any]]): The execution context that the code runs in,
+            or None to skip the check for undefined names, for example because the context
+            lives in an execution kernel.
+        tools (Optional[Any]): The tool registry, an iterable of tool names whose tools are
+            its attributes, or None to skip the check of tool calls.
+
+    Returns:
+        List[PreflightDiagnostic]: The errors found, empty if the code passed the check.
+    """
+    # Compiling also warms the compile cache for the execution of the code
+    try:
+        compile_agent_code(code)
+    except SyntaxError as e:
+        return [PreflightDiagnostic(e.lineno, f"SyntaxError: {e.msg}")]
+    except ValueError as e:
+        return [PreflightDiagnostic(None, f"ValueError: {e}")]
+
+    tree = ast.parse(code)
+
+    diagnostics: List[PreflightDiagnostic] = []
+    if context is not None:
+        diagnostics.extend(check_undefined_names(tree, context))
+    if tools is not None and "tools" not in _collect_bound_names(tree):
+        diagnostics.extend(check_tool_calls(tree, tools))
+
+    return sorted(diagnostics, key=lambda diagnostic: diagnostic.line or 0)
@@ -426,7 +426,7 @@ BaseSystemPrompt: str = (
 
     <action_types>
         - **CODE**: Execute Python code to achieve goals. Code will be executed with exec(). MUST include non-empty code in the "code" field.
-        - **READ**: Read file contents. Specify file path - content will be printed to console. Always read before writing/editing existing files.
+        - **READ**: Read file contents. Specify file path - content will be printed to console. Always read before writing/editing existing files.  For large files such as logs, add a "read_range" field to read a range of lines or bytes, or only the lines that match a regular expression.
         - **WRITE**: Create or overwrite a file. Specify file path and complete content in the "content" field.
         - **EDIT**: Modify existing file. Specify file path and search/replace patterns in "replacements" field.
         - **DELEGATE**: Send message to another agent. Specify agent name in "agent" field and message in "message" field.
@@ -462,7 +462,7 @@ BaseSystemPrompt: str = (
 Your response flow for working tasks should look something like the following example sequence, depending on what the user is asking for:
 <example_response_flow>
   1. Research (CODE): research the information required by the plan.  Run exploratory code to gather information about the user's goal.  The purpose of this step is to gather information and data from the web and local data files into the environment context for use in the next steps.
-  2. Read (READ): read the contents of files to gather information about the user's goal.  You can read text and image files.  Do not READ for large files or data files, instead use CODE to extract and summarize a portion of the file instead.  The purpose of this step is to gather information from documents on the filesystem into the environment context for use in the next steps.
+  2. Read (READ): read the contents of files to gather information about the user's goal.  You can read text and image files.  Do not READ data files, instead use CODE to extract and summarize a portion of the file instead.  Read large text files in windows with a read_range.  The purpose of this step is to gather information from documents on the filesystem into the environment context for use in the next steps.
   3. Code/Write/Edit (CODE/WRITE/EDIT): execute on the plan by performing the actions necessary to achieve the user's goal.  Print the output of the code to the console for the system to consume.
   4. Validate (CODE): verify the results of the previous step.
   5. Repeat steps 1-4 until every required task is complete.
@@ -807,6 +807,7 @@ Fields:
 - content: Required for WRITE: content to write to file. Omit for READ/EDIT.  Do not use for any actions that are not WRITE.
 - file_path: Required for READ/WRITE/EDIT: path to file.  Do not use for any actions that are not READ/WRITE/EDIT.
 - replacements: List of replacements to make in the file.
+- read_range: Optional for READ: the part of a large file to read, one setting per line: "lines: 100-200" for a range of lines, "bytes: 0-65536" for a range of bytes, and "pattern: <regular expression>" for only the lines that match.  A pattern can be combined with a line range to search part of the file.  Omit to read the whole file, large files are cut off after the first lines.
 - mentioned_files: The files that are being referenced in CODE that the user should be able to see.  Include the paths to the files as mentioned in the code.  Make sure that all the files are included in the list, otherwise the user will not be able to see them.  If there are file names that are programatically assigned,  infer the values accurately based on the code and include them in the list as well.  If the files are generated in code, you will need to review the way that the filenames are created from the variables and include them in the list as well so that the user can see them.  Make sure that all files here are valid addresses to a file on the user's computer or a resource on the internet.  Do not include incorrect file paths or invalid names, or names that are not files.  If there are no files referenced in the code or if the action is not CODE, leave this as an empty list.  Do not put any string values like "None", or "No files", etc. as these will be literally interpreted as file names.
 - action: Required for all actions: CODE | READ | WRITE | EDIT | DELEGATE
 
@@ -923,6 +924,28 @@ CODE usage guidelines:
 - Remember that things you print() to the console are meant to be seen by you, but may not be seen by the user.  Don't assume that the user has seen what you have printed.
 - Do not provide a CODE action if you are done with your task.  Do not provide empty CODE tags that just say "# no code required", or similar.  These will cause the system to continue the loop when not necessary.
 
+#### Example for READ:
+
+<example>
+Searching a range of a large log file for errors.
+
+<action_response>
+<action>READ</action>
+
+<file_path>
+logs/server.log
+</file_path>
+
+<read_range>
+lines: 50000-60000
+pattern: ERROR|Traceback
+</read_range>
+</action_response>
+</example>
+
+READ usage guidelines:
+- Omit read_range to read a whole text file.  Files that are too large to read in full are cut off after the first lines, and the system tells you how many lines the file has so that you can read the next lines with a read_range.
+
 #### Example for WRITE:
 
 <example>
@@ -1080,6 +1103,7 @@ You must reinterpret the agent's response purely in JSON format with the followi
 - code: The code that the agent has written.  An empty string if the action is not CODE.
 - content: The content that the agent has written to a file.  An empty string if the action is not WRITE.
 - file_path: The path to the file that the agent has read/wrote/edited.  An empty string if the action is not READ/WRITE/EDIT.
+- read_range: The part of the file that the agent wants to read, as an object with the optional fields start_line, end_line, start_byte, end_byte and pattern.  null if the agent reads the whole file or the action is not READ.
 - mentioned_files: The files that the agent is referencing in CODE that the user should be able to see.  Include the paths to the files as mentioned in the code.  Make sure that all the files are included in the list, otherwise the user will not be able to see them.  If there are file names that are programatically assigned,  infer the values accurately based on the code and include them in the list as well.  If the files are generated in code, you will need to review the way that the filenames are created from the variables and include them in the list as well so that the user can see them.  Make sure that all files here are valid addresses to a file on the user's computer or a resource on the internet.  Do not include incorrect file paths or invalid names, or names that are not files.  An empty list if there are no files referenced in the code or if the action is not CODE.
 - replacements: The replacements that the agent has made to a file.  This field must be non-empty for EDIT actions and an empty list otherwise.  Be careful to double-check and proofread the diffs that the agent is requesting and properly convert them into the correct find and replace values, escaping any quotes or special characters that will cause JSON parsing errors.  Make sure to replace the entire contents with the new contents properly and don't duplicate the old contents or create any unclean edits.
 - agent: The name of the agent to delegate to.  An empty string if the action is not DELEGATE.  Only use this if the action is DELEGATE.
@@ -1591,6 +1615,29 @@ Format your response as a single sentence with the format:
 "[SUMMARY] summarized text here"
 """  # noqa: E501
 
+MessageBatchSummarySystemPrompt: str = """
+You are a conversation summarizer. Your task is to summarize what happened in each of the given conversation steps between a user and an AI assistant concisely to reduce the amount of tokens in the conversation history.  Keep each summary under 3 sentences, and ideally aim for a single sentence.
+
+Focus only on capturing critical details that may be relevant for future reference, such as:
+- Key actions taken
+- Important changes made
+- Significant results or outcomes
+- Any errors or issues encountered
+- Key variable names, file names, URLs, headers, or other identifiers
+- Transformations or calculations performed that need to be remembered for later reference
+- Shapes and dimensions of data structures
+- Data schemas, data types, and data formats
+- Key numbers or values
+
+You will be given several conversation steps, each in a <step> tag with an id attribute.  Each step might be from the user or the AI assistant, you will know which one it is by the <role> tag.  Keep the conversation in the first person between myself and the AI assistant, refer to me as "I" and the AI assistant as "you" in the summaries.
+
+Summarize each step separately, only using the content in the <message> tag of that step.
+
+Format your response as one <summary> tag per step, with the same id as the step, for example:
+<summary id="1">[SUMMARY] summarized text of step 1 here</summary>
+<summary id="2">[SUMMARY] summarized text of step 2 here</summary>
+"""  # noqa: E501
+
 
 class RequestType(str, Enum):
     """Enum for classifying different types of user requests.
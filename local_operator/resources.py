@@ -0,0 +1,277 @@
+"""Resource limits and accounting for code execution steps.
+
+A step is one execution of agent code.  While a step runs, a resource monitor samples the
+CPU time, resident memory and I/O of the process that runs the code, so that the usage of
+every step can be recorded and a step that goes over its limits can be stopped.
+
+Limits work like the soft and hard limits of `setrlimit`.  A step that goes over a limit
+is reported to the execution backend, which interrupts it, and is killed if it does not
+stop within a grace period or if its memory grows past the hard memory limit.  Execution
+kernels also set `RLIMIT_CPU` for the duration of a step, so that the operating system
+stops a kernel that the backend fails to stop.
+
+This module is imported by execution kernels, and only imports the standard library and
+psutil.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+SAMPLE_INTERVAL = 0.05
+"""The number of seconds between samples of the resources used by a running step."""
+
+HARD_MEMORY_LIMIT_FACTOR = 1.25
+"""A step whose resident memory grows past this multiple of the memory limit is killed
+without waiting for it to stop after the interrupt."""
+
+
+def _reset_peak_rss(pid: int) -> bool:
+    """Reset the peak resident memory of a process, which is only supported on Linux.
+
+    Returns:
+        bool: Whether the peak was reset and can be read with _read_peak_rss.
+    """
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _read_peak_rss(pid: int) -> Optional[int]:
+    """Read the peak resident memory of a process in bytes from /proc, if available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ResourceMonitor:
+    """Measures the resources used by a process while a step runs and checks its limits.
+
+    The process is sampled from a background thread, so that the limits are checked even
+    if the step blocks the event loop.  When the step goes over a limit, `on_exceeded` is
+    called from the sampling thread with `kill=False`, and once more with `kill=True` if
+    the resident memory grows past the hard memory limit.
+
+    Attributes:
+        wall_time_limit (float | None): Maximum wall clock seconds of the step.
+        cpu_time_limit (float | None): Maximum CPU seconds of the step, including waited
+            for child processes.
+        memory_limit (int | None): Maximum resident memory of the process in bytes.
+        limit_exceeded (str | None): Description of the first limit that the step went
+            over, or None if it stayed within its limits.
+    """
+
+    wall_time_limit: Optional[float]
+    cpu_time_limit: Optional[float]
+    memory_limit: Optional[int]
+    limit_exceeded: Optional[str]
+
+    def __init__(
+        self,
+        wall_time_limit: Optional[float] = None,
+        cpu_time_limit: Optional[float] = None,
+        memory_limit: Optional[int] = None,
+    ):
+        """Create a monitor.  Limits that are None or 0 are not enforced.
+
+        Args:
+            wall_time_limit (float | None): Maximum wall clock seconds of the step.
+            cpu_time_limit (float | None): Maximum CPU seconds of the step.
+            memory_limit (int | None): Maximum resident memory of the process in bytes.
+        """
+        self.wall_time_limit = wall_time_limit or None
+        self.cpu_time_limit = cpu_time_limit or None
+        self.memory_limit = memory_limit or None
+        self.limit_exceeded = None
+        self._process: Optional[psutil.Process] = None
+        self._on_exceeded: Optional[Callable[[bool], None]] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._killed = False
+        self._peak_reset = False
+        self._start_time = 0.0
+        self._start_cpu = 0.0
+        self._start_io: Tuple[int, int] = (0, 0)
+        self._wall_time = 0.0
+        self._cpu_time = 0.0
+        self._io: Tuple[int, int] = (0, 0)
+        self._peak_rss = 0
+
+    @property
+    def is_limited(self) -> bool:
+        """Whether any limit is enforced."""
+        return any((self.wall_time_limit, self.cpu_time_limit, self.memory_limit))
+
+    def start(
+        self, pid: Optional[int] = None, on_exceeded: Optional[Callable[[bool], None]] = None
+    ) -> None:
+        """Start measuring a process.
+
+        Args:
+            pid (int | None): The process that runs the step, this process if None.
+            on_exceeded (Callable[[bool], None] | None): Called when the step goes over a
+                limit, with whether the step must be killed immediately.
+        """
+        self._process = psutil.Process(pid)
+        self._on_exceeded = on_exceeded
+        self._peak_reset = _reset_peak_rss(self._process.pid)
+        self._start_time = time.monotonic()
+        try:
+            self._start_cpu = self._read_cpu_time()
+            self._start_io = self._read_io()
+        except psutil.Error:
+            pass
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop measuring the process and take a final sample.
+
+        Limits are still checked on the final sample, but `on_exceeded` is not called
+        because the step has already finished.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._on_exceeded = None
+        self.sample()
+
+    def sample(self) -> None:
+        """Measure the process and check the limits of the step."""
+        if self._process is None:
+            return
+
+        with self._lock:
+            self._wall_time = time.monotonic() - self._start_time
+            try:
+                self._cpu_time = self._read_cpu_time() - self._start_cpu
+                io_read, io_write = self._read_io()
+                self._io = (io_read - self._start_io[0], io_write - self._start_io[1])
+                rss = self._process.memory_info().rss
+            except psutil.Error:
+                return
+
+            if self._peak_reset:
+                rss = max(rss, _read_peak_rss(self._process.pid) or 0)
+            self._peak_rss = max(self._peak_rss, rss)
+
+            if self.limit_exceeded is None:
+                self.limit_exceeded = self._check_limits(rss)
+                if self.limit_exceeded is not None:
+                    self._notify(kill=False)
+
+            if (
+                not self._killed
+                and self.memory_limit is not None
+                and rss > self.memory_limit * HARD_MEMORY_LIMIT_FACTOR
+            ):
+                self._killed = True
+                self._notify(kill=True)
+
+    @property
+    def usage(self) -> Dict[str, Any]:
+        """The resources used by the step so far, as keyword arguments of ResourceUsage."""
+        with self._lock:
+            return {
+                "wall_time_seconds": self._wall_time,
+                "cpu_seconds": self._cpu_time,
+                "peak_rss_bytes": self._peak_rss,
+                "io_read_bytes": self._io[0],
+                "io_write_bytes": self._io[1],
+                "limit_exceeded": self.limit_exceeded,
+            }
+
+    def _check_limits(self, rss: int) -> Optional[str]:
+        if self.wall_time_limit is not None and self._wall_time > self.wall_time_limit:
+            return f"Execution exceeded the wall time limit of {self.wall_time_limit:g} seconds"
+        if self.cpu_time_limit is not None and self._cpu_time > self.cpu_time_limit:
+            return f"Execution exceeded the CPU time limit of {self.cpu_time_limit:g} seconds"
+        if self.memory_limit is not None and rss > self.memory_limit:
+            return (
+                f"Execution exceeded the memory limit of "
+                f"{self.memory_limit / (1024 * 1024):g} MB"
+            )
+        return None
+
+    def _notify(self, kill: bool) -> None:
+        if self._on_exceeded is not None:
+            self._on_exceeded(kill)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            self.sample()
+
+    def _read_cpu_time(self) -> float:
+        assert self._process is not None
+        times = self._process.cpu_times()
+        return (
+            times.user
+            + times.system
+            + getattr(times, "children_user", 0.0)
+            + getattr(times, "children_system", 0.0)
+        )
+
+    def _read_io(self) -> Tuple[int, int]:
+        assert self._process is not None
+        # I/O counters are not available on macOS
+        io_counters = getattr(self._process, "io_counters", None)
+        if io_counters is None:
+            return (0, 0)
+        try:
+            counters = io_counters()
+        except (psutil.AccessDenied, NotImplementedError):
+            return (0, 0)
+        return (counters.read_bytes, counters.write_bytes)
+
+
+@contextmanager
+def cpu_time_limit(seconds: Optional[float]) -> Iterator[None]:
+    """Limit the CPU time that this process may use from now on with RLIMIT_CPU.
+
+    The process receives SIGXCPU, which terminates it, when it goes over the limit.  The
+    previous limit is restored on exit.  Does nothing if seconds is None or 0, or on
+    platforms without the resource module.
+
+    Args:
+        seconds (float | None): The number of CPU seconds that the process may use.
+    """
+    if not seconds or resource is None:
+        yield
+        return
+
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft_limit = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    if previous[1] != resource.RLIM_INFINITY:
+        soft_limit = min(soft_limit, previous[1])
+
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft_limit, previous[1]))
+    except (ValueError, OSError):
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, previous)
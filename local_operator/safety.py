@@ -0,0 +1,1139 @@
+"""Local static safety pre-screen for agent actions.
+
+This module classifies agent actions with static analysis before they are sent to the
+LLM security auditor.  Code is parsed into an AST and inspected for the imports, calls
+and attribute accesses that it uses.  Code that only uses an allowlist of side-effect-free
+modules, builtins and methods is classified as benign and does not need a model round
+trip, while anything that touches the filesystem, network, subprocesses, agent tools or
+dynamic evaluation is left to the auditor.
+
+The pre-screen only ever skips the auditor for benign actions, it never blocks an action
+on its own.
+
+Actions that the auditor has already found safe are remembered in a verdict cache keyed by
+the normalized action, the agent security prompt and the auditor model, so that retries
+and repeated actions do not need another round trip.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import string
+import time
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from local_operator.persisted_cache import PersistedLRUCache
+from local_operator.types import ActionType, ResponseJsonSchema
+
+DEFAULT_SAFE_MODULES: FrozenSet[str] = frozenset(
+    {
+        "bisect",
+        "calendar",
+        "cmath",
+        "collections",
+        "copy",
+        "dataclasses",
+        "datetime",
+        "decimal",
+        "enum",
+        "fractions",
+        "heapq",
+        "itertools",
+        "json",
+        "math",
+        "numbers",
+        "numpy",
+        "pandas",
+        "pprint",
+        "random",
+        "re",
+        "scipy",
+        "statistics",
+        "string",
+        "textwrap",
+        "time",
+        "uuid",
+    }
+)
+"""Modules whose functions are side-effect-free, apart from the file and evaluation
+functions that are covered by the denied attributes."""
+
+DEFAULT_SAFE_MODULE_ATTRIBUTES: Dict[str, FrozenSet[str]] = {
+    "numpy": frozenset(
+        {
+            "abs",
+            "absolute",
+            "all",
+            "allclose",
+            "amax",
+            "amin",
+            "any",
+            "append",
+            "arange",
+            "arccos",
+            "arcsin",
+            "arctan",
+            "arctan2",
+            "argmax",
+            "argmin",
+            "argsort",
+            "around",
+            "array",
+            "array_equal",
+            "asarray",
+            "average",
+            "bincount",
+            "bool_",
+            "cbrt",
+            "ceil",
+            "clip",
+            "column_stack",
+            "concatenate",
+            "corrcoef",
+            "cos",
+            "cosh",
+            "count_nonzero",
+            "cov",
+            "cross",
+            "cumprod",
+            "cumsum",
+            "deg2rad",
+            "degrees",
+            "diag",
+            "diff",
+            "digitize",
+            "divide",
+            "dot",
+            "dtype",
+            "e",
+            "einsum",
+            "empty",
+            "equal",
+            "exp",
+            "exp2",
+            "expand_dims",
+            "eye",
+            "flip",
+            "float32",
+            "float64",
+            "floor",
+            "full",
+            "full_like",
+            "gcd",
+            "histogram",
+            "hstack",
+            "hypot",
+            "identity",
+            "inf",
+            "inner",
+            "int32",
+            "int64",
+            "interp",
+            "isclose",
+            "isfinite",
+            "isin",
+            "isinf",
+            "isnan",
+            "kron",
+            "lcm",
+            "linalg",
+            "linspace",
+            "log",
+            "log10",
+            "log2",
+            "logical_and",
+            "logical_not",
+            "logical_or",
+            "logspace",
+            "matmul",
+            "max",
+            "maximum",
+            "mean",
+            "median",
+            "meshgrid",
+            "min",
+            "minimum",
+            "mod",
+            "multiply",
+            "nan",
+            "nanmax",
+            "nanmean",
+            "nanmedian",
+            "nanmin",
+            "nanstd",
+            "nansum",
+            "ndarray",
+            "newaxis",
+            "nonzero",
+            "ones",
+            "ones_like",
+            "outer",
+            "percentile",
+            "pi",
+            "polyfit",
+            "polyval",
+            "power",
+            "prod",
+            "quantile",
+            "rad2deg",
+            "radians",
+            "random",
+            "ravel",
+            "repeat",
+            "reshape",
+            "round",
+            "searchsorted",
+            "sign",
+            "sin",
+            "sinh",
+            "sort",
+            "split",
+            "sqrt",
+            "square",
+            "squeeze",
+            "stack",
+            "std",
+            "subtract",
+            "sum",
+            "tan",
+            "tanh",
+            "tile",
+            "trace",
+            "transpose",
+            "tril",
+            "triu",
+            "uint8",
+            "unique",
+            "var",
+            "vstack",
+            "where",
+            "zeros",
+            "zeros_like",
+        }
+    ),
+    "pandas": frozenset(
+        {
+            "Categorical",
+            "CategoricalDtype",
+            "DataFrame",
+            "DateOffset",
+            "DatetimeIndex",
+            "Index",
+            "Interval",
+            "IntervalIndex",
+            "MultiIndex",
+            "NA",
+            "NaT",
+            "Period",
+            "PeriodIndex",
+            "RangeIndex",
+            "Series",
+            "Timedelta",
+            "TimedeltaIndex",
+            "Timestamp",
+            "bdate_range",
+            "concat",
+            "crosstab",
+            "cut",
+            "date_range",
+            "factorize",
+            "get_dummies",
+            "interval_range",
+            "isna",
+            "isnull",
+            "melt",
+            "merge",
+            "merge_asof",
+            "merge_ordered",
+            "notna",
+            "notnull",
+            "period_range",
+            "pivot",
+            "pivot_table",
+            "qcut",
+            "timedelta_range",
+            "to_datetime",
+            "to_numeric",
+            "to_timedelta",
+            "unique",
+            "wide_to_long",
+        }
+    ),
+    "scipy": frozenset(
+        {
+            "cluster",
+            "constants",
+            "fft",
+            "integrate",
+            "interpolate",
+            "linalg",
+            "ndimage",
+            "optimize",
+            "signal",
+            "spatial",
+            "special",
+            "stats",
+        }
+    ),
+}
+"""Attributes and submodules that may be used from modules that also contain file,
+memory-mapping or database functions, such as numpy.lib.format, scipy.io and pandas.io.
+Other allowlisted modules may use any attribute that is not denied."""
+
+DEFAULT_SAFE_BUILTINS: FrozenSet[str] = frozenset(
+    {
+        "abs",
+        "all",
+        "any",
+        "ascii",
+        "bin",
+        "bool",
+        "bytearray",
+        "bytes",
+        "callable",
+        "chr",
+        "classmethod",
+        "complex",
+        "dict",
+        "divmod",
+        "enumerate",
+        "filter",
+        "float",
+        "format",
+        "frozenset",
+        "hasattr",
+        "hash",
+        "hex",
+        "id",
+        "int",
+        "isinstance",
+        "issubclass",
+        "iter",
+        "len",
+        "list",
+        "map",
+        "max",
+        "min",
+        "next",
+        "object",
+        "oct",
+        "ord",
+        "pow",
+        "print",
+        "property",
+        "range",
+        "repr",
+        "reversed",
+        "round",
+        "set",
+        "slice",
+        "sorted",
+        "staticmethod",
+        "str",
+        "sum",
+        "super",
+        "tuple",
+        "type",
+        "zip",
+        "ArithmeticError",
+        "AssertionError",
+        "AttributeError",
+        "Exception",
+        "IndexError",
+        "KeyError",
+        "NotImplementedError",
+        "RuntimeError",
+        "StopIteration",
+        "TypeError",
+        "ValueError",
+        "ZeroDivisionError",
+    }
+)
+"""Builtin functions and types that can be called without side effects."""
+
+DEFAULT_DENIED_ATTRIBUTES: FrozenSet[str] = frozenset(
+    {
+        "ExcelFile",
+        "ExcelWriter",
+        "HDFStore",
+        "attrgetter",
+        "bind",
+        "breakpoint",
+        "chmod",
+        "chown",
+        "compile",
+        "connect",
+        "delattr",
+        "dump",
+        "eval",
+        "exec",
+        "exit",
+        "fdopen",
+        "fork",
+        "format_map",
+        "fromfile",
+        "genfromtxt",
+        "get_field",
+        "getattr",
+        "globals",
+        "import_module",
+        "input",
+        "kill",
+        "killpg",
+        "lambdify",
+        "link",
+        "listen",
+        "locals",
+        "makedirs",
+        "memmap",
+        "methodcaller",
+        "mkdir",
+        "open",
+        "parse_expr",
+        "popen",
+        "query",
+        "quit",
+        "remove",
+        "removedirs",
+        "rename",
+        "renames",
+        "rmdir",
+        "rmtree",
+        "send",
+        "sendall",
+        "setattr",
+        "spawn",
+        "symlink",
+        "sympify",
+        "system",
+        "tofile",
+        "touch",
+        "truncate",
+        "unlink",
+        "urlopen",
+        "vars",
+        "vformat",
+    }
+)
+"""Function and method names that read or write files, use the network, run processes,
+evaluate dynamic code or look up attributes by their names in strings, even when called on
+an allowlisted module or object."""
+
+DEFAULT_DENIED_ATTRIBUTE_PREFIXES: Tuple[str, ...] = ("to_", "read_", "save", "load", "write")
+"""Prefixes of function and method names that read or write files, such as the pandas
+read_* and to_* functions and numpy save and load functions."""
+
+DEFAULT_ALLOWED_ATTRIBUTES: FrozenSet[str] = frozenset(
+    {
+        "to_datetime",
+        "to_dict",
+        "to_frame",
+        "to_list",
+        "to_numeric",
+        "to_numpy",
+        "to_period",
+        "to_records",
+        "to_string",
+        "to_timedelta",
+        "to_timestamp",
+    }
+)
+"""In-memory conversions that match a denied prefix but do not touch any files."""
+
+DEFAULT_DENIED_NAMES: FrozenSet[str] = frozenset(
+    {
+        "Path",
+        "__import__",
+        "breakpoint",
+        "builtins",
+        "compile",
+        "ctypes",
+        "delattr",
+        "eval",
+        "exec",
+        "getattr",
+        "globals",
+        "httpx",
+        "importlib",
+        "input",
+        "locals",
+        "open",
+        "os",
+        "pathlib",
+        "requests",
+        "setattr",
+        "shutil",
+        "socket",
+        "subprocess",
+        "sys",
+        "tools",
+        "urllib",
+        "vars",
+    }
+)
+"""Names that are never benign to use, such as system modules and the agent tool registry,
+which may be available from the execution context without being imported."""
+
+SENSITIVE_PATH_PATTERNS: Tuple[str, ...] = (
+    ".aws",
+    ".config/gh",
+    ".docker",
+    ".env",
+    ".git-credentials",
+    ".gnupg",
+    ".key",
+    ".kube",
+    ".netrc",
+    ".npmrc",
+    ".pem",
+    ".pypirc",
+    ".ssh",
+    "_history",
+    "credential",
+    "id_ed25519",
+    "id_rsa",
+    "password",
+    "secret",
+    "token",
+)
+"""Path fragments that indicate that a file may contain credentials or keys."""
+
+# Name of the file used to persist the safety verdict cache
+SAFETY_VERDICT_CACHE_FILE_NAME: str = "safety_verdict_cache.json"
+
+# Maximum number of verdicts to keep, least recently used verdicts are evicted first
+DEFAULT_MAX_SAFETY_VERDICT_CACHE_ENTRIES: int = 2000
+
+# Number of seconds that a cached verdict stays valid, one week by default
+DEFAULT_SAFETY_VERDICT_CACHE_TTL: int = 7 * 24 * 60 * 60
+
+
+CALLABLE_ARGUMENT_BUILTINS: Dict[str, Tuple[Optional[int], Tuple[str, ...]]] = {
+    "filter": (0, ()),
+    "map": (0, ()),
+    "max": (None, ("key",)),
+    "min": (None, ("key",)),
+    "sorted": (None, ("key",)),
+}
+"""Builtins that call a function that is passed to them, with the position and keywords
+of the function argument.  The two argument form of iter, which calls its first argument,
+is checked separately."""
+
+
+def _is_dunder(name: str) -> bool:
+    return name.startswith("__") and name.endswith("__")
+
+
+def _has_attribute_fields(format_string: str) -> bool:
+    """Check whether a format string looks up attributes, such as "{0.__class__}"."""
+    try:
+        fields = [field for _, field, _, _ in string.Formatter().parse(format_string) if field]
+    except ValueError:
+        return True
+    return any("." in field for field in fields)
+
+
+class SafetyScreenResult(Enum):
+    """Result of the local static safety pre-screen."""
+
+    BENIGN = "benign"  # Action is side-effect-free, the LLM auditor can be skipped
+    UNCERTAIN = "uncertain"  # Action needs to be reviewed by the LLM auditor
+
+
+class SafetyAllowlist(BaseModel):
+    """Configurable allowlist of side-effect-free patterns for the safety pre-screen.
+
+    Attributes:
+        modules (Set[str]): Top-level modules that benign code may import and use.
+        module_attributes (Dict[str, Set[str]]): For modules that also contain functions
+            with side effects, the only attributes and submodules that may be used.
+        builtins (Set[str]): Builtin functions and types that benign code may call.
+        denied_attributes (Set[str]): Function and method names that are never benign.
+        denied_attribute_prefixes (Tuple[str, ...]): Prefixes of function and method names
+            that are never benign.
+        allowed_attributes (Set[str]): Function and method names that are benign even
+            though they match a denied prefix.
+        denied_names (Set[str]): Names that are never benign to reference.
+    """
+
+    modules: Set[str] = Field(default_factory=lambda: set(DEFAULT_SAFE_MODULES))
+    module_attributes: Dict[str, Set[str]] = Field(
+        default_factory=lambda: {
+            module: set(attributes) for module, attributes in DEFAULT_SAFE_MODULE_ATTRIBUTES.items()
+        }
+    )
+    builtins: Set[str] = Field(default_factory=lambda: set(DEFAULT_SAFE_BUILTINS))
+    denied_attributes: Set[str] = Field(default_factory=lambda: set(DEFAULT_DENIED_ATTRIBUTES))
+    denied_attribute_prefixes: Tuple[str, ...] = DEFAULT_DENIED_ATTRIBUTE_PREFIXES
+    allowed_attributes: Set[str] = Field(default_factory=lambda: set(DEFAULT_ALLOWED_ATTRIBUTES))
+    denied_names: Set[str] = Field(default_factory=lambda: set(DEFAULT_DENIED_NAMES))
+
+    def is_denied_attribute(self, name: str) -> bool:
+        """Check whether a function or method name is never benign.
+
+        Args:
+            name (str): The function or method name.
+
+        Returns:
+            bool: True if calling or referencing the name needs to be reviewed.
+        """
+        if _is_dunder(name) or name in self.denied_attributes:
+            return True
+        return name not in self.allowed_attributes and name.startswith(
+            self.denied_attribute_prefixes
+        )
+
+    def is_safe_module(self, module_name: str) -> bool:
+        """Check whether a module, or a submodule given by its dotted name, is allowlisted.
+
+        Args:
+            module_name (str): The dotted module name.
+
+        Returns:
+            bool: True if benign code may import and use the module.
+        """
+        top_level, _, submodule = module_name.partition(".")
+        if top_level not in self.modules:
+            return False
+        return not submodule or self.is_safe_module_attribute(top_level, submodule.split(".")[0])
+
+    def is_safe_module_attribute(self, module_name: str, attribute: str) -> bool:
+        """Check whether an attribute of an allowlisted module may be used.
+
+        Args:
+            module_name (str): The dotted name of the module that the attribute is taken from.
+            attribute (str): The attribute name.
+
+        Returns:
+            bool: True if the attribute is not denied and, for modules with restricted
+                attributes, is one of the allowed attributes.
+        """
+        if self.is_denied_attribute(attribute):
+            return False
+        allowed_attributes = self.module_attributes.get(module_name)
+        return allowed_attributes is None or attribute in allowed_attributes
+
+
+class SafetyCheckMetrics(BaseModel):
+    """Tracks how many safety checks were resolved by the local pre-screen.
+
+    Attributes:
+        total_checks (int): Number of actions that went through the safety check.
+        skipped_checks (int): Number of checks that were resolved by the pre-screen.
+        cached_checks (int): Number of checks that were resolved by the verdict cache.
+        llm_checks (int): Number of checks that were sent to the LLM auditor.
+        llm_check_seconds (float): Total time that the LLM auditor took to respond.
+        pipelined_checks (int): Number of LLM checks that started while the agent response
+            was still streaming.
+        pipelined_seconds (float): Total time of the LLM checks that overlapped with the
+            agent response stream.
+    """
+
+    total_checks: int = 0
+    skipped_checks: int = 0
+    cached_checks: int = 0
+    llm_checks: int = 0
+    llm_check_seconds: float = 0.0
+    pipelined_checks: int = 0
+    pipelined_seconds: float = 0.0
+
+    def record_skip(self) -> None:
+        """Record a check that was resolved by the pre-screen."""
+        self.total_checks += 1
+        self.skipped_checks += 1
+
+    def record_cache_hit(self) -> None:
+        """Record a check that was resolved by the verdict cache."""
+        self.total_checks += 1
+        self.cached_checks += 1
+
+    def record_llm_check(self, seconds: float, pipelined_seconds: Optional[float] = None) -> None:
+        """Record a check that was sent to the LLM auditor.
+
+        Args:
+            seconds (float): How long the LLM auditor took to respond.
+            pipelined_seconds (Optional[float]): How much of the check overlapped with the
+                agent response stream, or None if the check started after the stream.
+        """
+        self.total_checks += 1
+        self.llm_checks += 1
+        self.llm_check_seconds += seconds
+        if pipelined_seconds is not None:
+            self.pipelined_checks += 1
+            self.pipelined_seconds += pipelined_seconds
+
+    def skip_fraction(self) -> float:
+        """Get the fraction of checks that skipped the LLM auditor.
+
+        Returns:
+            float: The skip fraction between 0.0 and 1.0.
+        """
+        if self.total_checks <= 0:
+            return 0.0
+        return (self.skipped_checks + self.cached_checks) / self.total_checks
+
+    def estimated_seconds_saved(self) -> float:
+        """Estimate the latency saved by skipping or pipelining the LLM auditor.
+
+        Each check that skipped the auditor is assumed to have taken as long as the average
+        LLM check, and pipelined checks save the time that overlapped with the stream.
+
+        Returns:
+            float: The estimated number of seconds saved.
+        """
+        if self.llm_checks <= 0:
+            return 0.0
+        average_seconds = self.llm_check_seconds / self.llm_checks
+        skipped_seconds = (self.skipped_checks + self.cached_checks) * average_seconds
+        return skipped_seconds + self.pipelined_seconds
+
+
+def get_context_modules(context: Mapping[str, Any]) -> Dict[str, str]:
+    """Get the names in an execution context that are bound to modules.
+
+    Args:
+        context (Mapping[str, Any]): The execution context of the agent.
+
+    Returns:
+        Dict[str, str]: Mapping of context variable names to the module names they are
+            bound to.
+    """
+    return {
+        name: value.__name__ for name, value in context.items() if isinstance(value, ModuleType)
+    }
+
+
+class _CodeScreener(ast.NodeVisitor):
+    """AST visitor that looks for any construct outside of the safety allowlist."""
+
+    def __init__(self, allowlist: SafetyAllowlist, context_modules: Mapping[str, str]):
+        self.allowlist = allowlist
+        self.context_modules = context_modules
+        self.local_callables: Set[str] = set()
+        self.local_names: Set[str] = set()
+        self.module_aliases: Dict[str, str] = {}
+        self.benign = True
+
+    def _get_module_name(self, name: str) -> Optional[str]:
+        return self.module_aliases.get(name) or self.context_modules.get(name)
+
+    def _is_safe_name(self, name: str) -> bool:
+        if name in self.allowlist.denied_names or _is_dunder(name):
+            return False
+        module_name = self._get_module_name(name)
+        if module_name is not None:
+            return self.allowlist.is_safe_module(module_name)
+        # Anything that is not defined by the code itself, such as a builtin that is passed
+        # around as a value or a variable from an earlier step, is left to the auditor
+        return name in self.allowlist.builtins or name in self.local_names
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if not self.allowlist.is_safe_module(alias.name):
+                self.benign = False
+                return
+            if alias.asname:
+                self.module_aliases[alias.asname] = alias.name
+            else:
+                top_level = alias.name.split(".")[0]
+                self.module_aliases[top_level] = top_level
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        if node.level or not node.module or not self.allowlist.is_safe_module(node.module):
+            self.benign = False
+            return
+        for alias in node.names:
+            if alias.name == "*" or not self.allowlist.is_safe_module_attribute(
+                node.module, alias.name
+            ):
+                self.benign = False
+                return
+            self.local_callables.add(alias.asname or alias.name)
+            self.local_names.add(alias.asname or alias.name)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            benign = self._is_safe_name(node.id)
+        else:
+            benign = node.id not in self.allowlist.denied_names and not _is_dunder(node.id)
+        if not benign:
+            self.benign = False
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if self.allowlist.is_denied_attribute(node.attr):
+            self.benign = False
+            return
+        # Attributes taken directly from a module, such as np.lib, are checked against the
+        # attributes that the module allows
+        if isinstance(node.value, ast.Name):
+            module_name = self._get_module_name(node.value.id)
+            if module_name is not None and not self.allowlist.is_safe_module_attribute(
+                module_name, node.attr
+            ):
+                self.benign = False
+                return
+        self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant) -> None:
+        # Strings that name dunder attributes are only useful to look the attributes up
+        if isinstance(node.value, str) and "__" in node.value:
+            self.benign = False
+
+    def _is_local_callable(self, node: ast.expr) -> bool:
+        """Check whether a function argument is a callable that the screen can vouch for."""
+        if isinstance(node, ast.Lambda) or (isinstance(node, ast.Constant) and node.value is None):
+            return True
+        if isinstance(node, ast.Name):
+            return node.id in self.allowlist.builtins or node.id in self.local_callables
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            owner = node.value.id
+            return (
+                self._get_module_name(owner) is not None or owner in self.allowlist.builtins
+            ) and self._is_safe_name(owner)
+        return False
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if isinstance(func, ast.Name):
+            if func.id not in self.allowlist.builtins and func.id not in self.local_callables:
+                self.benign = False
+                return
+            callable_position, callable_keywords = CALLABLE_ARGUMENT_BUILTINS.get(
+                func.id, (None, ())
+            )
+            callables = [
+                keyword.value for keyword in node.keywords if keyword.arg in callable_keywords
+            ]
+            if callable_position is not None and len(node.args) > callable_position:
+                callables.append(node.args[callable_position])
+            if func.id == "iter" and len(node.args) == 2:
+                callables.append(node.args[0])
+            if not all(self._is_local_callable(argument) for argument in callables):
+                self.benign = False
+                return
+        elif isinstance(func, ast.Attribute):
+            # Format strings can look up attributes by name, such as "{0.__globals__}"
+            if func.attr == "format" and not (
+                isinstance(func.value, ast.Constant)
+                and isinstance(func.value.value, str)
+                and not _has_attribute_fields(func.value.value)
+            ):
+                self.benign = False
+                return
+        else:
+            self.benign = False
+            return
+        self.generic_visit(node)
+
+
+def _collect_local_callables(tree: ast.AST) -> Set[str]:
+    """Collect the functions and classes that are defined in the code itself."""
+    return {
+        node.name
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    }
+
+
+def _collect_local_names(tree: ast.AST) -> Set[str]:
+    """Collect the names that are bound by the code itself, such as assigned variables,
+    function arguments and exception names."""
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            names.add(node.id)
+        elif isinstance(node, ast.arg):
+            names.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            names.add(node.name)
+    return names
+
+
+def screen_code(
+    code: str,
+    allowlist: Optional[SafetyAllowlist] = None,
+    context_modules: Optional[Mapping[str, str]] = None,
+) -> SafetyScreenResult:
+    """Classify a code block by the imports, calls and attributes that it uses.
+
+    Args:
+        code (str): The code to classify.
+        allowlist (Optional[SafetyAllowlist]): The allowlist of side-effect-free patterns,
+            defaults to the built-in allowlist.
+        context_modules (Optional[Mapping[str, str]]): Names in the execution context that
+            are bound to modules, so that modules imported in earlier steps are checked
+            against the allowlist too.
+
+    Returns:
+        SafetyScreenResult: BENIGN if the code only uses allowlisted patterns, otherwise
+            UNCERTAIN.
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return SafetyScreenResult.UNCERTAIN
+
+    screener = _CodeScreener(allowlist or SafetyAllowlist(), context_modules or {})
+    screener.local_callables = _collect_local_callables(tree)
+    screener.local_names = _collect_local_names(tree) | screener.local_callables
+
+    # Imports are visited first so that aliases are known wherever they are used
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            screener.visit(node)
+            if not screener.benign:
+                return SafetyScreenResult.UNCERTAIN
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Name, ast.Attribute, ast.Call, ast.Constant)):
+            screener.visit(node)
+            if not screener.benign:
+                return SafetyScreenResult.UNCERTAIN
+
+    return SafetyScreenResult.BENIGN
+
+
+def is_sensitive_path(file_path: Path) -> bool:
+    """Check whether a path looks like it holds credentials or keys.
+
+    Args:
+        file_path (Path): The path to check.
+
+    Returns:
+        bool: True if any part of the path matches a sensitive pattern.
+    """
+    path_lower = str(file_path).lower()
+    return any(pattern in path_lower for pattern in SENSITIVE_PATH_PATTERNS)
+
+
+def screen_file_action(action: ActionType, file_path: str, working_dir: Path) -> SafetyScreenResult:
+    """Classify a file action by the path that it operates on.
+
+    Writing a new file inside the working directory is benign as long as the path does not
+    look like it holds credentials.  Reads always go to the auditor since a file anywhere
+    can hold credentials, and edits and overwrites of existing files always go to the
+    auditor since they can destroy data.
+
+    Args:
+        action (ActionType): The file action, one of READ, WRITE or EDIT.
+        file_path (str): The path of the file that the action operates on.
+        working_dir (Path): The working directory of the agent.
+
+    Returns:
+        SafetyScreenResult: BENIGN if the file action only creates a new file in the
+            working directory, otherwise UNCERTAIN.
+    """
+    if not file_path or action != ActionType.WRITE:
+        return SafetyScreenResult.UNCERTAIN
+
+    try:
+        resolved_path = (working_dir / Path(file_path).expanduser()).resolve()
+        resolved_working_dir = working_dir.resolve()
+    except (OSError, RuntimeError):
+        return SafetyScreenResult.UNCERTAIN
+
+    if not resolved_path.is_relative_to(resolved_working_dir):
+        return SafetyScreenResult.UNCERTAIN
+
+    if is_sensitive_path(resolved_path.relative_to(resolved_working_dir)):
+        return SafetyScreenResult.UNCERTAIN
+
+    if resolved_path.exists():
+        return SafetyScreenResult.UNCERTAIN
+
+    return SafetyScreenResult.BENIGN
+
+
+def screen_action(
+    response: ResponseJsonSchema,
+    working_dir: Path,
+    allowlist: Optional[SafetyAllowlist] = None,
+    context_modules: Optional[Mapping[str, str]] = None,
+) -> SafetyScreenResult:
+    """Classify an agent action with the local static safety pre-screen.
+
+    Args:
+        response (ResponseJsonSchema): The action generated by the agent.
+        working_dir (Path): The working directory of the agent.
+        allowlist (Optional[SafetyAllowlist]): The allowlist of side-effect-free patterns.
+        context_modules (Optional[Mapping[str, str]]): Names in the execution context that
+            are bound to modules.
+
+    Returns:
+        SafetyScreenResult: BENIGN if the LLM auditor can be skipped, otherwise UNCERTAIN.
+    """
+    if response.action == ActionType.CODE:
+        return screen_code(response.code, allowlist, context_modules)
+
+    return screen_file_action(response.action, response.file_path, working_dir)
+
+
+def normalize_action(response: ResponseJsonSchema, working_dir: Optional[Path] = None) -> str:
+    """Get a normalized representation of the action that an agent response performs.
+
+    Code is normalized to its AST dump so that formatting and comments do not change the
+    representation.  File actions are normalized to the resolved path, whether the file
+    already exists and a hash of the content or replacements that they apply, so that a
+    verdict for a file in one directory does not approve the same action anywhere else.
+    The free text fields of the response are not part of the action.
+
+    Args:
+        response (ResponseJsonSchema): The action generated by the agent.
+        working_dir (Optional[Path]): The directory that relative file paths are resolved
+            against, defaults to the current working directory.
+
+    Returns:
+        str: The normalized action.
+    """
+    action = response.action.value if isinstance(response.action, Enum) else str(response.action)
+
+    if response.action == ActionType.CODE:
+        try:
+            return f"{action}\0{ast.dump(ast.parse(response.code))}"
+        except (SyntaxError, ValueError):
+            return f"{action}\0{response.code.strip()}"
+
+    if response.action == ActionType.EDIT:
+        payload = json.dumps(response.replacements, sort_keys=True)
+    else:
+        payload = response.content or response.code or ""
+
+    content_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    file_path = Path(response.file_path or "").expanduser()
+    try:
+        resolved_path = ((working_dir or Path.cwd()) / file_path).resolve()
+    except (OSError, RuntimeError):
+        resolved_path = Path(os.path.abspath(file_path))
+    exists = "exists" if resolved_path.exists() else "new"
+
+    return f"{action}\0{resolved_path}\0{exists}\0{content_hash}"
+
+
+def get_safety_verdict_key(
+    response: ResponseJsonSchema,
+    security_prompt: str,
+    model_name: str,
+    scope: str = "",
+    working_dir: Optional[Path] = None,
+) -> str:
+    """Get the verdict cache key for an action.
+
+    Args:
+        response (ResponseJsonSchema): The action generated by the agent.
+        security_prompt (str): The security prompt of the agent that the action was
+            reviewed against.
+        model_name (str): The model that reviewed the action.
+        scope (str): Additional scope for verdicts that depend on more than the action and
+            the security prompt, such as the conversation that was reviewed.
+        working_dir (Optional[Path]): The directory that relative file paths are resolved
+            against, defaults to the current working directory.
+
+    Returns:
+        str: The hex digest of the normalized action, security prompt, model and scope.
+    """
+    digest = hashlib.sha256()
+    action = normalize_action(response, working_dir)
+    for part in (scope, model_name, security_prompt or "", action):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SafetyVerdictCache:
+    """Cache of actions that the LLM auditor found safe.
+
+    Only SAFE verdicts are stored, so that a cache hit can never turn an unsafe action or
+    a security override into an approval.  Verdicts expire after a TTL so that changes in
+    the auditor behaviour are picked up, and the least recently used verdicts are evicted
+    once the cache is full.  The cache is thread safe and loaded from disk lazily on first
+    use.
+
+    Attributes:
+        cache_file (Path | None): Path to the file that the cache is persisted to, or None
+            to keep the cache in memory only
+        max_entries (int): Maximum number of verdicts to keep
+        ttl (float): Number of seconds that a verdict stays valid, 0 disables the cache
+    """
+
+    cache_file: Optional[Path]
+    max_entries: int
+    ttl: float
+
+    def __init__(
+        self,
+        cache_file: Optional[Path] = None,
+        max_entries: int = DEFAULT_MAX_SAFETY_VERDICT_CACHE_ENTRIES,
+        ttl: float = DEFAULT_SAFETY_VERDICT_CACHE_TTL,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Values are the times at which the verdicts expire, expired verdicts are not
+        # loaded or saved
+        self._entries: PersistedLRUCache[float] = PersistedLRUCache(
+            cache_file,
+            max_entries,
+            name="safety verdict cache",
+            is_valid=lambda expires_at: isinstance(expires_at, (int, float))
+            and expires_at > time.time(),
+        )
+
+    def is_safe(self, key: str) -> bool:
+        """Check whether an action was found safe and the verdict has not expired.
+
+        Args:
+            key (str): The verdict key of the action, see get_safety_verdict_key
+
+        Returns:
+            bool: True if a valid SAFE verdict is cached for the action
+        """
+        if self.ttl <= 0:
+            return False
+
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            self._entries.pop(key)
+            return False
+        return True
+
+    def mark_safe(self, key: str) -> None:
+        """Store a SAFE verdict for an action.
+
+        Args:
+            key (str): The verdict key of the action, see get_safety_verdict_key
+        """
+        if self.ttl <= 0:
+            return
+
+        self._entries.set(key, time.time() + self.ttl)
+
+    def save(self) -> None:
+        """Persist the cache to disk if it has changed since it was loaded, without the
+        verdicts that have expired."""
+        self._entries.save()
+
+
+@lru_cache(maxsize=None)
+def get_safety_verdict_cache(
+    config_dir: Path, ttl: float = DEFAULT_SAFETY_VERDICT_CACHE_TTL
+) -> SafetyVerdictCache:
+    """Get the shared safety verdict cache for a config directory.
+
+    Args:
+        config_dir (Path): The Local Operator config directory
+        ttl (float): Number of seconds that a verdict stays valid
+
+    Returns:
+        SafetyVerdictCache: The safety verdict cache persisted in the config directory
+    """
+    return SafetyVerdictCache(cache_file=config_dir / SAFETY_VERDICT_CACHE_FILE_NAME, ttl=ttl)
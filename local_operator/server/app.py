@@ -20,6 +20,7 @@ from local_operator.env import get_env_config
 from local_operator.helpers import setup_cross_platform_environment
 from local_operator.jobs import JobManager
 from local_operator.logger import get_logger
+from local_operator.model.catalog import get_model_catalog_cache
 from local_operator.operator import OperatorType
 from local_operator.scheduler_service import SchedulerService
 from local_operator.server.routes import (
@@ -35,6 +36,7 @@ from local_operator.server.routes import (
     transcription,
     websockets,
 )
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 from local_operator.server.utils.websocket_manager import WebSocketManager
 
 logger = get_logger("local_operator.server")
@@ -66,6 +68,8 @@ async def lifespan(app: FastAPI):
     # Initialize AgentRegistry with a refresh interval of 3 seconds to ensure
     # changes made by child processes are quickly reflected in the parent process
     app.state.agent_registry = AgentRegistry(config_dir=config_dir, refresh_interval=3.0)
+    app.state.async_agent_registry = AsyncAgentRegistry(app.state.agent_registry)
+    app.state.model_catalog = get_model_catalog_cache(config_dir)
     app.state.job_manager = JobManager()
     app.state.websocket_manager = WebSocketManager()
     app.state.env_config = get_env_config()
@@ -86,10 +90,14 @@ async def lifespan(app: FastAPI):
     yield
     # Clean up on shutdown
     await app.state.scheduler_service.shutdown()
+    await app.state.websocket_manager.shutdown()
+    app.state.async_agent_registry.shutdown()
 
     app.state.credential_manager = None
     app.state.config_manager = None
     app.state.agent_registry = None
+    app.state.async_agent_registry = None
+    app.state.model_catalog = None
     app.state.job_manager = None
     app.state.websocket_manager = None
     app.state.env_config = None
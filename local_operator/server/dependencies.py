@@ -1,4 +1,6 @@
-from fastapi import Request, WebSocket
+from typing import Optional
+
+from fastapi import Depends, Request, WebSocket
 
 from local_operator.agents import AgentRegistry
 from local_operator.clients.radient import RadientClient
@@ -6,7 +8,9 @@ from local_operator.config import ConfigManager
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
 from local_operator.jobs import JobManager
+from local_operator.model.catalog import ModelCatalogCache
 from local_operator.scheduler_service import SchedulerService
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 from local_operator.server.utils.websocket_manager import WebSocketManager
 
 
@@ -26,11 +30,32 @@ def get_agent_registry(request: Request) -> AgentRegistry:
     return request.app.state.agent_registry
 
 
+def get_async_agent_registry(
+    request: Request, agent_registry: AgentRegistry = Depends(get_agent_registry)
+) -> AsyncAgentRegistry:
+    """Get the awaitable facade of the agent registry for async route handlers.
+
+    The facade is kept in the application state, and replaced when the agent registry is.
+    """
+    async_registry = getattr(request.app.state, "async_agent_registry", None)
+    if async_registry is None or async_registry.registry is not agent_registry:
+        if async_registry is not None:
+            async_registry.shutdown()
+        async_registry = AsyncAgentRegistry(agent_registry)
+        request.app.state.async_agent_registry = async_registry
+    return async_registry
+
+
 def get_job_manager(request: Request) -> JobManager:
     """Get the job manager from the application state."""
     return request.app.state.job_manager
 
 
+def get_model_catalog(request: Request) -> Optional[ModelCatalogCache]:
+    """Get the model catalog cache from the application state, if there is one."""
+    return getattr(request.app.state, "model_catalog", None)
+
+
 def get_websocket_manager(request: Request) -> WebSocketManager:
     """Get the WebSocket manager from the application state."""
     return request.app.state.websocket_manager
@@ -18,6 +18,7 @@ from local_operator.model.registry import ModelInfo, ProviderDetail
 from local_operator.types import (  # Added ScheduleUnit
     CodeExecutionResult,
     ConversationRecord,
+    ResourceLimits,
     ScheduleUnit,
 )
 
@@ -142,6 +143,16 @@ class Agent(BaseModel):
         "",
         description="The model to use for the agent. Defaults to ''.",
     )
+    auxiliary_hosting: str = Field(
+        default="",
+        description="The hosting environment for the auxiliary model that runs "
+        "classification, safety checks, summaries and plans. Defaults to ''.",
+    )
+    auxiliary_model: str = Field(
+        default="",
+        description="The auxiliary model that runs classification, safety checks, summaries "
+        "and plans. Defaults to '' to use the main model for every task.",
+    )
     description: str = Field(
         "",
         description="A description of the agent. Defaults to ''.",
@@ -207,6 +218,11 @@ class Agent(BaseModel):
         description="The current working directory for the agent.  Updated whenever the "
         "agent changes its working directory through code execution.  Defaults to '.'",
     )
+    resource_limits: Optional[ResourceLimits] = Field(
+        default=None,
+        description="Limits on the wall time, CPU time and memory of each code execution "
+        "step of the agent. Limits that are not set use the configured defaults.",
+    )
 
 
 class AgentCreate(BaseModel):
@@ -226,6 +242,16 @@ class AgentCreate(BaseModel):
         None,
         description="The model to use for the agent. Defaults to 'openai/gpt-4o-mini'.",
     )
+    auxiliary_hosting: str | None = Field(
+        default=None,
+        description="The hosting environment for the auxiliary model that runs "
+        "classification, safety checks, summaries and plans. Defaults to ''.",
+    )
+    auxiliary_model: str | None = Field(
+        default=None,
+        description="The auxiliary model that runs classification, safety checks, summaries "
+        "and plans. Defaults to '' to use the main model for every task.",
+    )
     description: str | None = Field(
         None,
         description="A description of the agent. Defaults to ''.",
@@ -275,6 +301,11 @@ class AgentCreate(BaseModel):
         "agent changes its working directory through code execution.  Defaults to "
         "'~/local-operator-home'.",
     )
+    resource_limits: ResourceLimits | None = Field(
+        default=None,
+        description="Limits on the wall time, CPU time and memory of each code execution "
+        "step of the agent. Limits that are not set use the configured defaults.",
+    )
 
 
 class AgentUpdate(BaseModel):
@@ -294,6 +325,16 @@ class AgentUpdate(BaseModel):
         None,
         description="The model to use for the agent. Defaults to 'google/gemini-2.0-flash-001'.",
     )
+    auxiliary_hosting: str | None = Field(
+        default=None,
+        description="The hosting environment for the auxiliary model that runs "
+        "classification, safety checks, summaries and plans. Defaults to ''.",
+    )
+    auxiliary_model: str | None = Field(
+        default=None,
+        description="The auxiliary model that runs classification, safety checks, summaries "
+        "and plans. Defaults to '' to use the main model for every task.",
+    )
     description: str | None = Field(
         None,
         description="A description of the agent.  Defaults to ''.",
@@ -349,6 +390,11 @@ class AgentUpdate(BaseModel):
         description="The current working directory for the agent.  Updated whenever the "
         "agent changes its working directory through code execution.",
     )
+    resource_limits: ResourceLimits | None = Field(
+        default=None,
+        description="Limits on the wall time, CPU time and memory of each code execution "
+        "step of the agent. Limits that are not set use the configured defaults.",
+    )
 
 
 class AgentListResult(BaseModel):
@@ -27,12 +27,12 @@ from fastapi.encoders import jsonable_encoder
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import ValidationError
 
-from local_operator.agents import AgentEditFields, AgentRegistry
+from local_operator.agents import AgentEditFields
 from local_operator.clients.radient import RadientClient
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig, get_env_config
 from local_operator.server.dependencies import (
-    get_agent_registry,
+    get_async_agent_registry,
     get_credential_manager,
 )
 from local_operator.server.models.schemas import (
@@ -46,6 +46,7 @@ from local_operator.server.models.schemas import (
     ExecutionVariable,
     ExecutionVariablesResponse,
 )
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 from local_operator.types import AgentState
 
 router = APIRouter(tags=["Agents"])
@@ -102,7 +103,7 @@ logger = logging.getLogger("local_operator.server.routes.agents")
     },
 )
 async def list_agents(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, description="Number of agents per page"),
     name: str = Query(None, description="Filter agents by name (case-insensitive)"),
@@ -123,7 +124,7 @@ async def list_agents(
     Default sort is by last_message_datetime in descending order.
     """
     try:
-        agents_list = agent_registry.list_agents()
+        agents_list = await agent_registry.list_agents()
 
         # Filter by name if provided
         if name:
@@ -255,14 +256,14 @@ async def list_agents(
 )
 async def create_agent(
     agent: AgentCreate,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     """
     Create a new agent.
     """
     try:
         agent_edit_metadata = AgentEditFields.model_validate(agent.model_dump(exclude_unset=True))
-        new_agent = agent_registry.create_agent(agent_edit_metadata)
+        new_agent = await agent_registry.create_agent(agent_edit_metadata)
     except ValidationError as e:
         logger.exception("Validation error creating agent")
         raise HTTPException(status_code=422, detail=f"Validation error: {e}")
@@ -315,14 +316,14 @@ async def create_agent(
     },
 )
 async def get_agent(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent to retrieve", examples=["agent123"]),
 ):
     """
     Retrieve an agent by ID.
     """
     try:
-        agent_obj = agent_registry.get_agent(agent_id)
+        agent_obj = await agent_registry.get_agent(agent_id)
     except KeyError as e:
         logger.exception("Agent not found")
         raise HTTPException(status_code=404, detail=f"Agent not found: {e}")
@@ -395,7 +396,7 @@ async def get_agent(
 )
 async def update_agent(
     agent_data: AgentUpdate,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent to update", examples=["agent123"]),
 ):
     """
@@ -403,7 +404,7 @@ async def update_agent(
     """
     try:
         agent_edit_data = AgentEditFields.model_validate(agent_data.model_dump(exclude_unset=True))
-        updated_agent = agent_registry.update_agent(agent_id, agent_edit_data)
+        updated_agent = await agent_registry.update_agent(agent_id, agent_edit_data)
     except KeyError as e:
         logger.exception("Agent not found")
         raise HTTPException(status_code=404, detail=f"Agent not found: {e}")
@@ -462,7 +463,7 @@ async def update_agent(
 )
 async def upload_agent_to_radient(
     agent_id: str = Path(..., description="ID of the agent to upload", examples=["agent123"]),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     env_config: EnvConfig = Depends(get_env_config),
     credential_manager: CredentialManager = Depends(get_credential_manager),
 ):
@@ -480,14 +481,14 @@ async def upload_agent_to_radient(
 
         # Get agent and export as zip
         try:
-            agent = agent_registry.get_agent(agent_id)
+            agent = await agent_registry.get_agent(agent_id)
         except KeyError:
             raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
-        zip_path, _ = agent_registry.export_agent(agent.id)
+        zip_path, _ = await agent_registry.export_agent(agent.id)
 
         # Upload to Radient
         try:
-            agent_registry.upload_agent_to_radient(radient_client, agent_id, zip_path)
+            await agent_registry.upload_agent_to_radient(radient_client, agent_id, zip_path)
         except Exception as e:
             logger.exception("Error uploading agent to Radient")
             raise HTTPException(status_code=400, detail=f"Error uploading agent to Radient: {e}")
@@ -552,7 +553,7 @@ async def download_agent_from_radient(
     agent_id: str = Path(
         ..., description="ID of the agent to download from Radient", examples=["radient-agent-id"]
     ),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     env_config: EnvConfig = Depends(get_env_config),
 ):
     """
@@ -565,7 +566,9 @@ async def download_agent_from_radient(
 
         # Download from Radient
         try:
-            imported_agent = agent_registry.download_agent_from_radient(radient_client, agent_id)
+            imported_agent = await agent_registry.download_agent_from_radient(
+                radient_client, agent_id
+            )
         except Exception as e:
             logger.exception("Error downloading agent from Radient")
             raise HTTPException(
@@ -608,14 +611,14 @@ async def download_agent_from_radient(
     },
 )
 async def delete_agent(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent to delete", examples=["agent123"]),
 ):
     """
     Delete an existing agent.
     """
     try:
-        agent_registry.delete_agent(agent_id)
+        await agent_registry.delete_agent(agent_id)
     except KeyError as e:
         logger.exception("Agent not found")
         raise HTTPException(status_code=404, detail=f"Agent not found: {e}")
@@ -677,7 +680,7 @@ async def delete_agent(
     },
 )
 async def get_agent_conversation(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(
         ..., description="ID of the agent to get conversation for", examples=["agent123"]
     ),
@@ -700,7 +703,7 @@ async def get_agent_conversation(
         HTTPException: If the agent registry is not initialized or the agent is not found
     """
     try:
-        conversation_history = agent_registry.get_agent_conversation_history(agent_id)
+        conversation_history = await agent_registry.get_agent_conversation_history(agent_id)
         total_messages = len(conversation_history)
 
         # Set default datetime values in case the conversation is empty
@@ -808,7 +811,7 @@ async def get_agent_conversation(
     },
 )
 async def clear_agent_conversation(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(
         ..., description="ID of the agent to clear conversation for", examples=["agent123"]
     ),
@@ -828,13 +831,13 @@ async def clear_agent_conversation(
     """
     try:
         # Get the agent to verify it exists
-        agent = agent_registry.get_agent(agent_id)
+        agent = await agent_registry.get_agent(agent_id)
 
         # Get the current agent state
-        agent_state = agent_registry.load_agent_state(agent_id)
+        agent_state = await agent_registry.load_agent_state(agent_id)
 
         # Clear the conversation by saving an empty list
-        agent_registry.save_agent_state(
+        await agent_registry.save_agent_state(
             agent_id=agent_id,
             agent_state=AgentState(
                 version=agent.version,
@@ -847,7 +850,7 @@ async def clear_agent_conversation(
                 agent_system_prompt=agent_state.agent_system_prompt,
             ),
         )
-        agent_registry.save_agent_context(agent_id=agent_id, context={})
+        await agent_registry.save_agent_context(agent_id=agent_id, context={})
 
         return CRUDResponse(
             status=200,
@@ -906,7 +909,7 @@ async def clear_agent_conversation(
     },
 )
 async def import_agent(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     file: UploadFile = File(..., description="ZIP file containing agent state files"),
 ):
     """
@@ -937,7 +940,7 @@ async def import_agent(
 
         # Use the AgentRegistry's import_agent method
         try:
-            agent_obj = agent_registry.import_agent(zip_path)
+            agent_obj = await agent_registry.import_agent(zip_path)
             agent_serialized = agent_obj.model_dump()
 
             response = CRUDResponse(
@@ -991,7 +994,7 @@ async def import_agent(
 )
 async def export_agent(
     background_tasks: BackgroundTasks,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent to export", examples=["agent123"]),
 ):
     """
@@ -1010,7 +1013,7 @@ async def export_agent(
     """
     try:
         # Use the AgentRegistry's export_agent method
-        zip_path, filename = agent_registry.export_agent(agent_id)
+        zip_path, filename = await agent_registry.export_agent(agent_id)
 
         # Ensure the file exists before returning it
         if not zip_path.exists():
@@ -1102,7 +1105,7 @@ async def export_agent(
     },
 )
 async def get_agent_execution_history(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(
         ..., description="ID of the agent to get execution history for", examples=["agent123"]
     ),
@@ -1113,7 +1116,7 @@ async def get_agent_execution_history(
     Get the execution history for a specific agent.
     """
     try:
-        execution_history = agent_registry.get_agent_execution_history(agent_id)
+        execution_history = await agent_registry.get_agent_execution_history(agent_id)
         total_executions = len(execution_history)
 
         # Default timestamps if no executions
@@ -1239,7 +1242,7 @@ async def get_agent_execution_history(
     },
 )
 async def get_agent_system_prompt(
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent", examples=["agent123"]),
 ):
     """
@@ -1256,7 +1259,7 @@ async def get_agent_system_prompt(
         HTTPException: If the agent is not found or there is an error retrieving the system prompt
     """
     try:
-        system_prompt = agent_registry.get_agent_system_prompt(agent_id)
+        system_prompt = await agent_registry.get_agent_system_prompt(agent_id)
         return CRUDResponse(
             status=200,
             message="Agent system prompt retrieved successfully",
@@ -1312,7 +1315,7 @@ async def get_agent_system_prompt(
 )
 async def update_agent_system_prompt(
     system_prompt: Dict[str, str],
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     agent_id: str = Path(..., description="ID of the agent", examples=["agent123"]),
 ):
     """
@@ -1335,7 +1338,7 @@ async def update_agent_system_prompt(
                 status_code=422, detail="Request body must contain 'system_prompt' field"
             )
 
-        agent_registry.set_agent_system_prompt(agent_id, system_prompt["system_prompt"])
+        await agent_registry.set_agent_system_prompt(agent_id, system_prompt["system_prompt"])
         return CRUDResponse(
             status=200,
             message="Agent system prompt updated successfully",
@@ -1364,10 +1367,10 @@ async def update_agent_system_prompt(
 )
 async def list_agent_execution_variables(
     agent_id: str = Path(..., description="ID of the agent"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     try:
-        variables = agent_registry.load_agent_context(agent_id)
+        variables = await agent_registry.load_agent_context(agent_id)
 
         if variables is None:
             return CRUDResponse(
@@ -1405,7 +1408,7 @@ async def list_agent_execution_variables(
 async def create_agent_execution_variable(
     variable_data: ExecutionVariable,
     agent_id: str = Path(..., description="ID of the agent"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     try:
         # Coerce the value to the correct type based on the type field
@@ -1428,7 +1431,7 @@ async def create_agent_execution_variable(
                 raise ValueError("Value is not a valid dict")
         # For 'str' type or any other type, keep as string
 
-        agent_registry.create_context_variable(agent_id, variable_data.key, coerced_value)
+        await agent_registry.create_context_variable(agent_id, variable_data.key, coerced_value)
         response_content = CRUDResponse(
             status=201,
             message="Execution variable created successfully",
@@ -1466,10 +1469,10 @@ async def create_agent_execution_variable(
 async def get_agent_execution_variable(
     agent_id: str = Path(..., description="ID of the agent"),
     variable_key: str = Path(..., description="Key of the execution variable"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     try:
-        value = agent_registry.get_context_variable(agent_id, variable_key)
+        value = await agent_registry.get_context_variable(agent_id, variable_key)
         return CRUDResponse(
             status=200,
             message="Execution variable retrieved successfully",
@@ -1507,7 +1510,7 @@ async def update_agent_execution_variable(
     variable_data: ExecutionVariable,
     agent_id: str = Path(..., description="ID of the agent"),
     variable_key: str = Path(..., description="Key of the execution variable to update"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     try:
         # Coerce the value to the correct type if type is provided
@@ -1537,7 +1540,7 @@ async def update_agent_execution_variable(
                     f"'{variable_data.type}': {str(type_error)}"
                 )
 
-        updated_context = agent_registry.update_context_variable(
+        updated_context = await agent_registry.update_context_variable(
             agent_id, variable_key, coerced_value
         )
         updated_value = updated_context.get(variable_key)
@@ -1582,10 +1585,10 @@ async def update_agent_execution_variable(
 async def delete_agent_execution_variable(
     agent_id: str = Path(..., description="ID of the agent"),
     variable_key: str = Path(..., description="Key of the execution variable to delete"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     try:
-        agent_registry.delete_context_variable(agent_id, variable_key)
+        await agent_registry.delete_context_variable(agent_id, variable_key)
         return CRUDResponse(
             status=200,
             message="Execution variable deleted successfully",
@@ -5,22 +5,22 @@ This module contains the FastAPI route handlers for chat-related endpoints.
 """
 
 import logging
-from typing import TYPE_CHECKING  # Added
+from typing import TYPE_CHECKING, Optional  # Added
 
 from fastapi import APIRouter, Depends, HTTPException, Path
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
-from tiktoken import encoding_for_model
 
-from local_operator.agents import AgentRegistry
 from local_operator.config import ConfigManager
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
+from local_operator.helpers import get_tokenizer
 from local_operator.jobs import JobManager
+from local_operator.operator import Operator
 
 # from local_operator.scheduler_service import SchedulerService # Moved to TYPE_CHECKING
 from local_operator.server.dependencies import (
-    get_agent_registry,
+    get_async_agent_registry,
     get_config_manager,
     get_credential_manager,
     get_env_config,
@@ -36,6 +36,7 @@ from local_operator.server.models.schemas import (
     CRUDResponse,
     JobResultSchema,
 )
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 from local_operator.server.utils.attachment_utils import process_attachments
 
 # Import job processor utilities when needed
@@ -87,7 +88,7 @@ async def chat_endpoint(
     request: ChatRequest,
     credential_manager: CredentialManager = Depends(get_credential_manager),
     config_manager: ConfigManager = Depends(get_config_manager),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     env_config=Depends(get_env_config),
 ):
     """
@@ -102,6 +103,7 @@ async def chat_endpoint(
       500:
         description: Internal Server Error
     """
+    operator: Optional[Operator] = None
     try:
         # Create a new executor for this request using the provided hosting and model
         operator = create_operator(
@@ -109,7 +111,7 @@ async def chat_endpoint(
             request.model,
             credential_manager,
             config_manager,
-            agent_registry,
+            agent_registry.registry,
             env_config=env_config,
         )
 
@@ -146,16 +148,12 @@ async def chat_endpoint(
             response_content = ""
 
         # Calculate token stats using tiktoken
-        tokenizer = None
-        try:
-            tokenizer = encoding_for_model(request.model)
-        except Exception:
-            tokenizer = encoding_for_model("gpt-4o")
+        tokenizer = get_tokenizer(request.model)
 
         prompt_tokens = sum(
-            len(tokenizer.encode(msg.content)) for msg in operator.executor.agent_state.conversation
+            msg.get_token_count(tokenizer) for msg in operator.executor.agent_state.conversation
         )
-        completion_tokens = len(tokenizer.encode(response_content))
+        completion_tokens = len(tokenizer.encode(response_content, disallowed_special=()))
         total_tokens = prompt_tokens + completion_tokens
 
         return CRUDResponse(
@@ -178,6 +176,10 @@ async def chat_endpoint(
     except Exception:
         logger.exception("Unexpected error while processing chat request")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    finally:
+        # The execution kernel of the request would otherwise live as long as the server
+        if operator is not None:
+            await operator.executor.shutdown_kernel()
 
 
 @router.post(
@@ -214,7 +216,7 @@ async def chat_with_agent(
     request: AgentChatRequest,
     credential_manager: CredentialManager = Depends(get_credential_manager),
     config_manager: ConfigManager = Depends(get_config_manager),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     env_config=Depends(get_env_config),
     agent_id: str = Path(
         ..., description="ID of the agent to use for the chat", examples=["agent123"]
@@ -224,21 +226,25 @@ async def chat_with_agent(
     Process a chat request using a specific agent from the registry and return the response with
     context. The specified agent is applied to both the operator and executor.
     """
+    operator: Optional[Operator] = None
     try:
         # Retrieve the specific agent from the registry
         try:
-            agent_obj = agent_registry.get_agent(agent_id)
+            agent_obj = await agent_registry.get_agent(agent_id)
         except KeyError as e:
             logger.exception("Error retrieving agent")
             raise HTTPException(status_code=404, detail=f"Agent not found: {e}")
 
-        # Create a new executor for this request using the provided hosting and model
-        operator = create_operator(
+        # Create a new executor for this request using the provided hosting and model, in a
+        # worker thread since the conversation of the agent is loaded from disk
+        operator = await agent_registry.run(
+            create_operator,
             request.hosting,
             request.model,
             credential_manager,
             config_manager,
-            agent_registry,
+            agent_registry.registry,
+            agent_id=agent_id,
             current_agent=agent_obj,
             persist_conversation=request.persist_conversation,
             env_config=env_config,
@@ -259,16 +265,12 @@ async def chat_with_agent(
         response_content = response_json.response if response_json is not None else ""
 
         # Calculate token stats using tiktoken
-        tokenizer = None
-        try:
-            tokenizer = encoding_for_model(request.model)
-        except Exception:
-            tokenizer = encoding_for_model("gpt-4o")
+        tokenizer = get_tokenizer(request.model)
 
         prompt_tokens = sum(
-            len(tokenizer.encode(msg.content)) for msg in operator.executor.agent_state.conversation
+            msg.get_token_count(tokenizer) for msg in operator.executor.agent_state.conversation
         )
-        completion_tokens = len(tokenizer.encode(response_content))
+        completion_tokens = len(tokenizer.encode(response_content, disallowed_special=()))
         total_tokens = prompt_tokens + completion_tokens
 
         return CRUDResponse(
@@ -294,6 +296,9 @@ async def chat_with_agent(
     except Exception:
         logger.exception("Unexpected error while processing chat request with agent")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    finally:
+        if operator is not None:
+            await operator.executor.shutdown_kernel()
 
 
 @router.post(
@@ -327,7 +332,7 @@ async def chat_async_endpoint(
     request: ChatRequest,
     credential_manager: CredentialManager = Depends(get_credential_manager),
     config_manager: ConfigManager = Depends(get_config_manager),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     job_manager: JobManager = Depends(get_job_manager),
     websocket_manager: WebSocketManager = Depends(get_websocket_manager),
     env_config: EnvConfig = Depends(get_env_config),
@@ -379,7 +384,7 @@ async def chat_async_endpoint(
                 request.hosting,
                 credential_manager,
                 config_manager,
-                agent_registry,
+                agent_registry.registry,
                 env_config,
                 request.context if request.context else None,
                 request.options.model_dump() if request.options else None,
@@ -451,7 +456,7 @@ async def chat_with_agent_async(
     request: AgentChatRequest,
     credential_manager: CredentialManager = Depends(get_credential_manager),
     config_manager: ConfigManager = Depends(get_config_manager),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     job_manager: JobManager = Depends(get_job_manager),
     websocket_manager: WebSocketManager = Depends(get_websocket_manager),
     env_config: EnvConfig = Depends(get_env_config),
@@ -488,7 +493,7 @@ async def chat_with_agent_async(
     try:
         # Retrieve the specific agent from the registry
         try:
-            agent_registry.get_agent(agent_id)
+            await agent_registry.get_agent(agent_id)
         except KeyError as e:
             logger.exception("Error retrieving agent")
             raise HTTPException(status_code=404, detail=f"Agent not found: {e}")
@@ -515,7 +520,7 @@ async def chat_with_agent_async(
                 agent_id,
                 credential_manager,
                 config_manager,
-                agent_registry,
+                agent_registry.registry,
                 env_config,
                 request.persist_conversation,
                 request.user_message_id,
@@ -1,11 +1,12 @@
+import json
 import logging
 from datetime import datetime, timezone  # Added
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
 
 from local_operator.agents import (  # Added
-    AgentRegistry,
     AgentState,
     CodeExecutionResult,
     ConversationRecord,
@@ -13,13 +14,18 @@ from local_operator.agents import (  # Added
     ExecutionType,
     ProcessResponseStatus,
 )
-from local_operator.jobs import JobManager, JobStatus
-from local_operator.server.dependencies import get_agent_registry, get_job_manager
+from local_operator.jobs import JobEventLog, JobManager, JobStatus
+from local_operator.server.dependencies import get_async_agent_registry, get_job_manager
 from local_operator.server.models.schemas import CRUDResponse
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 
 router = APIRouter(tags=["Jobs"])
 logger = logging.getLogger("local_operator.server.routes.jobs")
 
+SSE_KEEPALIVE_INTERVAL = 15.0
+"""The number of seconds without events after which a job stream sends a comment, so
+that proxies keep the connection open."""
+
 
 @router.get(
     "/v1/jobs/{job_id}",
@@ -122,6 +128,129 @@ async def get_job_status(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+def _format_sse(event: str, data: str, event_id: Optional[int] = None) -> str:
+    """Format a Server-Sent Event, with one data line for each line of the data."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+async def _stream_job_events(
+    job_id: str,
+    job_manager: JobManager,
+    events: JobEventLog,
+    last_event_id: Optional[int],
+) -> AsyncIterator[str]:
+    """Stream the events of a job until the job ends.
+
+    A client that connects without an event ID, or whose events were dropped from the log,
+    first gets a "job" event with the current summary of the job, followed by the kept
+    events, which include the latest update of each message.
+    """
+    cursor = last_event_id or 0
+    pending, complete = events.since(cursor)
+    if last_event_id is None or not complete:
+        try:
+            job = await job_manager.get_job(job_id)
+        except KeyError:
+            return
+        yield _format_sse("job", json.dumps(job_manager.get_job_summary(job), default=str))
+        pending, _ = events.since(0)
+
+    while True:
+        for event in pending:
+            yield _format_sse(event.event, event.data, event.id)
+            cursor = event.id
+
+        if cursor >= events.last_id:
+            if events.closed:
+                return
+            if not await events.wait(SSE_KEEPALIVE_INTERVAL):
+                yield ": keepalive\n\n"
+        pending, _ = events.since(cursor)
+
+
+@router.get(
+    "/v1/jobs/{job_id}/stream",
+    summary="Stream job events",
+    description=(
+        "Streams the status changes and message updates of a job as Server-Sent Events, "
+        "until the job ends.  Reconnecting clients send the Last-Event-ID header to "
+        "receive only the events that they missed."
+    ),
+    response_class=StreamingResponse,
+    openapi_extra={
+        "responses": {
+            "200": {
+                "description": "A stream of job events",
+                "content": {
+                    "text/event-stream": {
+                        "example": (
+                            'event: job\ndata: {"id": "job-123456", "status": "processing"}\n\n'
+                            'id: 1\nevent: message\ndata: {"id": "execution-123456", '
+                            '"message_id": "execution-123456", "content": "Hello"}\n\n'
+                            'id: 2\nevent: status\ndata: {"job_id": "job-123456", '
+                            '"status": "completed", "result": null}\n\n'
+                        )
+                    }
+                },
+            },
+            "404": {
+                "description": "Job not found",
+                "content": {
+                    "application/json": {
+                        "example": {"detail": 'Job with ID "job-123456" not found'}
+                    }
+                },
+            },
+        }
+    },
+)
+async def stream_job_events(
+    job_id: str = Path(..., description="The ID of the chat job to stream"),
+    last_event_id: Optional[str] = Header(
+        None,
+        alias="Last-Event-ID",
+        description="The ID of the last event that the client received",
+    ),
+    job_manager: JobManager = Depends(get_job_manager),
+):
+    """
+    Stream the events of an asynchronous chat job as Server-Sent Events.
+
+    Each "status" and "message" event has an ID, and a client that reconnects with the
+    Last-Event-ID header gets the events after it.  Message events replace the earlier
+    events of the same message, so a reconnecting client gets the latest state of each
+    message.  The server keeps no state for the connection.
+
+    Args:
+        job_id: The ID of the job to stream
+        last_event_id: The ID of the last event that the client received
+        job_manager: The job manager instance
+
+    Returns:
+        A text/event-stream response that ends when the job ends
+
+    Raises:
+        HTTPException: If the job is not found
+    """
+    try:
+        await job_manager.get_job(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f'Job with ID "{job_id}" not found')
+
+    resume_from = None
+    if isinstance(last_event_id, str) and last_event_id.strip().isdigit():
+        resume_from = int(last_event_id)
+
+    return StreamingResponse(
+        _stream_job_events(job_id, job_manager, job_manager.get_job_events(job_id), resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get(
     "/v1/jobs",
     summary="List jobs",
@@ -263,7 +392,7 @@ async def list_jobs(
 async def cancel_job(
     job_id: str = Path(..., description="The ID of the job to cancel"),
     job_manager: JobManager = Depends(get_job_manager),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     """
     Cancel a running or pending job.
@@ -297,7 +426,7 @@ async def cancel_job(
         agent_id = job.agent_id
         if agent_id:
             try:
-                agent_state: AgentState = agent_registry.load_agent_state(agent_id)
+                agent_state: AgentState = await agent_registry.load_agent_state(agent_id)
                 now = datetime.now(timezone.utc)
 
                 # Add to conversation history
@@ -344,7 +473,7 @@ async def cancel_job(
                     agent_state.execution_history = []
                 agent_state.execution_history.append(execution_record)
 
-                agent_registry.save_agent_state(agent_id, agent_state)
+                await agent_registry.save_agent_state(agent_id, agent_state)
                 logger.info(f"Added cancellation history for job {job_id} to agent {agent_id}")
 
             except Exception as e:
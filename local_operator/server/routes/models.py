@@ -5,7 +5,7 @@ This module contains the FastAPI route handlers for model-related endpoints.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
@@ -14,6 +14,7 @@ from local_operator.clients.openrouter import OpenRouterClient
 from local_operator.clients.radient import RadientClient
 from local_operator.credentials import CredentialManager
 from local_operator.env import EnvConfig
+from local_operator.model.catalog import ModelCatalogCache
 from local_operator.model.registry import (
     ProviderDetail,
     RecommendedOpenRouterModelIds,
@@ -29,7 +30,11 @@ from local_operator.model.registry import (
     qwen_models,
     xai_models,
 )
-from local_operator.server.dependencies import get_credential_manager, get_env_config
+from local_operator.server.dependencies import (
+    get_credential_manager,
+    get_env_config,
+    get_model_catalog,
+)
 from local_operator.server.models.schemas import (
     CRUDResponse,
     ModelEntry,
@@ -182,16 +187,21 @@ async def list_models(
     credential_manager: CredentialManager = Depends(get_credential_manager),
     query_params: ModelListQueryParams = Depends(),
     env_config: EnvConfig = Depends(get_env_config),
+    model_catalog: Optional[ModelCatalogCache] = Depends(get_model_catalog),
 ):
     """
     List all available models from all providers.
 
     This endpoint returns models from the registry and also includes OpenRouter models
     if the API key is configured. Results can be filtered by provider and sorted by field.
+    The OpenRouter and Radient catalogs are served from the model catalog cache, which
+    refreshes them in the background when they are stale.
 
     Args:
         credential_manager: Dependency for managing credentials
         query_params: Query parameters for filtering and sorting models
+        env_config: The environment configuration
+        model_catalog: The cache of provider model catalogs, if any
 
     Returns:
         CRUDResponse: A response containing the list of models.
@@ -346,7 +356,11 @@ async def list_models(
                         client = OpenRouterClient(api_key=api_key)
 
                         # Get the list of models
-                        openrouter_models = client.list_models()
+                        openrouter_models = (
+                            model_catalog.get_openrouter_models(client)
+                            if model_catalog
+                            else client.list_models()
+                        )
 
                         # Add OpenRouter models
                         for model in openrouter_models.data:
@@ -400,7 +414,11 @@ async def list_models(
                         )
 
                         # Get the list of models
-                        radient_models = client.list_models()
+                        radient_models = (
+                            model_catalog.get_radient_models(client)
+                            if model_catalog
+                            else client.list_models()
+                        )
 
                         # Add Radient models
                         for model in radient_models.data:
@@ -4,6 +4,7 @@ Schedule management endpoints for the Local Operator API.
 This module contains the FastAPI route handlers for schedule-related endpoints.
 """
 
+import asyncio
 import logging
 from typing import List, Optional
 from uuid import UUID
@@ -12,9 +13,11 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 
-from local_operator.agents import AgentRegistry
 from local_operator.scheduler_service import SchedulerService
-from local_operator.server.dependencies import get_agent_registry, get_scheduler_service
+from local_operator.server.dependencies import (
+    get_async_agent_registry,
+    get_scheduler_service,
+)
 from local_operator.server.models.schemas import (
     CRUDResponse,
     ScheduleCreateRequest,
@@ -22,6 +25,7 @@ from local_operator.server.models.schemas import (
     ScheduleResponse,
     ScheduleUpdateRequest,
 )
+from local_operator.server.utils.async_agent_registry import AsyncAgentRegistry
 from local_operator.types import Schedule as ScheduleModel  # Renaming to avoid conflict
 
 logger = logging.getLogger("local_operator.server.routes.schedules")
@@ -37,21 +41,21 @@ router = APIRouter(tags=["Schedules"])
 async def create_schedule_for_agent(
     agent_id: UUID,
     schedule_data: ScheduleCreateRequest,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     scheduler_service: SchedulerService = Depends(get_scheduler_service),
 ):
     """
     Create a new schedule for a specific agent.
     """
     try:
-        agent_registry.get_agent(str(agent_id))
+        await agent_registry.get_agent(str(agent_id))
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
     try:
         new_schedule_model = ScheduleModel(agent_id=agent_id, **schedule_data.model_dump())
-        agent_state = agent_registry.load_agent_state(str(agent_id))
+        agent_state = await agent_registry.load_agent_state(str(agent_id))
         agent_state.schedules.append(new_schedule_model)
-        agent_registry.save_agent_state(str(agent_id), agent_state)
+        await agent_registry.save_agent_state(str(agent_id), agent_state)
         if new_schedule_model.is_active:
             scheduler_service.add_or_update_job(new_schedule_model)
         response = CRUDResponse(
@@ -75,16 +79,18 @@ async def create_schedule_for_agent(
 async def list_all_schedules(
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Number of schedules per page"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     """
     Retrieve a paginated list of all schedules across all agents.
     """
     all_schedules: List[ScheduleModel] = []
     try:
-        agents = agent_registry.list_agents()
-        for agent_data in agents:
-            agent_state = agent_registry.load_agent_state(agent_data.id)
+        agents = await agent_registry.list_agents()
+        agent_states = await asyncio.gather(
+            *(agent_registry.load_agent_state(agent_data.id) for agent_data in agents)
+        )
+        for agent_state in agent_states:
             all_schedules.extend(agent_state.schedules)
         all_schedules.sort(key=lambda s: s.created_at, reverse=True)
         total = len(all_schedules)
@@ -120,17 +126,17 @@ async def list_schedules_for_agent(
     agent_id: UUID,
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(10, ge=1, le=100, description="Number of schedules per page"),
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     """
     Retrieve a paginated list of schedules for a specific agent.
     """
     try:
-        agent_registry.get_agent(str(agent_id))
+        await agent_registry.get_agent(str(agent_id))
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Agent with ID {agent_id} not found")
     try:
-        agent_state = agent_registry.load_agent_state(str(agent_id))
+        agent_state = await agent_registry.load_agent_state(str(agent_id))
         agent_schedules = sorted(agent_state.schedules, key=lambda s: s.created_at, reverse=True)
         total = len(agent_schedules)
         start_idx = (page - 1) * per_page
@@ -163,15 +169,15 @@ async def list_schedules_for_agent(
 )
 async def get_schedule_by_id(
     schedule_id: UUID,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
 ):
     """
     Retrieve a single schedule by its ID.
     """
     try:
-        agents = agent_registry.list_agents()
+        agents = await agent_registry.list_agents()
         for agent_data in agents:
-            agent_state = agent_registry.load_agent_state(agent_data.id)
+            agent_state = await agent_registry.load_agent_state(agent_data.id)
             for schedule in agent_state.schedules:
                 if schedule.id == schedule_id:
                     response = CRUDResponse(
@@ -196,25 +202,25 @@ async def get_schedule_by_id(
 async def edit_schedule(
     schedule_id: UUID,
     schedule_data: ScheduleUpdateRequest,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     scheduler_service: SchedulerService = Depends(get_scheduler_service),
 ):
     """
     Edit an existing schedule by its ID.
     """
     try:
-        agents = agent_registry.list_agents()
+        agents = await agent_registry.list_agents()
         schedule_found = False
         updated_schedule_model: Optional[ScheduleModel] = None
 
         for agent_data in agents:
-            agent_state = agent_registry.load_agent_state(agent_data.id)
+            agent_state = await agent_registry.load_agent_state(agent_data.id)
             for i, existing_schedule in enumerate(agent_state.schedules):
                 if existing_schedule.id == schedule_id:
                     update_data = schedule_data.model_dump(exclude_unset=True)
                     updated_schedule_model = existing_schedule.model_copy(update=update_data)
                     agent_state.schedules[i] = updated_schedule_model
-                    agent_registry.save_agent_state(agent_data.id, agent_state)
+                    await agent_registry.save_agent_state(agent_data.id, agent_state)
                     schedule_found = True
                     break
             if schedule_found:
@@ -250,23 +256,23 @@ async def edit_schedule(
 )
 async def remove_schedule(
     schedule_id: UUID,
-    agent_registry: AgentRegistry = Depends(get_agent_registry),
+    agent_registry: AsyncAgentRegistry = Depends(get_async_agent_registry),
     scheduler_service: SchedulerService = Depends(get_scheduler_service),
 ):
     """
     Remove a schedule by its ID.
     """
     try:
-        agents = agent_registry.list_agents()
+        agents = await agent_registry.list_agents()
         schedule_found_and_removed = False
 
         for agent_data in agents:
-            agent_state = agent_registry.load_agent_state(agent_data.id)
+            agent_state = await agent_registry.load_agent_state(agent_data.id)
             original_len = len(agent_state.schedules)
             agent_state.schedules = [s for s in agent_state.schedules if s.id != schedule_id]
 
             if len(agent_state.schedules) < original_len:
-                agent_registry.save_agent_state(agent_data.id, agent_state)
+                await agent_registry.save_agent_state(agent_data.id, agent_state)
                 scheduler_service.remove_job(schedule_id)
                 schedule_found_and_removed = True
                 break
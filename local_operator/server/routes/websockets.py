@@ -6,8 +6,9 @@ This module contains the FastAPI route handlers for WebSocket-related endpoints.
 
 import json
 import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
 
 from local_operator.server.dependencies import get_websocket_manager_ws
 from local_operator.server.models.schemas import WebsocketConnectionType
@@ -22,6 +23,17 @@ async def websocket_message_endpoint(
     websocket: WebSocket,
     message_id: str,
     websocket_manager: WebSocketManager = Depends(get_websocket_manager_ws),
+    encoding: Optional[str] = Query(
+        None,
+        description="Encoding of the message updates: json, msgpack or cbor. "
+        "Binary encodings are sent as binary frames when they are available on the server, "
+        "and JSON is used otherwise.",
+    ),
+    resume_from: Optional[int] = Query(
+        None,
+        description="Sequence number of the last update that the client received, to replay "
+        "the updates that it missed while it was disconnected.",
+    ),
 ):
     """
     WebSocket endpoint for subscribing to message updates for a specific message ID.
@@ -30,6 +42,10 @@ async def websocket_message_endpoint(
         websocket (WebSocket): The WebSocket connection.
         message_id (str): The message ID to subscribe to.
         websocket_manager (WebSocketManager): The WebSocket manager.
+        encoding (str, optional): The encoding of the message updates that the client
+            asks for, the connection confirmation reports the encoding that is used.
+        resume_from (int, optional): The sequence number of the last update that the
+            client received before it reconnected.
     """
     connection_established = False
     connection_accepted = False
@@ -41,6 +57,8 @@ async def websocket_message_endpoint(
 
         # Then register the connection with the WebSocket manager
         try:
+            if isinstance(encoding, str):
+                websocket_manager.set_encoding(websocket, encoding)
             connection_established = await websocket_manager.connect(
                 websocket, message_id, WebsocketConnectionType.MESSAGE
             )
@@ -68,6 +86,11 @@ async def websocket_message_endpoint(
 
         logger.info(f"WebSocket connection established for message ID: {message_id}")
 
+        if isinstance(resume_from, int):
+            websocket_manager.replay(
+                websocket, message_id, resume_from, WebsocketConnectionType.MESSAGE
+            )
+
         # Main message processing loop
         while True:
             try:
@@ -97,6 +120,15 @@ async def websocket_message_endpoint(
                                 await websocket_manager.subscribe(
                                     websocket, subscribe_message_id, connection_type
                                 )
+                                # Clients that reconnect resume from the last update they got
+                                subscribe_resume_from = message.get("resume_from")
+                                if isinstance(subscribe_resume_from, int):
+                                    websocket_manager.replay(
+                                        websocket,
+                                        subscribe_message_id,
+                                        subscribe_resume_from,
+                                        connection_type,
+                                    )
                             except Exception as e:
                                 logger.error(f"Error subscribing to {subscribe_message_id}: {e}")
                                 # Don't break the loop for subscription errors
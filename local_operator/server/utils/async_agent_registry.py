@@ -0,0 +1,357 @@
+"""
+Asynchronous access to the agent registry for the Local Operator API.
+
+The AgentRegistry reads and writes YAML, JSONL and pickle files, and scans the agents
+directory when it refreshes, all synchronously.  Route handlers run on the event loop, so
+they reach the registry through the AsyncAgentRegistry in this module, which runs every
+call in a bounded pool of worker threads.  A large conversation being loaded then only
+occupies a worker, and WebSocket clients and other requests keep being served.
+
+Calls for the same agent are ordered by a read/write lock of the agent: any number of
+reads run together, and a write waits for them and runs alone.  Calls that add or remove
+agents change the agents of the whole registry, such as the name check and the in-memory
+agents that any call may refresh from disk, so they hold a lock of the registry
+exclusively, while every other call holds it shared.  The locks are held until the call
+ends in its worker, even if the request that made it was cancelled.
+"""
+
+import asyncio
+import functools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from local_operator.agents import (
+    AgentData,
+    AgentEditFields,
+    AgentRegistry,
+    AgentState,
+    CodeExecutionResult,
+    ConversationRecord,
+)
+from local_operator.clients.radient import RadientClient
+
+T = TypeVar("T")
+
+DEFAULT_MAX_WORKERS = 4
+"""The number of worker threads that run agent registry calls."""
+
+
+class ReadWriteLock:
+    """
+    An asyncio lock that is shared by readers and exclusive for writers.
+
+    Waiters are served in the order that they arrived, so a waiting writer is not starved
+    by readers that arrive after it.  Unlike asyncio.Lock, releasing does not need to be
+    awaited, so the lock can be released from a callback.
+    """
+
+    def __init__(self) -> None:
+        self._readers = 0
+        self._writing = False
+        self._waiters: Deque[Tuple[bool, asyncio.Future[None]]] = deque()
+
+    @property
+    def idle(self) -> bool:
+        """Whether the lock is neither held nor waited for."""
+        return not self._readers and not self._writing and not self._waiters
+
+    def _can_acquire(self, write: bool) -> bool:
+        return not self._writing and (not write or not self._readers)
+
+    def _take(self, write: bool) -> None:
+        if write:
+            self._writing = True
+        else:
+            self._readers += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            write, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not self._can_acquire(write):
+                break
+            self._waiters.popleft()
+            self._take(write)
+            future.set_result(None)
+
+    async def acquire(self, write: bool) -> None:
+        """
+        Acquire the lock.
+
+        Args:
+            write (bool): Whether to acquire the lock exclusively, for a write.
+        """
+        if not self._waiters and self._can_acquire(write):
+            self._take(write)
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append((write, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The lock was granted just before the cancellation
+                self.release(write)
+            else:
+                self._wake()
+            raise
+
+    def release(self, write: bool) -> None:
+        """
+        Release the lock.
+
+        Args:
+            write (bool): Whether the lock was acquired for a write.
+        """
+        if write:
+            self._writing = False
+        else:
+            self._readers -= 1
+        self._wake()
+
+
+class AsyncAgentRegistry:
+    """
+    Awaitable access to an AgentRegistry that keeps its disk work off the event loop.
+
+    Attributes:
+        registry (AgentRegistry): The registry that the calls are made on.
+    """
+
+    def __init__(self, registry: AgentRegistry, max_workers: int = DEFAULT_MAX_WORKERS):
+        """
+        Initialize the facade.
+
+        Args:
+            registry (AgentRegistry): The registry to make the calls on.
+            max_workers (int): The number of worker threads that run the calls.
+        """
+        self.registry = registry
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="agent-registry"
+        )
+        self._locks: Dict[str, ReadWriteLock] = {}
+        self._registry_lock = ReadWriteLock()
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        agent_id: Optional[str] = None,
+        write: bool = False,
+        registry_write: bool = False,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Run a blocking function in a worker thread.
+
+        Args:
+            func (Callable[..., T]): The function to run.
+            *args (Any): The positional arguments of the function.
+            agent_id (Optional[str]): The agent whose lock to hold while the function runs,
+                or None to hold only the registry lock.  It is not passed to the function.
+            write (bool): Whether the function changes the agent, and needs the lock of the
+                agent exclusively.
+            registry_write (bool): Whether the function adds or removes agents, and needs
+                the lock of the registry exclusively.
+            **kwargs (Any): The keyword arguments of the function.
+
+        Returns:
+            T: The return value of the function.
+        """
+        call = functools.partial(func, *args, **kwargs)
+
+        # The registry lock is always taken before the lock of an agent, so that the calls
+        # can not wait for each other in a cycle
+        await self._registry_lock.acquire(registry_write)
+        lock: Optional[ReadWriteLock] = None
+        if agent_id is not None:
+            lock = self._locks.get(agent_id)
+            if lock is None:
+                lock = self._locks[agent_id] = ReadWriteLock()
+            try:
+                await lock.acquire(write)
+            except BaseException:
+                self._registry_lock.release(registry_write)
+                if lock.idle and self._locks.get(agent_id) is lock:
+                    del self._locks[agent_id]
+                raise
+
+        loop = asyncio.get_running_loop()
+        release = functools.partial(self._release, agent_id, lock, write, registry_write)
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            release()
+            raise
+
+        def release_when_done(_: "Future[T]") -> None:
+            try:
+                loop.call_soon_threadsafe(release)
+            except RuntimeError:
+                # The event loop was closed, and nothing waits for the lock anymore
+                pass
+
+        future.add_done_callback(release_when_done)
+        return await asyncio.wrap_future(future)
+
+    def _release(
+        self,
+        agent_id: Optional[str],
+        lock: Optional[ReadWriteLock],
+        write: bool,
+        registry_write: bool,
+    ) -> None:
+        if agent_id is not None and lock is not None:
+            lock.release(write)
+            if lock.idle and self._locks.get(agent_id) is lock:
+                del self._locks[agent_id]
+        self._registry_lock.release(registry_write)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads once the calls that were made have ended."""
+        self._executor.shutdown(wait=False)
+
+    async def list_agents(self) -> List[AgentData]:
+        """List the metadata of all agents."""
+        return await self.run(self.registry.list_agents)
+
+    async def create_agent(self, agent_edit_metadata: AgentEditFields) -> AgentData:
+        """Create an agent, see AgentRegistry.create_agent."""
+        return await self.run(self.registry.create_agent, agent_edit_metadata, registry_write=True)
+
+    async def get_agent(self, agent_id: str) -> AgentData:
+        """Get the metadata of an agent, see AgentRegistry.get_agent."""
+        return await self.run(self.registry.get_agent, agent_id, agent_id=agent_id)
+
+    async def update_agent(self, agent_id: str, updated_metadata: AgentEditFields) -> AgentData:
+        """Update the metadata of an agent, see AgentRegistry.update_agent."""
+        return await self.run(
+            self.registry.update_agent, agent_id, updated_metadata, agent_id=agent_id, write=True
+        )
+
+    async def delete_agent(self, agent_id: str) -> None:
+        """Delete an agent, see AgentRegistry.delete_agent."""
+        await self.run(
+            self.registry.delete_agent,
+            agent_id,
+            agent_id=agent_id,
+            write=True,
+            registry_write=True,
+        )
+
+    async def import_agent(self, zip_path: Path) -> AgentData:
+        """Import an agent from a ZIP file, see AgentRegistry.import_agent."""
+        return await self.run(self.registry.import_agent, zip_path, registry_write=True)
+
+    async def export_agent(self, agent_id: str) -> Tuple[Path, str]:
+        """Export an agent to a ZIP file, see AgentRegistry.export_agent."""
+        return await self.run(self.registry.export_agent, agent_id, agent_id=agent_id)
+
+    async def upload_agent_to_radient(
+        self, radient_client: RadientClient, agent_id: Optional[str], zip_path: Path
+    ) -> Optional[str]:
+        """Upload an exported agent to Radient, see AgentRegistry.upload_agent_to_radient."""
+        return await self.run(
+            self.registry.upload_agent_to_radient, radient_client, agent_id, zip_path
+        )
+
+    async def download_agent_from_radient(
+        self, radient_client: RadientClient, agent_id: str
+    ) -> AgentData:
+        """Import an agent from Radient, see AgentRegistry.download_agent_from_radient."""
+        return await self.run(
+            self.registry.download_agent_from_radient,
+            radient_client,
+            agent_id,
+            registry_write=True,
+        )
+
+    async def load_agent_state(self, agent_id: str) -> AgentState:
+        """Load the state of an agent, see AgentRegistry.load_agent_state."""
+        return await self.run(self.registry.load_agent_state, agent_id, agent_id=agent_id)
+
+    async def save_agent_state(self, agent_id: str, agent_state: AgentState) -> None:
+        """Save the state of an agent, see AgentRegistry.save_agent_state."""
+        await self.run(
+            self.registry.save_agent_state, agent_id, agent_state, agent_id=agent_id, write=True
+        )
+
+    async def get_agent_conversation_history(self, agent_id: str) -> List[ConversationRecord]:
+        """Get the conversation of an agent, see
+        AgentRegistry.get_agent_conversation_history."""
+        return await self.run(
+            self.registry.get_agent_conversation_history, agent_id, agent_id=agent_id
+        )
+
+    async def get_agent_execution_history(self, agent_id: str) -> List[CodeExecutionResult]:
+        """Get the executions of an agent, see AgentRegistry.get_agent_execution_history."""
+        return await self.run(
+            self.registry.get_agent_execution_history, agent_id, agent_id=agent_id
+        )
+
+    async def load_agent_context(self, agent_id: str) -> Any:
+        """Load the context of an agent, see AgentRegistry.load_agent_context."""
+        return await self.run(self.registry.load_agent_context, agent_id, agent_id=agent_id)
+
+    async def save_agent_context(self, agent_id: str, context: Any) -> None:
+        """Save the context of an agent, see AgentRegistry.save_agent_context."""
+        await self.run(
+            self.registry.save_agent_context, agent_id, context, agent_id=agent_id, write=True
+        )
+
+    async def get_agent_system_prompt(self, agent_id: str) -> str:
+        """Get the system prompt of an agent, see AgentRegistry.get_agent_system_prompt."""
+        return await self.run(self.registry.get_agent_system_prompt, agent_id, agent_id=agent_id)
+
+    async def set_agent_system_prompt(self, agent_id: str, system_prompt: str) -> None:
+        """Set the system prompt of an agent, see AgentRegistry.set_agent_system_prompt."""
+        await self.run(
+            self.registry.set_agent_system_prompt,
+            agent_id,
+            system_prompt,
+            agent_id=agent_id,
+            write=True,
+        )
+
+    async def get_context_variable(self, agent_id: str, variable_key: str) -> Any:
+        """Get a context variable of an agent, see AgentRegistry.get_context_variable."""
+        return await self.run(
+            self.registry.get_context_variable, agent_id, variable_key, agent_id=agent_id
+        )
+
+    async def create_context_variable(self, agent_id: str, key: str, value: Any) -> Dict[str, Any]:
+        """Create a context variable of an agent, see
+        AgentRegistry.create_context_variable."""
+        return await self.run(
+            self.registry.create_context_variable,
+            agent_id,
+            key,
+            value,
+            agent_id=agent_id,
+            write=True,
+        )
+
+    async def update_context_variable(self, agent_id: str, key: str, value: Any) -> Dict[str, Any]:
+        """Update a context variable of an agent, see
+        AgentRegistry.update_context_variable."""
+        return await self.run(
+            self.registry.update_context_variable,
+            agent_id,
+            key,
+            value,
+            agent_id=agent_id,
+            write=True,
+        )
+
+    async def delete_context_variable(self, agent_id: str, key: str) -> Dict[str, Any]:
+        """Delete a context variable of an agent, see
+        AgentRegistry.delete_context_variable."""
+        return await self.run(
+            self.registry.delete_context_variable, agent_id, key, agent_id=agent_id, write=True
+        )
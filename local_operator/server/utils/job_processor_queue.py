@@ -348,7 +348,18 @@ def create_and_start_job_process_with_queue(
                                 # Message update: (type, job_id, message)
                                 _, received_job_id, message = message
 
+                                job_manager.publish_message_update(
+                                    current_job_id, received_job_id, message.model_dump_json()
+                                )
                                 await websocket_manager.broadcast_update(received_job_id, message)
+                            elif msg_type == "message_frame" and len(message) == 3:
+                                # Serialized message update: (type, message_id, frame)
+                                _, received_job_id, frame = message
+
+                                job_manager.publish_message_update(
+                                    current_job_id, received_job_id, frame.text
+                                )
+                                await websocket_manager.broadcast_frame(received_job_id, frame)
                             elif msg_type == "schedule_add" and len(message) == 2:
                                 # Schedule add message: (type, schedule)
                                 _, schedule = message
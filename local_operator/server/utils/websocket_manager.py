@@ -3,19 +3,244 @@ WebSocket manager for the Local Operator API.
 
 This module provides a WebSocketManager class for managing WebSocket connections
 and broadcasting updates to connected clients.
+
+Each connection has a bounded queue of outgoing frames that a writer task of its own
+sends, so that broadcasting only puts frames in queues and a slow client does not hold up
+the other clients or the caller.  An update of a message that is still waiting in a queue
+is replaced by the newer update of the same message, since every update carries the full
+state of the message.  A client whose queue overflows anyway is disconnected, and has to
+reconnect to catch up.
+
+Updates are serialized once for all subscribers, and clients that negotiated a binary
+encoding get the updates as binary frames in that encoding.  Confirmations and other
+control messages are always JSON text frames.
+
+The updates of each message are numbered, and the latest update of recent messages is
+kept in a replay buffer, so that a client that reconnects can resume from the last update
+that it received instead of fetching the whole job again.  Since the latest update carries
+the full state, it is all that a client that missed any updates needs.  Sequence numbers
+can skip updates that were replaced by a newer update before they were sent.
 """
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional, Set
-
-from fastapi import WebSocket, WebSocketDisconnect
-
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+from pydantic import BaseModel
+
+from local_operator.frames import (
+    EncodedFrame,
+    FrameEncoding,
+    encode_message_update,
+    negotiate_encoding,
+)
 from local_operator.server.models.schemas import WebsocketConnectionType
 from local_operator.types import CodeExecutionResult
 
 logger = logging.getLogger("local_operator.server.utils.websocket_manager")
 
+DEFAULT_SEND_QUEUE_SIZE = 256
+"""The maximum number of frames that wait to be sent to a connection."""
+
+DEFAULT_REPLAY_BUFFER_MESSAGES = 1024
+"""The number of messages whose latest frame is kept, the least recently updated messages
+are forgotten first."""
+
+
+class WebSocketMetrics(BaseModel):
+    """Counters of the frames that the WebSocket manager sent and dropped.
+
+    Attributes:
+        sent_frames (int): Number of frames sent to clients.
+        superseded_frames (int): Number of queued updates that were replaced by a newer
+            update of the same message before they were sent.
+        dropped_frames (int): Number of frames that were not sent because the connection
+            was too slow or failed.
+        slow_consumer_disconnects (int): Number of connections that were closed because
+            their send queue overflowed.
+        replayed_frames (int): Number of frames sent again to clients that resumed.
+    """
+
+    sent_frames: int = 0
+    superseded_frames: int = 0
+    dropped_frames: int = 0
+    slow_consumer_disconnects: int = 0
+    replayed_frames: int = 0
+
+
+class ReplayBuffer:
+    """The sequence number and the latest frame of the updates of one message.
+
+    Every update carries the full state of the message, so the latest frame brings a
+    client up to date however many updates it missed, and older frames are not kept.
+
+    Attributes:
+        last_sequence (int): The sequence number of the latest update, 0 before the first.
+        frame (EncodedFrame | None): The latest update, with its sequence number.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty buffer."""
+        self.last_sequence = 0
+        self.frame: Optional[EncodedFrame] = None
+
+    def append(self, frame: EncodedFrame) -> EncodedFrame:
+        """Number an update and keep it in place of the previous one.
+
+        Args:
+            frame (EncodedFrame): The update.
+
+        Returns:
+            EncodedFrame: The update with its sequence number.
+        """
+        self.last_sequence += 1
+        self.frame = frame.with_sequence(self.last_sequence)
+        return self.frame
+
+    def since(self, sequence: int) -> Tuple[List[EncodedFrame], bool]:
+        """Get the update that brings a client up to date from a sequence number.
+
+        Args:
+            sequence (int): The sequence number of the last update that the client has.
+
+        Returns:
+            Tuple[List[EncodedFrame], bool]: The latest update if the client missed any,
+                and whether the client is up to date with it, which it is not if the
+                sequence number is ahead of the updates that were numbered here.
+        """
+        if sequence > self.last_sequence:
+            return [], False
+        if sequence == self.last_sequence or self.frame is None:
+            return [], True
+        return [self.frame], True
+
+
+class ConnectionSender:
+    """Sends the queued frames of one WebSocket in order, in a writer task of its own.
+
+    Frames with a key replace a queued frame with the same key in place, frames without
+    a key are always queued.  Text frames are sent as text, bytes as binary frames.
+
+    Attributes:
+        websocket (WebSocket): The WebSocket that the frames are sent to.
+        max_queue_size (int): The maximum number of queued frames.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue_size: int,
+        on_sent: Callable[[], None],
+        on_error: Callable[[WebSocket, Exception], None],
+    ):
+        """Initialize the sender, the writer task is started with the first frame.
+
+        Args:
+            websocket (WebSocket): The WebSocket that the frames are sent to.
+            max_queue_size (int): The maximum number of queued frames.
+            on_sent (Callable[[], None]): Called after each frame that was sent.
+            on_error (Callable[[WebSocket, Exception], None]): Called when a frame can not
+                be sent, after which the writer task stops.
+        """
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self._on_sent = on_sent
+        self._on_error = on_error
+        self._order: Deque[Hashable] = deque()
+        self._frames: Dict[Hashable, Union[str, bytes]] = {}
+        self._ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def depth(self) -> int:
+        """The number of frames waiting to be sent."""
+        return len(self._order)
+
+    def enqueue(self, frame: Union[str, bytes], key: Optional[Hashable] = None) -> Optional[bool]:
+        """Queue a frame to be sent.
+
+        Args:
+            frame (str | bytes): The text or bytes of the frame.
+            key (Optional[Hashable]): The key of the frame, a queued frame with the same key
+                is replaced instead of queueing another frame.
+
+        Returns:
+            bool | None: True if the frame was queued, False if it replaced a queued frame,
+                or None if the queue is full.
+        """
+        if key is not None and key in self._frames:
+            self._frames[key] = frame
+            return False
+        if len(self._order) >= self.max_queue_size:
+            return None
+
+        if key is None:
+            key = object()
+        self._order.append(key)
+        self._frames[key] = frame
+        self._idle.clear()
+        self._ready.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await self._ready.wait()
+            while self._order:
+                frame = self._frames.pop(self._order.popleft())
+                try:
+                    if isinstance(frame, bytes):
+                        await self.websocket.send_bytes(frame)
+                    else:
+                        await self.websocket.send_text(frame)
+                except Exception as e:
+                    self._on_error(self.websocket, e)
+                    return
+                self._on_sent()
+            self._ready.clear()
+            self._idle.set()
+
+    async def drain(self) -> None:
+        """Wait until the queued frames were sent, or the writer task stopped."""
+        if self._idle.is_set() or self._task is None or self._task.done():
+            return
+        idle = asyncio.ensure_future(self._idle.wait())
+        try:
+            await asyncio.wait([idle, self._task], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            idle.cancel()
+
+    def close(self) -> int:
+        """Stop the writer task and discard the queued frames.
+
+        Returns:
+            int: The number of frames that were discarded.
+        """
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        discarded = len(self._order)
+        self._order.clear()
+        self._frames.clear()
+        self._idle.set()
+        return discarded
+
 
 class WebSocketManager:
     """
@@ -30,16 +255,223 @@ class WebSocketManager:
         connection_subscriptions (Dict[WebSocket, Dict[WebsocketConnectionType, Set[str]]]):
             Maps WebSockets to connection types to a set of message IDs they are
             subscribed to.
+        senders (Dict[WebSocket, ConnectionSender]): The send queue and writer task of
+            each WebSocket.
+        encodings (Dict[WebSocket, FrameEncoding]): The encoding of the updates sent to
+            each WebSocket that negotiated one other than JSON.
+        max_queue_size (int): The maximum number of frames that wait to be sent to a
+            WebSocket before it is disconnected as a slow consumer.
+        replay_buffers (OrderedDict[Tuple[WebsocketConnectionType, str], ReplayBuffer]):
+            The sequence numbers and latest frames of recently updated messages, least
+            recently updated first.
+        replay_buffer_messages (int): The number of messages whose latest frame is kept.
+        metrics (WebSocketMetrics): Counters of the frames sent and dropped.
     """
 
-    def __init__(self):
-        """Initialize the WebSocketManager."""
+    def __init__(
+        self,
+        max_queue_size: int = DEFAULT_SEND_QUEUE_SIZE,
+        replay_buffer_messages: int = DEFAULT_REPLAY_BUFFER_MESSAGES,
+    ):
+        """Initialize the WebSocketManager.
+
+        Args:
+            max_queue_size (int): The maximum number of frames that wait to be sent to a
+                WebSocket before it is disconnected as a slow consumer.
+            replay_buffer_messages (int): The number of messages whose latest frame is
+                kept for clients that resume.
+        """
         # Maps connection types to message IDs to a set of connected WebSockets
         self.connections: Dict[WebsocketConnectionType, Dict[str, Set[WebSocket]]] = {
             conn_type: {} for conn_type in WebsocketConnectionType
         }
         # Maps WebSockets to connection types to a set of message IDs they are subscribed to
         self.connection_subscriptions: Dict[WebSocket, Dict[WebsocketConnectionType, Set[str]]] = {}
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.encodings: Dict[WebSocket, FrameEncoding] = {}
+        self.max_queue_size = max_queue_size
+        self.replay_buffers: OrderedDict[Tuple[WebsocketConnectionType, str], ReplayBuffer] = (
+            OrderedDict()
+        )
+        self.replay_buffer_messages = replay_buffer_messages
+        self.metrics = WebSocketMetrics()
+        # Disconnects of slow or failed connections that were started from a broadcast
+        self._disconnect_tasks: Set[asyncio.Task[None]] = set()
+
+    def _get_sender(self, websocket: WebSocket) -> ConnectionSender:
+        """Get the sender of a WebSocket, creating it on first use."""
+        sender = self.senders.get(websocket)
+        if sender is None:
+            sender = ConnectionSender(
+                websocket, self.max_queue_size, self._record_sent_frame, self._handle_send_error
+            )
+            self.senders[websocket] = sender
+        return sender
+
+    def _record_sent_frame(self) -> None:
+        self.metrics.sent_frames += 1
+
+    def _handle_send_error(self, websocket: WebSocket, error: Exception) -> None:
+        logger.warning(f"Failed to send message to WebSocket: {error}")
+        self.metrics.dropped_frames += 1
+        self._schedule_disconnect(websocket)
+
+    def _schedule_disconnect(
+        self, websocket: WebSocket, code: int = status.WS_1000_NORMAL_CLOSURE
+    ) -> None:
+        """Stop tracking a WebSocket right away and close it in the background."""
+        self._remove_connection_tracking(websocket)
+        self.metrics.dropped_frames += self._close_sender(websocket)
+        task = asyncio.create_task(self.disconnect(websocket, code))
+        self._disconnect_tasks.add(task)
+        task.add_done_callback(self._disconnect_tasks.discard)
+
+    def _close_sender(self, websocket: WebSocket) -> int:
+        """Stop the writer task of a WebSocket and return the number of discarded frames."""
+        sender = self.senders.pop(websocket, None)
+        return sender.close() if sender is not None else 0
+
+    def enqueue(self, websocket: WebSocket, data: Dict[str, Any]) -> None:
+        """
+        Queue a message to be sent to a WebSocket after the messages already queued.
+
+        Args:
+            websocket (WebSocket): The WebSocket to send to.
+            data (Dict[str, Any]): The message, which is sent as JSON.
+        """
+        if self._get_sender(websocket).enqueue(json.dumps(data)) is None:
+            self._disconnect_slow_consumer(websocket)
+
+    def _disconnect_slow_consumer(self, websocket: WebSocket) -> None:
+        logger.warning(
+            f"Disconnecting slow WebSocket client with {self.max_queue_size} queued messages"
+        )
+        self.metrics.dropped_frames += 1
+        self.metrics.slow_consumer_disconnects += 1
+        self._schedule_disconnect(websocket, status.WS_1013_TRY_AGAIN_LATER)
+
+    def set_encoding(self, websocket: WebSocket, requested: Optional[str]) -> FrameEncoding:
+        """
+        Set the encoding of the updates sent to a WebSocket.
+
+        Args:
+            websocket (WebSocket): The WebSocket.
+            requested (str, optional): The encoding that the client asked for.
+
+        Returns:
+            FrameEncoding: The requested encoding if it is available, otherwise JSON.
+        """
+        encoding = negotiate_encoding(requested)
+        if encoding == FrameEncoding.JSON:
+            self.encodings.pop(websocket, None)
+        else:
+            self.encodings[websocket] = encoding
+        return encoding
+
+    def _get_replay_buffer(
+        self, message_id: str, connection_type: WebsocketConnectionType
+    ) -> ReplayBuffer:
+        """Get the replay buffer of a message, creating it and forgetting the least
+        recently updated message if there are too many."""
+        key = (connection_type, message_id)
+        buffer = self.replay_buffers.get(key)
+        if buffer is None:
+            buffer = ReplayBuffer()
+            self.replay_buffers[key] = buffer
+            if len(self.replay_buffers) > self.replay_buffer_messages:
+                self.replay_buffers.popitem(last=False)
+        else:
+            self.replay_buffers.move_to_end(key)
+        return buffer
+
+    def replay(
+        self,
+        websocket: WebSocket,
+        message_id: str,
+        resume_from: int,
+        connection_type: WebsocketConnectionType = WebsocketConnectionType.MESSAGE,
+    ) -> bool:
+        """
+        Queue the updates of a message that a client missed, for a client that resumes.
+
+        A "resume" message is queued first, with the number of updates that follow and
+        whether they bring the client up to date.  If they do not, the client has to fetch
+        the full state of the message instead.
+
+        Args:
+            websocket (WebSocket): The WebSocket of the client.
+            message_id (str): The message ID to resume.
+            resume_from (int): The sequence number of the last update that the client
+                received, 0 if it received none.
+            connection_type (WebsocketConnectionType): The type of connection to resume.
+                Defaults to WebsocketConnectionType.MESSAGE.
+
+        Returns:
+            bool: Whether the updates that bring the client up to date were queued.
+        """
+        buffer = self.replay_buffers.get((connection_type, message_id))
+        if buffer is not None:
+            frames, complete = buffer.since(resume_from)
+        else:
+            # Nothing was broadcast for the message, or it was forgotten
+            frames, complete = [], resume_from <= 0
+
+        self.enqueue(
+            websocket,
+            {
+                "type": "resume",
+                "message_id": message_id,
+                "connection_type": connection_type.value,
+                "status": "complete" if complete else "incomplete",
+                "resume_from": resume_from,
+                "frames": len(frames),
+            },
+        )
+        encoding = self.encodings.get(websocket, FrameEncoding.JSON)
+        sender = self._get_sender(websocket)
+        for frame in frames:
+            if sender.enqueue(frame.encode(encoding)) is None:
+                self._disconnect_slow_consumer(websocket)
+                return False
+        self.metrics.replayed_frames += len(frames)
+        return complete
+
+    def get_metrics(self) -> Dict[str, int]:
+        """
+        Get the counters of the frames sent and dropped, and the current queue depths.
+
+        Returns:
+            Dict[str, int]: The metrics, with the number of queued frames over all
+                connections as "queue_depth" and in the longest queue as "max_queue_depth".
+        """
+        depths = [sender.depth for sender in self.senders.values()]
+        return {
+            **self.metrics.model_dump(),
+            "connections": len(self.connection_subscriptions),
+            "queue_depth": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+        }
+
+    async def drain(self, websocket: Optional[WebSocket] = None) -> None:
+        """
+        Wait until the queued messages were sent.
+
+        Args:
+            websocket (WebSocket, optional): The WebSocket to wait for, or None to wait for
+                all WebSockets.
+        """
+        if websocket is not None:
+            senders = [self.senders[websocket]] if websocket in self.senders else []
+        else:
+            senders = list(self.senders.values())
+        await asyncio.gather(*(sender.drain() for sender in senders))
+
+    async def shutdown(self) -> None:
+        """Stop the writer tasks of all WebSockets and wait for pending disconnects."""
+        for websocket in list(self.senders):
+            self._close_sender(websocket)
+        if self._disconnect_tasks:
+            await asyncio.gather(*self._disconnect_tasks, return_exceptions=True)
 
     async def connect(
         self,
@@ -92,6 +524,7 @@ class WebSocketManager:
                                 "message_id": message_id,
                                 "connection_type": connection_type.value,
                                 "status": "connected",
+                                "encoding": self.encodings.get(websocket, FrameEncoding.JSON).value,
                             }
                         )
                     )
@@ -205,17 +638,22 @@ class WebSocketManager:
         except Exception as e:
             logger.error(f"Error removing WebSocket from tracking: {e}")
 
-    async def disconnect(self, websocket: WebSocket) -> None:
+    async def disconnect(
+        self, websocket: WebSocket, code: int = status.WS_1000_NORMAL_CLOSURE
+    ) -> None:
         """
-        Disconnect a WebSocket.
+        Disconnect a WebSocket, discarding the messages that are still queued for it.
 
         Args:
             websocket (WebSocket): The WebSocket to disconnect.
+            code (int): The close code to send to the client.
         """
+        self.metrics.dropped_frames += self._close_sender(websocket)
+        self.encodings.pop(websocket, None)
         try:
             # Try to close the WebSocket if it's still open
             try:
-                await websocket.close()
+                await websocket.close(code)
             except Exception as e:
                 # It's okay if this fails, the client might already be disconnected
                 logger.debug(f"Error closing WebSocket during disconnect: {e}")
@@ -254,17 +692,16 @@ class WebSocketManager:
                 }
             self.connection_subscriptions[websocket][connection_type].add(message_id)
 
-            # Send a subscription confirmation message
+            # Queue a subscription confirmation message, which is sent before the updates
             try:
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "subscription",
-                            "message_id": message_id,
-                            "connection_type": connection_type.value,
-                            "status": "subscribed",
-                        }
-                    )
+                self.enqueue(
+                    websocket,
+                    {
+                        "type": "subscription",
+                        "message_id": message_id,
+                        "connection_type": connection_type.value,
+                        "status": "subscribed",
+                    },
                 )
             except Exception as e:
                 logger.warning(f"Failed to send subscription confirmation: {e}")
@@ -307,17 +744,16 @@ class WebSocketManager:
                 ):
                     del self.connection_subscriptions[websocket]
 
-            # Send an unsubscription confirmation message
+            # Queue an unsubscription confirmation message
             try:
-                await websocket.send_text(
-                    json.dumps(
-                        {
-                            "type": "unsubscription",
-                            "message_id": message_id,
-                            "connection_type": connection_type.value,
-                            "status": "unsubscribed",
-                        }
-                    )
+                self.enqueue(
+                    websocket,
+                    {
+                        "type": "unsubscription",
+                        "message_id": message_id,
+                        "connection_type": connection_type.value,
+                        "status": "unsubscribed",
+                    },
                 )
             except Exception as e:
                 logger.warning(f"Failed to send unsubscription confirmation: {e}")
@@ -339,90 +775,73 @@ class WebSocketManager:
         Broadcast a message to all WebSockets subscribed to a message ID with a
         specific connection type.
 
+        The message is queued for each WebSocket without waiting for it to be sent.  Each
+        broadcast carries the latest state of the message, so a broadcast for the same
+        message ID that is still queued for a WebSocket is replaced by this one.
+
         Args:
             message_id (str): The message ID to broadcast to.
             data (Dict[str, Any]): The data to broadcast.
             connection_type (WebsocketConnectionType): The type of connection to broadcast to.
                 Defaults to WebsocketConnectionType.MESSAGE.
         """
-        if message_id not in self.connections[connection_type]:
-            logger.debug(
-                f"No connections for message ID: {message_id} with type: {connection_type.value}"
-            )
-            return
-
-        # Add the message ID and connection type to the data
-        data["message_id"] = message_id
-        data["connection_type"] = connection_type.value
-
-        # Convert the data to JSON
+        # Serialize the data once for all subscribers, and for the replay buffer
         try:
-            json_data = json.dumps(data)
+            frame = encode_message_update(message_id, data, connection_type.value)
         except Exception as e:
             logger.error(f"Failed to serialize broadcast data: {e}")
             return
 
-        # Broadcast the message to all WebSockets subscribed to the message ID
-        # with the specified type
-        disconnected_websockets = set()
+        await self.broadcast_frame(message_id, frame, connection_type)
 
-        # Check if there are any connections for this message ID and type
-        if message_id not in self.connections[connection_type]:
-            logger.debug(
-                f"No connections found for message ID: {message_id} with "
-                f"type: {connection_type.value}"
-            )
-            return
+    async def broadcast_frame(
+        self,
+        message_id: str,
+        frame: EncodedFrame,
+        connection_type: WebsocketConnectionType = WebsocketConnectionType.MESSAGE,
+    ) -> None:
+        """
+        Broadcast an update that is already serialized to all WebSockets subscribed to a
+        message ID with a specific connection type.
 
-        # Make a copy to avoid modification during iteration
-        connections = self.connections[connection_type][message_id].copy()
+        The frame gets the next sequence number of the message and is kept in its replay
+        buffer, and is forwarded to each WebSocket in the encoding that it negotiated.  A
+        frame for the same message ID that is still queued for a WebSocket is replaced by
+        this one.
+
+        Args:
+            message_id (str): The message ID to broadcast to.
+            frame (EncodedFrame): The update, which includes the message ID and
+                connection type.
+            connection_type (WebsocketConnectionType): The type of connection to broadcast to.
+                Defaults to WebsocketConnectionType.MESSAGE.
+        """
+        frame = self._get_replay_buffer(message_id, connection_type).append(frame)
 
+        connections = self.connections[connection_type].get(message_id)
         if not connections:
             logger.debug(
-                f"Empty connection set for message ID: {message_id} with "
-                f"type: {connection_type.value}"
+                f"No connections for message ID: {message_id} with type: {connection_type.value}"
             )
             return
 
+        key = (connection_type, message_id)
+        slow_websockets = []
         for websocket in connections:
             try:
-                # Check if the WebSocket is still in our tracking
-                if (
-                    websocket not in self.connection_subscriptions
-                    or message_id
-                    not in self.connection_subscriptions.get(websocket, {}).get(
-                        connection_type, set()
-                    )
-                ):
-                    logger.debug(
-                        f"WebSocket no longer tracked for message ID: {message_id} with "
-                        f"type: {connection_type.value}"
-                    )
-                    disconnected_websockets.add(websocket)
-                    continue
-
-                # Check if we can send a message
-                await websocket.send_text(json_data)
-            except Exception as e:
-                logger.warning(f"Failed to broadcast message to WebSocket: {e}")
-                disconnected_websockets.add(websocket)
-
-        # Disconnect any WebSockets that failed to receive the message
-        for websocket in disconnected_websockets:
-            logger.debug(
-                f"Disconnecting failed WebSocket for message ID: {message_id} with "
-                f"type: {connection_type.value}"
-            )
-            try:
-                await self.disconnect(websocket)
+                payload = frame.encode(self.encodings.get(websocket, FrameEncoding.JSON))
             except Exception as e:
-                logger.error(f"Error disconnecting WebSocket: {e}")
-                # Even if disconnect fails, make sure we remove the connection from our tracking
-                try:
-                    # Remove the WebSocket from all connections
-                    self._remove_connection_tracking(websocket)
-                except Exception as cleanup_error:
-                    logger.error(f"Error cleaning up WebSocket state: {cleanup_error}")
+                logger.error(f"Failed to encode broadcast frame: {e}")
+                continue
+            queued = self._get_sender(websocket).enqueue(payload, key)
+            if queued is None:
+                slow_websockets.append(websocket)
+            elif not queued:
+                self.metrics.superseded_frames += 1
+
+        # Disconnecting changes the connection set, so it happens after the loop
+        for websocket in slow_websockets:
+            self._disconnect_slow_consumer(websocket)
 
     async def broadcast_update(
         self,
@@ -1,9 +1,94 @@
-from typing import Tuple
+import asyncio
+from typing import AsyncIterator, Dict, Generic, List, Optional, Tuple, TypeVar
 
 from local_operator.types import ActionType, CodeExecutionResult
 
 DEFAULT_LOOKAHEAD_LENGTH = 32
 
+T = TypeVar("T")
+
+# Tags that define the action of each action type.  Each entry is a group of alternative
+# tags, and one tag of every group has to be closed for the action to be complete.
+ACTION_PAYLOAD_TAGS: Dict[ActionType, Tuple[Tuple[str, ...], ...]] = {
+    ActionType.CODE: (("code",),),
+    ActionType.WRITE: (("file_path",), ("content", "code")),
+    ActionType.EDIT: (("file_path",), ("replacements",)),
+    ActionType.READ: (("file_path",),),
+}
+
+
+class BufferedStream(Generic[T]):
+    """Consumes an async stream in a background task and buffers its items so that they
+    can be replayed later, while the stream is still producing or after it has finished.
+
+    Used to start a model response speculatively before it is known whether the response
+    will be needed.
+
+    Attributes:
+        started_at (float): The event loop time at which the stream was started
+    """
+
+    def __init__(self, stream: AsyncIterator[T]):
+        """Start consuming the stream in a background task.
+
+        Args:
+            stream (AsyncIterator[T]): The stream to consume
+        """
+        self._items: List[T] = []
+        self._error: Optional[Exception] = None
+        self._updated = asyncio.Event()
+        self.started_at = asyncio.get_running_loop().time()
+        self._task = asyncio.create_task(self._consume(stream))
+        # Also wakes up replays when the task is cancelled before it starts running
+        self._task.add_done_callback(lambda _: self._updated.set())
+
+    async def _consume(self, stream: AsyncIterator[T]) -> None:
+        try:
+            async for item in stream:
+                self._items.append(item)
+                self._updated.set()
+        except Exception as e:
+            # Kept for the replay instead of being raised in the background task
+            self._error = e
+
+    def done(self) -> bool:
+        """Whether the stream has finished, failed or been cancelled."""
+        return self._task.done()
+
+    def cancel(self) -> None:
+        """Stop consuming the stream.  Items that were already buffered can still be
+        replayed."""
+        if not self._task.done():
+            self._task.cancel()
+
+    async def replay(self) -> AsyncIterator[T]:
+        """Yield the buffered items from the start, then the remaining items as they arrive.
+
+        Yields:
+            T: The items of the stream in order
+
+        Raises:
+            Exception: The error raised by the stream, if it failed
+            asyncio.CancelledError: If the stream was cancelled before it finished
+        """
+        index = 0
+        while True:
+            while index < len(self._items):
+                yield self._items[index]
+                index += 1
+
+            if self._task.done():
+                if index < len(self._items):
+                    continue
+                if self._task.cancelled():
+                    raise asyncio.CancelledError()
+                if self._error is not None:
+                    raise self._error
+                return
+
+            self._updated.clear()
+            await self._updated.wait()
+
 
 def stream_action_buffer(
     accumulated_text: str,
@@ -97,6 +182,38 @@ def stream_action_buffer(
     return False, result
 
 
+def is_action_payload_complete(accumulated_text: str, action: Optional[ActionType]) -> bool:
+    """
+    Checks whether the fields that define an action have finished streaming.
+
+    The remaining fields of the action response, such as learnings and mentioned files,
+    do not change what the action does, so the action can be reviewed once its payload
+    tags are closed.
+
+    Args:
+        accumulated_text (str): The complete accumulated text up to this point.
+        action (Optional[ActionType]): The action type parsed from the text so far.
+
+    Returns:
+        bool: True if the action has payload tags and all of them are closed.
+    """
+    if action is None or action not in ACTION_PAYLOAD_TAGS:
+        return False
+
+    _, remaining_text = _extract_thinking_content(accumulated_text)
+    action_start_idx = remaining_text.find("<action_response>")
+    if action_start_idx != -1:
+        remaining_text = remaining_text[action_start_idx:]
+
+    if "</action>" not in remaining_text:
+        return False
+
+    return all(
+        any(f"</{tag}>" in remaining_text for tag in tag_group)
+        for tag_group in ACTION_PAYLOAD_TAGS[action]
+    )
+
+
 def _extract_thinking_content(text: str) -> Tuple[str, str]:
     """
     Extracts content from <think> or <thinking> tags at the beginning of the text.
@@ -0,0 +1,106 @@
+"""Summary cache for Local Operator.
+
+This module stores summaries of conversation steps keyed by a hash of the step content,
+so that the same step is never summarized twice.  The cache is shared by all executors
+that use the same config directory, which covers cloned agents and resumed sessions,
+and is persisted to a JSON file in the config directory.
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from local_operator.persisted_cache import PersistedLRUCache
+from local_operator.types import ConversationRecord
+
+# Name of the file used to persist the summary cache
+SUMMARY_CACHE_FILE_NAME: str = "summary_cache.json"
+
+# Maximum number of summaries to keep, least recently used summaries are evicted first
+DEFAULT_MAX_SUMMARY_CACHE_ENTRIES: int = 5000
+
+
+class SummaryCache:
+    """Content-addressed cache of conversation step summaries.
+
+    Summaries are keyed by a SHA-256 hash of the role and content of the summarized
+    record.  The cache is thread safe so that executors running in different jobs can
+    share it, and is loaded from disk lazily on first use.
+
+    Attributes:
+        cache_file (Path | None): Path to the file that the cache is persisted to, or None
+            to keep the cache in memory only
+        max_entries (int): Maximum number of summaries to keep
+    """
+
+    cache_file: Optional[Path]
+    max_entries: int
+
+    def __init__(
+        self,
+        cache_file: Optional[Path] = None,
+        max_entries: int = DEFAULT_MAX_SUMMARY_CACHE_ENTRIES,
+    ):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self._entries: PersistedLRUCache[str] = PersistedLRUCache(
+            cache_file,
+            max_entries,
+            name="summary cache",
+            is_valid=lambda summary: isinstance(summary, str),
+        )
+
+    @staticmethod
+    def get_key(record: ConversationRecord) -> str:
+        """Get the cache key for a conversation record.
+
+        Args:
+            record (ConversationRecord): The record to get the key for
+
+        Returns:
+            str: The hex digest of the record role and content
+        """
+        digest = hashlib.sha256()
+        digest.update(str(record.role.value).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update((record.content or "").encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, record: ConversationRecord) -> Optional[str]:
+        """Get the cached summary for a conversation record.
+
+        Args:
+            record (ConversationRecord): The record to look up
+
+        Returns:
+            Optional[str]: The cached summary, or None if the record has not been summarized
+        """
+        return self._entries.get(self.get_key(record))
+
+    def set(self, record: ConversationRecord, summary: str) -> None:
+        """Store the summary for a conversation record.
+
+        Args:
+            record (ConversationRecord): The record that was summarized, with its original
+                content
+            summary (str): The summary of the record
+        """
+        self._entries.set(self.get_key(record), summary)
+
+    def save(self) -> None:
+        """Persist the cache to disk if it has changed since it was loaded."""
+        self._entries.save()
+
+
+@lru_cache(maxsize=None)
+def get_summary_cache(config_dir: Path) -> SummaryCache:
+    """Get the shared summary cache for a config directory.
+
+    Args:
+        config_dir (Path): The Local Operator config directory
+
+    Returns:
+        SummaryCache: The summary cache persisted in the config directory
+    """
+    return SummaryCache(cache_file=config_dir / SUMMARY_CACHE_FILE_NAME)
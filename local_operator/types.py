@@ -3,10 +3,11 @@
 import uuid
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4  # Added UUID, uuid4
 
-from pydantic import BaseModel, Field, validator  # Added validator
+from pydantic import BaseModel, Field, PrivateAttr, validator  # Added validator
+from tiktoken import Encoding
 
 
 class ConversationRole(str, Enum):
@@ -98,6 +99,7 @@ class ConversationRecord(BaseModel):
     Methods:
         to_dict(): Convert the record to a dictionary format
         from_dict(data): Create a ConversationRecord from a dictionary
+        get_token_count(encoding): Get the cached number of tokens in the content
     """
 
     content: str = Field(default="")
@@ -111,6 +113,36 @@ class ConversationRecord(BaseModel):
     files: Optional[List[str]] = None
     should_cache: Optional[bool] = False
 
+    _token_count: Optional[int] = PrivateAttr(default=None)
+    _token_count_key: Optional[Tuple[str, int]] = PrivateAttr(default=None)
+
+    def __eq__(self, other: object) -> bool:
+        """Compare records by their fields, ignoring the cached token count."""
+        if not isinstance(other, ConversationRecord):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+    def get_token_count(self, encoding: Encoding) -> int:
+        """Get the number of tokens in the content of this record.
+
+        The count is stored on the record and only recomputed when the content or the
+        encoding changes, so records are tokenized once no matter how many times the
+        conversation is sent to the model.
+
+        Args:
+            encoding (Encoding): The tiktoken encoding to count the tokens with.
+
+        Returns:
+            int: The number of tokens in the content.
+        """
+        token_count_key = (encoding.name, hash(self.content))
+        if self._token_count is None or self._token_count_key != token_count_key:
+            self._token_count = (
+                len(encoding.encode(self.content, disallowed_special=())) if self.content else 0
+            )
+            self._token_count_key = token_count_key
+        return self._token_count
+
     def dict(self, *args, **kwargs) -> Dict[str, Any]:
         """Convert the conversation record to a dictionary format compatible with LangChain.
 
@@ -187,6 +219,27 @@ class ConversationRecord(BaseModel):
         )
 
 
+class FileReadRange(BaseModel):
+    """The part of a file that a READ action reads, instead of the whole file.
+
+    Ranges are expanded to whole lines.  A byte range takes precedence over a line range,
+    and a pattern only searches the lines of the line range if one is given.
+
+    Attributes:
+        start_line (int | None): The first line to read, starting at 1.
+        end_line (int | None): The last line to read, inclusive.
+        start_byte (int | None): A byte offset in the first line to read.
+        end_byte (int | None): The byte offset to stop reading at, exclusive.
+        pattern (str | None): A regular expression, only the lines that match it are read.
+    """
+
+    start_line: Optional[int] = Field(default=None)
+    end_line: Optional[int] = Field(default=None)
+    start_byte: Optional[int] = Field(default=None)
+    end_byte: Optional[int] = Field(default=None)
+    pattern: Optional[str] = Field(default=None)
+
+
 class ResponseJsonSchema(BaseModel):
     """Schema for JSON responses from the language model.
 
@@ -201,6 +254,8 @@ class ResponseJsonSchema(BaseModel):
         replacements (List[Dict[str, str]]): List of replacements to be made in the file
         agent (str): The name of the agent to delegate the task to
         message (str): The message to delegate the task to
+        read_range (FileReadRange | None): The part of the file to read, for READ actions
+            that do not read the whole file
     """
 
     response: str
@@ -214,6 +269,7 @@ class ResponseJsonSchema(BaseModel):
     agent: str = Field(default="")
     message: str = Field(default="")
     thinking: str = Field(default="")
+    read_range: Optional[FileReadRange] = Field(default=None)
 
 
 class ProcessResponseStatus(str, Enum):
@@ -241,6 +297,65 @@ class ProcessResponseOutput:
         self.message = message
 
 
+class ResourceLimits(BaseModel):
+    """Limits on the resources that one code execution step may use.
+
+    A limit that is not set falls back to the configured default, and a limit of 0 is not
+    enforced.  Limits are only enforced when code runs in an execution kernel.
+
+    Attributes:
+        wall_time_seconds (float | None): Maximum wall clock time of a step in seconds.
+        cpu_seconds (float | None): Maximum CPU time of a step in seconds.
+        memory_mb (float | None): Maximum resident memory of the process that runs the
+            step in megabytes, including the variables of the session.
+    """
+
+    wall_time_seconds: Optional[float] = Field(default=None, ge=0)
+    cpu_seconds: Optional[float] = Field(default=None, ge=0)
+    memory_mb: Optional[float] = Field(default=None, ge=0)
+
+    def merge(self, overrides: Optional["ResourceLimits"]) -> "ResourceLimits":
+        """Get these limits with the limits that are set in overrides replacing them.
+
+        Args:
+            overrides (ResourceLimits | None): The limits to apply on top, for example the
+                limits of an agent.
+
+        Returns:
+            ResourceLimits: The merged limits.
+        """
+        if overrides is None:
+            return self
+        return self.model_copy(update=overrides.model_dump(exclude_none=True))
+
+    @property
+    def is_limited(self) -> bool:
+        """Whether any limit is enforced."""
+        return any((self.wall_time_seconds, self.cpu_seconds, self.memory_mb))
+
+
+class ResourceUsage(BaseModel):
+    """The resources used by one code execution step.
+
+    Attributes:
+        wall_time_seconds (float): Wall clock time of the step in seconds.
+        cpu_seconds (float): CPU time of the process that ran the step in seconds,
+            including the child processes that it waited for.
+        peak_rss_bytes (int): Peak resident memory of the process that ran the step.
+        io_read_bytes (int): Bytes read from storage by the process during the step.
+        io_write_bytes (int): Bytes written to storage by the process during the step.
+        limit_exceeded (str | None): Description of the resource limit that the step went
+            over, if any.
+    """
+
+    wall_time_seconds: float = Field(default=0.0)
+    cpu_seconds: float = Field(default=0.0)
+    peak_rss_bytes: int = Field(default=0)
+    io_read_bytes: int = Field(default=0)
+    io_write_bytes: int = Field(default=0)
+    limit_exceeded: Optional[str] = None
+
+
 class CodeExecutionResult(BaseModel):
     """Represents the result of a code execution.
 
@@ -263,6 +378,8 @@ class CodeExecutionResult(BaseModel):
         is_complete (bool): Whether the execution is complete
         is_streamable (bool): Whether the result can be streamed
         learnings (str): Learnings extracted from the execution
+        resource_usage (ResourceUsage | None): The resources used by the code execution,
+            None for actions that do not run code
     """
 
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -287,6 +404,7 @@ class CodeExecutionResult(BaseModel):
     is_complete: bool = Field(default=False)
     is_streamable: bool = Field(default=False)
     thinking: str = Field(default="")
+    resource_usage: Optional[ResourceUsage] = None
 
     def model_dump(self, *args, **kwargs) -> Dict[str, Any]:
         """Convert the conversation record to a dictionary for serialization.
@@ -121,7 +121,7 @@ def test_submit_request_success(fal_client: FalClient, mock_request_status: Dict
     mock_response.status_code = 200
     mock_response.json.return_value = mock_request_status
 
-    with patch("requests.post", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_response):
         result = fal_client._submit_request({"prompt": "test prompt"})
 
     assert isinstance(result, FalRequestStatus)
@@ -142,7 +142,7 @@ def test_submit_request_error(fal_client: FalClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.post", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             fal_client._submit_request({"prompt": "test prompt"})
         assert "Failed to submit FAL API request" in str(exc_info.value)
@@ -161,7 +161,7 @@ def test_get_request_status_success(
     mock_response.status_code = 200
     mock_response.json.return_value = mock_request_status
 
-    with patch("requests.get", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.get", return_value=mock_response):
         result = fal_client._get_request_status("test-request-id")
 
     assert isinstance(result, FalRequestStatus)
@@ -182,7 +182,7 @@ def test_get_request_status_error(fal_client: FalClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.get", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.get", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             fal_client._get_request_status("test-request-id")
         assert "Failed to get FAL API request status" in str(exc_info.value)
@@ -201,7 +201,7 @@ def test_get_request_result_success(
     mock_response.status_code = 200
     mock_response.json.return_value = mock_image_generation_response
 
-    with patch("requests.get", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.get", return_value=mock_response):
         result = fal_client._get_request_result("test-request-id")
 
     assert isinstance(result, FalImageGenerationResponse)
@@ -228,7 +228,7 @@ def test_get_request_result_error(fal_client: FalClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.get", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.get", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             fal_client._get_request_result("test-request-id")
         assert "Failed to get FAL API request result" in str(exc_info.value)
@@ -249,7 +249,7 @@ def test_generate_image_sync_mode_success(
     mock_response.status_code = 200
     mock_response.json.return_value = mock_image_generation_response
 
-    with patch("requests.post", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_response):
         result = fal_client.generate_image(
             prompt="test prompt",
             image_size=ImageSize.LANDSCAPE_4_3,
@@ -281,7 +281,7 @@ def test_generate_image_sync_mode_error(fal_client: FalClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.post", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             fal_client.generate_image(prompt="test prompt", sync_mode=True)
         assert "Failed to submit FAL API request" in str(exc_info.value)
@@ -317,9 +317,9 @@ def test_generate_image_with_sync_mode_param(
     mock_result_response.json.return_value = mock_image_generation_response
 
     # Set up the mocks to be returned in sequence
-    with patch("requests.post", return_value=mock_submit_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_submit_response):
         with patch(
-            "requests.get",
+            "local_operator.clients.http.HttpTransport.get",
             side_effect=[mock_status_response, mock_result_response],
         ):
             # Mock time.sleep to avoid actual sleeping
@@ -357,7 +357,7 @@ def test_generate_image_error(fal_client: FalClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.post", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             fal_client.generate_image(prompt="test prompt")
         assert "Failed to submit FAL API request" in str(exc_info.value)
@@ -401,9 +401,9 @@ def test_generate_image_wait_for_completion(
     mock_result_response.json.return_value = mock_image_generation_response
 
     # Set up the mocks to be returned in sequence
-    with patch("requests.post", return_value=mock_submit_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_submit_response):
         with patch(
-            "requests.get",
+            "local_operator.clients.http.HttpTransport.get",
             side_effect=[mock_status_response1, mock_status_response2, mock_result_response],
         ):
             # Properly mock time.sleep to avoid actual sleeping
@@ -442,8 +442,10 @@ def test_generate_image_timeout(
     mock_status_response.json.return_value = mock_request_status
 
     # Set up the mocks
-    with patch("requests.post", return_value=mock_submit_response):
-        with patch("requests.get", return_value=mock_status_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_submit_response):
+        with patch(
+            "local_operator.clients.http.HttpTransport.get", return_value=mock_status_response
+        ):
             # Properly mock time.sleep to avoid actual sleeping
             with patch("time.sleep") as mock_sleep:
                 # Use a very short timeout to speed up the test
@@ -478,8 +480,10 @@ def test_generate_image_failed_status(
     mock_status_response.json.return_value = {"request_id": "test-request-id", "status": "FAILED"}
 
     # Set up the mocks
-    with patch("requests.post", return_value=mock_submit_response):
-        with patch("requests.get", return_value=mock_status_response):
+    with patch("local_operator.clients.http.HttpTransport.post", return_value=mock_submit_response):
+        with patch(
+            "local_operator.clients.http.HttpTransport.get", return_value=mock_status_response
+        ):
             # Properly mock time.sleep to avoid actual sleeping
             with patch("time.sleep") as mock_sleep:
                 # Use a very short timeout to speed up the test
@@ -0,0 +1,186 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from local_operator.clients.http import (
+    MAX_RETRY_AFTER,
+    HttpTransport,
+    _CappedRetry,
+    _reset_transports_after_fork,
+    get_endpoint,
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self) -> None:
+        server = self.server
+        server.requests.append((self.command, self.path, self.client_address[1]))  # type: ignore
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        status = 200
+        headers = {}
+        if self.path.startswith("/flaky") and server.failures > 0:  # type: ignore
+            server.failures -= 1  # type: ignore
+            status = 503
+            headers["Retry-After"] = "0"
+        elif self.path.startswith("/slow"):
+            time.sleep(0.5)
+
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.requests = []  # type: ignore
+    httpd.failures = 0  # type: ignore
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def transport():
+    transport = HttpTransport(backoff_factor=0)
+    yield transport
+    transport.close()
+
+
+def _url(server, path: str) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+
+def test_connections_are_kept_alive(server, transport):
+    for _ in range(3):
+        assert transport.get(_url(server, "/models")).json() == {"ok": True}
+
+    client_ports = {port for _, _, port in server.requests}
+    assert len(server.requests) == 3
+    assert len(client_ports) == 1
+
+
+def test_sessions_are_shared_by_host(transport):
+    session = transport.get_session("https://api.example.com/v1/models")
+
+    assert transport.get_session("https://api.example.com/v1/search?q=x") is session
+    assert transport.get_session("https://other.example.com/v1/models") is not session
+    assert transport.get_session("http://api.example.com/v1/models") is not session
+
+
+def test_idempotent_requests_are_retried_after_retry_after(server, transport):
+    server.failures = 2
+
+    response = transport.get(_url(server, "/flaky"))
+
+    assert response.status_code == 200
+    assert len(server.requests) == 3
+    stats = transport.get_stats()[get_endpoint("GET", _url(server, "/flaky"))]
+    assert stats.requests == 1
+    assert stats.errors == 0
+
+
+def test_post_requests_are_not_retried_on_error_status(server, transport):
+    server.failures = 1
+
+    response = transport.post(_url(server, "/flaky"), json={"prompt": "hello"})
+
+    assert response.status_code == 503
+    assert len(server.requests) == 1
+    assert transport.get_stats()[get_endpoint("POST", _url(server, "/flaky"))].errors == 1
+
+
+def test_retries_give_up_with_the_last_response(server):
+    server.failures = 5
+    transport = HttpTransport(max_retries=2, backoff_factor=0)
+
+    response = transport.get(_url(server, "/flaky"))
+
+    assert response.status_code == 503
+    assert len(server.requests) == 3
+    transport.close()
+
+
+def test_read_timeout_is_applied(server):
+    transport = HttpTransport(read_timeout=0.1, max_retries=0)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        transport.get(_url(server, "/slow"))
+
+    stats = transport.get_stats()[get_endpoint("GET", _url(server, "/slow"))]
+    assert stats.requests == 1
+    assert stats.errors == 1
+    assert stats.max_seconds >= 0.1
+    transport.close()
+
+
+def test_retry_after_is_capped():
+    retry = _CappedRetry(total=1)
+
+    assert retry.parse_retry_after("3600") == MAX_RETRY_AFTER
+    assert retry.parse_retry_after("2") == 2
+
+
+def test_endpoint_names_collapse_ids():
+    assert (
+        get_endpoint("get", "https://queue.fal.run/fal-ai/flux/requests/7b3c2a9e-11f4-4d0e/status")
+        == "GET queue.fal.run/fal-ai/flux/requests/{id}/status"
+    )
+    assert (
+        get_endpoint(
+            "GET", "https://gmail.googleapis.com/gmail/v1/users/me/messages/18c2f9a0b1d3e4f5"
+        )
+        == "GET gmail.googleapis.com/gmail/v1/users/me/messages/{id}"
+    )
+    assert get_endpoint("DELETE", "https://api.radient.com/v1/agents/42?force=1") == (
+        "DELETE api.radient.com/v1/agents/{id}"
+    )
+    assert get_endpoint("GET", "https://openrouter.ai/api/v1/models") == (
+        "GET openrouter.ai/api/v1/models"
+    )
+
+
+def test_latency_counters_accumulate(server, transport):
+    for _ in range(2):
+        transport.get(_url(server, "/models"))
+    transport.post(_url(server, "/models"), endpoint="list models")
+
+    stats = transport.get_stats()
+    get_stats = stats[get_endpoint("GET", _url(server, "/models"))]
+    assert get_stats.requests == 2
+    assert get_stats.total_seconds >= get_stats.max_seconds > 0
+    assert get_stats.mean_seconds == pytest.approx(get_stats.total_seconds / 2)
+    assert stats["list models"].requests == 1
+
+    transport.reset_stats()
+    assert transport.get_stats() == {}
+
+
+def test_sessions_are_dropped_after_fork(transport):
+    session = transport.get_session("https://api.example.com")
+
+    _reset_transports_after_fork()
+
+    assert transport.get_session("https://api.example.com") is not session
@@ -58,7 +58,7 @@ def test_is_healthy_success(ollama_client: OllamaClient) -> None:
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.text = "Ollama is running"
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         result = ollama_client.is_healthy()
 
     assert result is True
@@ -74,7 +74,7 @@ def test_is_healthy_failure(ollama_client: OllamaClient) -> None:
     mock_requests_get = MagicMock()
     mock_requests_get.return_value.status_code = 500
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         result = ollama_client.is_healthy()
 
     assert result is False
@@ -90,7 +90,7 @@ def test_is_healthy_exception(ollama_client: OllamaClient) -> None:
         side_effect=requests.exceptions.RequestException("Connection error")
     )
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         result = ollama_client.is_healthy()
 
     assert result is False
@@ -117,7 +117,7 @@ def test_list_models_success(
     mock_requests_get.return_value.json.return_value = mock_tags_response
 
     with patch.object(ollama_client, "is_healthy", mock_health_check):
-        with patch("requests.get", mock_requests_get):
+        with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
             response = ollama_client.list_models()
 
     assert len(response) == len(mock_model_data)
@@ -162,7 +162,7 @@ def test_list_models_api_error(ollama_client: OllamaClient) -> None:
     )
 
     with patch.object(ollama_client, "is_healthy", mock_health_check):
-        with patch("requests.get", mock_requests_get):
+        with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
             with pytest.raises(RuntimeError) as exc_info:
                 ollama_client.list_models()
             assert "Failed to fetch Ollama models due to a requests error" in str(exc_info.value)
@@ -181,7 +181,7 @@ def test_list_models_network_error(ollama_client: OllamaClient) -> None:
     mock_requests_get = MagicMock(side_effect=requests.exceptions.RequestException("Network error"))
 
     with patch.object(ollama_client, "is_healthy", mock_health_check):
-        with patch("requests.get", mock_requests_get):
+        with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
             with pytest.raises(RuntimeError) as exc_info:
                 ollama_client.list_models()
             assert "Failed to fetch Ollama models due to a requests error" in str(exc_info.value)
@@ -199,7 +199,7 @@ def test_custom_base_url() -> None:
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.text = "Ollama is running"
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         client.is_healthy()
 
     mock_requests_get.assert_called_once_with(custom_url, timeout=2)
@@ -77,7 +77,7 @@ def test_list_models_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = openrouter_client.list_models()
 
     assert isinstance(response, OpenRouterListModelsResponse)
@@ -104,7 +104,7 @@ def test_list_models_api_error(openrouter_client: OpenRouterClient) -> None:
         "Bad Request", response=mock_requests_get.return_value
     )
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             openrouter_client.list_models()
         assert "Failed to fetch OpenRouter models due to a requests error" in str(exc_info.value)
@@ -118,7 +118,7 @@ def test_list_models_network_error(openrouter_client: OpenRouterClient) -> None:
     """
     mock_requests_get = MagicMock(side_effect=requests.exceptions.RequestException("Network error"))
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             openrouter_client.list_models()
         assert "Failed to fetch OpenRouter models due to a requests error" in str(exc_info.value)
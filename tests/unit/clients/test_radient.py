@@ -170,7 +170,7 @@ def test_list_models_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.list_models()
 
     # Verify the request was made with the correct parameters
@@ -211,7 +211,7 @@ def test_list_models_api_error(radient_client: RadientClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.list_models()
         assert "Failed to fetch Radient models due to a requests error" in str(exc_info.value)
@@ -231,7 +231,7 @@ def test_list_models_network_error(radient_client: RadientClient) -> None:
         side_effect=requests.exceptions.RequestException("Network error", response=mock_response)
     )
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.list_models()
         assert "Failed to fetch Radient models due to a requests error" in str(exc_info.value)
@@ -263,7 +263,9 @@ def test_upload_agent_to_marketplace_success(
     mock_response = MagicMock()
     mock_response.status_code = 201
     mock_response.json.return_value = {"id": "new-agent-id"}
-    with patch("requests.post", return_value=mock_response) as mock_post:
+    with patch(
+        "local_operator.clients.http.HttpTransport.post", return_value=mock_response
+    ) as mock_post:
         agent_id = radient_client.upload_agent_to_marketplace(zip_path)
     assert agent_id == "new-agent-id"
     mock_post.assert_called_once()
@@ -282,7 +284,9 @@ def test_overwrite_agent_in_marketplace_success(
     zip_path.write_bytes(b"dummy zip content")
     mock_response = MagicMock()
     mock_response.status_code = 200
-    with patch("requests.put", return_value=mock_response) as mock_put:
+    with patch(
+        "local_operator.clients.http.HttpTransport.put", return_value=mock_response
+    ) as mock_put:
         radient_client.overwrite_agent_in_marketplace("existing-id", zip_path)
     mock_put.assert_called_once()
     args, kwargs = mock_put.call_args
@@ -302,7 +306,9 @@ def test_download_agent_from_marketplace_success(
     mock_response = MagicMock()
     mock_response.status_code = 200
     mock_response.iter_content = MagicMock(return_value=[dummy_content])
-    with patch("requests.get", return_value=mock_response) as mock_get:
+    with patch(
+        "local_operator.clients.http.HttpTransport.get", return_value=mock_response
+    ) as mock_get:
         radient_client.download_agent_from_marketplace(agent_id, dest_path)
     mock_get.assert_called_once_with(
         f"{base_url}/agents/{agent_id}/download",
@@ -320,7 +326,9 @@ def test_delete_agent_from_marketplace_success(radient_client: RadientClient, ba
     agent_id = "agent-to-delete"
     mock_response = MagicMock()
     mock_response.status_code = 204
-    with patch("requests.delete", return_value=mock_response) as mock_delete:
+    with patch(
+        "local_operator.clients.http.HttpTransport.delete", return_value=mock_response
+    ) as mock_delete:
         radient_client.delete_agent_from_marketplace(agent_id)
     mock_delete.assert_called_once_with(
         f"{base_url}/agents/{agent_id}",
@@ -338,7 +346,7 @@ def test_delete_agent_from_marketplace_error_response(radient_client: RadientCli
     mock_response = MagicMock()
     mock_response.status_code = 404
     mock_response.content = b"Agent not found"
-    with patch("requests.delete", return_value=mock_response):
+    with patch("local_operator.clients.http.HttpTransport.delete", return_value=mock_response):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.delete_agent_from_marketplace(agent_id)
         assert "Failed to delete agent from Radient Agent Hub" in str(exc_info.value)
@@ -353,7 +361,7 @@ def test_delete_agent_from_marketplace_network_error(radient_client: RadientClie
     mock_delete = MagicMock(
         side_effect=requests.exceptions.RequestException("Network error", response=mock_response)
     )
-    with patch("requests.delete", mock_delete):
+    with patch("local_operator.clients.http.HttpTransport.delete", mock_delete):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.delete_agent_from_marketplace(agent_id)
         assert "Failed to delete agent from Radient Agent Hub" in str(exc_info.value)
@@ -379,7 +387,7 @@ def test_generate_image_success(
     mock_requests_post.return_value.status_code = 200
     mock_requests_post.return_value.json.return_value = mock_image_generation_response
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         response = radient_client.generate_image(
             prompt="test prompt",
             num_images=1,
@@ -432,7 +440,7 @@ def test_generate_image_with_provider(
     mock_requests_post.return_value.status_code = 200
     mock_requests_post.return_value.json.return_value = mock_image_generation_response
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         response = radient_client.generate_image(
             prompt="test prompt",
             provider="test_provider",
@@ -476,7 +484,7 @@ def test_generate_image_with_source_url(
     mock_requests_post.return_value.status_code = 200
     mock_requests_post.return_value.json.return_value = mock_image_generation_response
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         response = radient_client.generate_image(
             prompt="test prompt",
             source_url="https://example.com/source.jpg",
@@ -520,7 +528,7 @@ def test_generate_image_api_error(radient_client: RadientClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.generate_image(prompt="test prompt")
         assert "Failed to generate image" in str(exc_info.value)
@@ -543,7 +551,7 @@ def test_get_image_generation_status_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_image_generation_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.get_image_generation_status(request_id="test-request-id")
 
     # Verify the request was made with the correct parameters
@@ -582,7 +590,7 @@ def test_get_image_generation_status_with_provider(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_image_generation_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.get_image_generation_status(
             request_id="test-request-id",
             provider="test_provider",
@@ -623,7 +631,7 @@ def test_list_image_generation_providers_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_image_generation_providers_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.list_image_generation_providers()
 
     # Verify the request was made with the correct parameters
@@ -669,7 +677,7 @@ def test_search_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_search_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.search(query="test query")
 
     # Verify the request was made with the correct parameters
@@ -715,7 +723,7 @@ def test_search_with_options(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_search_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.search(
             query="test query",
             max_results=5,
@@ -762,7 +770,7 @@ def test_search_api_error(radient_client: RadientClient) -> None:
         "Bad Request", response=mock_response
     )
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             radient_client.search(query="test query")
         assert "Failed to execute search" in str(exc_info.value)
@@ -785,7 +793,7 @@ def test_list_search_providers_success(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_search_providers_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = radient_client.list_search_providers()
 
     # Verify the request was made with the correct parameters
@@ -86,7 +86,7 @@ def test_search_success(serp_client: SerpApiClient, mock_response: Dict[str, Any
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = serp_client.search("test query")
 
     assert isinstance(response, SerpApiResponse)
@@ -112,7 +112,7 @@ def test_search_api_error(serp_client: SerpApiClient) -> None:
     mock_requests_get = Mock()
     mock_requests_get.return_value.status_code = 400
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             serp_client.search("test query")
         assert "SERP API request failed with status 400" in str(exc_info.value)
@@ -126,7 +126,7 @@ def test_search_network_error(serp_client: SerpApiClient) -> None:
     """
     mock_requests_get = Mock(side_effect=Exception("Network error"))
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         with pytest.raises(RuntimeError) as exc_info:
             serp_client.search("test query")
         assert "Failed to execute SERP API search: Network error" in str(exc_info.value)
@@ -156,7 +156,7 @@ def test_search_with_optional_params(
     mock_requests_get.return_value.status_code = 200
     mock_requests_get.return_value.json.return_value = mock_response
 
-    with patch("requests.get", mock_requests_get):
+    with patch("local_operator.clients.http.HttpTransport.get", mock_requests_get):
         response = serp_client.search(
             query="test query",
             engine="google",
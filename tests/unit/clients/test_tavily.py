@@ -72,7 +72,7 @@ def test_search_success(tavily_client: TavilyClient, mock_response: Dict[str, An
     mock_requests_post.return_value.status_code = 200
     mock_requests_post.return_value.json.return_value = mock_response
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         response = tavily_client.search("What are the latest updates with agentic AI?")
 
     assert isinstance(response, TavilyResponse)
@@ -96,7 +96,7 @@ def test_search_api_error(tavily_client: TavilyClient) -> None:
     mock_requests_post.return_value.status_code = 400
     mock_requests_post.return_value.content = b"Bad Request"
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         with pytest.raises(RuntimeError) as exc_info:
             tavily_client.search("test query")
         assert "Tavily API request failed with status 400" in str(exc_info.value)
@@ -110,7 +110,7 @@ def test_search_network_error(tavily_client: TavilyClient) -> None:
     """
     mock_requests_post = Mock(side_effect=Exception("Network error"))
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         with pytest.raises(RuntimeError) as exc_info:
             tavily_client.search("test query")
         assert "Failed to execute Tavily API search: Network error" in str(exc_info.value)
@@ -140,7 +140,7 @@ def test_search_with_optional_params(
     mock_requests_post.return_value.status_code = 200
     mock_requests_post.return_value.json.return_value = mock_response
 
-    with patch("requests.post", mock_requests_post):
+    with patch("local_operator.clients.http.HttpTransport.post", mock_requests_post):
         response = tavily_client.search(
             query="test query",
             search_depth="advanced",
@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from local_operator.clients.openrouter import (
+    OpenRouterClient,
+    OpenRouterListModelsResponse,
+    OpenRouterModelData,
+    OpenRouterModelPricing,
+)
+from local_operator.model.catalog import ModelCatalogCache
+
+
+def make_catalog(*model_ids):
+    return {
+        "data": [
+            {
+                "id": model_id,
+                "name": model_id,
+                "description": "",
+                "pricing": {"prompt": 0.0, "completion": 0.0},
+            }
+            for model_id in model_ids
+        ]
+    }
+
+
+def age_entry(cache, key, seconds):
+    entry = cache._entries.get(key)
+    entry["fetched_at"] -= seconds
+
+
+def test_fresh_catalog_is_not_fetched_again():
+    cache = ModelCatalogCache(ttl=60)
+    fetch = MagicMock(return_value=make_catalog("a"))
+
+    assert cache.get("openrouter", fetch) == make_catalog("a")
+    assert cache.get("openrouter", fetch) == make_catalog("a")
+    fetch.assert_called_once()
+
+
+def test_stale_catalog_is_served_while_it_is_refreshed():
+    cache = ModelCatalogCache(ttl=60, max_stale=3600)
+    cache.get("openrouter", lambda: make_catalog("a"))
+    age_entry(cache, "openrouter", 120)
+
+    refreshed = threading.Event()
+
+    def fetch():
+        refreshed.wait(5)
+        return make_catalog("b")
+
+    # The stale catalog is returned at once, and only one refresh runs
+    assert cache.get("openrouter", fetch) == make_catalog("a")
+    assert cache.get("openrouter", fetch) == make_catalog("a")
+    refreshed.set()
+
+    deadline = time.time() + 5
+    while cache.get("openrouter", fetch) != make_catalog("b") and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get("openrouter", fetch) == make_catalog("b")
+
+
+def test_expired_catalog_is_fetched_before_it_is_used():
+    cache = ModelCatalogCache(ttl=60, max_stale=3600)
+    cache.get("openrouter", lambda: make_catalog("a"))
+    age_entry(cache, "openrouter", 7200)
+
+    assert cache.get("openrouter", lambda: make_catalog("b")) == make_catalog("b")
+
+
+def test_cached_catalog_is_used_when_the_provider_fails():
+    cache = ModelCatalogCache(ttl=60, max_stale=3600)
+    cache.get("openrouter", lambda: make_catalog("a"))
+    age_entry(cache, "openrouter", 7200)
+
+    def fetch():
+        raise RuntimeError("Failed to fetch OpenRouter models")
+
+    assert cache.get("openrouter", fetch) == make_catalog("a")
+
+    with pytest.raises(RuntimeError):
+        cache.get("radient", fetch)
+
+
+def test_catalog_is_persisted(tmp_path):
+    cache_file = tmp_path / "model_catalog_cache.json"
+    ModelCatalogCache(cache_file=cache_file).get("openrouter", lambda: make_catalog("a"))
+
+    assert json.loads(cache_file.read_text())["openrouter"]["catalog"] == make_catalog("a")
+
+    fetch = MagicMock()
+    assert ModelCatalogCache(cache_file=cache_file).get("openrouter", fetch) == make_catalog("a")
+    fetch.assert_not_called()
+
+
+def test_get_openrouter_models():
+    client = MagicMock(spec=OpenRouterClient)
+    client.base_url = "https://openrouter.ai/api/v1"
+    pricing = OpenRouterModelPricing(prompt=0.001, completion=0.002)
+    client.list_models.return_value = OpenRouterListModelsResponse(
+        data=[OpenRouterModelData(id="a", name="A", description="", pricing=pricing)]
+    )
+    cache = ModelCatalogCache()
+
+    models = cache.get_openrouter_models(client)
+    assert [model.id for model in models.data] == ["a"]
+    assert cache.get_openrouter_models(client) is models
+    client.list_models.assert_called_once()
@@ -690,3 +690,28 @@ def test_validate_model_ollama_failure(mock_get):
     api_key = SecretStr("test_key")  # API key is not used for Ollama
     result = validate_model("ollama", "test_model", api_key)
     assert result is False
+
+
+def test_calculate_cost_with_prompt_cache() -> None:
+    """Test that cached input tokens are charged at the cache read and write prices."""
+    model_info = ModelInfo(
+        id="test-model",
+        name="test-model",
+        description="Mock model",
+        input_price=3.0,
+        output_price=15.0,
+        cache_reads_price=0.3,
+        cache_writes_price=3.75,
+        recommended=True,
+    )
+
+    cost = calculate_cost(
+        model_info,
+        input_tokens=10_000,
+        output_tokens=1_000,
+        cache_read_tokens=6_000,
+        cache_write_tokens=2_000,
+    )
+
+    expected_cost = (2_000 * 3.0 + 6_000 * 0.3 + 2_000 * 3.75 + 1_000 * 15.0) / 1_000_000
+    assert cost == pytest.approx(expected_cost)
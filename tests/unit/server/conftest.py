@@ -67,6 +67,10 @@ class DummyExecutor:
             instruction_details=None,
             agent_system_prompt=None,
         )
+        self.kernel_shutdowns = 0
+
+    async def shutdown_kernel(self):
+        self.kernel_shutdowns += 1
 
     async def invoke_model(self, conversation_history):
         # Simply return a dummy response content as if coming from the model.
@@ -6,7 +6,7 @@ regular chat and agent-specific chat endpoints.
 """
 
 from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -59,6 +59,7 @@ async def test_chat_success(
     assert stats.get("total_tokens") > 0
     assert stats.get("prompt_tokens") > 0
     assert stats.get("completion_tokens") > 0
+    assert mock_create_operator.executor.kernel_shutdowns == 1
 
 
 @pytest.mark.asyncio
@@ -155,6 +156,7 @@ async def test_chat_sync_with_agent_success(
     assert stats.get("total_tokens") > 0
     assert stats.get("prompt_tokens") > 0
     assert stats.get("completion_tokens") > 0
+    assert mock_create_operator.executor.kernel_shutdowns == 1
 
 
 @pytest.mark.asyncio
@@ -276,16 +278,18 @@ class FailingOperator:
     """Mock operator that simulates a failure in chat."""
 
     def __init__(self):
-        self.executor = None
+        self.executor = MagicMock()
+        self.executor.shutdown_kernel = AsyncMock()
 
-    async def chat(self):
+    async def handle_user_input(self, prompt, attachments=None):
         raise Exception("Simulated failure in chat")
 
 
 @pytest.mark.asyncio
 async def test_chat_model_failure(test_app_client):
     """Test handling of model failure during chat."""
-    with patch("local_operator.server.routes.chat.create_operator", return_value=FailingOperator()):
+    failing_operator = FailingOperator()
+    with patch("local_operator.server.routes.chat.create_operator", return_value=failing_operator):
         payload = ChatRequest(
             hosting="openai",
             model="gpt-4o",
@@ -301,6 +305,7 @@ async def test_chat_model_failure(test_app_client):
         data = response.json()
         # The error detail should indicate an internal server error.
         assert "Internal Server Error" in data.get("detail", "")
+        failing_operator.executor.shutdown_kernel.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -5,12 +5,20 @@ This module contains tests for job-related functionality, including
 retrieving, listing, cancelling, and cleaning up jobs.
 """
 
+import asyncio
+import json
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
 
-from local_operator.jobs import Job, JobContextRecord, JobResult, JobStatus
+from local_operator.jobs import (
+    Job,
+    JobContextRecord,
+    JobEventLog,
+    JobResult,
+    JobStatus,
+)
 from local_operator.types import ConversationRole
 
 
@@ -104,6 +112,83 @@ async def test_get_job_status_error(test_app_client, mock_job_manager):
     assert "Internal Server Error" in data.get("detail", "")
 
 
+def parse_sse(text):
+    """Parse a Server-Sent Events stream into (id, event, data) tuples."""
+    parsed = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        if "event" in fields:
+            parsed.append((fields.get("id"), fields["event"], fields["data"]))
+    return parsed
+
+
+@pytest.mark.asyncio
+async def test_stream_job_events(test_app_client, mock_job_manager, sample_job):
+    """Test streaming the events of a job until it ends."""
+    events = JobEventLog()
+    events.publish("message", '{"content": "Hel"}', key=("message", "m1"))
+    mock_job_manager.get_job.return_value = sample_job
+    mock_job_manager.get_job_summary.return_value = {"id": sample_job.id, "status": "processing"}
+    mock_job_manager.get_job_events.return_value = events
+
+    async def finish_job():
+        await asyncio.sleep(0.05)
+        events.publish("message", '{"content": "Hello"}', key=("message", "m1"))
+        events.publish("status", '{"status": "completed"}')
+        events.close()
+
+    finisher = asyncio.create_task(finish_job())
+    response = await test_app_client.get(f"/v1/jobs/{sample_job.id}/stream")
+    await finisher
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert parse_sse(response.text) == [
+        (None, "job", json.dumps({"id": sample_job.id, "status": "processing"})),
+        ("1", "message", '{"content": "Hel"}'),
+        ("2", "message", '{"content": "Hello"}'),
+        ("3", "status", '{"status": "completed"}'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_job_events_resumes_from_last_event_id(
+    test_app_client, mock_job_manager, sample_job
+):
+    """Test that a reconnecting client only gets the events that it missed."""
+    events = JobEventLog(size=1)
+    for i in range(3):
+        events.publish("status", f'{{"n": {i}}}')
+    events.close()
+    mock_job_manager.get_job.return_value = sample_job
+    mock_job_manager.get_job_summary.return_value = {"id": sample_job.id}
+    mock_job_manager.get_job_events.return_value = events
+
+    response = await test_app_client.get(
+        f"/v1/jobs/{sample_job.id}/stream", headers={"Last-Event-ID": "2"}
+    )
+    assert parse_sse(response.text) == [("3", "status", '{"n": 2}')]
+
+    # Event 2 was dropped from the log, so the client starts over from a snapshot of the job
+    response = await test_app_client.get(
+        f"/v1/jobs/{sample_job.id}/stream", headers={"Last-Event-ID": "1"}
+    )
+    assert [event for _, event, _ in parse_sse(response.text)] == ["job", "status"]
+
+
+@pytest.mark.asyncio
+async def test_stream_job_events_not_found(test_app_client, mock_job_manager):
+    """Test streaming the events of a non-existent job."""
+    job_id = "nonexistent-job"
+    mock_job_manager.get_job.side_effect = KeyError(f'Job with ID "{job_id}" not found')
+
+    response = await test_app_client.get(f"/v1/jobs/{job_id}/stream")
+
+    assert response.status_code == 404
+    assert f'Job with ID "{job_id}" not found' in response.json().get("detail", "")
+
+
 @pytest.mark.asyncio
 async def test_list_jobs_success(test_app_client, mock_job_manager, sample_job):
     """Test listing jobs successfully."""
@@ -14,6 +14,7 @@ from local_operator.clients.openrouter import (
     OpenRouterModelData,
     OpenRouterModelPricing,
 )
+from local_operator.model.catalog import ModelCatalogCache
 from local_operator.server.app import app
 
 
@@ -282,6 +283,35 @@ def test_list_models_with_openrouter(mock_list_models, client, mock_credential_m
         assert model1["info"]["output_price"] == 2000.0  # 0.002 * 1,000,000
 
 
+@patch.object(OpenRouterClient, "list_models")
+def test_list_models_uses_model_catalog_cache(mock_list_models, client, mock_credential_manager):
+    """Test that the OpenRouter catalog is fetched once and then served from the cache."""
+    mock_pricing = OpenRouterModelPricing(prompt=0.001, completion=0.002)
+    mock_list_models.return_value = OpenRouterListModelsResponse(
+        data=[
+            OpenRouterModelData(
+                id="model1", name="Model 1", description="Test model 1", pricing=mock_pricing
+            )
+        ]
+    )
+
+    app.state.model_catalog = ModelCatalogCache()
+    try:
+        with patch(
+            "local_operator.credentials.CredentialManager.get_credential",
+            return_value="fake_api_key",
+        ):
+            for _ in range(2):
+                response = client.get("/v1/models?provider=openrouter")
+                assert response.status_code == 200
+                models = response.json()["result"]["models"]
+                assert [m["id"] for m in models] == ["model1"]
+    finally:
+        app.state.model_catalog = None
+
+    mock_list_models.assert_called_once()
+
+
 @patch.object(OpenRouterClient, "list_models")
 def test_list_models_no_api_key(mock_list_models, client, mock_credential_manager):
     """Test the list_models endpoint with no OpenRouter API key."""
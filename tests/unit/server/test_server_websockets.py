@@ -2,12 +2,14 @@
 Tests for the WebSocket endpoints in the Local Operator API.
 """
 
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import WebSocketDisconnect
 
+from local_operator.frames import FrameEncoding, encode_message_update
 from local_operator.server.models.schemas import WebsocketConnectionType
 from local_operator.server.routes.websockets import websocket_message_endpoint
 from local_operator.server.utils.websocket_manager import WebSocketManager
@@ -155,6 +157,7 @@ async def test_websocket_manager_broadcast(websocket_manager):
 
     # Broadcast the message
     await websocket_manager.broadcast(message_id, test_data)
+    await websocket_manager.drain()
 
     # Check that the WebSocket received the message
     websocket.send_text.assert_called_once()
@@ -200,6 +203,7 @@ async def test_websocket_manager_broadcast_update(websocket_manager):
 
     # Broadcast the update
     await websocket_manager.broadcast_update(message_id, execution_result)
+    await websocket_manager.drain()
 
     # Check that the WebSocket received the message
     websocket.send_text.assert_called_once()
@@ -220,6 +224,116 @@ async def test_websocket_manager_broadcast_update(websocket_manager):
     assert called_data["is_complete"] is True
 
 
+@pytest.mark.asyncio
+async def test_websocket_manager_broadcast_does_not_wait_for_slow_clients():
+    """A slow client gets the latest update of a message, and is dropped on overflow."""
+    websocket_manager = WebSocketManager(max_queue_size=1)
+    release = asyncio.Event()
+
+    async def send_slowly(text: str) -> None:
+        await release.wait()
+
+    slow, fast, slowest = MagicMock(), MagicMock(), MagicMock()
+    fast.send_text = AsyncMock()
+    slow.send_text = AsyncMock(side_effect=send_slowly)
+    slowest.send_text = AsyncMock(side_effect=send_slowly)
+    slowest.close = AsyncMock()
+    for websocket in (slow, fast, slowest):
+        websocket_manager.connections[WebsocketConnectionType.MESSAGE].setdefault(
+            "message", set()
+        ).add(websocket)
+        websocket_manager.connection_subscriptions[websocket] = {
+            WebsocketConnectionType.MESSAGE: {"message"},
+            WebsocketConnectionType.HEALTH: set(),
+        }
+    websocket_manager.connections[WebsocketConnectionType.MESSAGE]["other"] = {slowest}
+    websocket_manager.connection_subscriptions[slowest][WebsocketConnectionType.MESSAGE].add(
+        "other"
+    )
+
+    for step in range(3):
+        await asyncio.wait_for(websocket_manager.broadcast("message", {"step": step}), timeout=1)
+        await asyncio.sleep(0)
+
+    # The update of another message overflows the queue of the slowest client
+    await websocket_manager.broadcast("other", {"step": 0})
+    await websocket_manager.broadcast("message", {"step": 3})
+    await asyncio.sleep(0)
+    assert slowest not in websocket_manager.connection_subscriptions
+    slowest.close.assert_awaited_once_with(1013)
+
+    release.set()
+    await websocket_manager.drain()
+    assert [json.loads(call.args[0])["step"] for call in fast.send_text.call_args_list] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+    # The first update was in flight, and the queued ones were replaced by the latest
+    assert [json.loads(call.args[0])["step"] for call in slow.send_text.call_args_list] == [0, 3]
+
+    metrics = websocket_manager.get_metrics()
+    assert metrics["superseded_frames"] == 3
+    assert metrics["slow_consumer_disconnects"] == 1
+    assert metrics["dropped_frames"] == 2
+    assert metrics["queue_depth"] == 0
+    await websocket_manager.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_websocket_manager_sends_negotiated_binary_encoding(websocket_manager):
+    """Updates go to each client in its encoding, and control messages stay JSON text."""
+    msgpack = pytest.importorskip("msgpack")
+    binary_client, text_client = MagicMock(), MagicMock()
+    for websocket in (binary_client, text_client):
+        websocket.send_text = AsyncMock()
+        websocket.send_bytes = AsyncMock()
+
+    assert websocket_manager.set_encoding(binary_client, "msgpack") == FrameEncoding.MSGPACK
+    await websocket_manager.connect(binary_client, "message")
+    await websocket_manager.connect(text_client, "message")
+
+    frame = encode_message_update("message", {"stdout": "token"})
+    await websocket_manager.broadcast_frame("message", frame)
+    await websocket_manager.drain()
+
+    assert json.loads(binary_client.send_text.call_args.args[0])["encoding"] == "msgpack"
+    assert msgpack.unpackb(binary_client.send_bytes.call_args.args[0])["stdout"] == "token"
+    assert text_client.send_text.call_args.args[0] == frame.with_sequence(1).text
+    text_client.send_bytes.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_websocket_manager_replays_missed_updates():
+    """A client that resumes gets the latest update if it missed any."""
+    websocket_manager = WebSocketManager()
+    for step in range(3):
+        await websocket_manager.broadcast("message", {"step": step})
+
+    websocket = MagicMock()
+    websocket.send_text = AsyncMock()
+    await websocket_manager.connect(websocket, "message")
+
+    assert websocket_manager.replay(websocket, "message", 1)
+    assert websocket_manager.replay(websocket, "message", 3)
+    assert not websocket_manager.replay(websocket, "message", 5)
+    await websocket_manager.broadcast("message", {"step": 3})
+    await websocket_manager.drain()
+
+    frames = [json.loads(call.args[0]) for call in websocket.send_text.call_args_list[1:]]
+    assert [frame.get("type") for frame in frames] == ["resume", None, "resume", "resume", None]
+    assert frames[0]["status"] == "complete" and frames[0]["frames"] == 1
+    assert frames[1]["sequence"] == 3 and frames[1]["step"] == 2
+    assert frames[2]["status"] == "complete" and frames[2]["frames"] == 0
+    assert frames[3]["status"] == "incomplete" and frames[3]["frames"] == 0
+    assert frames[-1]["sequence"] == 4 and frames[-1]["step"] == 3
+    assert websocket_manager.get_metrics()["replayed_frames"] == 1
+    # Only the latest frame of the message is kept
+    buffer = websocket_manager.replay_buffers[(WebsocketConnectionType.MESSAGE, "message")]
+    assert buffer.frame is not None and json.loads(buffer.frame.text)["step"] == 3
+
+
 @pytest.mark.asyncio
 async def test_websocket_endpoint(mock_get_websocket_manager):
     """Test the WebSocket endpoint."""
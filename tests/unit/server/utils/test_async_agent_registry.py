@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from local_operator.agents import AgentRegistry
+from local_operator.server.utils.async_agent_registry import (
+    AsyncAgentRegistry,
+    ReadWriteLock,
+)
+
+
+@pytest.fixture
+def mock_registry():
+    return MagicMock(spec=AgentRegistry)
+
+
+@pytest.fixture
+def async_registry(mock_registry):
+    registry = AsyncAgentRegistry(mock_registry, max_workers=4)
+    yield registry
+    registry.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_calls_run_off_the_event_loop(async_registry, mock_registry):
+    loop_thread = threading.get_ident()
+    call_threads = []
+
+    def load_agent_state(agent_id):
+        call_threads.append(threading.get_ident())
+        return f"state of {agent_id}"
+
+    mock_registry.load_agent_state.side_effect = load_agent_state
+
+    assert await async_registry.load_agent_state("agent-1") == "state of agent-1"
+    mock_registry.load_agent_state.assert_called_once_with("agent-1")
+    assert call_threads and call_threads[0] != loop_thread
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_do_not_block_the_event_loop(async_registry, mock_registry):
+    mock_registry.get_agent_conversation_history.side_effect = lambda _: time.sleep(0.3) or []
+
+    lag = 0.0
+
+    async def measure_lag():
+        nonlocal lag
+        for _ in range(20):
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    await asyncio.gather(async_registry.get_agent_conversation_history("agent-1"), measure_lag())
+
+    assert lag < 0.05
+
+
+@pytest.mark.asyncio
+async def test_writes_exclude_reads_of_the_same_agent(async_registry, mock_registry):
+    events = []
+
+    def load_agent_state(agent_id):
+        events.append(("read start", agent_id))
+        time.sleep(0.05)
+        events.append(("read end", agent_id))
+
+    def save_agent_state(agent_id, agent_state):
+        events.append(("write start", agent_id))
+        time.sleep(0.05)
+        events.append(("write end", agent_id))
+
+    mock_registry.load_agent_state.side_effect = load_agent_state
+    mock_registry.save_agent_state.side_effect = save_agent_state
+
+    await asyncio.gather(
+        async_registry.load_agent_state("a"),
+        async_registry.load_agent_state("a"),
+        async_registry.save_agent_state("a", MagicMock()),
+        async_registry.load_agent_state("a"),
+    )
+
+    # Both reads run together, the write waits for them, and the last read waits for it
+    assert [event for event, _ in events[:2]] == ["read start", "read start"]
+    assert [event for event, _ in events[4:]] == [
+        "write start",
+        "write end",
+        "read start",
+        "read end",
+    ]
+    assert async_registry._locks == {}
+
+
+@pytest.mark.asyncio
+async def test_creates_exclude_all_other_calls(async_registry, mock_registry):
+    running = []
+    overlaps = []
+
+    def call(name):
+        def run(*args):
+            if running:
+                overlaps.append((name, list(running)))
+            running.append(name)
+            time.sleep(0.05)
+            running.remove(name)
+
+        return run
+
+    mock_registry.create_agent.side_effect = call("create")
+    mock_registry.import_agent.side_effect = call("import")
+    mock_registry.list_agents.side_effect = call("list")
+    mock_registry.load_agent_state.side_effect = call("load")
+
+    await asyncio.gather(
+        async_registry.create_agent(MagicMock()),
+        async_registry.create_agent(MagicMock()),
+        async_registry.list_agents(),
+        async_registry.import_agent(MagicMock()),
+        async_registry.load_agent_state("a"),
+    )
+
+    # Only the list and the load, which both hold the registry lock shared, may overlap
+    assert all({name, *others} == {"list", "load"} for name, others in overlaps)
+    assert mock_registry.create_agent.call_count == 2
+    assert async_registry._registry_lock.idle
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_holds_the_lock_until_it_ends(async_registry, mock_registry):
+    started = threading.Event()
+    finished = threading.Event()
+
+    def save_agent_state(agent_id, agent_state):
+        started.set()
+        time.sleep(0.1)
+        finished.set()
+
+    mock_registry.save_agent_state.side_effect = save_agent_state
+    mock_registry.load_agent_state.side_effect = lambda _: finished.is_set()
+
+    write = asyncio.create_task(async_registry.save_agent_state("a", MagicMock()))
+    while not started.is_set():
+        await asyncio.sleep(0.01)
+    write.cancel()
+
+    assert await async_registry.load_agent_state("a") is True
+
+
+@pytest.mark.asyncio
+async def test_read_write_lock_serves_waiters_in_order():
+    lock = ReadWriteLock()
+    await lock.acquire(write=False)
+
+    writer = asyncio.create_task(lock.acquire(write=True))
+    reader = asyncio.create_task(lock.acquire(write=False))
+    await asyncio.sleep(0)
+    assert not writer.done() and not reader.done()
+
+    lock.release(write=False)
+    await asyncio.sleep(0)
+    assert writer.done() and not reader.done()
+
+    lock.release(write=True)
+    await asyncio.sleep(0)
+    assert reader.done()
+
+    lock.release(write=False)
+    assert lock.idle
@@ -20,6 +20,7 @@ from local_operator.types import (
     ConversationRole,
     ExecutionType,
     ProcessResponseStatus,
+    ResourceLimits,
 )
 
 
@@ -478,6 +479,20 @@ def test_update_agent(temp_agents_dir: Path, test_case):
     assert updated_agent.security_prompt == test_case["expected_prompt"]
 
 
+def test_update_agent_resource_limits(temp_agents_dir: Path):
+    registry = AgentRegistry(temp_agents_dir)
+    agent = registry.create_agent(AgentEditFields.model_validate({"name": "Limited Agent"}))
+
+    registry.update_agent(
+        agent.id,
+        AgentEditFields.model_validate({"resource_limits": {"wall_time_seconds": 30}}),
+    )
+
+    assert registry.get_agent(agent.id).resource_limits == ResourceLimits(wall_time_seconds=30)
+    reloaded = AgentRegistry(temp_agents_dir)
+    assert reloaded.get_agent(agent.id).resource_limits == ResourceLimits(wall_time_seconds=30)
+
+
 def test_delete_agent(temp_agents_dir: Path):
     registry = AgentRegistry(temp_agents_dir)
     agent_name = "Agent to Delete"
@@ -0,0 +1,61 @@
+import asyncio
+import io
+import logging
+import sys
+from typing import TextIO
+
+import pytest
+
+from local_operator.capture import OutputCapture, capture_output, get_output_stream
+
+
+def make_capture() -> OutputCapture:
+    log_handler = logging.StreamHandler(io.StringIO())
+    log_handler.setLevel(logging.WARNING)
+    return OutputCapture(io.StringIO(), io.StringIO(), log_handler)
+
+
+def get_text(stream: TextIO) -> str:
+    assert isinstance(stream, io.StringIO)
+    return stream.getvalue()
+
+
+def get_log_output(capture: OutputCapture) -> str:
+    assert isinstance(capture.log_handler, logging.StreamHandler)
+    return get_text(capture.log_handler.stream)
+
+
+@pytest.mark.asyncio
+async def test_capture_output_routes_output_of_concurrent_tasks():
+    async def run(name: str, capture: OutputCapture) -> None:
+        with capture_output(capture):
+            for i in range(3):
+                print(f"{name} {i}")
+                await asyncio.sleep(0)
+            await asyncio.to_thread(lambda: print(f"{name} thread", file=sys.stderr))
+            logging.getLogger("test_capture").warning(f"{name} warning")
+            logging.getLogger("test_capture").info(f"{name} info")
+
+    first, second = make_capture(), make_capture()
+    await asyncio.gather(run("first", first), run("second", second))
+
+    assert get_text(first.stdout) == "first 0\nfirst 1\nfirst 2\n"
+    assert get_text(second.stdout) == "second 0\nsecond 1\nsecond 2\n"
+    assert get_text(first.stderr) == "first thread\n"
+    assert get_text(second.stderr) == "second thread\n"
+    assert get_log_output(first) == "first warning\n"
+    assert get_log_output(second) == "second warning\n"
+
+
+def test_capture_output_leaves_other_contexts_alone(capsys):
+    capture = make_capture()
+
+    with capture_output(capture):
+        print("captured")
+        assert get_output_stream("stdout") is capture.stdout
+        with pytest.raises(EOFError):
+            input()
+    print("not captured")
+
+    assert get_text(capture.stdout) == "captured\n"
+    assert capsys.readouterr().out == "not captured\n"
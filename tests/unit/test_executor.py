@@ -1,25 +1,39 @@
+import asyncio
 import io
+import os
 import subprocess
 import tempfile
 import textwrap
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Generator
+from typing import Any, Dict, Generator, List
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import AIMessageChunk, BaseMessage
 from openai import APIError
 
 from local_operator.executor import (
+    ATTACHMENT_TOKEN_ESTIMATE,
+    CONTEXT_TRUNCATION_NOTICE,
+    MESSAGE_TOKEN_OVERHEAD,
     CodeExecutionError,
     CodeExecutionResult,
     ConfirmSafetyResult,
     LocalCodeExecutor,
+    ModelTask,
+    StreamTokenUsage,
     get_confirm_safety_result,
     get_context_vars_str,
+    get_stable_prefix_length,
+    order_volatile_records_last,
+    pack_conversation_context,
     process_json_response,
+    select_cache_breakpoints,
 )
+from local_operator.helpers import get_tokenizer
+from local_operator.kernel import KernelPool
+from local_operator.model.registry import ModelInfo
 from local_operator.operator import Operator, OperatorType
 from local_operator.tools.general import ToolRegistry
 from local_operator.types import (
@@ -28,8 +42,10 @@ from local_operator.types import (
     ConversationRecord,
     ConversationRole,
     ExecutionType,
+    FileReadRange,
     ProcessResponseStatus,
     RequestClassification,
+    ResourceLimits,
     ResponseJsonSchema,
 )
 
@@ -79,6 +95,7 @@ def executor(mock_model_config, test_tool_registry):
     agent.name = "Test Agent"
     agent.version = "1.0.0"
     agent.security_prompt = ""
+    agent.resource_limits = None
 
     # Create a fresh AgentState for each test
     fresh_agent_state = AgentState(
@@ -837,6 +854,8 @@ def test_limit_conversation_history(executor):
                     content="<system>Some conversation history has been truncated for brevity.</system>",  # noqa: E501
                     should_summarize=False,
                 ),
+                ConversationRecord(role=ConversationRole.ASSISTANT, content="msg2"),
+                ConversationRecord(role=ConversationRole.USER, content="msg3"),
                 ConversationRecord(role=ConversationRole.ASSISTANT, content="msg4"),
             ],
         },
@@ -1707,6 +1726,7 @@ async def test_write_file_action(
 
     assert actual_content == expected_content
     assert "Successfully wrote to file" in result.formatted_print
+    assert "bytes in" in result.formatted_print
     assert str(file_path) in executor.agent_state.conversation[-1].content
 
 
@@ -1797,6 +1817,25 @@ async def test_edit_file_action(
         assert str(file_path) in executor.agent_state.conversation[-1].content
 
 
+@pytest.mark.asyncio
+async def test_edit_file_action_diffs_the_closest_region_of_large_files(
+    executor: LocalCodeExecutor, tmp_path: Path
+) -> None:
+    lines = [f"value_{i} = compute({i})\n" for i in range(50000)]
+    file_path = tmp_path / "large.py"
+    file_path.write_text("".join(lines))
+
+    search = "value_40000 = compute(40000)\nvalue_40001 = compute(4001)\n"
+    with pytest.raises(ValueError) as exc_info:
+        await executor.edit_file(str(file_path), [{"find": search, "replace": ""}])
+
+    message = str(exc_info.value)
+    assert "(lines approx. 39999-40004)" in message
+    assert "- value_40001 = compute(4001)\n" in message
+    assert "+ value_40001 = compute(40001)\n" in message
+    assert file_path.read_text() == "".join(lines)
+
+
 @pytest.mark.parametrize(
     "initial_history, expected_history",
     [
@@ -2303,8 +2342,1090 @@ def test_append_to_history_limits_history_length(executor):
         executor.append_to_history(record)
 
     # Verify only the most recent messages are kept
-    assert len(executor.agent_state.conversation) == 4
+    assert len(executor.agent_state.conversation) == 5
     assert executor.agent_state.conversation[0].content == "System prompt"
     assert "truncated" in executor.agent_state.conversation[1].content
-    assert executor.agent_state.conversation[2].content == "Message 4"
-    assert executor.agent_state.conversation[3].content == "Message 5"
+    assert executor.agent_state.conversation[2].content == "Message 3"
+    assert executor.agent_state.conversation[3].content == "Message 4"
+    assert executor.agent_state.conversation[4].content == "Message 5"
+
+
+def test_limit_conversation_history_drops_whole_blocks(executor):
+    executor.max_conversation_history = 8
+    executor.summary_block_size = 4
+    executor.agent_state.conversation = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="System prompt")
+    ]
+
+    contents = []
+    for i in range(12):
+        executor.append_to_history(
+            ConversationRecord(role=ConversationRole.USER, content=f"Message {i+1}")
+        )
+        contents.append([record.content for record in executor.agent_state.conversation[2:]])
+
+    # The oldest block is dropped once the limit is exceeded, and the start of the
+    # history stays the same until the limit is exceeded again
+    assert contents[8] == [f"Message {i}" for i in range(5, 10)]
+    assert contents[11] == [f"Message {i}" for i in range(5, 13)]
+    assert executor.agent_state.conversation[1].content == CONTEXT_TRUNCATION_NOTICE
+    assert [record.content for record in executor.agent_state.conversation].count(
+        CONTEXT_TRUNCATION_NOTICE
+    ) == 1
+
+
+def test_order_volatile_records_last():
+    records = [
+        ConversationRecord(content="system", is_system_prompt=True),
+        ConversationRecord(content="msg1"),
+        ConversationRecord(content="write result", ephemeral=True, ephemeral_steps=1),
+        ConversationRecord(content="msg2"),
+        ConversationRecord(content="hud", ephemeral=True),
+    ]
+
+    ordered = order_volatile_records_last(records)
+
+    assert [record.content for record in ordered] == [
+        "system",
+        "msg1",
+        "msg2",
+        "write result",
+        "hud",
+    ]
+    assert get_stable_prefix_length(ordered) == 3
+
+
+@pytest.mark.asyncio
+async def test_invoke_model_sends_ephemeral_records_last(executor):
+    sent_messages: List[List[Dict[str, Any]]] = []
+
+    async def mock_astream(messages, *args, **kwargs):
+        sent_messages.append(messages)
+        yield AIMessageChunk(content="ok")
+
+    executor.model_configuration.instance.astream = mock_astream
+    executor.agent_state.conversation = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system", is_system_prompt=True),
+        ConversationRecord(role=ConversationRole.USER, content="msg1"),
+        ConversationRecord(
+            role=ConversationRole.USER, content="write result", ephemeral=True, ephemeral_steps=1
+        ),
+        ConversationRecord(role=ConversationRole.ASSISTANT, content="msg2"),
+    ]
+
+    executor.update_ephemeral_messages()
+    await executor.invoke_model(executor.agent_state.conversation)
+    executor.append_to_history(ConversationRecord(role=ConversationRole.USER, content="msg3"))
+    executor.update_ephemeral_messages()
+    await executor.invoke_model(executor.agent_state.conversation)
+
+    first_call = [message["content"][0]["text"] for message in sent_messages[0]]
+    second_call = [message["content"][0]["text"] for message in sent_messages[1]]
+
+    assert first_call[:3] == ["system", "msg1", "msg2"]
+    assert first_call[3] == "write result"
+    assert first_call[4].startswith("<system>")
+    # The stable records of the first call are an unchanged prefix of the second call
+    assert second_call[:4] == ["system", "msg1", "msg2", "msg3"]
+    assert "write result" not in second_call
+
+
+@pytest.mark.parametrize(
+    "records, previous_prefix_length, expected",
+    [
+        ([], 0, []),
+        (
+            [ConversationRecord(content="system", is_system_prompt=True)],
+            0,
+            [0],
+        ),
+        (
+            [
+                ConversationRecord(content="system", is_system_prompt=True),
+                ConversationRecord(content="msg1"),
+                ConversationRecord(content="msg2"),
+                ConversationRecord(content="hud", ephemeral=True),
+            ],
+            0,
+            [0, 2],
+        ),
+        (
+            [
+                ConversationRecord(content="system", is_system_prompt=True),
+                ConversationRecord(content="msg1"),
+                ConversationRecord(content="write result", ephemeral=True, ephemeral_steps=1),
+                ConversationRecord(content="msg2"),
+                ConversationRecord(content="hud", ephemeral=True),
+            ],
+            0,
+            [0, 1],
+        ),
+        (
+            [
+                ConversationRecord(content="system", is_system_prompt=True),
+                ConversationRecord(content="summary", summarized=True),
+                ConversationRecord(content="msg2"),
+                ConversationRecord(content="msg3"),
+                ConversationRecord(content="msg4"),
+                ConversationRecord(content="hud", ephemeral=True),
+            ],
+            4,
+            [0, 1, 3, 4],
+        ),
+    ],
+)
+def test_select_cache_breakpoints(records, previous_prefix_length, expected):
+    assert select_cache_breakpoints(records, previous_prefix_length) == expected
+
+
+@pytest.mark.asyncio
+async def test_summarize_old_steps_waits_for_full_block(executor):
+    summarize_mock = AsyncMock(return_value="[SUMMARY]")
+    executor._summarize_conversation_step = summarize_mock
+    executor.detail_conversation_length = 2
+    executor.summary_block_size = 4
+    executor.agent_state.conversation = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system prompt"),
+    ] + [ConversationRecord(role=ConversationRole.USER, content=f"msg{i}") for i in range(5)]
+
+    await executor._summarize_old_steps()
+
+    summarize_mock.assert_not_called()
+
+    executor.agent_state.conversation.append(
+        ConversationRecord(role=ConversationRole.USER, content="msg5")
+    )
+
+    await executor._summarize_old_steps()
+
+    assert summarize_mock.call_count == 4
+    assert [record.summarized for record in executor.agent_state.conversation] == [
+        False,
+        True,
+        True,
+        True,
+        True,
+        False,
+        False,
+    ]
+
+
+def count_words(record: ConversationRecord) -> int:
+    return len(record.content.split())
+
+
+def test_pack_conversation_context_within_budget():
+    records = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system", is_system_prompt=True),
+        ConversationRecord(role=ConversationRole.USER, content="one two three"),
+    ]
+
+    result = pack_conversation_context(records, 10, count_words)
+
+    assert result.records == records
+    assert result.excluded == []
+    assert result.token_count == 4
+
+
+def test_pack_conversation_context_drops_oldest_records():
+    records = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system", is_system_prompt=True),
+        ConversationRecord(role=ConversationRole.USER, content="word " * 50),
+        ConversationRecord(role=ConversationRole.ASSISTANT, content="old reply"),
+        ConversationRecord(role=ConversationRole.USER, content="new request"),
+        ConversationRecord(role=ConversationRole.ASSISTANT, content="new reply"),
+    ]
+    notice_tokens = len(CONTEXT_TRUNCATION_NOTICE.split())
+
+    result = pack_conversation_context(records, 1 + notice_tokens + 6, count_words)
+
+    assert [record.content for record in result.records] == [
+        "system",
+        CONTEXT_TRUNCATION_NOTICE,
+        "old reply",
+        "new request",
+        "new reply",
+    ]
+    assert result.excluded == [records[1]]
+    assert result.token_count <= 1 + notice_tokens + 6
+
+
+def test_pack_conversation_context_truncates_large_record():
+    large_content = "word " * 1000
+    records = [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system", is_system_prompt=True),
+        ConversationRecord(role=ConversationRole.USER, content=large_content),
+    ]
+
+    result = pack_conversation_context(records, 500, count_words)
+
+    assert result.token_count <= 500
+    assert result.records[0] == records[0]
+    assert result.records[-1].content.endswith("[... truncated to fit the context window]")
+    assert result.excluded == [records[1]]
+    assert records[1].content == large_content
+
+
+def build_packing_records(count: int) -> List[ConversationRecord]:
+    return [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system", is_system_prompt=True)
+    ] + [
+        ConversationRecord(role=ConversationRole.USER, content=f"record {idx} " + "word " * 8)
+        for idx in range(count)
+    ]
+
+
+def summarize_first_word(record: ConversationRecord) -> ConversationRecord:
+    return record.model_copy(update={"content": record.content.split()[1], "summarized": True})
+
+
+def test_pack_conversation_context_summarizes_before_dropping():
+    records = build_packing_records(8)
+    notice_tokens = len(CONTEXT_TRUNCATION_NOTICE.split())
+
+    result = pack_conversation_context(
+        records,
+        1 + notice_tokens + 4 * 10 + 2,
+        count_words,
+        summarize=summarize_first_word,
+        block_size=2,
+    )
+
+    assert [record.content for record in result.records[:4]] == [
+        "system",
+        CONTEXT_TRUNCATION_NOTICE,
+        "2",
+        "3",
+    ]
+    assert result.records[4:] == records[5:]
+    assert result.excluded == records[1:5]
+    assert all(not record.summarized for record in records)
+
+
+def test_pack_conversation_context_drops_records_without_summary():
+    records = build_packing_records(4)
+    notice_tokens = len(CONTEXT_TRUNCATION_NOTICE.split())
+
+    result = pack_conversation_context(
+        records,
+        1 + notice_tokens + 2 * 10 + 2,
+        count_words,
+        summarize=lambda record: None,
+        block_size=2,
+    )
+
+    assert result.records == [records[0], result.records[1]] + records[3:]
+    assert result.excluded == records[1:3]
+
+
+def test_pack_conversation_context_cut_moves_in_blocks():
+    notice_tokens = len(CONTEXT_TRUNCATION_NOTICE.split())
+    budget = 1 + notice_tokens + 5 * 10
+
+    packed = [
+        pack_conversation_context(build_packing_records(count), budget, count_words, block_size=2)
+        for count in (6, 7, 8)
+    ]
+
+    assert [len(result.excluded) for result in packed] == [2, 2, 4]
+    # Between block boundaries the packed conversation only grows at the end
+    assert packed[1].records[: len(packed[0].records)] == packed[0].records
+
+
+def test_get_record_context_token_count_counts_attachments(executor):
+    record = ConversationRecord(role=ConversationRole.USER, content="hello world")
+    with_files = ConversationRecord(
+        role=ConversationRole.USER, content="hello world", files=["a.png", "b.png"]
+    )
+
+    content_tokens = executor.get_record_token_count(record)
+
+    assert (
+        executor.get_record_context_token_count(record) == content_tokens + MESSAGE_TOKEN_OVERHEAD
+    )
+    assert executor.get_record_context_token_count(with_files) == (
+        content_tokens + MESSAGE_TOKEN_OVERHEAD + 2 * ATTACHMENT_TOKEN_ESTIMATE
+    )
+
+
+def test_get_summarized_record_uses_cached_summary(executor):
+    record = ConversationRecord(role=ConversationRole.USER, content="a long message")
+    assert executor.get_summarized_record(record) is None
+
+    executor.summary_cache.set(record, "short")
+    summarized = executor.get_summarized_record(record)
+
+    assert summarized is not None
+    assert summarized.content == "short"
+    assert summarized.summarized
+    assert record.content == "a long message"
+
+
+@pytest.mark.parametrize(
+    "context_window, info_max_tokens, config_max_tokens, expected",
+    [
+        (None, None, None, -1),
+        (-1, -1, None, -1),
+        (100_000, None, None, 100_000 - 4096 - 5_000),
+        (100_000, 8_000, None, 100_000 - 8_000 - 5_000),
+        (100_000, 8_000, 2_000, 100_000 - 2_000 - 5_000),
+        (10_000, 64_000, None, 10_000 - 5_000 - 500),
+    ],
+)
+def test_get_context_token_budget(
+    executor, context_window, info_max_tokens, config_max_tokens, expected
+):
+    executor.model_configuration.info.context_window = context_window
+    executor.model_configuration.info.max_tokens = info_max_tokens
+    executor.model_configuration.max_tokens = config_max_tokens
+
+    assert executor.get_context_token_budget() == expected
+
+
+def test_get_record_token_count_recomputed_only_on_content_change(executor):
+    record = ConversationRecord(role=ConversationRole.USER, content="hello world")
+    tokenizer = MagicMock(wraps=get_tokenizer("gpt-4o"))
+    tokenizer.name = "gpt-4o"
+
+    with patch("local_operator.executor.get_tokenizer", return_value=tokenizer):
+        assert executor.get_record_token_count(record) == 2
+        assert executor.get_invoke_token_count([record, record]) == 4
+        assert tokenizer.encode.call_count == 1
+
+        record.content = "hello there world"
+        assert executor.get_record_token_count(record) == 3
+        assert tokenizer.encode.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_invoke_model_uses_streamed_usage_metadata(executor):
+    executor.model_configuration.info = ModelInfo(
+        id="test-model",
+        name="test-model",
+        description="Mock model",
+        input_price=3.0,
+        output_price=15.0,
+        cache_reads_price=0.3,
+        recommended=False,
+    )
+
+    async def mock_astream(*args, **kwargs):
+        yield AIMessageChunk(
+            content="Hello",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 0,
+                "total_tokens": 1000,
+                "input_token_details": {"cache_read": 800},
+            },
+        )
+        yield AIMessageChunk(
+            content=" world",
+            usage_metadata={"input_tokens": 0, "output_tokens": 7, "total_tokens": 7},
+        )
+
+    executor.model_configuration.instance.astream = mock_astream
+
+    await executor.invoke_model([ConversationRecord(role=ConversationRole.USER, content="test")])
+
+    metrics = executor.get_token_metrics()
+    assert metrics.total_prompt_tokens == 1000
+    assert metrics.total_completion_tokens == 7
+    assert metrics.total_cache_read_tokens == 800
+    assert metrics.total_cache_write_tokens == 0
+    assert metrics.total_cost == pytest.approx((200 * 3.0 + 800 * 0.3 + 7 * 15.0) / 1_000_000)
+
+
+def test_stream_token_usage_does_not_double_count_cumulative_usage():
+    usage = StreamTokenUsage()
+
+    # Anthropic message_start
+    usage.add_chunk(
+        AIMessageChunk(
+            content="",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 1,
+                "total_tokens": 1001,
+                "input_token_details": {"cache_read": 800, "cache_creation": 100},
+            },
+        )
+    )
+    # Cumulative Anthropic message_delta
+    usage.add_chunk(
+        AIMessageChunk(
+            content="",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 42,
+                "total_tokens": 1042,
+                "input_token_details": {"cache_read": 800, "cache_creation": 100},
+            },
+        )
+    )
+
+    assert usage.input_tokens == 1000
+    assert usage.output_tokens == 42
+    assert usage.cache_read_tokens == 800
+    assert usage.cache_write_tokens == 100
+
+
+@pytest.mark.asyncio
+async def test_invoke_model_estimates_usage_without_metadata(executor):
+    async def mock_astream(*args, **kwargs):
+        yield AIMessageChunk(content="Hello world")
+
+    executor.model_configuration.instance.astream = mock_astream
+
+    await executor.invoke_model(
+        [ConversationRecord(role=ConversationRole.USER, content="one two three")]
+    )
+
+    metrics = executor.get_token_metrics()
+    assert metrics.total_prompt_tokens == 3 + MESSAGE_TOKEN_OVERHEAD
+    assert metrics.total_completion_tokens == 2
+    assert metrics.total_cache_read_tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_summarize_old_steps_batches_and_caches(executor):
+    executor.detail_conversation_length = 1
+    executor.summary_block_size = 1
+    executor.summary_batch_size = 2
+    long_contents = [f"step {i} " + "word " * 50 for i in range(3)]
+
+    def build_conversation():
+        return [
+            ConversationRecord(role=ConversationRole.SYSTEM, content="system prompt"),
+            *[ConversationRecord(role=ConversationRole.USER, content=c) for c in long_contents],
+            ConversationRecord(role=ConversationRole.USER, content="recent"),
+        ]
+
+    prompts = []
+
+    async def mock_astream(messages):
+        prompt = messages[-1]["content"][0]["text"]
+        prompts.append(prompt)
+        if "<step" in prompt:
+            content = (
+                '<summary id="1">[SUMMARY] batch one</summary>\n'
+                '<summary id="2">[SUMMARY] batch two</summary>'
+            )
+        else:
+            content = "[SUMMARY] single"
+        yield BaseMessage(content=content, type="assistant")
+
+    executor.model_configuration.instance.astream = mock_astream
+    executor.agent_state.conversation = build_conversation()
+
+    await executor._summarize_old_steps(min_token_threshold=10)
+
+    assert len(prompts) == 2
+    assert [record.content for record in executor.agent_state.conversation[1:4]] == [
+        "[SUMMARY] batch one",
+        "[SUMMARY] batch two",
+        "[SUMMARY] single",
+    ]
+    assert all(record.summarized for record in executor.agent_state.conversation[1:4])
+
+    # The same records are summarized from the cache without calling the model again
+    executor.agent_state.conversation = build_conversation()
+
+    await executor._summarize_old_steps(min_token_threshold=10)
+
+    assert len(prompts) == 2
+    assert executor.agent_state.conversation[3].content == "[SUMMARY] single"
+
+
+@pytest.mark.asyncio
+async def test_summarize_conversation_steps_falls_back_for_missing_summaries(executor):
+    async def mock_astream(messages):
+        prompt = messages[-1]["content"][0]["text"]
+        if "<step" in prompt:
+            content = '<summary id="2">[SUMMARY] second</summary>'
+        else:
+            content = "[SUMMARY] fallback"
+        yield BaseMessage(content=content, type="assistant")
+
+    executor.model_configuration.instance.astream = mock_astream
+    records = [
+        ConversationRecord(role=ConversationRole.USER, content="first " * 20),
+        ConversationRecord(role=ConversationRole.ASSISTANT, content="second " * 20),
+    ]
+
+    summaries = await executor._summarize_conversation_steps(records, min_token_threshold=5)
+
+    assert summaries == ["[SUMMARY] fallback", "[SUMMARY] second"]
+
+
+def build_summarizable_conversation(count: int) -> List[ConversationRecord]:
+    return [
+        ConversationRecord(role=ConversationRole.SYSTEM, content="system prompt"),
+    ] + [ConversationRecord(role=ConversationRole.USER, content=f"msg{i}") for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_background_summarization_applies_at_step_boundary(executor):
+    release = asyncio.Event()
+
+    async def summarize(msg, min_token_threshold):
+        await release.wait()
+        return f"[SUMMARY] {msg.content}"
+
+    executor._summarize_conversation_step = summarize
+    executor.detail_conversation_length = 1
+    executor.summary_block_size = 1
+    executor.summary_batch_size = 1
+    executor.agent_state.conversation = build_summarizable_conversation(3)
+
+    executor.start_background_summarization()
+    executor.start_background_summarization()
+    await asyncio.sleep(0.01)
+
+    # Nothing is applied while the summaries are generated or before the step boundary
+    assert not executor.apply_background_summaries()
+    executor.agent_state.conversation[2].content = "msg1 edited"
+    release.set()
+    await asyncio.sleep(0.01)
+
+    assert executor.agent_state.conversation[1].content == "msg0"
+
+    assert executor.apply_background_summaries()
+    assert [record.content for record in executor.agent_state.conversation] == [
+        "system prompt",
+        "[SUMMARY] msg0",
+        "msg1 edited",
+        "msg2",
+    ]
+    assert not executor.agent_state.conversation[2].summarized
+
+
+@pytest.mark.asyncio
+async def test_wait_for_background_summarization(executor):
+    executor._summarize_conversation_step = AsyncMock(return_value="[SUMMARY]")
+    executor.detail_conversation_length = 1
+    executor.summary_block_size = 1
+    executor.agent_state.conversation = build_summarizable_conversation(2)
+
+    executor.start_background_summarization()
+
+    assert await executor.wait_for_background_summarization()
+    assert executor.agent_state.conversation[1].content == "[SUMMARY]"
+    assert not await executor.wait_for_background_summarization()
+
+
+@pytest.mark.asyncio
+async def test_cancel_background_summarization(executor):
+    async def summarize(msg, min_token_threshold):
+        await asyncio.sleep(10)
+        return "[SUMMARY]"
+
+    executor._summarize_conversation_step = summarize
+    executor.detail_conversation_length = 1
+    executor.summary_block_size = 1
+    executor.agent_state.conversation = build_summarizable_conversation(2)
+
+    executor.start_background_summarization()
+    executor.cancel_background_summarization()
+
+    assert not await executor.wait_for_background_summarization()
+    assert executor.agent_state.conversation[1].content == "msg0"
+
+
+@pytest.mark.asyncio
+async def test_summarize_old_steps_limits_concurrency(executor):
+    active_calls = 0
+    max_active_calls = 0
+
+    async def summarize(msg, min_token_threshold):
+        nonlocal active_calls, max_active_calls
+        active_calls += 1
+        max_active_calls = max(max_active_calls, active_calls)
+        await asyncio.sleep(0.01)
+        active_calls -= 1
+        return "[SUMMARY]"
+
+    executor._summarize_conversation_step = summarize
+    executor.detail_conversation_length = 1
+    executor.summary_block_size = 1
+    executor.summary_batch_size = 1
+    executor.summary_concurrency = 2
+    executor.agent_state.conversation = build_summarizable_conversation(7)
+
+    await executor._summarize_old_steps()
+
+    assert max_active_calls == 2
+    assert all(record.summarized for record in executor.agent_state.conversation[1:7])
+
+
+@pytest.mark.asyncio
+async def test_check_and_confirm_safety_skips_llm_for_benign_code(executor, mock_model_config):
+    executor.safety_prescreen = True
+    mock_model_config.instance.astream = MagicMock()
+
+    response = ResponseJsonSchema(
+        code="import math\nprint(math.sqrt(16))",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+
+    safety_result = await executor.check_and_confirm_safety(response)
+
+    assert safety_result == ConfirmSafetyResult.SAFE
+    mock_model_config.instance.astream.assert_not_called()
+    assert executor.safety_metrics.skipped_checks == 1
+    assert executor.safety_metrics.llm_checks == 0
+
+
+def test_get_safety_check_summary(executor):
+    assert executor.get_safety_check_summary() == {}
+
+    executor.safety_metrics.record_llm_check(2.0)
+    executor.safety_metrics.record_skip()
+
+    assert executor.get_safety_check_summary() == {
+        "total_checks": 2,
+        "skip_fraction": 0.5,
+        "seconds_saved": 2.0,
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "code, security_prompt",
+    [
+        ("import os\nos.remove('file.txt')", ""),
+        ("x = 1 + 1", "Never allow any arithmetic"),
+    ],
+)
+async def test_check_and_confirm_safety_uses_llm_when_prescreen_uncertain(
+    executor, mock_model_config, code, security_prompt
+):
+    executor.safety_prescreen = True
+    executor.can_prompt_user = False
+    executor.agent.security_prompt = security_prompt
+
+    async def mock_astream(*args, **kwargs):
+        yield BaseMessage(content="The code is safe\n\n[SAFE]", type="assistant")
+
+    mock_model_config.instance.astream = mock_astream
+
+    response = ResponseJsonSchema(
+        code=code,
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+
+    safety_result = await executor.check_and_confirm_safety(response)
+
+    assert safety_result == ConfirmSafetyResult.SAFE
+    assert executor.safety_metrics.skipped_checks == 0
+    assert executor.safety_metrics.llm_checks == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "verdict, expected_llm_checks",
+    [
+        ("The code is safe\n\n[SAFE]", 1),
+        ("The code is unsafe\n\n[UNSAFE]", 2),
+        ("The code is unsafe but allowed\n\n[OVERRIDE]", 2),
+    ],
+)
+async def test_check_and_confirm_safety_caches_only_safe_verdicts(
+    executor, mock_model_config, verdict, expected_llm_checks
+):
+    executor.can_prompt_user = False
+    llm_calls = 0
+
+    async def mock_astream(*args, **kwargs):
+        nonlocal llm_calls
+        llm_calls += 1
+        yield BaseMessage(content=verdict, type="assistant")
+
+    mock_model_config.instance.astream = mock_astream
+
+    response = ResponseJsonSchema(
+        code="import os\nos.remove('file.txt')",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+
+    first_result = await executor.check_and_confirm_safety(response)
+    second_result = await executor.check_and_confirm_safety(response)
+
+    assert first_result == second_result
+    assert llm_calls == expected_llm_checks
+    assert executor.safety_metrics.llm_checks == expected_llm_checks
+    assert executor.safety_metrics.cached_checks == 2 - expected_llm_checks
+    assert executor.safety_verdict_cache.is_safe(executor.get_safety_verdict_key(response)) is False
+
+
+@pytest.mark.asyncio
+async def test_check_and_confirm_safety_uses_early_review(executor, mock_model_config):
+    executor.can_prompt_user = False
+    llm_calls = 0
+
+    async def mock_astream(*args, **kwargs):
+        nonlocal llm_calls
+        llm_calls += 1
+        yield BaseMessage(content="The code is safe\n\n[SAFE]", type="assistant")
+
+    mock_model_config.instance.astream = mock_astream
+
+    early_response = ResponseJsonSchema(
+        code="import os\nos.remove('file.txt')",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+    final_response = early_response.model_copy(update={"learnings": "Removed the file"})
+
+    assert executor.start_early_safety_review(early_response)
+
+    safety_result = await executor.check_and_confirm_safety(final_response)
+
+    assert safety_result == ConfirmSafetyResult.SAFE
+    assert llm_calls == 1
+    assert executor.safety_metrics.pipelined_checks == 1
+
+
+@pytest.mark.asyncio
+async def test_check_and_confirm_safety_cancels_early_review_when_action_changes(
+    executor, mock_model_config
+):
+    executor.can_prompt_user = False
+    reviewed_payloads = []
+
+    async def mock_astream(messages, *args, **kwargs):
+        reviewed_payloads.append(str(messages[-1]))
+        yield BaseMessage(content="The code is unsafe\n\n[UNSAFE]", type="assistant")
+
+    mock_model_config.instance.astream = mock_astream
+
+    early_response = ResponseJsonSchema(
+        code="import os\nos.remove('file.txt')",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+    final_response = early_response.model_copy(update={"code": "import os\nos.remove('other.txt')"})
+
+    assert executor.start_early_safety_review(early_response)
+    early_review = executor._early_safety_review
+
+    safety_result = await executor.check_and_confirm_safety(final_response)
+
+    assert safety_result == ConfirmSafetyResult.UNSAFE
+    assert early_review is not None
+    with pytest.raises(asyncio.CancelledError):
+        await early_review
+    assert executor.safety_metrics.pipelined_checks == 0
+    assert any("other.txt" in payload for payload in reviewed_payloads)
+
+
+@pytest.mark.asyncio
+async def test_start_early_safety_review_skips_benign_actions(executor):
+    executor.safety_prescreen = True
+
+    response = ResponseJsonSchema(
+        code="print('hello')",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+
+    assert not executor.start_early_safety_review(response)
+    assert not executor.start_early_safety_review(
+        response.model_copy(update={"action": ActionType.DONE})
+    )
+
+
+@pytest.mark.asyncio
+async def test_invoke_model_routes_auxiliary_tasks(executor, mock_model_config):
+    async def main_astream(*args, **kwargs):
+        yield AIMessageChunk(content="main")
+
+    async def auxiliary_astream(*args, **kwargs):
+        yield AIMessageChunk(content="auxiliary")
+
+    mock_model_config.instance.astream = main_astream
+
+    auxiliary_model_config = MagicMock()
+    auxiliary_model_config.hosting = "ollama"
+    auxiliary_model_config.name = "qwen3:4b"
+    auxiliary_model_config.instance = AsyncMock()
+    auxiliary_model_config.instance.astream = auxiliary_astream
+    executor.auxiliary_model_configuration = auxiliary_model_config
+    executor.auxiliary_tasks = {ModelTask.SAFETY, ModelTask.SUMMARIZE}
+
+    messages = [ConversationRecord(role=ConversationRole.USER, content="hello")]
+
+    action_response = await executor.invoke_model(messages)
+    safety_response = await executor.invoke_model(messages, task=ModelTask.SAFETY)
+    classify_response = await executor.invoke_model(messages, task=ModelTask.CLASSIFY)
+
+    assert action_response.content == "main"
+    assert safety_response.content == "auxiliary"
+    assert classify_response.content == "main"
+
+    task_metrics = executor.get_task_metrics()
+    assert task_metrics[ModelTask.SAFETY].calls == 1
+    assert task_metrics[ModelTask.SAFETY].model == "ollama/qwen3:4b"
+    assert task_metrics[ModelTask.ACTION].calls == 1
+    assert set(executor.get_task_usage_summary()) == {"action", "safety", "classify"}
+
+
+def test_get_task_model_configuration_without_auxiliary_model(executor, mock_model_config):
+    assert executor.get_task_model_configuration(ModelTask.SAFETY) is mock_model_config
+    assert executor.get_task_usage_summary() == {}
+
+
+def test_pack_context_counts_tokens_with_the_called_model(executor):
+    auxiliary_model_config = MagicMock()
+    auxiliary_model_config.instance.model = "llama3"
+    auxiliary_model_config.info.context_window = None
+    record = ConversationRecord(role=ConversationRole.USER, content="hello world")
+
+    with patch(
+        "local_operator.executor.get_tokenizer", side_effect=get_tokenizer
+    ) as mock_get_tokenizer:
+        executor.pack_context([record], auxiliary_model_config)
+
+    mock_get_tokenizer.assert_called_with("llama3")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Kernels are not supported on Windows")
+@pytest.mark.asyncio
+async def test_run_code_in_execution_kernel(executor):
+    executor.kernel_pool = KernelPool(0, preload_modules=())
+
+    try:
+        await executor._run_code("import math\nvalue = math.sqrt(16)")
+        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+            await executor._run_code("print(value + 1)")
+
+        assert mock_stdout.getvalue() == "5.0\n"
+        assert "value" not in executor.context
+        assert executor._get_mentioned_variables("value") == {"value": "4.0"}
+        assert executor.kernel_modules == {"math": "math"}
+
+        with pytest.raises(CodeExecutionError) as exc_info:
+            await executor._run_code("x = 1\nraise ValueError('bad value')")
+        assert exc_info.value.message == "bad value"
+        assert exc_info.value.error_line == 2
+        assert "ValueError: bad value" in exc_info.value.agent_info_str()
+
+        await executor.sync_kernel_context()
+        assert executor.context["value"] == 4.0
+        assert executor.context["math"].__name__ == "math"
+    finally:
+        await executor.shutdown_kernel()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Kernels are not supported on Windows")
+@pytest.mark.asyncio
+async def test_exited_kernel_is_replaced_with_the_persisted_context(executor):
+    executor.kernel_pool = KernelPool(0, preload_modules=())
+    executor.context["value"] = 21
+
+    try:
+        await executor._run_code("value = value * 2")
+        assert executor.kernel is not None and executor.kernel.process is not None
+        executor.kernel.kill()
+        await executor.kernel.process.wait()
+        await executor._run_code("doubled = value * 2")
+
+        # The session context was never persisted, so the restarted kernel starts from it
+        assert executor._get_mentioned_variables("doubled") == {"value": "21", "doubled": "42"}
+    finally:
+        await executor.shutdown_kernel()
+
+
+@pytest.mark.asyncio
+async def test_execute_code_records_resource_usage(executor):
+    response = ResponseJsonSchema(
+        code="total = sum(range(1000))",
+        action=ActionType.CODE,
+        content="",
+        file_path="",
+        learnings="",
+        mentioned_files=[],
+        replacements=[],
+        response="",
+    )
+
+    with patch("sys.stdout", new_callable=io.StringIO):
+        execution_result = await executor.execute_code(response)
+
+    assert execution_result.status == ProcessResponseStatus.SUCCESS
+    assert execution_result.resource_usage is not None
+    assert execution_result.resource_usage.peak_rss_bytes > 0
+    assert execution_result.resource_usage.limit_exceeded is None
+
+
+def test_get_step_resource_limits_applies_agent_limits(executor):
+    executor.resource_limits = ResourceLimits(wall_time_seconds=60, memory_mb=1024)
+    executor.agent.resource_limits = ResourceLimits(memory_mb=256)
+
+    assert executor.get_step_resource_limits() == ResourceLimits(
+        wall_time_seconds=60, memory_mb=256
+    )
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Kernels are not supported on Windows")
+@pytest.mark.asyncio
+async def test_run_code_in_kernel_enforces_resource_limits(executor):
+    executor.kernel_pool = KernelPool(0, preload_modules=())
+    executor.resource_limits = ResourceLimits(wall_time_seconds=0.3)
+
+    try:
+        with pytest.raises(CodeExecutionError) as exc_info:
+            await executor._run_code("while True:\n    pass")
+
+        assert exc_info.value.message == "Execution exceeded the wall time limit of 0.3 seconds"
+        assert executor.step_resource_usage is not None
+        assert executor.step_resource_usage.limit_exceeded == exc_info.value.message
+        assert executor.step_resource_usage.wall_time_seconds >= 0.3
+
+        await executor._run_code("value = 1")
+        assert executor.step_resource_usage.limit_exceeded is None
+    finally:
+        await executor.shutdown_kernel()
+
+
+@pytest.mark.asyncio
+async def test_execute_code_captures_output_of_concurrent_executors(
+    mock_model_config, test_tool_registry
+):
+    executors = [LocalCodeExecutor(mock_model_config) for _ in range(2)]
+    for executor in executors:
+        executor.tool_registry = test_tool_registry
+
+    def make_response(name: str) -> ResponseJsonSchema:
+        return ResponseJsonSchema(
+            code=(
+                "import asyncio\n"
+                "for i in range(3):\n"
+                f"    print('{name}', i)\n"
+                "    await asyncio.sleep(0.01)\n"
+            ),
+            action=ActionType.CODE,
+            content="",
+            file_path="",
+            learnings="",
+            mentioned_files=[],
+            replacements=[],
+            response="",
+        )
+
+    first, second = await asyncio.gather(
+        executors[0].execute_code(make_response("first")),
+        executors[1].execute_code(make_response("second")),
+    )
+
+    assert first.stdout == "first 0\nfirst 1\nfirst 2"
+    assert second.stdout == "second 0\nsecond 1\nsecond 2"
+
+
+@pytest.mark.asyncio
+async def test_run_code_decides_async_execution_from_compiled_code(executor):
+    await executor._run_code("import asyncio\nawait asyncio.sleep(0)\nvalue = 1")
+    assert executor.context["value"] == 1
+
+    # Code that only defines coroutines runs synchronously, so it can start its own loop
+    await executor._run_code(
+        "import asyncio\nasync def main():\n    return 2\nresult = asyncio.run(main())"
+    )
+    assert executor.context["result"] == 2
+
+    with pytest.raises(CodeExecutionError) as exc_info:
+        await executor._run_code("await asyncio.sleep(0)\nx = 1\nraise ValueError('bad')")
+    assert exc_info.value.error_line == 3
+    assert "await asyncio.sleep(0)" in exc_info.value.agent_info_str()
+
+
+@pytest.mark.asyncio
+async def test_perform_action_sends_code_that_fails_preflight_back(executor, mock_model_config):
+    executor.code_preflight = True
+    mock_model_config.instance.astream = MagicMock()
+    executor.execute_code = AsyncMock()
+
+    response = ResponseJsonSchema(
+        response="Test response",
+        code="x = 1\nprint(x + y)",
+        action=ActionType.CODE,
+        learnings="",
+        content="",
+        file_path="",
+        mentioned_files=[],
+        replacements=[],
+    )
+
+    with patch("sys.stdout", new_callable=io.StringIO):
+        _, execution_result = await executor.perform_action(
+            response, RequestClassification(type="data_science")
+        )
+
+    assert execution_result is not None
+    assert execution_result.status == ProcessResponseStatus.ERROR
+    assert execution_result.stderr == "Line 2: NameError: name 'y' is not defined"
+    mock_model_config.instance.astream.assert_not_called()
+    executor.execute_code.assert_not_called()
+    assert any(
+        "check before execution found errors" in record.content
+        for record in executor.agent_state.conversation
+    )
+    assert executor.get_preflight_summary() == {"total_checks": 1, "round_trips_avoided": 1}
+
+
+@pytest.mark.asyncio
+async def test_read_file_action_reads_windows_of_large_files(
+    executor: LocalCodeExecutor, tmp_path: Path
+):
+    file_path = tmp_path / "large.log"
+    file_path.write_text("".join(f"line {i}\n" for i in range(1, 1001)))
+
+    result = await executor.read_file(str(file_path), max_text_file_size_bytes=100)
+
+    content = executor.agent_state.conversation[-1].content
+    assert "Successfully read lines 1-13 of file" in result.formatted_print
+    assert "Here are lines 1-13 of 1000 of" in content
+    assert "  13 |    9 | line 13\n" in content
+    assert "The file continues after line 13." in content
+
+    await executor.read_file(str(file_path), read_range=FileReadRange(start_line=500, end_line=501))
+    content = executor.agent_state.conversation[-1].content
+    assert " 500 |   10 | line 500\n 501 |   10 | line 501\n" in content
+
+    await executor.read_file(str(file_path), read_range=FileReadRange(pattern=r"^line 99\d$"))
+    content = executor.agent_state.conversation[-1].content
+    assert " 990 |   10 | line 990\n 991 |   10 | line 991\n" in content
+    assert "line 99\n" not in content
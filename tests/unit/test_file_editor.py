@@ -0,0 +1,80 @@
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from local_operator.file_editor import (
+    PieceTable,
+    encode_file_text,
+    find_closest_region,
+    strip_file_fences,
+    write_text_atomically,
+)
+
+
+def test_piece_table_replaces_in_the_edited_text():
+    table = PieceTable("alpha beta gamma")
+
+    assert table.replace("beta", "BE")
+    assert table.replace("BE gam", "delta ")
+    assert table.replace("a delta", "a-")
+    assert table.replace("", ">")
+    assert not table.replace("beta", "x")
+    assert table.replace("ma", "")
+
+    assert table.text() == ">alpha- "
+
+
+@pytest.mark.parametrize(
+    "search_lines, expected",
+    [
+        (["line 600\n", "line 601 changed\n", "line 602\n"], (600, 603)),
+        (["    line 700 indented\n"], (700, 701)),
+        (["nothing like it\n"], None),
+    ],
+)
+def test_find_closest_region(search_lines, expected):
+    file_lines = [f"line {i}\n" for i in range(1000)]
+    file_lines[700] = "line 700 indented\n"
+
+    assert find_closest_region(file_lines, search_lines) == expected
+
+
+def test_write_text_atomically_keeps_permissions(tmp_path: Path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    os.chmod(path, 0o750)
+
+    write_text_atomically(path, "new")
+
+    assert path.read_text() == "new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o750
+    assert os.listdir(tmp_path) == ["script.sh"]
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("```python\nprint('hi')\n```", "print('hi')"),
+        ("```\na\nb\n```\n", "a\nb\n```\n"),
+        ("```mermaid\ngraph TD\n```", "```mermaid\ngraph TD\n```"),
+        ("```json", ""),
+        ("plain\n```", "plain\n```"),
+    ],
+)
+def test_strip_file_fences(content: str, expected: str):
+    assert strip_file_fences(content) == expected
+
+
+def test_write_text_atomically_skips_unchanged_content(tmp_path: Path):
+    path = tmp_path / "data.txt"
+
+    written = write_text_atomically(path, "content\n", fsync=False)
+    os.utime(path, ns=(0, 0))
+    unchanged = write_text_atomically(path, "content\n")
+
+    assert written.bytes_written == len(encode_file_text("content\n"))
+    assert not written.skipped
+    assert unchanged.skipped and unchanged.bytes_written == 0
+    assert path.stat().st_mtime_ns == 0
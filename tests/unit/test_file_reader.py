@@ -0,0 +1,77 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from local_operator import file_reader
+from local_operator.file_reader import read_file_window, search_file
+
+
+@pytest.fixture
+def log_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # A small stride exercises the scan between indexed lines
+    monkeypatch.setattr(file_reader, "LINE_INDEX_STRIDE", 4)
+    monkeypatch.setattr(file_reader, "_STRIDE_PATTERN", file_reader.re.compile(rb"(?:[^\n]*\n){4}"))
+    file_reader._get_line_index.cache_clear()
+
+    path = tmp_path / "app.log"
+    path.write_bytes(
+        b"".join(
+            f"{i:03d} {'ERROR' if i % 10 == 0 else 'INFO'} event\n".encode() for i in range(1, 51)
+        )
+        + b"051 INFO last"
+    )
+    return path
+
+
+def test_read_file_window_reads_line_and_byte_ranges(log_file: Path):
+    window = read_file_window(log_file, 1000, start_line=6, end_line=9)
+
+    assert window.total_lines == 51
+    assert window.total_bytes == os.path.getsize(log_file)
+    assert window.lines == [(6, "006 INFO event\n007 INFO event\n008 INFO event\n009 INFO event\n")]
+    assert (window.first_line, window.last_line, window.truncated) == (6, 9, False)
+
+    # Byte ranges are expanded to the lines that they touch
+    line_length = len(b"001 INFO event\n")
+    window = read_file_window(
+        log_file, 1000, start_byte=line_length * 2 + 3, end_byte=line_length * 3 + 1
+    )
+    assert (window.first_line, window.last_line) == (3, 4)
+
+    window = read_file_window(log_file, 1000, start_line=50)
+    assert window.lines == [(50, "050 ERROR event\n051 INFO last")]
+    assert read_file_window(log_file, 1000, start_line=60).lines == []
+
+
+def test_read_file_window_truncates_at_whole_lines(log_file: Path):
+    window = read_file_window(log_file, 40)
+
+    assert window.truncated
+    assert window.lines == [(1, "001 INFO event\n002 INFO event\n")]
+
+
+def test_read_file_window_reindexes_changed_file(log_file: Path):
+    assert read_file_window(log_file, 1000).total_lines == 51
+
+    log_file.write_text("one\ntwo\n")
+    os.utime(log_file, ns=(0, 0))
+
+    window = read_file_window(log_file, 1000)
+    assert window.total_lines == 2
+    assert window.lines == [(1, "one\ntwo\n")]
+
+
+def test_search_file_returns_matching_lines(log_file: Path):
+    window = search_file(log_file, r"ERROR|last$", 1000, start_line=15)
+
+    assert [line for line, _ in window.lines] == [20, 30, 40, 50, 51]
+    assert window.lines[0] == (20, "020 ERROR event\n")
+    assert not window.truncated
+
+    window = search_file(log_file, "ERROR", 20)
+    assert window.lines == [(10, "010 ERROR event\n")]
+    assert window.truncated
+
+    with pytest.raises(ValueError):
+        search_file(log_file, "(", 1000)
@@ -0,0 +1,47 @@
+import json
+import pickle
+
+import pytest
+
+from local_operator.frames import (
+    EncodedFrame,
+    FrameEncoding,
+    encode_message_update,
+    negotiate_encoding,
+)
+
+
+def test_encoded_frame_pickles_only_the_json_text():
+    msgpack = pytest.importorskip("msgpack")
+    frame = encode_message_update("message-1", {"stdout": "token"})
+    packed = frame.encode(FrameEncoding.MSGPACK)
+
+    assert json.loads(frame.text) == {
+        "stdout": "token",
+        "message_id": "message-1",
+        "connection_type": "message",
+    }
+    assert msgpack.unpackb(packed) == json.loads(frame.text)
+    assert frame.encode(FrameEncoding.MSGPACK) is packed
+
+    copy = pickle.loads(pickle.dumps(frame))
+    assert isinstance(copy, EncodedFrame)
+    assert copy.text == frame.text
+    assert copy.encode(FrameEncoding.MSGPACK) == packed
+
+
+@pytest.mark.parametrize(
+    "requested, expected",
+    [
+        ("JSON", FrameEncoding.JSON),
+        ("protobuf", FrameEncoding.JSON),
+        (None, FrameEncoding.JSON),
+    ],
+)
+def test_negotiate_encoding(requested, expected):
+    assert negotiate_encoding(requested) == expected
+
+
+def test_encoded_frame_with_sequence():
+    assert json.loads(EncodedFrame('{"a": 1}').with_sequence(7).text) == {"sequence": 7, "a": 1}
+    assert json.loads(EncodedFrame("{}").with_sequence(1).text) == {"sequence": 1}
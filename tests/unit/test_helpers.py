@@ -8,9 +8,11 @@ import pytest
 
 from local_operator.helpers import _extract_initial_think_tags  # Added import
 from local_operator.helpers import (
+    _parse_read_range,
     clean_json_response,
     clean_plain_text_response,
     get_posix_shell_path,
+    get_tokenizer,
     get_windows_registry_path,
     is_marker_inside_json,
     parse_agent_action_xml,
@@ -1201,3 +1203,26 @@ def test_extract_initial_think_tags(text, expected_thinking, expected_remaining)
     thinking, remaining = _extract_initial_think_tags(text)
     assert thinking == expected_thinking
     assert remaining == expected_remaining
+
+
+def test_get_tokenizer_falls_back_and_caches():
+    tokenizer = get_tokenizer("not-a-real-model")
+
+    assert tokenizer.name == get_tokenizer("gpt-4o").name
+    assert get_tokenizer("not-a-real-model") is tokenizer
+
+
+def test_parse_agent_action_xml_read_range():
+    parsed = parse_agent_action_xml(
+        "<action_response>\n<action>READ</action>\n<file_path>\napp.log\n</file_path>\n"
+        "<read_range>\nlines: 100-\nbytes: -4096\npattern: ERROR: .*\nunknown: 1\n"
+        "</read_range>\n</action_response>"
+    )
+
+    assert parsed["read_range"] == {
+        "start_line": 100,
+        "end_byte": 4096,
+        "pattern": "ERROR: .*",
+    }
+    assert _parse_read_range("lines: 7") == {"start_line": 7, "end_line": 7}
+    assert _parse_read_range("lines: a-b\nbytes: 10-20") == {"start_byte": 10, "end_byte": 20}
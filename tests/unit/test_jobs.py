@@ -1,4 +1,5 @@
 import asyncio
+import json
 import os
 import time
 from multiprocessing import Process
@@ -10,6 +11,7 @@ from local_operator.jobs import (
     Job,
     JobContext,
     JobContextRecord,
+    JobEventLog,
     JobManager,
     JobResult,
     JobStatus,
@@ -393,3 +395,67 @@ async def test_job_validator():
     # Test invalid task
     with pytest.raises(ValueError):
         Job(prompt="Test", model="gpt-4", hosting="openai", task="not a task")  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_job_event_log_keeps_latest_message_updates():
+    events = JobEventLog(size=3)
+    events.publish("message", '{"content": "a"}', key=("message", "m1"))
+    events.publish("message", '{"content": "b"}', key=("message", "m2"))
+    events.publish("message", '{"content": "ab"}', key=("message", "m1"))
+
+    kept, complete = events.since(0)
+    assert [(event.id, event.data) for event in kept] == [
+        (2, '{"content": "b"}'),
+        (3, '{"content": "ab"}'),
+    ]
+    assert complete
+
+    kept, complete = events.since(2)
+    assert [event.id for event in kept] == [3]
+    assert complete
+
+    # Unkeyed events are never replaced, and the oldest event is dropped when the log is full
+    events.publish("status", "{}")
+    events.publish("status", "{}")
+    kept, complete = events.since(1)
+    assert [event.id for event in kept] == [3, 4, 5]
+    assert not complete
+    assert events.since(2)[1]
+
+    # An ID after the last event is not one of this log
+    assert not events.since(9)[1]
+
+    assert not await events.wait(0.01)
+    waiter = asyncio.create_task(events.wait(1))
+    await asyncio.sleep(0)
+    events.close()
+    assert await waiter
+    assert events.closed
+
+
+@pytest.mark.asyncio
+async def test_update_job_status_publishes_events(job_manager, sample_job, sample_job_result):
+    job_manager.jobs[sample_job.id] = sample_job
+    job_manager.publish_message_update(sample_job.id, "m1", '{"content": "Hi"}')
+    await job_manager.update_job_status(sample_job.id, JobStatus.PROCESSING)
+    await job_manager.update_job_status(sample_job.id, JobStatus.COMPLETED, sample_job_result)
+
+    events = job_manager.get_job_events(sample_job.id)
+    kept, _ = events.since(0)
+    assert [event.event for event in kept] == ["message", "status", "status"]
+    assert json.loads(kept[2].data) == {
+        "job_id": sample_job.id,
+        "status": "completed",
+        "result": sample_job_result.model_dump(),
+    }
+    assert events.closed
+
+    # Nothing is added after the job ended
+    await job_manager.update_job_status(sample_job.id, JobStatus.CANCELLED)
+    job_manager.publish_message_update(sample_job.id, "m1", "{}")
+    assert events.last_id == 3
+
+    sample_job.created_at = time.time() - 48 * 3600
+    await job_manager.cleanup_old_jobs()
+    assert sample_job.id not in job_manager.job_events
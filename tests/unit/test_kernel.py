@@ -0,0 +1,250 @@
+import asyncio
+import os
+from types import ModuleType
+from typing import List, Tuple
+
+import pytest
+import pytest_asyncio
+
+from local_operator.kernel import (
+    ExecutionKernel,
+    KernelError,
+    KernelPool,
+    compile_agent_code,
+    deserialize_variables,
+    format_context_value,
+    get_error_line,
+    is_async_code,
+    serialize_variables,
+)
+from local_operator.resources import ResourceMonitor
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="Kernels are not supported on Windows")
+
+
+class FakeToolRegistry:
+    def __iter__(self):
+        return iter(["add", "add_async", "fail"])
+
+    def add(self, a: int, b: int) -> int:
+        return a + b
+
+    async def add_async(self, a: int, b: int) -> int:
+        await asyncio.sleep(0)
+        return a + b
+
+    def fail(self) -> None:
+        raise ValueError("tool failed")
+
+
+@pytest_asyncio.fixture
+async def kernel():
+    kernel = ExecutionKernel(preload_modules=())
+    await kernel.start()
+    yield kernel
+    kernel.kill()
+    await kernel.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_kernel_keeps_state_and_forwards_output(kernel):
+    output: List[Tuple[str, str]] = []
+
+    await kernel.execute("x = 41", on_output=lambda name, text: output.append((name, text)))
+    result = await kernel.execute(
+        "import sys\nprint(x + 1)\nprint('warning', file=sys.stderr)\n",
+        on_output=lambda name, text: output.append((name, text)),
+    )
+
+    assert result.error is None
+    assert result.variables["x"] == "41"
+    assert result.modules == {"sys": "sys"}
+    assert ("stdout", "42\n") in output
+    assert ("stderr", "warning\n") in output
+
+
+@pytest.mark.asyncio
+async def test_kernel_runs_top_level_await_and_tools(kernel):
+    result = await kernel.execute(
+        "a = tools.add(1, 2)\nb = await tools.add_async(3, 4)\n", FakeToolRegistry()
+    )
+
+    assert result.error is None
+    assert result.variables["a"] == "3"
+    assert result.variables["b"] == "7"
+
+
+@pytest.mark.asyncio
+async def test_kernel_reports_errors_with_line(kernel):
+    result = await kernel.execute("x = 1\ny = x / 0\n")
+
+    assert result.error == "division by zero"
+    assert result.error_type == "ZeroDivisionError"
+    assert result.error_line == 2
+    assert "ZeroDivisionError" in (result.traceback or "")
+
+
+@pytest.mark.asyncio
+async def test_kernel_reports_tool_errors(kernel):
+    result = await kernel.execute("tools.fail()", FakeToolRegistry())
+
+    assert result.error == "ValueError: tool failed"
+
+
+@pytest.mark.asyncio
+async def test_kernel_interrupt_stops_running_code(kernel):
+    task = asyncio.create_task(kernel.execute("while True:\n    pass\n"))
+    await asyncio.sleep(0.2)
+
+    killed = await kernel.interrupt(grace_period=5)
+    result = await task
+
+    assert not killed
+    assert result.interrupted
+    assert kernel.is_alive
+    assert (await kernel.execute("y = 1")).error is None
+
+
+@pytest.mark.asyncio
+async def test_kernel_interrupt_kills_code_that_ignores_it(kernel):
+    task = asyncio.create_task(
+        kernel.execute(
+            "import time\n"
+            "while True:\n"
+            "    try:\n"
+            "        time.sleep(0.05)\n"
+            "    except KeyboardInterrupt:\n"
+            "        pass\n"
+        )
+    )
+    await asyncio.sleep(0.2)
+
+    killed = await kernel.interrupt(grace_period=0.2)
+
+    assert killed
+    with pytest.raises(KernelError):
+        await task
+    await kernel.process.wait()
+    assert not kernel.is_alive
+
+
+@pytest.mark.asyncio
+async def test_kernel_interrupts_code_over_wall_time_limit(kernel):
+    monitor = ResourceMonitor(wall_time_limit=0.3)
+
+    result = await kernel.execute("while True:\n    pass\n", resource_monitor=monitor)
+
+    assert result.interrupted
+    assert monitor.limit_exceeded == "Execution exceeded the wall time limit of 0.3 seconds"
+    assert monitor.usage["cpu_seconds"] > 0.1
+    assert kernel.is_alive
+    assert (await kernel.execute("y = 1", resource_monitor=ResourceMonitor())).error is None
+
+
+@pytest.mark.asyncio
+async def test_kernel_killed_past_hard_memory_limit(kernel):
+    monitor = ResourceMonitor(memory_limit=64 * 1024 * 1024)
+
+    with pytest.raises(KernelError):
+        await kernel.execute(
+            "import time\n"
+            "data = b'x' * (160 * 1024 * 1024)\n"
+            "while True:\n"
+            "    try:\n"
+            "        time.sleep(0.05)\n"
+            "    except KeyboardInterrupt:\n"
+            "        pass\n",
+            resource_monitor=monitor,
+        )
+
+    assert (monitor.limit_exceeded or "").startswith("Execution exceeded the memory limit")
+    assert monitor.usage["peak_rss_bytes"] > 80 * 1024 * 1024
+    await kernel.process.wait()
+    assert not kernel.is_alive
+
+
+@pytest.mark.asyncio
+async def test_kernel_cancelled_execution_interrupts_code(kernel):
+    task = asyncio.create_task(kernel.execute("import time\nwhile True:\n    time.sleep(0.05)\n"))
+    await asyncio.sleep(0.2)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert kernel.is_alive
+    assert not kernel.is_busy
+
+
+@pytest.mark.asyncio
+async def test_kernel_restart_reloads_context(kernel):
+    await kernel.execute("import os\nvalue = [1, 2, 3]")
+    context = await kernel.get_variables(import_modules=False)
+
+    assert isinstance(context["os"], ModuleType)
+    assert context["value"] == [1, 2, 3]
+
+    await kernel.restart(context)
+    result = await kernel.execute("total = sum(value)\nname = os.name")
+
+    assert result.error is None
+    assert result.variables["total"] == "6"
+    assert result.variables["name"] == os.name
+
+
+@pytest.mark.asyncio
+async def test_kernel_pool_replaces_acquired_kernels():
+    pool = KernelPool(1, preload_modules=())
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+
+    try:
+        assert first is not second
+        assert first.is_alive and second.is_alive
+        assert len(pool._warm) == 1
+    finally:
+        for kernel in (first, second):
+            await kernel.shutdown()
+        await pool.shutdown()
+
+
+def test_compile_agent_code_caches_and_detects_top_level_await():
+    code = "import asyncio\nawait asyncio.sleep(0)\n"
+    hits = compile_agent_code.cache_info().hits
+
+    compiled_code = compile_agent_code(code)
+
+    assert compile_agent_code(code) is compiled_code
+    assert compile_agent_code.cache_info().hits == hits + 1
+    assert is_async_code(compiled_code)
+    assert not is_async_code(compile_agent_code("async def main():\n    await main()\n"))
+    assert not is_async_code(compile_agent_code("x = 'await'\n"))
+
+    with pytest.raises(SyntaxError) as exc_info:
+        compile_agent_code("x = 1\ny = (\n")
+    assert get_error_line(exc_info.value) == 2
+
+
+def test_serialize_variables_skips_unpicklable_values():
+    variables = serialize_variables(
+        {"__builtins__": {}, "tools": object(), "os": os, "items": (i for i in range(3)), "x": 1}
+    )
+
+    assert variables["modules"] == {"os": "os"}
+    assert deserialize_variables(variables) == {"os": os, "x": 1}
+
+
+def test_format_context_value():
+    def add(a: int, b: int) -> int:
+        """Add two numbers."""
+        return a + b
+
+    async def fetch(url: str) -> str:
+        return url
+
+    assert format_context_value("add", add) == "def add(a: int, b: int) -> int: Add two numbers."
+    assert format_context_value("fetch", fetch) == (
+        "async def fetch(url: str) -> str: No description available"
+    )
+    assert format_context_value("text", "a" * 20000).endswith("(truncated due to length limits)")
@@ -454,3 +454,66 @@ def test_process_classification_response_invalid(invalid_content, expect_throw):
         assert classification.planning_required is False
         assert classification.relative_effort == RelativeEffortLevel.LOW
         assert classification.subject_change is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "classification,expected_stream_calls,expected_hits",
+    [
+        pytest.param(
+            RequestClassification(
+                type=RequestType.CONVERSATION,
+                planning_required=False,
+                relative_effort=RelativeEffortLevel.LOW,
+            ),
+            1,
+            1,
+            id="kept_without_planning",
+        ),
+        pytest.param(
+            RequestClassification(
+                type=RequestType.CONTINUE,
+                planning_required=False,
+                relative_effort=RelativeEffortLevel.LOW,
+                subject_change=True,
+            ),
+            2,
+            0,
+            id="discarded_on_subject_change",
+        ),
+        pytest.param(
+            RequestClassification(
+                type=RequestType.SOFTWARE_DEVELOPMENT,
+                planning_required=True,
+                relative_effort=RelativeEffortLevel.HIGH,
+            ),
+            2,
+            0,
+            id="discarded_when_planning",
+        ),
+    ],
+)
+async def test_handle_user_input_speculative_classification(
+    cli_operator, mock_model_config, classification, expected_stream_calls, expected_hits
+):
+    cli_operator.speculative_classification = True
+    stream_calls = []
+
+    async def mock_astream(messages, *args, **kwargs):
+        stream_calls.append(messages)
+        yield BaseMessage(content="Hello there", type="assistant")
+
+    mock_model_config.instance.astream = mock_astream
+
+    with (
+        patch.object(cli_operator, "classify_request", return_value=classification),
+        patch.object(cli_operator, "generate_plan", new_callable=AsyncMock),
+    ):
+        _, final_response = await cli_operator.handle_user_input("hi")
+
+    assert final_response == "Hello there"
+    assert len(stream_calls) == expected_stream_calls
+    assert "hi" in str(stream_calls[-1][-1])
+    assert cli_operator.speculation_metrics.attempts == 1
+    assert cli_operator.speculation_metrics.hits == expected_hits
+    assert cli_operator.executor.agent_state.conversation[-1].content == "Hello there"
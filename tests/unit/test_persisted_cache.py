@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+from local_operator.persisted_cache import PersistedLRUCache
+
+
+def test_persisted_lru_cache_evicts_least_recently_used():
+    cache: PersistedLRUCache[int] = PersistedLRUCache(None, max_entries=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_persisted_lru_cache_round_trip_drops_invalid_values(tmp_path: Path):
+    cache_file = tmp_path / "cache.json"
+    cache: PersistedLRUCache[int] = PersistedLRUCache(
+        cache_file, max_entries=10, is_valid=lambda value: isinstance(value, int) and value > 0
+    )
+
+    cache.set("valid", 1)
+    cache.set("invalid", -1)
+    cache.save()
+
+    assert json.loads(cache_file.read_text()) == {"valid": 1}
+
+    cache_file.write_text(json.dumps({"valid": 2, "invalid": "x"}))
+    reloaded: PersistedLRUCache[int] = PersistedLRUCache(
+        cache_file, max_entries=10, is_valid=lambda value: isinstance(value, int)
+    )
+
+    assert reloaded.get("valid") == 2
+    assert reloaded.get("invalid") is None
+
+
+def test_persisted_lru_cache_pop(tmp_path: Path):
+    cache: PersistedLRUCache[str] = PersistedLRUCache(tmp_path / "cache.json", max_entries=10)
+
+    cache.set("key", "value")
+    cache.pop("key")
+
+    assert cache.get("key") is None
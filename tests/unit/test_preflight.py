@@ -0,0 +1,78 @@
+import asyncio
+
+from local_operator.preflight import PreflightDiagnostic, preflight_check
+from local_operator.tools.general import ToolRegistry
+
+
+def make_tool_registry() -> ToolRegistry:
+    def add(a: int, b: int = 0) -> int:
+        return a + b
+
+    async def fetch(url: str) -> str:
+        await asyncio.sleep(0)
+        return url
+
+    registry = ToolRegistry()
+    registry.add_tool("add", add)
+    registry.add_tool("fetch", fetch)
+    return registry
+
+
+def test_preflight_check_reports_syntax_errors():
+    assert preflight_check("x = 1\nif x\n    print(x)\n") == [
+        PreflightDiagnostic(2, "SyntaxError: expected ':'")
+    ]
+    assert preflight_check("return 1") == [
+        PreflightDiagnostic(1, "SyntaxError: 'return' outside function")
+    ]
+
+
+def test_preflight_check_reports_undefined_names():
+    code = (
+        "import os\n"
+        "from math import sqrt as root\n"
+        "def scale(value, *, factor=2):\n"
+        "    return value * factor\n"
+        "for i, item in enumerate(items):\n"
+        "    print(scale(root(item)), i, os.sep)\n"
+        "print(undefined_name, later)\n"
+        "later = [y for y in range(3)]\n"
+        "print(undefined_name)\n"
+    )
+
+    assert preflight_check(code, {"items": [1, 4]}) == [
+        PreflightDiagnostic(7, "NameError: name 'undefined_name' is not defined")
+    ]
+    # Code that can bind names dynamically, and unknown contexts, are not checked
+    assert preflight_check("globals()['x'] = 1\nprint(x)", {}) == []
+    assert preflight_check("locals()['x'] = 1\nprint(x)", {}) == []
+    assert preflight_check("from math import *\nprint(pi)", {}) == []
+    assert preflight_check("print(undefined_name)") == []
+
+
+def test_preflight_check_reports_invalid_tool_calls():
+    registry = make_tool_registry()
+    code = (
+        "a = tools.add(1, 2)\n"
+        "b = tools.add(1, c=2)\n"
+        "c = await tools.fetch('https://example.com')\n"
+        "tools.fetch('https://example.com')\n"
+        "d = await tools.add(1)\n"
+        "e = tools.missing()\n"
+        "f = tools.add(*[1, 2])\n"
+        "g = asyncio.gather(tools.fetch('a'), tools.fetch('b'))\n"
+    )
+
+    diagnostics = preflight_check(code, {"tools": registry, "asyncio": asyncio}, registry)
+
+    assert [diagnostic.line for diagnostic in diagnostics] == [2, 4, 5, 6]
+    assert diagnostics[0].message == (
+        "TypeError: tools.add() got an unexpected keyword argument 'c'"
+    )
+    assert "tools.fetch is async and must be awaited" in diagnostics[1].message
+    assert "tools.add is not async" in diagnostics[2].message
+    assert diagnostics[3].message == "AttributeError: tools.missing is not an available tool"
+    assert str(diagnostics[3]).startswith("Line 6: ")
+
+    # Code that rebinds tools is not checked against the registry
+    assert preflight_check("tools = object()\ntools.missing()", None, registry) == []
@@ -0,0 +1,78 @@
+import time
+from typing import List
+
+import psutil
+import pytest
+
+from local_operator.resources import ResourceMonitor, cpu_time_limit, resource
+from local_operator.types import ResourceLimits, ResourceUsage
+
+
+def test_resource_monitor_measures_step():
+    monitor = ResourceMonitor()
+    monitor.start()
+
+    data = b"x" * (32 * 1024 * 1024)
+    deadline = time.process_time() + 0.2
+    while time.process_time() < deadline:
+        pass
+
+    monitor.stop()
+    usage = ResourceUsage(**monitor.usage)
+
+    assert len(data) == 32 * 1024 * 1024
+    assert usage.cpu_seconds >= 0.2
+    assert usage.wall_time_seconds >= 0.2
+    assert usage.peak_rss_bytes >= 32 * 1024 * 1024
+    assert usage.io_read_bytes >= 0 and usage.io_write_bytes >= 0
+    assert usage.limit_exceeded is None
+
+
+def test_resource_monitor_reports_exceeded_limit_once():
+    calls: List[bool] = []
+    monitor = ResourceMonitor(wall_time_limit=0.1)
+    monitor.start(on_exceeded=calls.append)
+
+    time.sleep(0.3)
+    monitor.stop()
+
+    assert calls == [False]
+    assert monitor.limit_exceeded == "Execution exceeded the wall time limit of 0.1 seconds"
+    assert monitor.usage["limit_exceeded"] == monitor.limit_exceeded
+
+
+def test_resource_monitor_kills_past_hard_memory_limit():
+    calls: List[bool] = []
+    rss = psutil.Process().memory_info().rss
+    monitor = ResourceMonitor(memory_limit=rss // 2)
+    monitor.start(on_exceeded=calls.append)
+
+    time.sleep(0.2)
+    monitor.stop()
+
+    assert calls == [False, True]
+    assert (monitor.limit_exceeded or "").startswith("Execution exceeded the memory limit")
+
+
+@pytest.mark.skipif(resource is None, reason="The resource module is not available")
+def test_cpu_time_limit_restores_previous_limit():
+    assert resource is not None
+    previous = resource.getrlimit(resource.RLIMIT_CPU)
+
+    with cpu_time_limit(60):
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_CPU)
+        assert soft_limit != resource.RLIM_INFINITY
+        assert hard_limit == previous[1]
+
+    assert resource.getrlimit(resource.RLIMIT_CPU) == previous
+
+
+def test_resource_limits_merge():
+    defaults = ResourceLimits(wall_time_seconds=60, cpu_seconds=30, memory_mb=0)
+
+    merged = defaults.merge(ResourceLimits(cpu_seconds=0, memory_mb=512))
+
+    assert merged == ResourceLimits(wall_time_seconds=60, cpu_seconds=0, memory_mb=512)
+    assert merged.is_limited
+    assert defaults.merge(None) is defaults
+    assert not ResourceLimits().is_limited
@@ -0,0 +1,306 @@
+import math
+import time
+from pathlib import Path
+
+import pytest
+
+from local_operator.safety import (
+    SAFETY_VERDICT_CACHE_FILE_NAME,
+    SafetyAllowlist,
+    SafetyCheckMetrics,
+    SafetyScreenResult,
+    SafetyVerdictCache,
+    get_context_modules,
+    get_safety_verdict_key,
+    normalize_action,
+    screen_action,
+    screen_code,
+    screen_file_action,
+)
+from local_operator.types import ActionType, ResponseJsonSchema
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "x = 1 + 1\nprint(x)",
+        "import math\nprint(math.sqrt(16))",
+        "import numpy as np\narr = np.arange(10)\nprint(arr.mean())",
+        "import pandas as pd\ndf = pd.DataFrame({'a': [1, 2]})\nprint(df.to_dict())",
+        "from collections import Counter\nprint(Counter('hello').most_common(1))",
+        "def square(n):\n    return n * n\n\nprint([square(i) for i in range(5)])",
+        "class Point:\n    pass\n\np = Point()",
+        "values = sorted([3, 1, 2])\nsaved_values = values",
+        "import numpy as np\nnp.random.seed(0)\nprint(np.linalg.norm(np.ones(3)))",
+        "from scipy import stats\nprint(stats.norm.cdf(0))",
+        "try:\n    x = int('a')\nexcept ValueError as error:\n    print(error)",
+        "print(list(map(str, [1, 2])))",
+        "print(list(filter(None, [0, 1])))",
+        "import numpy as np\nprint(list(map(np.sqrt, [1, 4])))",
+        "print(sorted(['b', 'a'], key=str.lower))",
+        "print(max([1, 2], key=lambda n: -n))",
+        "print('{} is {:.2f}'.format('pi', 3.14159))",
+        "import pandas as pd\nprint(pd.concat([pd.Series([1]), pd.Series([2])]).sum())",
+    ],
+)
+def test_screen_code_benign(code: str):
+    assert screen_code(code) == SafetyScreenResult.BENIGN
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import os\nos.remove('file.txt')",
+        "import subprocess\nsubprocess.run(['ls'])",
+        "from os import system",
+        "from math import *",
+        "open('file.txt', 'w').write('data')",
+        "with open('notes.txt') as f:\n    print(f.read())",
+        "eval('1 + 1')",
+        "__import__('os').system('ls')",
+        "import pandas as pd\ndf = pd.read_csv('data.csv')",
+        "import pandas as pd\npd.DataFrame().to_csv('out.csv')",
+        "import numpy as np\nnp.save('arr.npy', np.arange(3))",
+        "from pandas import read_csv",
+        "print(().__class__.__subclasses__())",
+        "result = tools.search_web('query')",
+        "os.listdir('.')",
+        "unknown_function()",
+        "funcs = [print]\nfuncs[0]('hi')",
+        "def broken(:\n    pass",
+        "list(map(exec, [\"import os; os.system('rm -rf ~/x')\"]))",
+        "list(map(eval, [\"__import__('os').system('id')\"]))",
+        "sorted([\"__import__('os').system('id')\"], key=eval)",
+        "list(map(open, ['important.txt'], ['w']))",
+        "total = previous_total + 1",
+        "import sympy\nsympy.S(\"__import__('os').system('id')\")",
+        "import sympy\nsympy.simplify(\"__import__('os').system('id')\")",
+        "import typing\n\ndef f(x: \"__import__('os').system('id')\"):\n    pass\n\n"
+        "typing.get_type_hints(f)",
+        "import numpy as np\nnp.lib.format.open_memmap('data.npy', mode='w+')",
+        "from numpy.lib.format import open_memmap",
+        "import scipy\nscipy.io.mmwrite('/home/u/.bashrc', [[1]])",
+        "import scipy.io\nscipy.io.mmwrite('/home/u/.bashrc', [[1]])",
+        "import operator\n"
+        "bases = list(map(operator.attrgetter('__class__.__base__'), [()]))\n"
+        "subs = list(map(operator.methodcaller('__subclasses__'), bases))[0]\n"
+        "g = list(map(operator.attrgetter('__init__.__globals__'),"
+        " [c for c in subs if 'wrap_close' in str(c)]))[0]\n"
+        "list(map(g['system'], ['id']))",
+        "import functools\nfunctools.reduce(lambda a, b: a + b, [1, 2])",
+        "from operator import attrgetter",
+        "import pandas as pd\npd.io.common.get_handle('/tmp/x', 'w')",
+        "import pandas as pd\npd.ExcelFile('~/.ssh/id_rsa')",
+        "import pandas as pd\npd.io.sql.execute('DROP TABLE users', con)",
+        "from pandas.io.sql import execute",
+        "functions = {'run': print}\nlist(map(functions['run'], ['id']))",
+        "sorted(['id'], key=handlers[0])",
+        "name = '_' + '_class' + '__'",
+        "print('{0.__init__}'.format(print))",
+        "template = '{0.real}'\nprint(template.format(1))",
+    ],
+)
+def test_screen_code_uncertain(code: str):
+    assert screen_code(code) == SafetyScreenResult.UNCERTAIN
+
+
+def test_screen_code_checks_context_modules():
+    code = "print(m.sqrt(4))"
+
+    assert screen_code(code, context_modules={"m": "math"}) == SafetyScreenResult.BENIGN
+    assert screen_code(code, context_modules={"m": "shutil"}) == SafetyScreenResult.UNCERTAIN
+
+
+def test_screen_code_custom_allowlist():
+    code = "import yaml\nprint(yaml.safe_dump({'a': 1}))"
+
+    assert screen_code(code) == SafetyScreenResult.UNCERTAIN
+
+    allowlist = SafetyAllowlist()
+    allowlist.modules.add("yaml")
+
+    assert screen_code(code, allowlist) == SafetyScreenResult.BENIGN
+
+
+def test_get_context_modules():
+    context = {"math": math, "m": math, "value": 1}
+
+    assert get_context_modules(context) == {"math": "math", "m": "math"}
+
+
+def test_screen_file_action(tmp_path: Path):
+    existing_file = tmp_path / "data.txt"
+    existing_file.write_text("data")
+
+    def screen(action: ActionType, file_path: str) -> SafetyScreenResult:
+        return screen_file_action(action, file_path, tmp_path)
+
+    assert screen(ActionType.READ, "data.txt") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.READ, str(existing_file)) == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.READ, ".kube/config") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.READ, "../outside.txt") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, "report.md") == SafetyScreenResult.BENIGN
+    assert screen(ActionType.WRITE, ".env") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, "keys/id_rsa") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, ".docker/config.json") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, ".bash_history") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, "../outside.txt") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.WRITE, "data.txt") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.EDIT, "data.txt") == SafetyScreenResult.UNCERTAIN
+    assert screen(ActionType.READ, "") == SafetyScreenResult.UNCERTAIN
+
+
+def test_screen_action_dispatches_by_action(tmp_path: Path):
+    code_response = ResponseJsonSchema(
+        response="",
+        code="print('hello')",
+        content="",
+        file_path="",
+        mentioned_files=[],
+        replacements=[],
+        action=ActionType.CODE,
+        learnings="",
+    )
+    write_response = code_response.model_copy(
+        update={"action": ActionType.WRITE, "code": "", "file_path": "notes.txt"}
+    )
+    read_response = write_response.model_copy(update={"action": ActionType.READ})
+
+    assert screen_action(code_response, tmp_path) == SafetyScreenResult.BENIGN
+    assert screen_action(write_response, tmp_path) == SafetyScreenResult.BENIGN
+    assert screen_action(read_response, tmp_path) == SafetyScreenResult.UNCERTAIN
+
+
+def test_safety_check_metrics():
+    metrics = SafetyCheckMetrics()
+
+    assert metrics.skip_fraction() == 0.0
+    assert metrics.estimated_seconds_saved() == 0.0
+
+    metrics.record_llm_check(2.0)
+    metrics.record_llm_check(4.0)
+    metrics.record_skip()
+    metrics.record_cache_hit()
+
+    assert metrics.total_checks == 4
+    assert metrics.skip_fraction() == 0.5
+    assert metrics.estimated_seconds_saved() == 6.0
+
+
+def make_response(action: ActionType, **kwargs) -> ResponseJsonSchema:
+    fields = {
+        "response": "",
+        "code": "",
+        "content": "",
+        "file_path": "",
+        "mentioned_files": [],
+        "replacements": [],
+        "learnings": "",
+    }
+    fields.update(kwargs)
+    return ResponseJsonSchema(action=action, **fields)
+
+
+def test_normalize_action_ignores_code_formatting():
+    first = make_response(ActionType.CODE, code="x = 1 + 1  # add\nprint(x)", response="a")
+    second = make_response(ActionType.CODE, code="x=1+1\n\nprint( x )", response="b")
+    different = make_response(ActionType.CODE, code="x = 1 + 2\nprint(x)")
+
+    assert normalize_action(first) == normalize_action(second)
+    assert normalize_action(first) != normalize_action(different)
+
+
+def test_normalize_action_file_actions():
+    write = make_response(ActionType.WRITE, file_path="./out/report.md", content="hello")
+
+    assert normalize_action(write) == normalize_action(
+        make_response(ActionType.WRITE, file_path="out/report.md", content="hello")
+    )
+    assert normalize_action(write) != normalize_action(
+        make_response(ActionType.WRITE, file_path="out/report.md", content="changed")
+    )
+    assert normalize_action(write) != normalize_action(
+        make_response(ActionType.EDIT, file_path="out/report.md", content="hello")
+    )
+
+
+def test_normalize_action_resolves_path_and_existence(tmp_path: Path):
+    first_dir = tmp_path / "first"
+    second_dir = tmp_path / "second"
+    first_dir.mkdir()
+    second_dir.mkdir()
+    write = make_response(ActionType.WRITE, file_path="config.py", content="x = 1")
+
+    assert normalize_action(write, first_dir) != normalize_action(write, second_dir)
+    assert normalize_action(write, first_dir) == normalize_action(
+        make_response(ActionType.WRITE, file_path=str(first_dir / "config.py"), content="x = 1"),
+        tmp_path,
+    )
+
+    new_file_action = normalize_action(write, first_dir)
+    (first_dir / "config.py").write_text("x = 0")
+
+    assert normalize_action(write, first_dir) != new_file_action
+
+
+def test_get_safety_verdict_key_includes_policy_and_model():
+    response = make_response(ActionType.CODE, code="print('hi')")
+    key = get_safety_verdict_key(response, "", "openai/gpt-4o")
+
+    assert key == get_safety_verdict_key(response, "", "openai/gpt-4o")
+    assert key != get_safety_verdict_key(response, "Never print", "openai/gpt-4o")
+    assert key != get_safety_verdict_key(response, "", "anthropic/claude")
+    assert key != get_safety_verdict_key(response, "", "openai/gpt-4o", scope="agent")
+
+
+def test_safety_verdict_cache_expires(monkeypatch):
+    cache = SafetyVerdictCache(ttl=10)
+    now = time.time()
+
+    cache.mark_safe("key")
+
+    assert cache.is_safe("key")
+    assert not cache.is_safe("other")
+
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+
+    assert not cache.is_safe("key")
+
+
+def test_safety_verdict_cache_evicts_least_recently_used():
+    cache = SafetyVerdictCache(max_entries=2)
+
+    cache.mark_safe("a")
+    cache.mark_safe("b")
+    cache.is_safe("a")
+    cache.mark_safe("c")
+
+    assert cache.is_safe("a")
+    assert not cache.is_safe("b")
+    assert cache.is_safe("c")
+
+
+def test_safety_verdict_cache_disabled_with_zero_ttl():
+    cache = SafetyVerdictCache(ttl=0)
+
+    cache.mark_safe("key")
+
+    assert not cache.is_safe("key")
+
+
+def test_safety_verdict_cache_persists_to_file(tmp_path: Path):
+    cache_file = tmp_path / SAFETY_VERDICT_CACHE_FILE_NAME
+
+    cache = SafetyVerdictCache(cache_file=cache_file)
+    cache.mark_safe("key")
+    cache.save()
+
+    assert cache_file.exists()
+    assert SafetyVerdictCache(cache_file=cache_file).is_safe("key")
+
+
+def test_safety_verdict_cache_ignores_corrupt_file(tmp_path: Path):
+    cache_file = tmp_path / SAFETY_VERDICT_CACHE_FILE_NAME
+    cache_file.write_text("not json")
+
+    assert not SafetyVerdictCache(cache_file=cache_file).is_safe("key")
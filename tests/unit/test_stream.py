@@ -1,6 +1,12 @@
+import asyncio
+
 import pytest
 
-from local_operator.stream import stream_action_buffer
+from local_operator.stream import (
+    BufferedStream,
+    is_action_payload_complete,
+    stream_action_buffer,
+)
 from local_operator.types import ActionType
 
 
@@ -458,3 +464,82 @@ def test_stream_action_buffer_cases(
             assert result.replacements == expected_replacements
         if expected_files is not None:
             assert result.files == expected_files
+
+
+@pytest.mark.parametrize(
+    "text,action,expected",
+    [
+        ("<action_response><action>CODE</action><code>print(1)", ActionType.CODE, False),
+        ("<action_response><action>CODE</action><code>print(1)</code>", ActionType.CODE, True),
+        (
+            "<action_response><action>WRITE</action><file_path>a.txt</file_path>",
+            ActionType.WRITE,
+            False,
+        ),
+        (
+            "<action_response><action>WRITE</action><file_path>a.txt</file_path>"
+            "<content>hello</content>",
+            ActionType.WRITE,
+            True,
+        ),
+        (
+            "<action_response><action>EDIT</action><file_path>a.txt</file_path><replacements>",
+            ActionType.EDIT,
+            False,
+        ),
+        (
+            "<action_response><action>READ</action><file_path>a.txt</file_path>",
+            ActionType.READ,
+            True,
+        ),
+        ("<action_response><action>DONE</action><response>ok</response>", ActionType.DONE, False),
+        ("<think><code>x</code></think><action_response><action>CODE", ActionType.CODE, False),
+        ("<action_response><code>x</code>", None, False),
+    ],
+)
+def test_is_action_payload_complete(text, action, expected):
+    assert is_action_payload_complete(text, action) == expected
+
+
+async def produce(items, error=None, delay=0.0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+    if error:
+        raise error
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_replays_buffered_and_live_items():
+    buffered = BufferedStream(produce(["a", "b", "c"], delay=0.01))
+
+    await asyncio.sleep(0.015)
+
+    assert [item async for item in buffered.replay()] == ["a", "b", "c"]
+    assert buffered.done()
+    assert [item async for item in buffered.replay()] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_raises_stream_error_on_replay():
+    buffered = BufferedStream(produce(["a"], error=ValueError("stream failed")))
+    items = []
+
+    with pytest.raises(ValueError, match="stream failed"):
+        async for item in buffered.replay():
+            items.append(item)
+
+    assert items == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_buffered_stream_cancel():
+    buffered = BufferedStream(produce(["a", "b"], delay=1.0))
+
+    buffered.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        async for _ in buffered.replay():
+            pass
+
+    assert buffered.done()
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from local_operator.summary_cache import (
+    SUMMARY_CACHE_FILE_NAME,
+    SummaryCache,
+    get_summary_cache,
+)
+from local_operator.types import ConversationRecord, ConversationRole
+
+
+def test_summary_cache_get_and_set():
+    cache = SummaryCache()
+    record = ConversationRecord(role=ConversationRole.USER, content="long message")
+
+    assert cache.get(record) is None
+
+    cache.set(record, "[SUMMARY] short")
+
+    assert cache.get(record) == "[SUMMARY] short"
+    assert cache.get(ConversationRecord(role=ConversationRole.USER, content="other")) is None
+    assert (
+        cache.get(ConversationRecord(role=ConversationRole.ASSISTANT, content="long message"))
+        is None
+    )
+
+
+def test_summary_cache_evicts_least_recently_used():
+    cache = SummaryCache(max_entries=2)
+    records = [
+        ConversationRecord(role=ConversationRole.USER, content=f"message {i}") for i in range(3)
+    ]
+
+    cache.set(records[0], "summary 0")
+    cache.set(records[1], "summary 1")
+    cache.get(records[0])
+    cache.set(records[2], "summary 2")
+
+    assert cache.get(records[0]) == "summary 0"
+    assert cache.get(records[1]) is None
+    assert cache.get(records[2]) == "summary 2"
+
+
+def test_summary_cache_persists_to_file(tmp_path: Path):
+    cache_file = tmp_path / SUMMARY_CACHE_FILE_NAME
+    record = ConversationRecord(role=ConversationRole.USER, content="long message")
+
+    cache = SummaryCache(cache_file=cache_file)
+    cache.set(record, "[SUMMARY] short")
+    cache.save()
+
+    assert cache_file.exists()
+    assert SummaryCache(cache_file=cache_file).get(record) == "[SUMMARY] short"
+
+
+def test_summary_cache_ignores_corrupt_file(tmp_path: Path):
+    cache_file = tmp_path / SUMMARY_CACHE_FILE_NAME
+    cache_file.write_text("not json")
+
+    cache = SummaryCache(cache_file=cache_file)
+
+    assert cache.get(ConversationRecord(content="message")) is None
+
+
+def test_get_summary_cache_is_shared_per_config_dir(tmp_path: Path):
+    assert get_summary_cache(tmp_path) is get_summary_cache(tmp_path)
+    assert get_summary_cache(tmp_path).cache_file == tmp_path / SUMMARY_CACHE_FILE_NAME